@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Concurrent SSE Load Test
+
+Opens many simultaneous /chat-stream conversations across many projects and
+reports latency percentiles and throughput:
+
+- time to first progress event and time to the final "complete" event
+- server event-loop lag (in-process mode)
+- file I/O syscalls and bytes from /proc/<pid>/io, and resident memory (Linux)
+
+By default the backend runs in-process under uvicorn on a free port, against a
+synthetic data set (see synthetic_data.py) in a temporary SAMURAI_DATA_DIR and
+the local LLM simulator. Any setting the application reads from the
+environment can be varied per run with --set, which makes it easy to compare
+storage or embedding configurations:
+
+    python benchmarks/load_test.py --concurrency 50 --requests 500
+    python benchmarks/load_test.py --set SAMURAI_DISABLE_EMBEDDINGS=1 --output results.json
+    python benchmarks/load_test.py --url http://localhost:8000 --server-pid 12345
+
+Requires httpx and uvicorn.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import httpx
+
+DEFAULT_MESSAGES = [
+    "I'm thinking about adding full-text search to the dashboard",
+    "What would be a good way to structure the search API?",
+    "The results should be paginated and sorted by relevance",
+    "Please create tasks for the search page",
+    "How do we keep the index in sync with edits?",
+]
+LAG_PROBE_INTERVAL = 0.01
+RSS_SAMPLE_INTERVAL = 0.1
+
+
+@dataclass
+class ChatResult:
+    """Timings of one streamed chat, in seconds from the request start."""
+    project_id: str
+    first_event: Optional[float] = None
+    first_progress: Optional[float] = None
+    complete: Optional[float] = None
+    events: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class ProcessSampler:
+    """Samples RSS and /proc I/O counters of a process while the test runs."""
+    pid: int
+    rss_samples: List[int] = field(default_factory=list)
+    io_start: Dict[str, int] = field(default_factory=dict)
+    io_end: Dict[str, int] = field(default_factory=dict)
+
+    def _read_io(self) -> Dict[str, int]:
+        try:
+            with open(f"/proc/{self.pid}/io") as f:
+                return {key: int(value) for key, value in (line.split(": ") for line in f)}
+        except (OSError, ValueError):
+            return {}
+
+    def _read_rss(self) -> Optional[int]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+    async def run(self, stop: asyncio.Event) -> None:
+        self.io_start = self._read_io()
+        while not stop.is_set():
+            rss = self._read_rss()
+            if rss is not None:
+                self.rss_samples.append(rss)
+            try:
+                await asyncio.wait_for(stop.wait(), RSS_SAMPLE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        self.io_end = self._read_io()
+
+    def report(self) -> Dict[str, Any]:
+        io = {key: self.io_end[key] - self.io_start.get(key, 0) for key in self.io_end}
+        mb = 1024 * 1024
+        return {
+            "pid": self.pid,
+            "rss_start_mb": round(self.rss_samples[0] / mb, 1) if self.rss_samples else None,
+            "rss_peak_mb": round(max(self.rss_samples) / mb, 1) if self.rss_samples else None,
+            "rss_end_mb": round(self.rss_samples[-1] / mb, 1) if self.rss_samples else None,
+            "io": {
+                "read_syscalls": io.get("syscr"),
+                "write_syscalls": io.get("syscw"),
+                "read_bytes": io.get("rchar"),
+                "write_bytes": io.get("wchar"),
+                "disk_write_bytes": io.get("write_bytes"),
+            },
+        }
+
+
+class LoopLagProbe:
+    """Measures how late a periodic timer fires on an event loop."""
+
+    def __init__(self, interval: float = LAG_PROBE_INTERVAL):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._running = True
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._running:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(loop.time() - expected, 0.0))
+
+    def stop(self) -> None:
+        self._running = False
+
+
+class InProcessServer:
+    """Runs the FastAPI app under uvicorn in a background thread with its own event loop."""
+
+    def __init__(self, port: int):
+        import uvicorn
+        from main import app
+
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.lag_probe = LoopLagProbe()
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve())
+
+    def start(self) -> None:
+        self.thread.start()
+        deadline = time.time() + 30
+        while not self.server.started:
+            if time.time() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Server failed to start")
+            time.sleep(0.05)
+        asyncio.run_coroutine_threadsafe(self.lag_probe.run(), self.loop)
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.lag_probe.stop)
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values: List[float], scale: float = 1000.0) -> Dict[str, Optional[float]]:
+    """p50/p95/p99/max of values (seconds) in milliseconds."""
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(values)
+
+    def pick(pct: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] * scale, 2)
+
+    return {"p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99), "max_ms": round(ordered[-1] * scale, 2)}
+
+
+async def stream_chat(client: httpx.AsyncClient, base_url: str, project_id: str, message: str,
+                      timeout: float) -> ChatResult:
+    result = ChatResult(project_id=project_id)
+    started = time.perf_counter()
+    try:
+        async with client.stream(
+            "POST", f"{base_url}/projects/{project_id}/chat-stream",
+            json={"message": message}, timeout=timeout
+        ) as response:
+            if response.status_code != 200:
+                result.error = f"HTTP {response.status_code}"
+                return result
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                elapsed = time.perf_counter() - started
+                event = json.loads(line[6:])
+                result.events += 1
+                if result.first_event is None:
+                    result.first_event = elapsed
+                if event.get("type") == "progress" and result.first_progress is None:
+                    result.first_progress = elapsed
+                elif event.get("type") == "complete":
+                    result.complete = elapsed
+                elif event.get("type") == "error":
+                    result.error = event.get("error", "error event")
+        if result.complete is None and result.error is None:
+            result.error = "stream ended without complete event"
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def run_load(args: argparse.Namespace, base_url: str, project_ids: List[str],
+                   server_pid: Optional[int]) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    messages = DEFAULT_MESSAGES
+    if args.messages_file:
+        with open(args.messages_file) as f:
+            messages = [line.strip() for line in f if line.strip()]
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait((project_ids[i % len(project_ids)], rng.choice(messages)))
+
+    results: List[ChatResult] = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while True:
+            try:
+                project_id, message = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results.append(await stream_chat(client, base_url, project_id, message, args.timeout))
+
+    sampler = ProcessSampler(server_pid) if server_pid else None
+    stop_sampling = asyncio.Event()
+    sampling = asyncio.create_task(sampler.run(stop_sampling)) if sampler else None
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+    wall_time = time.perf_counter() - started
+
+    stop_sampling.set()
+    if sampling:
+        await sampling
+
+    completed = [r for r in results if r.complete is not None]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r.error:
+            errors[r.error[:120]] = errors.get(r.error[:120], 0) + 1
+
+    return {
+        "requests": len(results),
+        "completed": len(completed),
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+        "wall_time_s": round(wall_time, 2),
+        "throughput_rps": round(len(completed) / wall_time, 2) if wall_time else None,
+        "time_to_first_progress": percentiles([r.first_progress for r in results if r.first_progress is not None]),
+        "time_to_complete": percentiles([r.complete for r in completed]),
+        "events_per_chat": round(statistics.mean(r.events for r in results), 1) if results else 0,
+        "process": sampler.report() if sampler else None,
+    }
+
+
+def apply_settings(settings: List[str]) -> Dict[str, str]:
+    applied = {}
+    for setting in settings:
+        key, _, value = setting.partition("=")
+        os.environ[key] = value
+        applied[key] = value
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /chat-stream load test")
+    parser.add_argument("--url", help="Test an already running server instead of starting one in-process")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server, for RSS and I/O sampling")
+    parser.add_argument("--project-ids", help="Comma-separated project IDs to use with --url")
+    parser.add_argument("--projects", type=int, default=20, help="Synthetic projects to generate (in-process)")
+    parser.add_argument("--memories", type=int, default=100, help="Memories per synthetic project")
+    parser.add_argument("--concurrency", type=int, default=20, help="Simultaneous chat streams")
+    parser.add_argument("--requests", type=int, default=200, help="Total chats to send")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-chat timeout in seconds")
+    parser.add_argument("--messages-file", help="File with one chat message per line")
+    parser.add_argument("--llm", choices=["simulator", "mock"], default="simulator",
+                        help="LLM stand-in for in-process runs")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Environment setting for the in-process app (repeatable)")
+    parser.add_argument("--log-level", default="WARNING", help="Application log level for in-process runs")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"config": {k: v for k, v in vars(args).items() if k != "set"}}
+    data_dir = None
+    server = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+            if not args.project_ids:
+                projects = httpx.get(f"{base_url}/projects", timeout=30).json()
+                project_ids = [p["id"] for p in projects][:args.projects]
+            else:
+                project_ids = args.project_ids.split(",")
+            server_pid = args.server_pid
+        else:
+            data_dir = tempfile.mkdtemp(prefix="samurai_load_test_data_")
+            os.environ["SAMURAI_DATA_DIR"] = data_dir
+            if args.llm == "simulator":
+                os.environ.setdefault("SAMURAI_LLM_SIMULATOR", "1")
+            else:
+                os.environ.setdefault("SAMURAI_USE_MOCK_LLM", "1")
+            os.environ["SAMURAI_LOG_LEVEL"] = args.log_level.upper()
+            report["settings"] = apply_settings(args.set)
+
+            from synthetic_data import DatasetSpec, generate_dataset
+            manifest = generate_dataset(data_dir, DatasetSpec(
+                projects=args.projects, memories=args.memories, sessions=2, messages_per_session=6,
+                root_tasks=5, seed=args.seed
+            ))
+            project_ids = manifest["project_ids"]
+
+            server = InProcessServer(free_port())
+            server.start()
+            base_url = f"http://127.0.0.1:{server.port}"
+            # The server shares this process, so its counters include the load generator
+            server_pid = os.getpid()
+
+        if not project_ids:
+            raise SystemExit("No projects to test against")
+
+        report["results"] = asyncio.run(run_load(args, base_url, project_ids, server_pid))
+        if server is not None:
+            report["results"]["event_loop_lag"] = percentiles(server.lag_probe.lags)
+    finally:
+        if server is not None:
+            server.stop()
+        if data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    results = report["results"]
+    print(f"\n📊 {results['completed']}/{results['requests']} chats completed "
+          f"in {results['wall_time_s']}s ({results['throughput_rps']} chats/s), {results['errors']} errors")
+    for metric in ("time_to_first_progress", "time_to_complete", "event_loop_lag"):
+        if metric in results:
+            values = results[metric]
+            print(f"  {metric:<24} p50 {values['p50_ms']} ms  p95 {values['p95_ms']} ms  "
+                  f"p99 {values['p99_ms']} ms  max {values['max_ms']} ms")
+    if results.get("process"):
+        process = results["process"]
+        print(f"  rss {process['rss_start_mb']} -> peak {process['rss_peak_mb']} MB, io {process['io']}")
+    for error, count in results["error_kinds"].items():
+        print(f"  ❌ {count} x {error}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
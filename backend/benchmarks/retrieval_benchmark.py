@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Retrieval Benchmark
+
+Offline relevance and latency comparison of the memory retrieval strategies:
+legacy substring matching (old search tools), legacy cosine with a hard 0.7
+threshold (old prompt context), BM25 only, hybrid RRF, and hybrid RRF + MMR.
+
+A labelled synthetic corpus is generated into a temporary data directory:
+every memory belongs to one topic, and a query is relevant to all memories of
+its topic. Queries mix words that appear in the memories with synonyms that
+only the embeddings connect. When the sentence-transformers model is not
+available, deterministic topic-based embeddings are used instead.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py [--memories 2000] [--queries 200] [--top-k 6] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Memory
+from services.embedding_service import embedding_service
+from services.file_service import FileService
+from services.hybrid_retriever import HybridRetriever
+from services.search_index import SearchIndex
+
+TOPICS = {
+    "auth": (["login", "password", "jwt", "token", "oauth"], ["signin", "credentials", "authentication"]),
+    "database": (["postgres", "schema", "migration", "index", "query"], ["sql", "tables", "persistence"]),
+    "deploy": (["docker", "kubernetes", "pipeline", "release", "rollout"], ["shipping", "containers", "ci"]),
+    "frontend": (["react", "component", "css", "layout", "hooks"], ["ui", "styling", "interface"]),
+    "payments": (["stripe", "invoice", "checkout", "refund", "billing"], ["charges", "subscription", "pricing"]),
+    "testing": (["pytest", "fixture", "mock", "coverage", "assertion"], ["qa", "regression", "specs"]),
+    "search": (["bm25", "ranking", "tokenizer", "recall", "relevance"], ["retrieval", "lookup", "matching"]),
+    "logging": (["logger", "trace", "metrics", "alert", "dashboard"], ["observability", "monitoring", "telemetry"]),
+}
+FILLER = ["the", "we", "use", "for", "with", "team", "agreed", "project", "update", "note", "keep", "should"]
+EMBEDDING_DIM = 32
+LEGACY_VECTOR_THRESHOLD = 0.7
+LEGACY_VECTOR_LIMIT = 15
+
+
+class TopicEmbeddings:
+    """Deterministic stand-in for the embedding model: topic direction plus word-level noise."""
+
+    def __init__(self, seed: int):
+        rng = random.Random(seed)
+        self.topic_axes = {topic: i for i, topic in enumerate(TOPICS)}
+        self.word_topics = {}
+        for topic, (words, synonyms) in TOPICS.items():
+            for word in words + synonyms:
+                self.word_topics[word] = topic
+        self.noise = {}
+        for word in list(self.word_topics) + FILLER:
+            self.noise[word] = [rng.gauss(0, 0.15) for _ in range(EMBEDDING_DIM)]
+
+    def is_model_loaded(self):
+        return True
+
+    def prepare_text_for_embedding(self, text, max_length=512):
+        return text
+
+    def generate_embedding(self, text):
+        vector = [0.0] * EMBEDDING_DIM
+        for word in text.lower().split():
+            topic = self.word_topics.get(word)
+            if topic is not None:
+                vector[self.topic_axes[topic]] += 1.0
+            for i, value in enumerate(self.noise.get(word, ())):
+                vector[i] += value
+        return vector
+
+
+def build_corpus(memory_count: int, query_count: int, seed: int):
+    rng = random.Random(seed)
+    topics = list(TOPICS)
+    memories, labels = [], {}
+    for i in range(memory_count):
+        topic = topics[i % len(topics)]
+        words = TOPICS[topic][0]
+        title = " ".join(rng.sample(words, 2)).capitalize()
+        content = " ".join(rng.sample(words, 3) + rng.sample(FILLER, 5))
+        memory_id = f"mem-{i}"
+        memories.append((memory_id, title, content, topic))
+        labels[memory_id] = topic
+
+    queries = []
+    for _ in range(query_count):
+        topic = rng.choice(topics)
+        words, synonyms = TOPICS[topic]
+        # Half of the queries only use synonyms that never appear in the corpus text
+        if rng.random() < 0.5:
+            text = " ".join(rng.sample(synonyms, 2))
+        else:
+            text = " ".join([rng.choice(words), rng.choice(synonyms)])
+        queries.append((text, topic))
+    return memories, labels, queries
+
+
+def ranking_metrics(ranked_ids, labels, topic, relevant_total, k):
+    hits = [1 if labels.get(mid) == topic else 0 for mid in ranked_ids[:k]]
+    reciprocal_rank = next((1.0 / (i + 1) for i, hit in enumerate(hits) if hit), 0.0)
+    dcg = sum(hit / math.log2(i + 2) for i, hit in enumerate(hits))
+    ideal = sum(1 / math.log2(i + 2) for i in range(min(k, relevant_total)))
+    return {
+        "precision": sum(hits) / k,
+        "recall": sum(hits) / min(k, relevant_total),
+        "mrr": reciprocal_rank,
+        "ndcg": dcg / ideal if ideal else 0.0,
+    }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix="samurai_retrieval_benchmark_")
+    try:
+        embeddings = embedding_service if embedding_service.is_model_loaded() else TopicEmbeddings(args.seed)
+        file_service = FileService(data_dir=temp_dir, backup_dir=os.path.join(temp_dir, "backups"))
+        project_id = "benchmark"
+
+        memories, labels, queries = build_corpus(args.memories, args.queries, args.seed)
+        file_service.save_memories(project_id, [
+            Memory(id=mid, project_id=project_id, title=title, content=content, category=topic, type="note",
+                   embedding=embeddings.generate_embedding(f"{title} {content}"))
+            for mid, title, content, topic in memories
+        ])
+        relevant_totals = {topic: sum(1 for t in labels.values() if t == topic) for topic in TOPICS}
+        records = {m.id: m for m in file_service.load_memories(project_id)}
+        retriever = HybridRetriever(index=SearchIndex(), embeddings=embeddings)
+
+        def legacy_substring(query, _embedding):
+            q = query.lower()
+            return [m.id for m in records.values() if q in m.title.lower() or q in m.content.lower()]
+
+        def legacy_vector(_query, embedding):
+            scored = []
+            for m in records.values():
+                similarity = embedding_service.calculate_cosine_similarity(embedding, m.embedding)
+                if similarity >= LEGACY_VECTOR_THRESHOLD:
+                    scored.append((similarity, m.id))
+            scored.sort(reverse=True)
+            return [mid for _, mid in scored[:LEGACY_VECTOR_LIMIT]]
+
+        def bm25(query, _embedding):
+            return [doc["id"] for doc, _ in retriever.index.search(file_service, project_id, "memories", query, args.top_k)]
+
+        def hybrid(query, embedding):
+            items = retriever.search(file_service, project_id, "memories", query, args.top_k, embedding)
+            return [item.id for item in items]
+
+        def hybrid_mmr(query, embedding):
+            items = asyncio.run(retriever.retrieve(file_service, project_id, "memories", query, args.top_k, embedding))
+            return [item.id for item in items]
+
+        methods = {
+            "legacy_substring": legacy_substring,
+            "legacy_vector_0.7": legacy_vector,
+            "bm25": bm25,
+            "hybrid_rrf": hybrid,
+            "hybrid_rrf_mmr": hybrid_mmr,
+        }
+
+        query_embeddings = [embeddings.generate_embedding(text) for text, _ in queries]
+        for method in methods.values():
+            # Warm up indexes and embedding matrices outside the timed loop
+            method(queries[0][0], query_embeddings[0])
+
+        report = {"memories": args.memories, "queries": args.queries, "top_k": args.top_k,
+                  "embeddings": "model" if embeddings is embedding_service else "synthetic", "methods": {}}
+        for name, method in methods.items():
+            totals = {"precision": 0.0, "recall": 0.0, "mrr": 0.0, "ndcg": 0.0}
+            latencies, prompt_chars, returned = [], [], []
+            for (text, topic), embedding in zip(queries, query_embeddings):
+                started = time.perf_counter()
+                ranked = method(text, embedding)
+                latencies.append((time.perf_counter() - started) * 1000)
+                returned.append(len(ranked))
+                prompt_chars.append(sum(len(records[mid].title) + len(records[mid].content) for mid in ranked))
+                for key, value in ranking_metrics(ranked, labels, topic, relevant_totals[topic], args.top_k).items():
+                    totals[key] += value
+            report["methods"][name] = {
+                **{f"{key}@{args.top_k}": round(value / len(queries), 4) for key, value in totals.items()},
+                "latency_p50_ms": round(statistics.median(latencies), 3),
+                "latency_p95_ms": round(percentile(latencies, 95), 3),
+                "avg_results": round(statistics.mean(returned), 2),
+                "avg_prompt_chars": round(statistics.mean(prompt_chars), 1),
+            }
+        return report
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory retrieval strategies")
+    parser.add_argument("--memories", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"📊 {report['memories']} memories, {report['queries']} queries, "
+          f"top-k {report['top_k']}, {report['embeddings']} embeddings")
+    columns = list(next(iter(report["methods"].values())).keys())
+    print(f"{'method':<20}" + "".join(f"{c:>18}" for c in columns))
+    for name, row in report["methods"].items():
+        print(f"{name:<20}" + "".join(f"{row[c]:>18}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmark Suite
+
+Generates a synthetic dataset (see synthetic_data.py) into a temporary data
+directory, points the application at it through SAMURAI_DATA_DIR, and times the
+hot paths:
+
+- FileService loads and saves of memories, tasks, sessions and chat history
+- EmbeddingService.find_similar_items over a project's memories
+- ContextSelectionService.select_relevant_context
+- UnifiedSamuraiAgent._create_conversation_summary
+- UnifiedSamuraiAgent.process_message end to end against the mock LLM
+
+Results are written as JSON together with the commit and dataset size, so runs
+from two commits can be compared with --compare.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --memories 2000 --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Services read SAMURAI_DATA_DIR when they are first imported, so it is set before any import
+DATA_DIR = tempfile.mkdtemp(prefix="samurai_benchmark_data_")
+os.environ["SAMURAI_DATA_DIR"] = DATA_DIR
+os.environ.setdefault("SAMURAI_USE_MOCK_LLM", "1")
+
+Benchmark = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def measure(loop: asyncio.AbstractEventLoop, benchmark: Benchmark, repeat: int, warmup: int) -> Dict[str, float]:
+    """Run a benchmark warmup + repeat times and summarize the timed runs in milliseconds."""
+    def run_once() -> None:
+        result = benchmark()
+        if asyncio.iscoroutine(result):
+            loop.run_until_complete(result)
+
+    for _ in range(warmup):
+        run_once()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_once()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "runs": repeat,
+        "mean_ms": round(statistics.mean(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def build_benchmarks(project_id: str, generator) -> Dict[str, Benchmark]:
+    """Benchmarks over one generated project. Imports happen after SAMURAI_DATA_DIR is set."""
+    from services.file_service import file_service
+    from services.embedding_service import embedding_service
+    from services.context_service import context_service
+    from services.unified_samurai_agent import unified_samurai_agent
+
+    memories = file_service.load_memories(project_id)
+    tasks = file_service.load_tasks(project_id)
+    session = file_service.get_latest_session(project_id)
+    session_messages = file_service.load_chat_messages_by_session(project_id, session.id)
+    memory_dicts = [m.dict() for m in memories]
+    query_embedding = generator.embedding("security")
+    query = "How should the login session refresh the jwt token?"
+    project = file_service.get_project_by_id(project_id)
+    project_context = {
+        "name": project.name,
+        "description": project.description,
+        "tech_stack": project.tech_stack,
+        "project_detail": file_service.load_project_detail(project_id),
+    }
+
+    return {
+        "file_service.load_memories": lambda: file_service.load_memories(project_id),
+        "file_service.load_tasks": lambda: file_service.load_tasks(project_id),
+        "file_service.load_sessions": lambda: file_service.load_sessions(project_id),
+        "file_service.load_chat_history": lambda: file_service.load_chat_history(project_id),
+        "file_service.load_chat_messages_by_session":
+            lambda: file_service.load_chat_messages_by_session(project_id, session.id),
+        "file_service.save_memories": lambda: file_service.save_memories(project_id, memories),
+        "file_service.save_tasks": lambda: file_service.save_tasks(project_id, tasks),
+        "embedding_service.find_similar_items": lambda: embedding_service.find_similar_items(
+            query_embedding, memory_dicts, similarity_threshold=0.5, max_results=10
+        ),
+        "context_service.select_relevant_context": lambda: context_service.select_relevant_context(
+            query, project_id, memories, tasks
+        ),
+        "agent.create_conversation_summary":
+            lambda: unified_samurai_agent._create_conversation_summary(session_messages, query),
+        "agent.process_message": lambda: unified_samurai_agent.process_message(
+            message=query,
+            project_id=project_id,
+            project_context=project_context,
+            session_id=session.id,
+            conversation_history=session_messages
+        ),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        from synthetic_data import SyntheticDataGenerator, generate_dataset, spec_from_args
+
+        spec = spec_from_args(args)
+        manifest = generate_dataset(DATA_DIR, spec)
+        logging.getLogger().setLevel(logging.WARNING)
+
+        from services.embedding_service import embedding_service
+        benchmarks = build_benchmarks(manifest["project_ids"][0], SyntheticDataGenerator(spec))
+        if args.filter:
+            benchmarks = {name: b for name, b in benchmarks.items() if args.filter in name}
+
+        loop = asyncio.new_event_loop()
+        results = {}
+        try:
+            for name, benchmark in benchmarks.items():
+                repeat = args.agent_repeat if name == "agent.process_message" else args.repeat
+                results[name] = measure(loop, benchmark, repeat, args.warmup)
+                if not args.quiet:
+                    print(f"  {name:<45} median {results[name]['median_ms']:>10.3f} ms", file=sys.stderr)
+        finally:
+            loop.close()
+
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "git_commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "embedding_model_loaded": embedding_service.is_model_loaded(),
+                "mock_llm": os.environ.get("SAMURAI_USE_MOCK_LLM") == "1",
+            },
+            "dataset": {"spec": manifest["spec"], "counts": manifest["counts"]},
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+def compare(report: Dict[str, Any], baseline_path: str) -> None:
+    """Print median timings next to a previous report."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n📊 Compared with {baseline_path} ({baseline['meta'].get('git_commit')})")
+    print(f"{'benchmark':<45}{'baseline ms':>14}{'current ms':>14}{'change':>10}")
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"{name:<45}{'-':>14}{current['median_ms']:>14.3f}{'new':>10}")
+            continue
+        change = (current["median_ms"] / previous["median_ms"] - 1) * 100 if previous["median_ms"] else 0.0
+        print(f"{name:<45}{previous['median_ms']:>14.3f}{current['median_ms']:>14.3f}{change:>+9.1f}%")
+
+
+def main():
+    from synthetic_data import add_spec_arguments
+
+    parser = argparse.ArgumentParser(description="Run the Samurai Agent performance benchmarks")
+    add_spec_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per benchmark")
+    parser.add_argument("--agent-repeat", type=int, default=5, help="Timed runs of process_message")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Wrote {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Synthetic Project Generator
+
+Writes reproducible projects in the real data/ format (projects.json and the
+per-project memories, tasks, sessions and chat files) for benchmarks and load
+tests. Every record is built from the pydantic models and written through
+FileService, so the files are exactly what the application reads.
+
+Embeddings are deterministic pseudo-random unit vectors grouped by topic, so
+similarity search has realistic structure without the embedding model.
+
+Usage:
+    python benchmarks/synthetic_data.py --out /tmp/samurai-data --projects 5 --memories 200
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import ChatMessage, Memory, Project, Session, Task
+from services.file_service import FileService
+from services.serialization import to_record
+
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+MAX_TASK_DEPTH = 4
+
+TOPICS = {
+    "frontend": ["react", "component", "layout", "css", "form", "state", "routing", "modal"],
+    "backend": ["fastapi", "endpoint", "router", "service", "validation", "middleware", "worker"],
+    "database": ["postgres", "schema", "migration", "index", "query", "transaction", "table"],
+    "security": ["login", "jwt", "password", "oauth", "session", "permission", "token"],
+    "devops": ["docker", "pipeline", "deploy", "kubernetes", "monitoring", "logs", "release"],
+    "testing": ["pytest", "fixture", "mock", "coverage", "integration", "regression"],
+}
+MEMORY_TYPES = ["feature", "decision", "spec", "note"]
+FILLER = [
+    "we", "should", "use", "the", "for", "with", "when", "user", "needs", "to", "and",
+    "keep", "make", "sure", "after", "before", "handle", "data", "flow", "update",
+]
+
+
+@dataclass
+class DatasetSpec:
+    """Size of a generated dataset."""
+    projects: int = 3
+    memories: int = 200
+    sessions: int = 10
+    messages_per_session: int = 20
+    root_tasks: int = 20
+    task_depth: int = 3
+    task_fanout: int = 3
+    seed: int = 42
+
+
+class SyntheticDataGenerator:
+    """Generates reproducible projects, memories, task trees and chat sessions."""
+
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.topic_vectors = {topic: self._unit_vector() for topic in TOPICS}
+
+    # Text and embeddings
+    def _unit_vector(self) -> List[float]:
+        vector = [self.rng.gauss(0, 1) for _ in range(EMBEDDING_DIM)]
+        norm = sum(v * v for v in vector) ** 0.5
+        return [v / norm for v in vector]
+
+    def embedding(self, topic: str, noise: float = 0.6) -> List[float]:
+        """A vector near the topic's direction."""
+        base = self.topic_vectors[topic]
+        vector = [b + self.rng.gauss(0, noise / EMBEDDING_DIM ** 0.5) for b in base]
+        norm = sum(v * v for v in vector) ** 0.5
+        return [round(v / norm, 6) for v in vector]
+
+    def sentence(self, topic: str, words: int) -> str:
+        topic_words = TOPICS[topic]
+        parts = [self.rng.choice(topic_words if self.rng.random() < 0.4 else FILLER) for _ in range(words)]
+        return " ".join(parts).capitalize() + "."
+
+    def paragraph(self, topic: str, sentences: int) -> str:
+        return " ".join(self.sentence(topic, self.rng.randint(6, 14)) for _ in range(sentences))
+
+    # Records
+    def project(self, index: int) -> Project:
+        return Project(
+            id=f"bench-project-{index}",
+            name=f"Benchmark Project {index}",
+            description=self.paragraph("backend", 2)[:500],
+            tech_stack="React, FastAPI, PostgreSQL"
+        )
+
+    def memories(self, project_id: str) -> List[Memory]:
+        memories = []
+        for i in range(self.spec.memories):
+            topic = self.rng.choice(list(TOPICS))
+            content = self.paragraph(topic, self.rng.randint(2, 8))[:2000]
+            memories.append(Memory(
+                id=f"{project_id}-memory-{i}",
+                project_id=project_id,
+                title=self.sentence(topic, 4)[:-1],
+                content=content,
+                category=topic,
+                type=self.rng.choice(MEMORY_TYPES),
+                embedding=self.embedding(topic),
+                embedding_text=content[:512]
+            ))
+        return memories
+
+    def tasks(self, project_id: str) -> List[Task]:
+        """Root tasks with a full subtree of task_fanout children down to task_depth."""
+        tasks: List[Task] = []
+        depth_limit = min(self.spec.task_depth, MAX_TASK_DEPTH)
+
+        def add(parent: Optional[Task], depth: int) -> None:
+            topic = self.rng.choice(list(TOPICS))
+            status = self.rng.choice(["pending", "pending", "in_progress", "completed"])
+            description = self.paragraph(topic, self.rng.randint(1, 4))
+            task = Task(
+                id=f"{project_id}-task-{len(tasks)}",
+                project_id=project_id,
+                title=self.sentence(topic, 5)[:-1],
+                description=description,
+                status=status,
+                completed=status == "completed",
+                priority=self.rng.choice(["low", "medium", "high"]),
+                order=len(tasks),
+                parent_task_id=parent.id if parent else None,
+                depth=depth,
+                embedding=self.embedding(topic),
+                embedding_text=description[:512]
+            )
+            tasks.append(task)
+            if depth < depth_limit:
+                for _ in range(self.spec.task_fanout):
+                    add(task, depth + 1)
+
+        for _ in range(self.spec.root_tasks):
+            add(None, 1)
+        return tasks
+
+    def sessions(self, project_id: str) -> List[Session]:
+        start = datetime(2025, 1, 1)
+        return [
+            Session(
+                id=f"{project_id}-session-{i}",
+                project_id=project_id,
+                name=f"Session {i + 1}",
+                created_at=start + timedelta(days=i),
+                last_activity=start + timedelta(days=i, hours=2)
+            )
+            for i in range(self.spec.sessions)
+        ]
+
+    def chat_messages(self, project_id: str, sessions: List[Session]) -> List[ChatMessage]:
+        messages = []
+        for session in sessions:
+            topic = self.rng.choice(list(TOPICS))
+            for i in range(self.spec.messages_per_session):
+                messages.append(ChatMessage(
+                    id=f"{session.id}-message-{i}",
+                    project_id=project_id,
+                    session_id=session.id,
+                    message=self.paragraph(topic, self.rng.randint(1, 3)),
+                    response=self.paragraph(topic, self.rng.randint(2, 6)),
+                    created_at=session.created_at + timedelta(minutes=i),
+                    intent_type=self.rng.choice(["pure_discussion", "feature_exploration", "direct_action"]),
+                    embedding=self.embedding(topic)
+                ))
+        return messages
+
+    # Writing
+    def write(self, file_service: FileService) -> Dict[str, object]:
+        """
+        Write the dataset into file_service's data directory.
+
+        Returns:
+            Manifest with the generated project IDs and record counts
+        """
+        projects = [self.project(i) for i in range(self.spec.projects)]
+        file_service._save_json(file_service._get_file_path("projects.json"), [to_record(p) for p in projects])
+
+        counts = {"memories": 0, "tasks": 0, "sessions": 0, "chat_messages": 0}
+        for project in projects:
+            memories = self.memories(project.id)
+            tasks = self.tasks(project.id)
+            sessions = self.sessions(project.id)
+            messages = self.chat_messages(project.id, sessions)
+
+            file_service.save_memories(project.id, memories)
+            file_service.save_tasks(project.id, tasks)
+            file_service._save_json(
+                file_service._get_project_file_path(project.id, "sessions"), [to_record(s) for s in sessions]
+            )
+            file_service.save_chat_history(project.id, messages)
+
+            counts["memories"] += len(memories)
+            counts["tasks"] += len(tasks)
+            counts["sessions"] += len(sessions)
+            counts["chat_messages"] += len(messages)
+
+        return {
+            "spec": asdict(self.spec),
+            "project_ids": [p.id for p in projects],
+            "counts": counts,
+            "data_dir": str(file_service.data_dir),
+        }
+
+
+def generate_dataset(data_dir: str, spec: Optional[DatasetSpec] = None) -> Dict[str, object]:
+    """Generate a dataset into data_dir (backups go to data_dir/backups)."""
+    file_service = FileService(data_dir=data_dir, backup_dir=os.path.join(data_dir, "backups"))
+    return SyntheticDataGenerator(spec or DatasetSpec()).write(file_service)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = DatasetSpec()
+    parser.add_argument("--projects", type=int, default=defaults.projects)
+    parser.add_argument("--memories", type=int, default=defaults.memories, help="Memories per project")
+    parser.add_argument("--sessions", type=int, default=defaults.sessions, help="Sessions per project")
+    parser.add_argument("--messages-per-session", type=int, default=defaults.messages_per_session)
+    parser.add_argument("--root-tasks", type=int, default=defaults.root_tasks, help="Root tasks per project")
+    parser.add_argument("--task-depth", type=int, default=defaults.task_depth, help=f"1-{MAX_TASK_DEPTH}")
+    parser.add_argument("--task-fanout", type=int, default=defaults.task_fanout, help="Children per task")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args: argparse.Namespace) -> DatasetSpec:
+    return DatasetSpec(
+        projects=args.projects,
+        memories=args.memories,
+        sessions=args.sessions,
+        messages_per_session=args.messages_per_session,
+        root_tasks=args.root_tasks,
+        task_depth=args.task_depth,
+        task_fanout=args.task_fanout,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Samurai Agent data")
+    parser.add_argument("--out", required=True, help="Data directory to write (e.g. for SAMURAI_DATA_DIR)")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    manifest = generate_dataset(args.out, spec_from_args(args))
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
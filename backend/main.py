@@ -1,6 +1,6 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import os
@@ -12,6 +12,7 @@ import logging
 import traceback
 import json
 import sys
+from contextlib import asynccontextmanager
 
 # Ensure backend directory is on sys.path for module imports
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -29,84 +30,102 @@ from models import (
 )
 
 # Import your services  
-from services.gemini_service import GeminiService
-from services.file_service import FileService
-from services.unified_samurai_agent import unified_samurai_agent
+from services.unified_samurai_agent import unified_samurai_agent, SESSION_CONTEXT_WINDOW
 from services.context_service import context_service
 from services.response_service import handle_agent_response, handle_validation_error
-from services.intelligent_memory_consolidation import IntelligentMemoryConsolidationService
 from services.project_detail_service import project_detail_service
+from services.job_queue import job_queue
+from services.write_lanes import write_lanes
+from services.container import container
+from services.logging_config import configure_logging
+from services.api_response import list_response, pagination_headers
+from services.file_service import DEFAULT_CHAT_PAGE_SIZE, MAX_CHAT_PAGE_SIZE
+from services.metrics import metrics
+from services.profiler import (
+    PROFILING_ENABLED, PROFILE_HEADER, PROFILE_ID_HEADER, SamplingProfiler, profile_store, should_profile
+)
 
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop application-scoped services and background workers."""
+    await container.start()
+    try:
+        yield
+    finally:
+        await container.stop()
+
 app = FastAPI(
     title="Samurai Agent API",
     description="AI-powered development assistant API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Background task for session end processing
-async def _perform_session_end_background_tasks(pid: str, sid: str) -> None:
+# Background jobs for session end processing
+def _build_project_context(pid: str) -> Optional[dict]:
+    proj = file_service.get_project_by_id(pid)
+    if not proj:
+        return None
+    return {
+        "name": proj.name,
+        "description": proj.description,
+        "tech_stack": proj.tech_stack,
+        "project_detail": file_service.load_project_detail(pid)
+    }
+
+async def _run_session_consolidation_job(payload: dict) -> None:
+    """Job handler: intelligent memory consolidation for an ended session."""
+    pid = payload["project_id"]
+    sid = payload["session_id"]
     try:
         # Build project context fresh in case of changes
-        proj = file_service.get_project_by_id(pid)
-        if not proj:
+        project_context = _build_project_context(pid)
+        if not project_context:
             logger.warning(f"Background task: project not found for {pid}")
             return
-        project_context = {
-            "name": proj.name,
-            "description": proj.description,
-            "tech_stack": proj.tech_stack,
-            "project_detail": file_service.load_project_detail(pid)
-        }
 
-        # Perform intelligent memory consolidation
-        consolidation_result = await memory_consolidation_service.consolidate_session_memories(
+        result = await memory_consolidation_service.consolidate_session_memories(
             project_id=pid,
             session_id=sid,
             project_context=project_context
         )
+        # The service reports failures as a result rather than raising; raise so the job is retried
+        if result.status == "error":
+            raise RuntimeError(f"Memory consolidation failed for session {sid}")
+        logger.info("Session memory consolidation completed for project %s, session %s", pid, sid)
+    except Exception as e:
+        logger.error(f"Error in background session end task for project {pid}, session {sid}: {e}")
+        raise
 
-        # Update project detail spec using last session conversation (semantic merge)
-        try:
-            session_messages = file_service.load_chat_messages_by_session(pid, sid)
-            parts = []
-            for m in session_messages[-100:]:
-                if m.message:
-                    parts.append(f"User: {m.message}")
-                if m.response:
-                    parts.append(f"Agent: {m.response}")
-            raw_update_text = "\n".join(parts)
-            if raw_update_text:
-                await project_detail_service.ingest_project_detail(
-                    project_id=pid,
-                    raw_text=raw_update_text,
-                    mode="merge"
-                )
-        except Exception as e:
-            logger.warning(f"Project detail update during session end failed: {e}")
-
-        logger.info(
-            "Background session end completed for project %s, session %s",
-            pid,
-            sid,
+async def _run_session_project_detail_merge_job(payload: dict) -> None:
+    """Job handler: merge the ended session's conversation into the project detail spec."""
+    pid = payload["project_id"]
+    sid = payload["session_id"]
+    try:
+        # Only messages after the project's digest watermark are summarized
+        session_messages = file_service.load_chat_messages_by_session(pid, sid)
+        await project_detail_service.ingest_session_messages(
+            project_id=pid,
+            session_id=sid,
+            messages=session_messages
         )
+        logger.info("Session project detail merge completed for project %s, session %s", pid, sid)
     except Exception as e:
         logger.error(f"Error in background session end task for project {pid}, session {sid}: {e}")
+        raise
 
 async def _perform_async_project_detail_digest(project_id: str, raw_text: str, mode: str) -> None:
     """
-    Asynchronously perform LLM digest and project detail saving.
-    This function runs in the background and handles all the time-consuming operations.
+    Perform LLM digest and project detail saving.
+    Runs as a background job; errors are re-raised so the job queue can retry.
     """
     try:
         logger.info(f"Starting async project detail digest for project {project_id}")
@@ -121,7 +140,19 @@ async def _perform_async_project_detail_digest(project_id: str, raw_text: str, m
         
     except Exception as e:
         logger.error(f"Error in async project detail digest for project {project_id}: {e}")
-        # Don't re-raise - this is a background task, we just log the error
+        raise
+
+# Job kinds; jobs that write the same resource share a lane and run one at a time per project
+SESSION_CONSOLIDATION_JOB = "session_memory_consolidation"
+SESSION_PROJECT_DETAIL_JOB = "session_project_detail_merge"
+PROJECT_DETAIL_DIGEST_JOB = "project_detail_digest"
+
+job_queue.register_handler(SESSION_CONSOLIDATION_JOB, _run_session_consolidation_job)
+job_queue.register_handler(SESSION_PROJECT_DETAIL_JOB, _run_session_project_detail_merge_job)
+job_queue.register_handler(
+    PROJECT_DETAIL_DIGEST_JOB,
+    lambda payload: _perform_async_project_detail_digest(**payload)
+)
 
 # Configure CORS
 app.add_middleware(
@@ -130,12 +161,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Has-More", "X-Before-Cursor", "X-After-Cursor"],
 )
 
-# Initialize services
-file_service = FileService()
-gemini_service = GeminiService()
-memory_consolidation_service = IntelligentMemoryConsolidationService()
+# Shared services, wired once by the application container
+file_service = container.file_service
+gemini_service = container.gemini_service
+memory_consolidation_service = container.memory_consolidation_service
+
+container.add_lifecycle_hook(
+    "memory section migration",
+    start=lambda: container.file_service.migrate_memory_section_sidecars()
+)
+container.add_lifecycle_hook(
+    "chat partition migration",
+    start=lambda: container.file_service.migrate_chat_partitions()
+)
+# Stops after the job queue, so writes made by draining jobs are flushed too
+container.add_lifecycle_hook("write-behind flush", stop=lambda: container.file_service.close())
+container.add_lifecycle_hook("job queue", start=job_queue.start, stop=job_queue.stop)
+
+
+async def _persist_chat_turn(project_id: str, chat_message: ChatMessage) -> None:
+    """Save a chat turn and bump its session's activity through the project's write lane."""
+    await asyncio.gather(
+        write_lanes.run_batched(
+            project_id, "chat", lambda messages: file_service.save_chat_messages(project_id, messages), chat_message
+        ),
+        write_lanes.run_batched(
+            project_id, "sessions",
+            lambda session_ids: file_service.update_sessions_activity(project_id, session_ids),
+            chat_message.session_id
+        )
+    )
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -161,14 +219,14 @@ async def log_requests(request: Request, call_next):
     start_time = datetime.now()
     
     # Log request
-    logger.info(f"Request: {request.method} {request.url}")
+    logger.info("Request: %s %s", request.method, request.url)
     
     try:
         response = await call_next(request)
         
         # Log response
         process_time = (datetime.now() - start_time).total_seconds()
-        logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
+        logger.info("Response: %s - %.3fs", response.status_code, process_time)
         
         return response
     except Exception as e:
@@ -177,6 +235,51 @@ async def log_requests(request: Request, call_next):
         logger.error(f"Error: {e} - {process_time:.3f}s")
         raise
 
+async def profile_requests(request: Request, call_next):
+    """Middleware to profile requests that send X-Samurai-Profile or are picked by the sampling rate."""
+    if request.url.path.startswith("/profiles") or not should_profile(request.headers.get(PROFILE_HEADER)):
+        return await call_next(request)
+
+    profiler = SamplingProfiler()
+    profiler.start()
+
+    async def save_profile(status_code: int) -> None:
+        profiler.stop()
+        try:
+            metadata = await asyncio.to_thread(profile_store.save, profiler, {
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": status_code,
+            })
+            logger.info(f"Saved profile {metadata['id']} for {request.method} {request.url.path} "
+                        f"({metadata['wall_ms']} ms, {metadata['samples']} samples)")
+        except Exception as e:
+            logger.error(f"Failed to save profile for {request.url.path}: {e}")
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        await save_profile(500)
+        raise
+
+    # Streaming bodies (chat SSE) keep running after call_next returns; profile until the body ends
+    body_iterator = response.body_iterator
+
+    async def profiled_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            await save_profile(response.status_code)
+
+    response.body_iterator = profiled_body()
+    response.headers[PROFILE_ID_HEADER] = profiler.profile_id
+    return response
+
+# Registered only when enabled so that unprofiled deployments pay nothing per request
+if PROFILING_ENABLED:
+    app.middleware("http")(profile_requests)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -197,6 +300,34 @@ async def health_check():
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: stage latencies, LLM, embedding, file I/O and tool call counters"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/profiles")
+async def list_profiles():
+    """Index of saved request profiles, newest first"""
+    try:
+        return {"enabled": PROFILING_ENABLED, "profiles": await asyncio.to_thread(profile_store.list_profiles)}
+    except Exception as e:
+        logger.error(f"Error listing profiles: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to list profiles: {str(e)}")
+
+@app.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    """Folded-stack profile, ready for flamegraph.pl or speedscope"""
+    try:
+        path = profile_store.get_profile_path(profile_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return PlainTextResponse(await asyncio.to_thread(path.read_text, encoding="utf-8"))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting profile {profile_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get profile: {str(e)}")
+
 # ---------------------------
 # User suggestion banner APIs
 # ---------------------------
@@ -300,18 +431,21 @@ async def chat(project_id: str, request: ChatRequest):
         if not current_session:
             current_session = file_service.create_session(project_id)
 
-        conversation_history = file_service.load_chat_messages_by_session(project_id, current_session.id)
+        conversation_history, _ = file_service.load_chat_messages_page(
+            project_id, current_session.id, limit=SESSION_CONTEXT_WINDOW
+        )
 
         # Process via unified agent (no progress callback)
-        result = await unified_samurai_agent.process_message(
-            message=request.message,
-            project_id=project_id,
-            project_context=project_context,
-            session_id=current_session.id,
-            conversation_history=conversation_history,
-            progress_callback=None,
-            task_context=None
-        )
+        with metrics.trace("chat"):
+            result = await unified_samurai_agent.process_message(
+                message=request.message,
+                project_id=project_id,
+                project_context=project_context,
+                session_id=current_session.id,
+                conversation_history=conversation_history,
+                progress_callback=None,
+                task_context=None
+            )
 
         final_response = handle_agent_response(result.get("response", ""))
 
@@ -325,8 +459,7 @@ async def chat(project_id: str, request: ChatRequest):
             intent_type=result.get('intent_analysis', {}).get('intent_type'),
             created_at=datetime.now()
         )
-        file_service.save_chat_message(project_id, chat_message)
-        file_service.update_session_activity(project_id, current_session.id)
+        await _persist_chat_turn(project_id, chat_message)
 
         return ChatResponse(
             response=final_response,
@@ -367,6 +500,7 @@ async def chat_with_progress(project_id: str, request: ChatRequest):
     Chat endpoint with real-time progress streaming using actual agent processing
     """
     async def stream_response():
+        trace, trace_token = metrics.start_trace("chat_with_progress")
         try:
             # 1. Verify project exists
             project = file_service.get_project_by_id(project_id)
@@ -414,7 +548,9 @@ async def chat_with_progress(project_id: str, request: ChatRequest):
                     logger.info(f"Cleared invalid task context: {current_session.task_context_id}")
             
             # 5. Get conversation history for planning-first agent (current session only)
-            conversation_history = file_service.load_chat_messages_by_session(project_id, current_session.id)
+            conversation_history, _ = file_service.load_chat_messages_page(
+                project_id, current_session.id, limit=SESSION_CONTEXT_WINDOW
+            )
             
             # 5. Create a progress queue for real-time updates
             progress_queue = asyncio.Queue()
@@ -432,7 +568,7 @@ async def chat_with_progress(project_id: str, request: ChatRequest):
                     }
                 }
                 await progress_queue.put(progress_data)
-            logger.info(f"Task context: {task_context}")
+            logger.debug("Task context: %s", task_context.id if task_context else None)
             # 6. Start unified agent processing in background
             processing_task = asyncio.create_task(
                 unified_samurai_agent.process_message(
@@ -485,17 +621,24 @@ async def chat_with_progress(project_id: str, request: ChatRequest):
                 intent_type=result.get('intent_analysis', {}).get('intent_type'),
                 created_at=datetime.now()
             )
-            file_service.save_chat_message(project_id, chat_message)
-            
-            # 11. Update session activity
-            file_service.update_session_activity(project_id, current_session.id)
+            # 11. Update session activity (written together with the message)
+            await _persist_chat_turn(project_id, chat_message)
             
             # 12. Send final response with intent_type
-            yield f"data: {json.dumps({'type': 'complete', 'response': final_response, 'intent_type': result.get('intent_analysis', {}).get('intent_type', 'unknown')})}\n\n"
+            complete_event = {
+                'type': 'complete',
+                'response': final_response,
+                'intent_type': result.get('intent_analysis', {}).get('intent_type', 'unknown')
+            }
+            if request.include_trace and trace is not None:
+                complete_event['trace'] = trace.to_dict()
+            yield f"data: {json.dumps(complete_event)}\n\n"
             
         except Exception as e:
             logger.error(f"Chat with progress error: {e}")
             yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+        finally:
+            metrics.finish_trace(trace, trace_token)
     
     return StreamingResponse(
         stream_response(),
@@ -514,6 +657,7 @@ async def chat_stream(project_id: str, request: ChatRequest):
     Simplified streaming endpoint using proper async generators
     """
     async def stream_response():
+        trace, trace_token = metrics.start_trace("chat_stream")
         try:
             # 1. Verify project exists
             project = file_service.get_project_by_id(project_id)
@@ -556,7 +700,9 @@ async def chat_stream(project_id: str, request: ChatRequest):
                     file_service.save_session(project_id, current_session)
                     logger.info(f"Cleared invalid task context: {current_session.task_context_id}")
             
-            conversation_history = file_service.load_chat_messages_by_session(project_id, current_session.id)
+            conversation_history, _ = file_service.load_chat_messages_page(
+                project_id, current_session.id, limit=SESSION_CONTEXT_WINDOW
+            )
             
             # 3. Create a real-time progress streaming system using asyncio.Queue
             progress_queue = asyncio.Queue()
@@ -634,15 +780,23 @@ async def chat_stream(project_id: str, request: ChatRequest):
                 intent_type=result.get('intent_analysis', {}).get('intent_type'),
                 created_at=datetime.now()
             )
-            file_service.save_chat_message(project_id, chat_message)
-            file_service.update_session_activity(project_id, current_session.id)
+            await _persist_chat_turn(project_id, chat_message)
             
             # 8. Send final response with intent_type
-            yield f"data: {json.dumps({'type': 'complete', 'response': final_response, 'intent_type': result.get('intent_analysis', {}).get('intent_type', 'unknown')})}\n\n"
+            complete_event = {
+                'type': 'complete',
+                'response': final_response,
+                'intent_type': result.get('intent_analysis', {}).get('intent_type', 'unknown')
+            }
+            if request.include_trace and trace is not None:
+                complete_event['trace'] = trace.to_dict()
+            yield f"data: {json.dumps(complete_event)}\n\n"
             
         except Exception as e:
             logger.error(f"Chat stream error: {e}")
             yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+        finally:
+            metrics.finish_trace(trace, trace_token)
     
     return StreamingResponse(
         stream_response(),
@@ -656,9 +810,15 @@ async def chat_stream(project_id: str, request: ChatRequest):
     )
 
 # Task endpoints
-@app.get("/projects/{project_id}/tasks")
-async def get_project_tasks(project_id: str, parent_id: Optional[str] = None):
-    """Get all tasks for a project"""
+@app.get("/projects/{project_id}/tasks", response_model=List[Task])
+async def get_project_tasks(
+    project_id: str,
+    request: Request,
+    parent_id: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_embeddings: bool = False
+):
+    """Get all tasks for a project. Embedding fields are omitted unless include_embeddings or fields asks for them."""
     try:
         logger.info(f"Loading tasks for project: {project_id}")
         tasks = file_service.load_tasks(project_id)
@@ -669,7 +829,9 @@ async def get_project_tasks(project_id: str, parent_id: Optional[str] = None):
             else:
                 tasks = [t for t in tasks if getattr(t, 'parent_task_id', None) == parent_id]
         logger.info(f"Loaded {len(tasks)} tasks for project {project_id}")
-        return tasks
+        return await list_response(request, Task, tasks, fields, include_embeddings)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error loading tasks for project {project_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to load tasks: {str(e)}")
@@ -684,8 +846,7 @@ async def complete_task(project_id: str, task_id: str):
         logger.info(f"Completing task {task_id} in project {project_id}")
 
         # Delegate to TaskService to ensure existing post-update logic runs
-        from services.task_service import TaskService
-        task_service = TaskService()
+        task_service = container.task_service
 
         updates = {"status": "completed"}
         task = await task_service.update_task(project_id, task_id, updates)
@@ -708,8 +869,7 @@ async def update_task(project_id: str, task_id: str, request: dict):
         logger.info(f"Updating task {task_id} in project {project_id}")
         
         # Use TaskService for automatic re-analysis
-        from services.task_service import TaskService
-        task_service = TaskService()
+        task_service = container.task_service
         
         # Prepare updates
         updates = {}
@@ -743,7 +903,7 @@ async def delete_task(project_id: str, task_id: str):
     """Delete a task"""
     try:
         logger.info(f"Deleting task {task_id} from project {project_id}")
-        success = file_service.delete_task(project_id, task_id)
+        success = await write_lanes.run(project_id, "tasks", file_service.delete_task, project_id, task_id)
         if not success:
             logger.warning(f"Task not found for deletion: {task_id}")
             raise HTTPException(status_code=404, detail="Task not found")
@@ -763,8 +923,7 @@ async def create_task(project_id: str, task_data: dict):
         logger.info(f"Creating task in project {project_id}")
         
         # Use TaskService for automatic analysis
-        from services.task_service import TaskService
-        task_service = TaskService()
+        task_service = container.task_service
         
         parent_task_id = task_data.get("parent_task_id")
         try:
@@ -785,23 +944,92 @@ async def create_task(project_id: str, task_data: dict):
         logger.error(f"Error creating task: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create task: {str(e)}")
 
+@app.post("/projects/{project_id}/tasks/batch", response_model=List[Task])
+async def create_tasks_batch(project_id: str, request: dict):
+    """
+    Create several tasks in one request.
+
+    Body: {"tasks": [{"title", "description", "priority", "status", "parent_task_id" | "parent_index"}, ...]}
+    where parent_index refers to an earlier task in the same batch. The batch is
+    validated as a whole and written once; if any task is invalid nothing is created.
+    """
+    try:
+        task_specs = request.get("tasks")
+        if not isinstance(task_specs, list) or not task_specs:
+            raise HTTPException(status_code=400, detail="Request must include a non-empty 'tasks' list")
+
+        logger.info(f"Creating {len(task_specs)} tasks in project {project_id}")
+
+        task_service = container.task_service
+
+        try:
+            tasks = await task_service.create_tasks(project_id, task_specs)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+
+        logger.info(f"Created {len(tasks)} tasks in project {project_id}")
+        return tasks
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating tasks: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to create tasks: {str(e)}")
+
+
+
+def _chat_page_size(limit: Optional[int], before: Optional[str], after: Optional[str]) -> Optional[int]:
+    """
+    Page size for the chat history endpoints.
+
+    Requests without `limit` or a cursor get the whole history, as they did
+    before paging existed (the frontend does not page); a cursor without
+    `limit` gets the default page size.
+    """
+    if limit is None and (before or after):
+        return DEFAULT_CHAT_PAGE_SIZE
+    return limit
 
 
 # Chat messages endpoint
 @app.get("/projects/{project_id}/chat-messages", response_model=List[ChatMessage])
-async def get_project_chat_messages(project_id: str):
-    """Get chat messages for a project."""
+async def get_project_chat_messages(
+    project_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_CHAT_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_embeddings: bool = False
+):
+    """Get chat messages for a project: the full history, or a page when `limit` or a cursor is given."""
     try:
-        messages = file_service.load_chat_history(project_id)
-        return messages
+        try:
+            messages, has_more = file_service.load_chat_messages_page(
+                project_id, limit=_chat_page_size(limit, before, after), before=before, after=after
+            )
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+        return await list_response(request, ChatMessage, messages, fields, include_embeddings,
+                                   headers=pagination_headers(messages, has_more))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error loading chat messages for project {project_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to load chat messages: {str(e)}")
 
 # Session management endpoints
 @app.get("/projects/{project_id}/session-messages/{session_id}", response_model=List[ChatMessage])
-async def get_session_messages(project_id: str, session_id: str):
-    """Get chat messages for a specific session."""
+async def get_session_messages(
+    project_id: str,
+    session_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_CHAT_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_embeddings: bool = False
+):
+    """Get chat messages for a specific session: all of them, or a page when `limit` or a cursor is given."""
     logger.info(f"DEBUG: Route matched! project_id={project_id}, session_id={session_id}")
     try:
         # Verify project exists
@@ -812,7 +1040,7 @@ async def get_session_messages(project_id: str, session_id: str):
         
         # Load all sessions to debug
         all_sessions = file_service.load_sessions(project_id)
-        logger.info(f"All sessions for project: {[s.id for s in all_sessions]}")
+        logger.debug("Project %s has %d sessions", project_id, len(all_sessions))
         
         # Verify session exists
         session = file_service.get_session_by_id(project_id, session_id)
@@ -820,9 +1048,15 @@ async def get_session_messages(project_id: str, session_id: str):
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        messages = file_service.load_chat_messages_by_session(project_id, session_id)
+        try:
+            messages, has_more = file_service.load_chat_messages_page(
+                project_id, session_id, limit=_chat_page_size(limit, before, after), before=before, after=after
+            )
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         logger.info(f"Loaded {len(messages)} messages for session {session_id}")
-        return messages
+        return await list_response(request, ChatMessage, messages, fields, include_embeddings,
+                                   headers=pagination_headers(messages, has_more))
     except HTTPException:
         raise
     except Exception as e:
@@ -896,7 +1130,15 @@ async def get_current_session(project_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to get current session: {str(e)}")
 
 @app.get("/projects/{project_id}/conversation-history", response_model=List[ChatMessage])
-async def get_conversation_history(project_id: str):
+async def get_conversation_history(
+    project_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_CHAT_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_embeddings: bool = False
+):
     """Get conversation history for the current session of a project."""
     try:
         # Verify project exists
@@ -911,10 +1153,16 @@ async def get_conversation_history(project_id: str):
             return []
         
         # Load conversation history for the current session
-        messages = file_service.load_chat_messages_by_session(project_id, session.id)
+        try:
+            messages, has_more = file_service.load_chat_messages_page(
+                project_id, session.id, limit=_chat_page_size(limit, before, after), before=before, after=after
+            )
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         logger.info(f"Loaded {len(messages)} conversation messages for project {project_id}, session {session.id}")
         
-        return messages
+        return await list_response(request, ChatMessage, messages, fields, include_embeddings,
+                                   headers=pagination_headers(messages, has_more))
     except HTTPException:
         raise
     except Exception as e:
@@ -923,13 +1171,17 @@ async def get_conversation_history(project_id: str):
 
 # Memory endpoints
 @app.get("/projects/{project_id}/memories", response_model=List[Memory])
-async def get_memories(project_id: str):
+async def get_memories(
+    project_id: str, request: Request, fields: Optional[str] = None, include_embeddings: bool = False
+):
     """Get all memories for a project"""
     try:
         logger.info(f"Loading memories for project: {project_id}")
         memories = file_service.load_memories(project_id)
         logger.info(f"Loaded {len(memories)} memories for project {project_id}")
-        return memories
+        return await list_response(request, Memory, memories, fields, include_embeddings)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error loading memories for project {project_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to load memories: {str(e)}")
@@ -959,7 +1211,7 @@ async def create_memory(project_id: str, memory_data: dict):
             content=content,
             type=mem_type
         )
-        file_service.save_memory(project_id, memory)
+        await write_lanes.run(project_id, "memories", file_service.save_memory, project_id, memory)
         logger.info(f"Memory created successfully: {memory.id}")
         return memory
     except HTTPException:
@@ -973,7 +1225,7 @@ async def delete_memory(project_id: str, memory_id: str):
     """Delete a memory"""
     try:
         logger.info(f"Deleting memory {memory_id} from project {project_id}")
-        success = file_service.delete_memory(project_id, memory_id)
+        success = await write_lanes.run(project_id, "memories", file_service.delete_memory, project_id, memory_id)
         if not success:
             logger.warning(f"Memory not found for deletion: {memory_id}")
             raise HTTPException(status_code=404, detail="Memory not found")
@@ -1013,18 +1265,21 @@ async def ingest_project_detail(project_id: str, request: ProjectDetailIngestReq
         if not raw_text:
             raise HTTPException(status_code=400, detail="raw_text is required")
 
-        # Start the async digest operation in the background
-        asyncio.create_task(
-            _perform_async_project_detail_digest(
-                project_id=project_id,
-                raw_text=raw_text,
-                mode=(request.mode or "merge")
-            )
+        # Queue the digest as a durable background job
+        job = job_queue.enqueue(
+            PROJECT_DETAIL_DIGEST_JOB,
+            project_id,
+            payload={
+                "project_id": project_id,
+                "raw_text": raw_text,
+                "mode": request.mode or "merge"
+            },
+            lane=f"{project_id}:project_detail"
         )
         
         return JSONResponse(
             status_code=202,
-            content={"message": "Project detail digest initiated asynchronously."}
+            content={"message": "Project detail digest initiated asynchronously.", "job_id": job.id}
         )
         
     except HTTPException:
@@ -1083,7 +1338,8 @@ async def complete_session(project_id: str, session_id: str):
             project_context=project_context
         )
         
-        logger.info(f"Session completion result: {result}")
+        logger.debug("Session completion result: %s", result)
+        await write_lanes.run(project_id, "chat", file_service.seal_chat_session, project_id, session_id)
         
         return {
             "status": "success",
@@ -1133,13 +1389,24 @@ async def end_session_with_consolidation(project_id: str, request: Request):
             project_id=project_id,
             name=f"Session {datetime.now().strftime('%Y-%m-%d %H:%M')}"
         )
-        file_service.save_session(project_id, new_session)
+        await write_lanes.run(project_id, "sessions", file_service.save_session, project_id, new_session)
+        await write_lanes.run(project_id, "chat", file_service.seal_chat_session, project_id, session_id)
         
-        # 5. Kick off background processing for consolidation and project detail update
-        asyncio.create_task(_perform_session_end_background_tasks(project_id, session_id))
+        # 5. Queue consolidation and project detail update; they touch different files and run concurrently
+        payload = {"project_id": project_id, "session_id": session_id}
+        consolidation_job = job_queue.enqueue(
+            SESSION_CONSOLIDATION_JOB, project_id, payload=payload, lane=f"{project_id}:memories"
+        )
+        detail_job = job_queue.enqueue(
+            SESSION_PROJECT_DETAIL_JOB, project_id, payload=payload, lane=f"{project_id}:project_detail"
+        )
 
         # 6. Minimal immediate response
-        return {"status": "processing_started", "new_session_id": new_session_id}
+        return {
+            "status": "processing_started",
+            "new_session_id": new_session_id,
+            "job_ids": [consolidation_job.id, detail_job.id]
+        }
         
     except HTTPException:
         raise
@@ -1148,6 +1415,21 @@ async def end_session_with_consolidation(project_id: str, request: Request):
         raise HTTPException(status_code=500, detail=f"Session end failed: {str(e)}")
 
 
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Get the status of a background job (payload omitted)."""
+    try:
+        job = job_queue.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job.dict(exclude={"payload"})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load job: {str(e)}")
+
+
 # Task Context endpoints
 @app.post("/projects/{project_id}/sessions/{session_id}/set-task-context", response_model=TaskContextResponse)
 async def set_task_context(project_id: str, session_id: str, request: TaskContextRequest):
@@ -457,9 +457,11 @@ class ChatRequest(BaseModel):
     Attributes:
         message: User message content
         task_context_id: Optional task ID to use as context for this chat
+        include_trace: Attach the per-request span tree to the final streamed event
     """
     message: str = Field(..., min_length=1, max_length=100000, description="User message")
     task_context_id: Optional[str] = Field(default=None, description="Task ID to use as context for this chat")
+    include_trace: bool = Field(default=False, description="Attach the per-request span tree to the final streamed event")
 
     class Config:
         json_schema_extra = {
@@ -743,4 +745,35 @@ class ProjectDetailIngestRequest(BaseModel):
 
 class ProjectDetailDirectSaveRequest(BaseModel):
     """Request model for directly saving project detail without LLM digestion."""
-    content: str = Field(..., description="Full project detail to save directly")
\ No newline at end of file
+    content: str = Field(..., description="Full project detail to save directly")
+# Background Job Models
+class BackgroundJob(BaseModel):
+    """
+    Persistent record of a background job (session consolidation, project detail digest, ...).
+    
+    Attributes:
+        id: Unique identifier for the job
+        kind: Registered handler name
+        project_id: Project the job belongs to
+        lane: Serialization key; jobs sharing a lane never run concurrently
+        payload: Handler arguments
+        status: Job status (queued, running, succeeded, failed)
+        attempts: Number of attempts started so far
+        max_attempts: Attempts allowed before the job is marked failed
+        run_after: Earliest time the job may (re)start
+        last_error: Error message of the most recent failed attempt
+    """
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="Unique job identifier")
+    kind: str = Field(..., description="Job kind / handler name")
+    project_id: str = Field(..., description="Project identifier")
+    lane: str = Field(..., description="Serialization lane")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="Handler arguments")
+    status: str = Field(default="queued", pattern="^(queued|running|succeeded|failed)$", description="Job status")
+    attempts: int = Field(default=0, ge=0, description="Attempts started")
+    max_attempts: int = Field(default=3, ge=1, description="Maximum attempts")
+    run_after: datetime = Field(default_factory=datetime.utcnow, description="Earliest start time")
+    last_error: Optional[str] = Field(default=None, description="Most recent error")
+    created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation timestamp")
+    updated_at: datetime = Field(default_factory=datetime.utcnow, description="Last update timestamp")
+    started_at: Optional[datetime] = Field(default=None, description="Start of the most recent attempt")
+    finished_at: Optional[datetime] = Field(default=None, description="Completion timestamp")
@@ -0,0 +1,151 @@
+"""
+Action Planner for Detected Agent Actions
+
+Builds a dependency graph for the actions detected in a single user message
+and executes independent actions concurrently. Two actions are ordered when
+one references an item the other creates, when they target the same item, or
+when they touch the same collection and at least one of them writes to it
+(collections are persisted as whole files, so overlapping writes would lose
+updates). Results are always returned in the original action order.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of actions executed at the same time
+MAX_PARALLEL_ACTIONS = 4
+
+# Collection and access mode for each agent tool
+TOOL_ACCESS: Dict[str, tuple] = {
+    "create_task": ("tasks", "write"),
+    "create_tasks": ("tasks", "write"),
+    "update_task": ("tasks", "write"),
+    "change_task_status": ("tasks", "write"),
+    "delete_task": ("tasks", "write"),
+    "search_tasks": ("tasks", "read"),
+    "create_memory": ("memories", "write"),
+    "update_memory": ("memories", "write"),
+    "delete_memory": ("memories", "write"),
+    "search_memories": ("memories", "read"),
+}
+
+# Parameter holding the target item for each collection
+TARGET_PARAMETERS = {
+    "tasks": ("task_identifier", "task_id", "parent_task_id"),
+    "memories": ("memory_identifier", "memory_id"),
+}
+
+
+@dataclass
+class PlannedAction:
+    """A detected action together with its position and dependencies."""
+    index: int
+    action: Dict[str, Any]
+    reads: Set[str] = field(default_factory=set)
+    writes: Set[str] = field(default_factory=set)
+    targets: Set[str] = field(default_factory=set)
+    creates: Set[str] = field(default_factory=set)
+    depends_on: Set[int] = field(default_factory=set)
+
+
+def _normalize(value: Any) -> Optional[str]:
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip().lower()
+
+
+def _describe_action(index: int, action: Dict[str, Any]) -> PlannedAction:
+    """Work out which collections and items an action touches."""
+    planned = PlannedAction(index=index, action=action)
+    parameters = action.get("parameters") or {}
+
+    tool_name = action.get("tool_name")
+    collection, mode = TOOL_ACCESS.get(tool_name, (None, None))
+    if collection:
+        (planned.writes if mode == "write" else planned.reads).add(collection)
+        for param in TARGET_PARAMETERS[collection]:
+            target = _normalize(parameters.get(param))
+            if target:
+                planned.targets.add(f"{collection}:{target}")
+        if tool_name in ("create_task", "create_memory"):
+            title = _normalize(parameters.get("title"))
+            if title:
+                planned.creates.add(f"{collection}:{title}")
+        elif tool_name == "create_tasks":
+            for spec in parameters.get("tasks") or []:
+                title = _normalize((spec or {}).get("title"))
+                if title:
+                    planned.creates.add(f"tasks:{title}")
+
+    # The search step of a search-first action reads its collection before the main step runs
+    if action.get("requires_search_first", False):
+        search_collection, _ = TOOL_ACCESS.get(action.get("search_tool", "search_tasks"), (None, None))
+        if search_collection:
+            planned.reads.add(search_collection)
+
+    return planned
+
+
+def build_action_graph(actions: List[Dict[str, Any]]) -> List[PlannedAction]:
+    """
+    Build the dependency graph for a list of detected actions.
+
+    Args:
+        actions: Actions in the order they were detected
+
+    Returns:
+        One PlannedAction per input action; depends_on holds indices of earlier actions
+    """
+    planned = [_describe_action(index, action) for index, action in enumerate(actions)]
+
+    for later in planned:
+        for earlier in planned[:later.index]:
+            # Create-then-reference chains and actions on the same item
+            if later.targets & (earlier.creates | earlier.targets):
+                later.depends_on.add(earlier.index)
+                continue
+            # Conflicting access to the same collection file
+            if (later.writes & (earlier.reads | earlier.writes)) or (later.reads & earlier.writes):
+                later.depends_on.add(earlier.index)
+            # Unknown tools keep their original position relative to everything else
+            elif not (later.reads or later.writes) or not (earlier.reads or earlier.writes):
+                later.depends_on.add(earlier.index)
+
+    return planned
+
+
+async def execute_action_graph(
+    planned: List[PlannedAction],
+    runner: Callable[[Dict[str, Any]], Awaitable[Any]],
+    max_parallel: int = MAX_PARALLEL_ACTIONS
+) -> List[Any]:
+    """
+    Execute planned actions, starting each one as soon as its dependencies finish.
+
+    Args:
+        planned: Output of build_action_graph
+        runner: Coroutine function executing a single action
+        max_parallel: Maximum number of actions running at the same time
+
+    Returns:
+        Runner results in the original action order
+    """
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    done: Dict[int, asyncio.Event] = {p.index: asyncio.Event() for p in planned}
+    results: List[Any] = [None] * len(planned)
+
+    async def run(node: PlannedAction) -> None:
+        try:
+            for dependency in node.depends_on:
+                await done[dependency].wait()
+            async with semaphore:
+                results[node.index] = await runner(node.action)
+        finally:
+            done[node.index].set()
+
+    await asyncio.gather(*(run(node) for node in planned))
+    return results
@@ -2,24 +2,65 @@ import uuid
 import json
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import Any, ClassVar, Dict, List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 try:
     from .file_service import FileService
+    from .search_index import search_index
+    from .hybrid_retriever import hybrid_retriever
+    from .metrics import metrics
+    from .write_lanes import write_lanes
     from models import Task, Memory, Project
 except ImportError:
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from file_service import FileService
+    from search_index import search_index
+    from hybrid_retriever import hybrid_retriever
+    from metrics import metrics
+    from write_lanes import write_lanes
     from models import Task, Memory, Project
 
 logger = logging.getLogger(__name__)
 
+SEARCH_RESULT_LIMIT = 50
 
-class TaskTool(BaseModel):
+
+class AgentTool(BaseModel):
+    """
+    Base class for agent tools.
+
+    The registry binds the application's shared FileService and TaskService;
+    a tool used on its own falls back to the service container's instances.
+    Synchronous tools that modify a project file name it in `writes`, and the
+    registry runs them in that project's write lane.
+    """
+    writes: ClassVar[Optional[str]] = None
+    _file_service: Optional[FileService] = PrivateAttr(default=None)
+    _task_service: Optional[Any] = PrivateAttr(default=None)
+
+    def bind_services(self, file_service: Optional[FileService] = None, task_service: Optional[Any] = None) -> "AgentTool":
+        self._file_service = file_service
+        self._task_service = task_service
+        return self
+
+    def get_file_service(self) -> FileService:
+        if self._file_service is not None:
+            return self._file_service
+        from .container import container
+        return container.file_service
+
+    def get_task_service(self):
+        if self._task_service is not None:
+            return self._task_service
+        from .container import container
+        return container.task_service
+
+
+class TaskTool(AgentTool):
     """Base class for task-related tools"""
     pass
 
@@ -35,8 +76,7 @@ class CreateTaskTool(TaskTool):
         Create a new task with automatic analysis
         """
         try:
-            from .task_service import TaskService
-            task_service = TaskService()
+            task_service = self.get_task_service()
             
             # Create task with analysis
             task = await task_service.create_task(
@@ -71,6 +111,46 @@ class CreateTaskTool(TaskTool):
             }
 
 
+class CreateTasksTool(TaskTool):
+    name: str = "create_tasks"
+    description: str = "Create several tasks (optionally nested) in one step"
+    
+    async def execute(self, tasks: List[Dict[str, Any]], project_id: str = None) -> Dict[str, Any]:
+        """
+        Create a batch of tasks with a single validation pass and a single write.
+        Each task spec may reference an earlier spec in the batch via parent_index.
+        """
+        try:
+            task_service = self.get_task_service()
+            
+            created = await task_service.create_tasks(project_id=project_id, task_specs=tasks)
+            
+            results = [
+                {
+                    "success": True,
+                    "task_id": task.id,
+                    "task_title": task.title,
+                    "message": f"✅ Created task: '{task.title}'"
+                }
+                for task in created
+            ]
+            
+            return {
+                "success": True,
+                "task_ids": [task.id for task in created],
+                "results": results,
+                "message": f"✅ Created {len(created)} task{'s' if len(created) != 1 else ''}"
+            }
+            
+        except Exception as e:
+            logger.error(f"Error creating tasks: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"❌ Failed to create tasks: {str(e)}"
+            }
+
+
 class UpdateTaskTool(TaskTool):
     name: str = "update_task"
     description: str = "Update an existing task's details"
@@ -102,8 +182,7 @@ class UpdateTaskTool(TaskTool):
             
             # Try to use TaskService first (preferred method)
             try:
-                from .task_service import TaskService
-                task_service = TaskService()
+                task_service = self.get_task_service()
                 
                 # Find task by ID or title
                 task = None
@@ -111,11 +190,9 @@ class UpdateTaskTool(TaskTool):
                     task = await task_service.get_task(project_id, task_identifier)
                     if not task:
                         # Try to find by title
-                        tasks = await task_service.list_tasks(project_id)
-                        for t in tasks:
-                            if t.title.lower() == task_identifier.lower():
-                                task = t
-                                break
+                        match = search_index.resolve(task_service.file_service, project_id, "tasks", task_identifier)
+                        if match:
+                            task = await task_service.get_task(project_id, match["id"])
                 
                 if task:
                     # Prepare updates dictionary
@@ -156,17 +233,11 @@ class UpdateTaskTool(TaskTool):
                 logger.warning(f"TaskService update failed, falling back to FileService: {service_error}")
             
             # Fallback to FileService method
-            file_service = FileService()
-            
-            # Load existing tasks
-            tasks = file_service.load_tasks(project_id)
+            file_service = self.get_file_service()
             
             # Find task by title or ID
-            task = None
-            for t in tasks:
-                if t.id == task_identifier or t.title.lower() == task_identifier.lower():
-                    task = t
-                    break
+            match = search_index.resolve(file_service, project_id, "tasks", task_identifier)
+            task = file_service.get_task_by_id(project_id, match["id"]) if match else None
             
             if not task:
                 return {
@@ -192,8 +263,8 @@ class UpdateTaskTool(TaskTool):
             elif status in ["pending", "in_progress", "blocked"]:
                 task.completed = False
             
-            # Save updated tasks
-            file_service.save_tasks(project_id, tasks)
+            # Save the updated task
+            await write_lanes.run(project_id, "tasks", file_service.save_task, project_id, task)
             
             return {
                 "success": True,
@@ -213,6 +284,7 @@ class UpdateTaskTool(TaskTool):
 class ChangeTaskStatusTool(TaskTool):
     name: str = "change_task_status"
     description: str = "Change the status of a task (pending, in_progress, completed, blocked)"
+    writes: ClassVar[Optional[str]] = "tasks"
     
     def execute(self, task_identifier: str, new_status: str, project_id: str) -> Dict[str, Any]:
         """
@@ -226,17 +298,11 @@ class ChangeTaskStatusTool(TaskTool):
             }
         
         try:
-            file_service = FileService()
-            
-            # Load existing tasks
-            tasks = file_service.load_tasks(project_id)
+            file_service = self.get_file_service()
             
             # Find task by title or ID
-            task = None
-            for t in tasks:
-                if t.id == task_identifier or t.title.lower() == task_identifier.lower():
-                    task = t
-                    break
+            match = search_index.resolve(file_service, project_id, "tasks", task_identifier)
+            task = file_service.get_task_by_id(project_id, match["id"]) if match else None
             
             if not task:
                 return {
@@ -253,8 +319,8 @@ class ChangeTaskStatusTool(TaskTool):
             else:
                 task.completed = False
             
-            # Save updated tasks
-            file_service.save_tasks(project_id, tasks)
+            # Save the updated task
+            file_service.save_task(project_id, task)
             
             status_emoji = {
                 "pending": "📋",
@@ -289,28 +355,20 @@ class SearchTasksTool(TaskTool):
         Search tasks
         """
         try:
-            file_service = FileService()
-            tasks = file_service.load_tasks(project_id)
-            
-            # Filter tasks based on query and status
-            matching_tasks = []
-            query_lower = query.lower()
-            
-            for task in tasks:
-                # Check if task matches query
-                matches_query = (
-                    query_lower in task.title.lower() or
-                    query_lower in task.description.lower()
-                )
-                
-                # Check status filter
-                matches_status = True
-                if status_filter:
-                    task_status = getattr(task, 'status', 'pending')
-                    matches_status = status_filter.lower() in task_status.lower()
-                
-                if matches_query and matches_status:
-                    matching_tasks.append(task)
+            file_service = self.get_file_service()
+            
+            # Check status filter
+            def matches_status(task: Dict[str, Any]) -> bool:
+                if not status_filter:
+                    return True
+                return status_filter.lower() in (task.get('status') or 'pending').lower()
+            
+            # Rank tasks matching the query
+            results = hybrid_retriever.search(
+                file_service, project_id, "tasks", query,
+                top_k=SEARCH_RESULT_LIMIT, predicate=matches_status
+            )
+            matching_tasks = [item.doc for item in results]
             
             if not matching_tasks:
                 return {
@@ -323,11 +381,11 @@ class SearchTasksTool(TaskTool):
             task_summaries = []
             for task in matching_tasks:
                 task_summaries.append({
-                    "id": task.id,
-                    "title": task.title,
-                    "status": getattr(task, 'status', 'pending'),
-                    "priority": getattr(task, 'priority', 'medium'),
-                    "completed": task.completed
+                    "id": task["id"],
+                    "title": task["title"],
+                    "status": task.get("status") or "pending",
+                    "priority": task.get("priority") or "medium",
+                    "completed": bool(task.get("completed"))
                 })
             
             return {
@@ -349,23 +407,18 @@ class SearchTasksTool(TaskTool):
 class DeleteTaskTool(TaskTool):
     name: str = "delete_task"
     description: str = "Delete a task from the project"
+    writes: ClassVar[Optional[str]] = "tasks"
     
     def execute(self, task_identifier: str, project_id: str) -> Dict[str, Any]:
         """
         Delete a task by title or ID
         """
         try:
-            file_service = FileService()
-            
-            # Load existing tasks
-            tasks = file_service.load_tasks(project_id)
+            file_service = self.get_file_service()
             
             # Find task by title or ID
-            task_to_delete = None
-            for task in tasks:
-                if task.id == task_identifier or task.title.lower() == task_identifier.lower():
-                    task_to_delete = task
-                    break
+            match = search_index.resolve(file_service, project_id, "tasks", task_identifier)
+            task_to_delete = file_service.get_task_by_id(project_id, match["id"]) if match else None
             
             if not task_to_delete:
                 return {
@@ -374,10 +427,7 @@ class DeleteTaskTool(TaskTool):
                 }
             
             # Remove task
-            tasks = [t for t in tasks if t.id != task_to_delete.id]
-            
-            # Save updated tasks
-            file_service.save_tasks(project_id, tasks)
+            file_service.delete_task(project_id, task_to_delete.id)
             
             return {
                 "success": True,
@@ -395,9 +445,10 @@ class DeleteTaskTool(TaskTool):
 
 
 # Memory Tools
-class CreateMemoryTool(BaseModel):
+class CreateMemoryTool(AgentTool):
     name: str = "create_memory"
     description: str = "Create a new memory entry"
+    writes: ClassVar[Optional[str]] = "memories"
     
     def execute(self, title: str, content: str, project_id: str, 
                 category: str = "general") -> Dict[str, Any]:
@@ -405,7 +456,7 @@ class CreateMemoryTool(BaseModel):
         Create a new memory
         """
         try:
-            file_service = FileService()
+            file_service = self.get_file_service()
             
             # Create memory object
             memory = Memory(
@@ -418,12 +469,8 @@ class CreateMemoryTool(BaseModel):
                 created_at=datetime.now()
             )
             
-            # Load existing memories and add new one
-            existing_memories = file_service.load_memories(project_id)
-            existing_memories.append(memory)
-            
-            # Save updated memories
-            file_service.save_memories(project_id, existing_memories)
+            # Add it to the project's memories
+            file_service.save_memory(project_id, memory)
             
             return {
                 "success": True,
@@ -439,9 +486,10 @@ class CreateMemoryTool(BaseModel):
             }
 
 
-class UpdateMemoryTool(BaseModel):
+class UpdateMemoryTool(AgentTool):
     name: str = "update_memory"
     description: str = "Update an existing memory"
+    writes: ClassVar[Optional[str]] = "memories"
     
     def execute(self, memory_identifier: str, project_id: str,
                 title: str = None, content: str = None, 
@@ -450,17 +498,14 @@ class UpdateMemoryTool(BaseModel):
         Update memory details
         """
         try:
-            file_service = FileService()
+            file_service = self.get_file_service()
             
             # Load existing memories
             memories = file_service.load_memories(project_id)
             
             # Find memory by title or ID
-            memory = None
-            for m in memories:
-                if m.id == memory_identifier or m.title.lower() == memory_identifier.lower():
-                    memory = m
-                    break
+            match = search_index.resolve(file_service, project_id, "memories", memory_identifier)
+            memory = next((m for m in memories if m.id == match["id"]), None) if match else None
             
             if not memory:
                 return {
@@ -473,8 +518,8 @@ class UpdateMemoryTool(BaseModel):
             if content: memory.content = content
             if category: memory.category = category
             
-            # Save updated memories
-            file_service.save_memories(project_id, memories)
+            # Save the updated memory
+            file_service.save_memory(project_id, memory)
             
             return {
                 "success": True,
@@ -491,7 +536,7 @@ class UpdateMemoryTool(BaseModel):
             }
 
 
-class SearchMemoriesTool(BaseModel):
+class SearchMemoriesTool(AgentTool):
     name: str = "search_memories"
     description: str = "Search for memories by title or content"
     
@@ -500,27 +545,20 @@ class SearchMemoriesTool(BaseModel):
         Search memories
         """
         try:
-            file_service = FileService()
-            memories = file_service.load_memories(project_id)
-            
-            # Filter memories based on query and category
-            matching_memories = []
-            query_lower = query.lower()
-            
-            for memory in memories:
-                # Check if memory matches query
-                matches_query = (
-                    query_lower in memory.title.lower() or
-                    query_lower in memory.content.lower()
-                )
-                
-                # Check category filter
-                matches_category = True
-                if category_filter:
-                    matches_category = category_filter.lower() in memory.category.lower()
-                
-                if matches_query and matches_category:
-                    matching_memories.append(memory)
+            file_service = self.get_file_service()
+            
+            # Check category filter
+            def matches_category(memory: Dict[str, Any]) -> bool:
+                if not category_filter:
+                    return True
+                return category_filter.lower() in (memory.get('category') or 'general').lower()
+            
+            # Rank memories matching the query
+            results = hybrid_retriever.search(
+                file_service, project_id, "memories", query,
+                top_k=SEARCH_RESULT_LIMIT, predicate=matches_category
+            )
+            matching_memories = [item.doc for item in results]
             
             if not matching_memories:
                 return {
@@ -532,11 +570,12 @@ class SearchMemoriesTool(BaseModel):
             
             memory_summaries = []
             for memory in matching_memories:
+                content = memory.get("content") or ""
                 memory_summaries.append({
-                    "id": memory.id,
-                    "title": memory.title,
-                    "category": memory.category,
-                    "preview": memory.content[:100] + "..." if len(memory.content) > 100 else memory.content
+                    "id": memory["id"],
+                    "title": memory["title"],
+                    "category": memory.get("category") or "general",
+                    "preview": content[:100] + "..." if len(content) > 100 else content
                 })
             
             return {
@@ -555,26 +594,24 @@ class SearchMemoriesTool(BaseModel):
             }
 
 
-class DeleteMemoryTool(BaseModel):
+class DeleteMemoryTool(AgentTool):
     name: str = "delete_memory"
     description: str = "Delete a memory from the project"
+    writes: ClassVar[Optional[str]] = "memories"
     
     def execute(self, memory_identifier: str, project_id: str) -> Dict[str, Any]:
         """
         Delete a memory by title or ID
         """
         try:
-            file_service = FileService()
+            file_service = self.get_file_service()
             
             # Load existing memories
             memories = file_service.load_memories(project_id)
             
             # Find memory by title or ID
-            memory_to_delete = None
-            for memory in memories:
-                if memory.id == memory_identifier or memory.title.lower() == memory_identifier.lower():
-                    memory_to_delete = memory
-                    break
+            match = search_index.resolve(file_service, project_id, "memories", memory_identifier)
+            memory_to_delete = next((m for m in memories if m.id == match["id"]), None) if match else None
             
             if not memory_to_delete:
                 return {
@@ -583,10 +620,7 @@ class DeleteMemoryTool(BaseModel):
                 }
             
             # Remove memory
-            memories = [m for m in memories if m.id != memory_to_delete.id]
-            
-            # Save updated memories
-            file_service.save_memories(project_id, memories)
+            file_service.delete_memory(project_id, memory_to_delete.id)
             
             return {
                 "success": True,
@@ -608,10 +642,16 @@ class AgentToolRegistry:
     Registry of all available tools for the agent
     """
     
-    def __init__(self):
+    def __init__(self, file_service: Optional[FileService] = None, task_service: Optional[Any] = None):
+        """
+        Args:
+            file_service: Shared FileService bound to every tool
+            task_service: Shared TaskService bound to the task tools
+        """
         self.tools = {
             # Task tools
             "create_task": CreateTaskTool(),
+            "create_tasks": CreateTasksTool(),
             "update_task": UpdateTaskTool(),
             "change_task_status": ChangeTaskStatusTool(),
             "search_tasks": SearchTasksTool(),
@@ -623,6 +663,8 @@ class AgentToolRegistry:
             "search_memories": SearchMemoriesTool(),
             "delete_memory": DeleteMemoryTool(),
         }
+        for tool in self.tools.values():
+            tool.bind_services(file_service=file_service, task_service=task_service)
     
     def get_tool_descriptions(self) -> str:
         """
@@ -644,12 +686,17 @@ class AgentToolRegistry:
                 "message": f"❌ Unknown tool: {tool_name}"
             }
         
+        metrics.inc("samurai_tool_calls_total", tool=tool_name)
         try:
             tool = self.tools[tool_name]
-            if hasattr(tool, 'execute') and asyncio.iscoroutinefunction(tool.execute):
-                return await tool.execute(**kwargs)
-            else:
-                return tool.execute(**kwargs)
+            with metrics.span(f"tool.{tool_name}"):
+                if hasattr(tool, 'execute') and asyncio.iscoroutinefunction(tool.execute):
+                    return await tool.execute(**kwargs)
+                elif tool.writes and kwargs.get("project_id"):
+                    return await write_lanes.run(kwargs["project_id"], tool.writes, tool.execute, **kwargs)
+                else:
+                    # Synchronous tools do blocking file I/O; keep it off the event loop
+                    return await asyncio.to_thread(tool.execute, **kwargs)
         except Exception as e:
             logger.error(f"Tool execution failed for {tool_name}: {e}")
             return {
@@ -0,0 +1,145 @@
+"""
+Projected and Compressed List Responses
+
+List endpoints return every stored field by default, including the 384-float
+`embedding` and its `embedding_text`, which clients never render. This module
+serializes lists of models straight to JSON bytes with pydantic-core,
+projecting out the vector fields unless asked for them, optionally down to a
+`fields=` subset, and compresses large bodies with brotli (when installed) or
+gzip according to Accept-Encoding. Serialization and compression run in a
+worker thread so large lists do not stall the event loop.
+"""
+
+import asyncio
+import gzip
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Constants
+VECTOR_FIELDS = frozenset({"embedding", "embedding_text"})
+COMPRESSION_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+
+
+def _adapter(model: Type[BaseModel]) -> TypeAdapter:
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(List[model])
+    return adapter
+
+
+def resolve_projection(
+    model: Type[BaseModel],
+    fields: Optional[str] = None,
+    include_embeddings: bool = False
+) -> Tuple[Optional[Set[str]], Optional[Set[str]]]:
+    """
+    Turn the fields/include_embeddings query parameters into include/exclude sets.
+
+    Args:
+        model: Model class of the list items
+        fields: Comma-separated field names to return; vector fields listed here are kept
+        include_embeddings: Keep the vector fields when no explicit projection is given
+
+    Returns:
+        (include, exclude) field sets for pydantic serialization
+
+    Raises:
+        HTTPException: 400 for unknown field names
+    """
+    if fields:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(model.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. "
+                       f"Valid fields: {', '.join(model.model_fields)}"
+            )
+        return requested, None
+    if include_embeddings:
+        return None, None
+    return None, set(VECTOR_FIELDS & set(model.model_fields))
+
+
+def encode_items(
+    model: Type[BaseModel],
+    items: Iterable[BaseModel],
+    include: Optional[Set[str]] = None,
+    exclude: Optional[Set[str]] = None
+) -> bytes:
+    """Serialize a list of models to JSON bytes with the given projection."""
+    return _adapter(model).dump_json(
+        list(items),
+        include={"__all__": include} if include is not None else None,
+        exclude={"__all__": exclude} if exclude else None
+    )
+
+
+def compress(body: bytes, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+    """Compress a body for the client's Accept-Encoding, preferring brotli over gzip."""
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return body, None
+    accepted = {part.split(";", 1)[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+    return body, None
+
+
+def pagination_headers(items: List[BaseModel], has_more: bool) -> Dict[str, str]:
+    """Cursor headers for a chronological page: ids of its first and last items."""
+    headers = {"X-Has-More": "true" if has_more else "false"}
+    if items:
+        headers["X-Before-Cursor"] = getattr(items[0], "id")
+        headers["X-After-Cursor"] = getattr(items[-1], "id")
+    return headers
+
+
+async def list_response(
+    request: Request,
+    model: Type[BaseModel],
+    items: Iterable[BaseModel],
+    fields: Optional[str] = None,
+    include_embeddings: bool = False,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Build the JSON response for a list endpoint.
+
+    Args:
+        request: Incoming request, for Accept-Encoding
+        model: Model class of the list items
+        items: Models to return
+        fields: Optional comma-separated projection from the query string
+        include_embeddings: Opt in to the vector fields
+        headers: Extra response headers, such as pagination cursors
+
+    Returns:
+        Response with the projected, possibly compressed JSON body
+    """
+    include, exclude = resolve_projection(model, fields, include_embeddings)
+    accept_encoding = request.headers.get("accept-encoding", "")
+
+    def render() -> Tuple[bytes, Optional[str]]:
+        return compress(encode_items(model, items, include, exclude), accept_encoding)
+
+    body, encoding = await asyncio.to_thread(render)
+    response_headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=response_headers)
@@ -0,0 +1,333 @@
+"""
+Data File Backups
+
+FileService snapshots a data file before replacing it. Saves always write a new
+file and rename it over the old one, so the outgoing version is an inode nobody
+modifies again: a hard link to it is a complete, zero-copy snapshot. The
+request path therefore only checks the snapshot interval and makes that link
+(falling back to a reflink or copy where the backup directory cannot share
+inodes with the data directory). Everything else happens on a background
+thread:
+
+- content-addressed dedup: a snapshot whose SHA-256 matches the previous
+  snapshot of the same file is dropped,
+- optional gzip archiving (SAMURAI_BACKUP_MODE=gzip),
+- an index file (index.json) that replaces globbing the backup directory,
+- rotation down to the newest max_backups snapshots per file.
+
+Snapshots are time based: a file is snapshotted at most once per
+SAMURAI_BACKUP_INTERVAL seconds, not on every write.
+
+Several worker processes may share one backup directory. Each rewrites
+index.json only while holding an fcntl lock on the directory, after merging
+the index the others wrote, and a store reloads the index whenever another
+process has replaced it, so the interval applies across processes too.
+"""
+
+import gzip
+import hashlib
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    from .metrics import metrics
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Constants
+BACKUP_MODES = ("link", "gzip", "off")
+BACKUP_MODE = os.getenv("SAMURAI_BACKUP_MODE", "link")
+BACKUP_INTERVAL = float(os.getenv("SAMURAI_BACKUP_INTERVAL", "60"))
+DEFAULT_MAX_BACKUPS = 5
+BACKUP_INDEX_NAME = "index.json"
+BACKUP_INDEX_VERSION = 1
+FICLONE = 0x40049409  # Linux ioctl that clones (reflinks) a file on btrfs/xfs
+
+# <stem>_<YYYYmmdd>_<HHMMSS>[_<micro>-<n>]<suffix>; the older form is what earlier versions wrote
+_BACKUP_NAME = re.compile(r"^(?P<stem>.+?)_(?P<stamp>\d{8}_\d{6})(?:_\d{6}-\d+)?(?P<suffix>\.[^_]*)?$")
+
+
+class BackupStore:
+    """Snapshots of data files, taken cheaply on the write path and curated in the background."""
+
+    def __init__(
+        self,
+        backup_dir: Path,
+        mode: str = BACKUP_MODE,
+        interval: float = BACKUP_INTERVAL,
+        max_backups: int = DEFAULT_MAX_BACKUPS
+    ):
+        if mode not in BACKUP_MODES:
+            raise ValueError(f"Unknown backup mode {mode!r}; expected one of {', '.join(BACKUP_MODES)}")
+        self.backup_dir = Path(backup_dir)
+        self.mode = mode
+        self.interval = interval
+        self.max_backups = max(1, max_backups)
+        self._index: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        # Signature of the index.json that _index reflects; a different one means another process rewrote it
+        self._index_signature: Optional[Tuple[int, int, int]] = None
+        self._last_snapshot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._sequence = itertools.count()
+
+    def snapshot(self, file_path: Path, force: bool = False) -> Optional[Path]:
+        """
+        Snapshot a file that is about to be replaced, unless it was snapshotted recently.
+
+        Args:
+            file_path: Existing data file
+            force: Ignore the snapshot interval (for files about to be deleted)
+
+        Returns:
+            Path of the new snapshot, or None if none was taken
+        """
+        if self.mode == "off":
+            return None
+        stem = file_path.stem
+        now = time.time()
+        with self._lock:
+            self._ensure_index()
+            last = self._last_snapshot.get(stem)
+            if not force and last is not None and now - last < self.interval:
+                metrics.inc("samurai_backups_total", result="skipped")
+                return None
+            self._last_snapshot[stem] = now
+
+        stamp = datetime.fromtimestamp(now).strftime('%Y%m%d_%H%M%S_%f')
+        backup_path = self.backup_dir / f"{stem}_{stamp}-{next(self._sequence)}{file_path.suffix}"
+        self._link_or_copy(file_path, backup_path)
+        self._enqueue({"stem": stem, "path": backup_path, "created_at": now})
+        return backup_path
+
+    def list_backups(self, stem: str) -> List[Dict[str, Any]]:
+        """Indexed snapshots of a file, oldest first (snapshots still being processed are not included)."""
+        with self._lock:
+            return [dict(entry) for entry in self._ensure_index().get(stem, [])]
+
+    def drain(self) -> None:
+        """Wait until every queued snapshot has been processed."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.join()
+
+    # Write path helpers
+    @staticmethod
+    def _link_or_copy(source: Path, target: Path) -> None:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            pass
+        if fcntl is not None:
+            try:
+                with open(source, 'rb') as src, open(target, 'wb') as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                shutil.copystat(source, target)
+                return
+            except OSError:
+                pass
+        shutil.copy2(source, target)
+
+    def _enqueue(self, item: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, name="backup-store", daemon=True)
+                self._worker.start()
+        self._queue.put(item)
+
+    # Background processing
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                self._process(item)
+            except Exception as e:
+                logger.warning(f"Failed to process backup {item['path']}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _process(self, item: Dict[str, Any]) -> None:
+        path: Path = item["path"]
+        digest = self._sha256(path)
+        with self._lock:
+            entries = self._ensure_index().setdefault(item["stem"], [])
+            if entries and entries[-1].get("sha256") == digest:
+                path.unlink()
+                metrics.inc("samurai_backups_total", result="deduplicated")
+                logger.debug(f"Dropped duplicate backup {path.name}")
+                return
+
+        size = path.stat().st_size
+        if self.mode == "gzip":
+            archive = path.with_name(path.name + ".gz")
+            with open(path, 'rb') as src, gzip.open(archive, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            path.unlink()
+            path = archive
+
+        with self._index_file_lock():
+            with self._lock:
+                # Reloading merges snapshots other processes indexed since our last look
+                entries = self._ensure_index().setdefault(item["stem"], [])
+                if entries and entries[-1].get("sha256") == digest:
+                    path.unlink()
+                    metrics.inc("samurai_backups_total", result="deduplicated")
+                    return
+                entries.append({"name": path.name, "created_at": item["created_at"], "sha256": digest, "size": size})
+                expired = entries[:-self.max_backups]
+                del entries[:-self.max_backups]
+                snapshot = self._dump_index()
+            # The request path only takes the thread lock, so it is not held for the write
+            self._write_index(snapshot)
+            with self._lock:
+                self._index_signature = self._read_index_signature()
+            for entry in expired:
+                try:
+                    (self.backup_dir / entry["name"]).unlink()
+                    logger.debug(f"Removed old backup: {entry['name']}")
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.warning(f"Failed to remove old backup {entry['name']}: {e}")
+        metrics.inc("samurai_backups_total", result="created")
+        logger.debug(f"Created backup: {path}")
+
+    @staticmethod
+    def _sha256(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    # Index
+    def _ensure_index(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Load the index on first use, and again after another process rewrote it (caller holds the lock)."""
+        signature = self._read_index_signature()
+        if self._index is not None and signature == self._index_signature:
+            return self._index
+        on_disk = self._read_index()
+        if self._index is None:
+            self._index = self._adopt_unindexed(on_disk)
+        else:
+            self._merge_index(on_disk)
+        self._index_signature = signature
+        for stem, entries in self._index.items():
+            if entries:
+                self._last_snapshot[stem] = max(self._last_snapshot.get(stem, 0.0), entries[-1]["created_at"])
+        return self._index
+
+    def _read_index(self) -> Dict[str, List[Dict[str, Any]]]:
+        index_path = self.backup_dir / BACKUP_INDEX_NAME
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Rebuilding unreadable backup index {index_path}: {e}")
+        return {}
+
+    def _read_index_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = (self.backup_dir / BACKUP_INDEX_NAME).stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _adopt_unindexed(self, index: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Add snapshots the index does not know about, e.g. from older versions and interrupted runs."""
+        # One directory scan per process; the adopted entries are written with the next snapshot
+        indexed = {entry["name"] for entries in index.values() for entry in entries}
+        adopted = 0
+        if self.backup_dir.exists():
+            for path in self.backup_dir.iterdir():
+                match = _BACKUP_NAME.match(path.name)
+                if match is None or path.name in indexed or not path.is_file():
+                    continue
+                index.setdefault(match.group("stem"), []).append({
+                    "name": path.name, "created_at": path.stat().st_mtime, "sha256": None, "size": path.stat().st_size
+                })
+                adopted += 1
+        for entries in index.values():
+            entries.sort(key=lambda entry: entry["created_at"])
+        if adopted:
+            logger.info(f"Indexed {adopted} existing backups in {self.backup_dir}")
+        return index
+
+    def _merge_index(self, on_disk: Dict[str, List[Dict[str, Any]]]) -> None:
+        """
+        Merge the index file another process wrote into ours (caller holds the lock).
+
+        The file wins; entries only we know about are kept while their snapshot
+        still exists, so rotations done elsewhere stick but adopted snapshots do not
+        get lost.
+        """
+        merged: Dict[str, List[Dict[str, Any]]] = {}
+        for stem in set(on_disk) | set(self._index):
+            entries = {entry["name"]: entry for entry in on_disk.get(stem, [])}
+            for entry in self._index.get(stem, []):
+                if entry["name"] not in entries and (self.backup_dir / entry["name"]).exists():
+                    entries[entry["name"]] = entry
+            merged[stem] = sorted(entries.values(), key=lambda entry: entry["created_at"])
+        self._index = merged
+
+    @contextmanager
+    def _index_file_lock(self):
+        """
+        Hold the cross-process lock for rewriting index.json.
+
+        The lock is an fcntl lock on the backup directory itself, since index.json
+        is replaced on every write. Without fcntl only one process may use a
+        backup directory.
+        """
+        if fcntl is None:
+            yield
+            return
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.backup_dir, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def _dump_index(self) -> str:
+        """Serialize the index (caller holds the lock)."""
+        return json.dumps({"version": BACKUP_INDEX_VERSION, "files": self._index}, indent=2)
+
+    def _write_index(self, content: str) -> None:
+        """Atomically replace the index file."""
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.backup_dir, prefix=f".{BACKUP_INDEX_NAME}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_name, self.backup_dir / BACKUP_INDEX_NAME)
+        except Exception:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
@@ -139,8 +139,8 @@ class ConsolidatedMemoryService:
     Service for managing consolidated memories.
     """
     
-    def __init__(self):
-        self.file_service = FileService()
+    def __init__(self, file_service: Optional[FileService] = None):
+        self.file_service = file_service or FileService()
     
     def get_or_create_consolidated_memory(self, category: str, project_id: str) -> ConsolidatedMemory:
         """
@@ -149,7 +149,7 @@ class ConsolidatedMemoryService:
         memory_id = f"{project_id}_{category}_consolidated"
         
         # Try to get existing consolidated memory
-        existing = self._get_memory_by_id(memory_id)
+        existing = self._get_memory_by_id(memory_id, project_id)
         
         if existing:
             consolidated = ConsolidatedMemory(category, project_id)
@@ -236,7 +236,7 @@ class ConsolidatedMemoryService:
         
         # Update the section
         consolidated.update_section(section_key, merged_content, title)
-        self._save_consolidated_memory(consolidated)
+        self._save_consolidated_memory(consolidated, changed_section=section_key)
         
         return {
             "action": "updated_existing_section",
@@ -250,7 +250,7 @@ class ConsolidatedMemoryService:
         Create a new section in the consolidated memory.
         """
         section_key = consolidated.add_section(title, new_info)
-        self._save_consolidated_memory(consolidated)
+        self._save_consolidated_memory(consolidated, changed_section=section_key)
         
         return {
             "action": "created_new_section", 
@@ -285,45 +285,23 @@ class ConsolidatedMemoryService:
         # Fallback: use category-specific default
         return f"{category_config.get('label', category.title())} Information"
     
-    def _get_memory_by_id(self, memory_id: str) -> Optional[Dict[str, Any]]:
+    def _get_memory_by_id(self, memory_id: str, project_id: str) -> Optional[Dict[str, Any]]:
         """
-        Get a consolidated memory by its ID.
+        Get a consolidated memory by its ID, with its sections loaded from the section store.
         """
         try:
-            # Extract project_id from memory_id
-            if memory_id.endswith('_consolidated'):
-                # Extract category from memory_id
-                parts = memory_id.split('_')
-                if len(parts) >= 3:
-                    category = parts[-2]  # Second to last part is category
-                    project_id = '_'.join(parts[:-2])  # Everything before category
-                else:
-                    category = "general"
-                    project_id = memory_id.replace('_consolidated', '')
-            else:
-                return None
-            
-            # Load the memory
             memories = self.file_service.load_memories(project_id)
             for memory in memories:
                 if memory.id == memory_id:
                     memory_dict = memory.dict()
                     
-                    # Try to load sections metadata
-                    sections_file = self.file_service.data_dir / f"memory-{memory_id}-sections.json"
-                    if sections_file.exists():
-                        try:
-                            import json
-                            with open(sections_file, 'r') as f:
-                                sections_data = json.load(f)
-                                if sections_data.get("memory_id") == memory_id:
-                                    memory_dict["sections"] = sections_data.get("sections", {})
-                                    memory_dict["metadata"] = sections_data.get("metadata", {})
-                                    logger.debug(f"Loaded {len(sections_data.get('sections', {}))} sections for {memory_id}")
-                        except Exception as e:
-                            logger.warning(f"Error loading sections for {memory_id}: {e}")
+                    stored = self.file_service.load_memory_sections(project_id, memory_id)
+                    if stored:
+                        memory_dict["sections"] = stored.get("sections", {})
+                        memory_dict["metadata"] = stored.get("metadata", {})
+                        logger.debug(f"Loaded {len(memory_dict['sections'])} sections for {memory_id}")
                     else:
-                        logger.debug(f"No sections file found for {memory_id}")
+                        logger.debug(f"No stored sections for {memory_id}")
                     
                     return memory_dict
             
@@ -332,9 +310,13 @@ class ConsolidatedMemoryService:
             logger.error(f"Error getting memory by ID {memory_id}: {e}")
             return None
     
-    def _save_consolidated_memory(self, consolidated: ConsolidatedMemory) -> None:
+    def _save_consolidated_memory(self, consolidated: ConsolidatedMemory, changed_section: Optional[str] = None) -> None:
         """
         Save a consolidated memory to storage.
+        
+        Args:
+            consolidated: Memory to save
+            changed_section: If given, only this section is written to the section store
         """
         try:
             # Convert to Memory model for storage
@@ -354,17 +336,22 @@ class ConsolidatedMemoryService:
             # Save using existing file service
             self.file_service.save_memory(consolidated.project_id, memory)
             
-            # Also save the sections metadata separately for proper restoration
-            sections_file = self.file_service.data_dir / f"memory-{memory_data['id']}-sections.json"
-            sections_data = {
-                "memory_id": memory_data["id"],
-                "sections": memory_data["sections"],
-                "metadata": memory_data["metadata"]
-            }
-            
-            with open(sections_file, 'w') as f:
-                import json
-                json.dump(sections_data, f, indent=2)
+            # Sections live in the per-project section store for proper restoration
+            if changed_section is not None:
+                self.file_service.update_memory_section(
+                    consolidated.project_id,
+                    memory_data["id"],
+                    changed_section,
+                    memory_data["sections"][changed_section],
+                    memory_data["metadata"]
+                )
+            else:
+                self.file_service.save_memory_sections(
+                    consolidated.project_id,
+                    memory_data["id"],
+                    memory_data["sections"],
+                    memory_data["metadata"]
+                )
             
         except Exception as e:
             logger.error(f"Error saving consolidated memory: {e}")
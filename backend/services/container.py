@@ -0,0 +1,168 @@
+"""
+Application Service Container
+
+Wires the shared service singletons once per process, instead of having every
+agent, tool call and endpoint construct its own GeminiService, FileService or
+TaskService. Services are created lazily on first access, so importing the
+container stays cheap, and everything that asks for a service gets the same
+instance, which is what lets in-memory caches (search indexes, embedding
+matrices, chunk summaries) actually be shared.
+
+Lifecycle hooks registered with add_lifecycle_hook() run in registration order
+on start() and in reverse order on stop(); main.py drives both from the FastAPI
+lifespan.
+"""
+
+import inspect
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    from .file_service import file_service as default_file_service
+    from .gemini_service import GeminiService
+except ImportError:
+    import os
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services.file_service import file_service as default_file_service
+    from services.gemini_service import GeminiService
+
+logger = logging.getLogger(__name__)
+
+LifecycleCallback = Callable[[], Union[None, Awaitable[None]]]
+
+
+class ServiceContainer:
+    """Lazily constructed, application-scoped service singletons with start/stop hooks."""
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._factories: Dict[str, Callable[[], Any]] = {
+            "file_service": lambda: default_file_service,
+            "gemini_service": GeminiService,
+            "task_analysis_agent": self._build_task_analysis_agent,
+            "task_service": self._build_task_service,
+            "memory_consolidation_service": self._build_memory_consolidation_service,
+        }
+        self._hooks: List[Tuple[str, Optional[LifecycleCallback], Optional[LifecycleCallback]]] = []
+        self._started: List[Tuple[str, Optional[LifecycleCallback]]] = []
+        self._lock = threading.RLock()
+
+    # Factories (imported lazily so the container can be imported by the services it builds)
+    def _build_task_analysis_agent(self):
+        from services.task_analysis_agent import TaskAnalysisAgent
+        return TaskAnalysisAgent(gemini_service=self.gemini_service)
+
+    def _build_task_service(self):
+        from services.task_service import TaskService
+        return TaskService(file_service=self.file_service, analysis_agent=self.task_analysis_agent)
+
+    def _build_memory_consolidation_service(self):
+        from services.intelligent_memory_consolidation import IntelligentMemoryConsolidationService
+        return IntelligentMemoryConsolidationService(
+            gemini_service=self.gemini_service,
+            file_service=self.file_service
+        )
+
+    # Resolution
+    def get(self, name: str) -> Any:
+        """Return the shared instance of a service, constructing it on first use."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                factory = self._factories.get(name)
+                if factory is None:
+                    raise KeyError(f"Unknown service: {name}")
+                self._instances[name] = factory()
+                logger.debug(f"Service container created {name}")
+            return self._instances[name]
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register (or replace) the factory for a service that has not been created yet."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def override(self, name: str, instance: Any) -> None:
+        """Replace a service instance, e.g. with a test double."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def reset(self) -> None:
+        """Forget all constructed instances; the next access rebuilds them."""
+        with self._lock:
+            self._instances.clear()
+
+    @property
+    def file_service(self):
+        return self.get("file_service")
+
+    @property
+    def gemini_service(self):
+        return self.get("gemini_service")
+
+    @property
+    def task_analysis_agent(self):
+        return self.get("task_analysis_agent")
+
+    @property
+    def task_service(self):
+        return self.get("task_service")
+
+    @property
+    def memory_consolidation_service(self):
+        return self.get("memory_consolidation_service")
+
+    # Lifecycle
+    def add_lifecycle_hook(
+        self,
+        name: str,
+        start: Optional[LifecycleCallback] = None,
+        stop: Optional[LifecycleCallback] = None
+    ) -> None:
+        """
+        Register callbacks to run when the application starts and stops.
+
+        Args:
+            name: Hook name used in logs
+            start: Sync or async callable run by start()
+            stop: Sync or async callable run by stop(), in reverse registration order
+        """
+        self._hooks.append((name, start, stop))
+
+    async def start(self) -> None:
+        """Run start hooks in registration order. A failing hook is logged and skipped."""
+        for name, start, stop in self._hooks:
+            if start is not None:
+                try:
+                    await self._call(start)
+                except Exception as e:
+                    logger.error(f"Failed to start {name}: {e}")
+                    continue
+            self._started.append((name, stop))
+        logger.info(f"Service container started ({len(self._started)} hooks)")
+
+    async def stop(self) -> None:
+        """Run the stop hooks of started components in reverse order."""
+        while self._started:
+            name, stop = self._started.pop()
+            if stop is None:
+                continue
+            try:
+                await self._call(stop)
+            except Exception as e:
+                logger.error(f"Failed to stop {name}: {e}")
+        logger.info("Service container stopped")
+
+    @staticmethod
+    async def _call(callback: LifecycleCallback) -> None:
+        result = callback()
+        if inspect.isawaitable(result):
+            await result
+
+
+# Global instance
+container = ServiceContainer()
@@ -12,6 +12,11 @@ import os
 from datetime import datetime
 import json
 
+try:
+    from .metrics import metrics
+except ImportError:
+    from services.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
@@ -68,7 +73,10 @@ class EmbeddingService:
                 return None
             
             # Generate embedding
-            embedding = self.model.encode(cleaned_text, convert_to_tensor=False)
+            metrics.inc("samurai_embedding_calls_total", kind="single")
+            metrics.inc("samurai_embedding_texts_total", kind="single")
+            with metrics.span("embedding.encode", texts=1):
+                embedding = self.model.encode(cleaned_text, convert_to_tensor=False)
             return embedding.tolist()
             
         except Exception as e:
@@ -98,7 +106,10 @@ class EmbeddingService:
             
             # Generate embeddings for valid texts
             indices, valid_text_list = zip(*valid_texts)
-            embeddings = self.model.encode(valid_text_list, convert_to_tensor=False)
+            metrics.inc("samurai_embedding_calls_total", kind="batch")
+            metrics.inc("samurai_embedding_texts_total", len(valid_text_list), kind="batch")
+            with metrics.span("embedding.encode", texts=len(valid_text_list)):
+                embeddings = self.model.encode(valid_text_list, convert_to_tensor=False)
             
             # Create result list with None for invalid texts
             result = [None] * len(texts)
@@ -145,6 +156,34 @@ class EmbeddingService:
             logger.error(f"Error calculating cosine similarity: {e}")
             return 0.0
     
+    def cosine_similarity_matrix(
+        self,
+        query_embeddings: List[List[float]],
+        candidate_embeddings: List[List[float]]
+    ) -> np.ndarray:
+        """
+        Calculate cosine similarity between every query and every candidate in one matmul.
+
+        Args:
+            query_embeddings: Query embedding vectors
+            candidate_embeddings: Candidate embedding vectors
+
+        Returns:
+            Array of shape (len(queries), len(candidates)); zero vectors score 0
+        """
+        if not query_embeddings or not candidate_embeddings:
+            return np.zeros((len(query_embeddings), len(candidate_embeddings)))
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+
+        query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        candidate_norms = np.linalg.norm(candidates, axis=1, keepdims=True)
+        queries = np.divide(queries, query_norms, out=np.zeros_like(queries), where=query_norms > 0)
+        candidates = np.divide(candidates, candidate_norms, out=np.zeros_like(candidates), where=candidate_norms > 0)
+
+        return queries @ candidates.T
+
     def find_similar_items(
         self,
         query_embedding: List[float],
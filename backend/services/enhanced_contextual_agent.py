@@ -31,11 +31,20 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+def _container():
+    """The application service container (imported lazily; it builds services that import this module's deps)."""
+    try:
+        from .container import container
+    except ImportError:
+        from container import container
+    return container
+
+
 class ContextUnderstandingService:
     """Service for extracting and understanding conversation context"""
     
-    def __init__(self):
-        self.gemini_service = GeminiService()
+    def __init__(self, gemini_service: Optional[GeminiService] = None):
+        self.gemini_service = gemini_service or _container().gemini_service
     
     async def extract_conversation_context(self, conversation_history: List[Dict]) -> Dict:
         """
@@ -159,10 +168,14 @@ class EnhancedContextualAgent:
     Agent with improved context understanding and tool calling
     """
     
-    def __init__(self):
-        self.tool_registry = AgentToolRegistry()
-        self.context_service = ContextUnderstandingService()
-        self.gemini_service = GeminiService()
+    def __init__(self, gemini_service: Optional[GeminiService] = None, file_service=None, task_service=None):
+        container = _container()
+        self.gemini_service = gemini_service or container.gemini_service
+        self.tool_registry = AgentToolRegistry(
+            file_service=file_service or container.file_service,
+            task_service=task_service or container.task_service
+        )
+        self.context_service = ContextUnderstandingService(gemini_service=self.gemini_service)
     
     async def process_message_with_context(self, user_message: str, conversation_history: List[Dict], 
                                          project_id: str, memories: List[Dict], tasks: List[Dict]) -> Dict:
@@ -2,18 +2,35 @@ from __future__ import annotations
 import json
 import os
 import shutil
-from typing import List, Optional, Dict, Any, TYPE_CHECKING
-from datetime import datetime
+import stat
+from typing import List, Optional, Dict, Any, Tuple, TYPE_CHECKING
+from datetime import datetime, timezone
 import uuid
 import logging
 from pathlib import Path
 import tempfile
+import bisect
+import gzip
+import hashlib
+import re
+import threading
+import atexit
 from contextlib import contextmanager
 
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks (Windows): writers are serialized within this process only
+    fcntl = None
+
 # Import models
 try:
     from models import Project, Memory, Task, ChatMessage
     from .embedding_service import embedding_service
+    from .search_index import search_index
+    from .metrics import metrics
+    from .backup_store import BackupStore
+    from .serialization import dumps, loads, to_record, from_record
     if TYPE_CHECKING:
         from models import Session
 except ImportError:
@@ -24,26 +41,88 @@ except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from models import Project, Memory, Task, ChatMessage
     from services.embedding_service import embedding_service
+    from services.search_index import search_index
+    from services.metrics import metrics
+    from services.backup_store import BackupStore
+    from services.serialization import dumps, loads, to_record, from_record
     if TYPE_CHECKING:
         from models import Session
 
 # Constants
-DATA_DIR = "data"
-BACKUP_DIR = "data/backups"
+DATA_DIR = os.getenv("SAMURAI_DATA_DIR", "data")
+BACKUP_DIR = os.getenv("SAMURAI_BACKUP_DIR", os.path.join(DATA_DIR, "backups"))
 MAX_BACKUPS = 5
+DEFAULT_CHAT_PAGE_SIZE = 50
+MAX_CHAT_PAGE_SIZE = 500
+CHAT_SEAL_COMPRESS = os.getenv("SAMURAI_CHAT_SEAL_COMPRESS", "1") != "0"
+CHAT_MANIFEST_VERSION = 1
+CHAT_TAIL_BLOCK_SIZE = 64 * 1024
+
+_SAFE_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+LOCKS_DIR_NAME = ".locks"
+FILE_MODE = 0o644
+DURABILITY_MODES = ("immediate", "interval", "on_shutdown")
+DURABILITY = os.getenv("SAMURAI_DURABILITY", "immediate")
+WRITE_BEHIND_INTERVAL = float(os.getenv("SAMURAI_WRITE_BEHIND_INTERVAL", "1.0"))
+WRITE_BEHIND_MAX_DIRTY = int(os.getenv("SAMURAI_WRITE_BEHIND_MAX_DIRTY", "100"))
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class ConcurrentModificationError(RuntimeError):
+    """A file changed between the read a save was based on and the save itself."""
+
+
 class FileService:
-    """Comprehensive file service for data persistence using JSON files."""
+    """
+    Comprehensive file service for data persistence using JSON files.
+
+    Durability modes for the JSON list files (projects, memories, tasks, sessions):
+
+    - immediate: every save rewrites the file, as before.
+    - interval: saves update an in-memory copy that is authoritative for reads
+      and is flushed (with fsync) every `flush_interval` seconds, or sooner once
+      `max_dirty` saves are pending.
+    - on_shutdown: pending copies are flushed only by flush()/close(), which
+      runs on graceful shutdown and at interpreter exit.
+
+    Write-behind keeps pending data in this process only, so deployments with
+    several worker processes must use immediate. Chat partitions, memory
+    sections and other files are always written immediately.
+    """
     
-    def __init__(self, data_dir: str = DATA_DIR, backup_dir: str = BACKUP_DIR):
+    def __init__(
+        self,
+        data_dir: str = DATA_DIR,
+        backup_dir: str = BACKUP_DIR,
+        durability: str = DURABILITY,
+        flush_interval: float = WRITE_BEHIND_INTERVAL,
+        max_dirty: int = WRITE_BEHIND_MAX_DIRTY
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode {durability!r}; expected one of {', '.join(DURABILITY_MODES)}")
         self.data_dir = Path(data_dir)
         self.backup_dir = Path(backup_dir)
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_dirty = max(1, max_dirty)
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock_handles: Dict[str, Any] = {}
+        self._locks_guard = threading.Lock()
+        # Write-behind state: latest unflushed data and its version token per file
+        self._pending: Dict[Path, List[Dict[str, Any]]] = {}
+        self._pending_versions: Dict[Path, str] = {}
+        self._pending_serial = 0
+        self._dirty_count = 0
+        self._pending_guard = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
         self._ensure_directories()
+        self.backups = BackupStore(self.backup_dir, max_backups=MAX_BACKUPS)
+        if durability != "immediate":
+            atexit.register(self.close)
     
     def _ensure_directories(self) -> None:
         """Ensure data and backup directories exist."""
@@ -67,65 +146,148 @@ class FileService:
         return self.data_dir / "user-preferences.json"
     
     @contextmanager
-    def _atomic_write(self, file_path: Path):
-        """Context manager for atomic file writes."""
-        # Create backup before writing
-        if file_path.exists():
-            self._create_backup(file_path)
-        
-        # Create temporary file
-        temp_file = file_path.with_suffix('.tmp')
+    def _file_lock(self, file_path: Path):
+        """
+        Hold the exclusive lock for a data file, across threads and processes.
+
+        Read-modify-write operations hold it from the read to the write so that
+        concurrent requests, background jobs and other worker processes cannot
+        lose each other's updates. The lock is reentrant within a thread.
+        Process-level locking uses fcntl advisory locks on a sidecar file under
+        data/.locks/, which works for any number of uvicorn workers on one host.
+        """
         try:
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                yield f
-            # Atomic move
-            temp_file.replace(file_path)
-        except Exception as e:
-            # Clean up temp file on error
-            if temp_file.exists():
-                temp_file.unlink()
-            raise e
-    
-    def _create_backup(self, file_path: Path) -> None:
-        """Create a backup of the file before modification."""
+            key = str(file_path.relative_to(self.data_dir)).replace(os.sep, "__")
+        except ValueError:
+            key = file_path.name
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.RLock())
+
+        with lock:
+            outermost = key not in self._lock_handles
+            if outermost:
+                handle = None
+                if fcntl is not None:
+                    locks_dir = self.data_dir / LOCKS_DIR_NAME
+                    locks_dir.mkdir(parents=True, exist_ok=True)
+                    handle = open(locks_dir / f"{key}.lock", 'a+')
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                self._lock_handles[key] = handle
+            try:
+                yield
+            finally:
+                if outermost:
+                    handle = self._lock_handles.pop(key)
+                    if handle is not None:
+                        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                        handle.close()
+
+    @staticmethod
+    def _file_version(file_path: Path) -> str:
+        """Version token of a data file; it changes with every save (each save replaces the file)."""
         try:
-            if not file_path.exists():
-                return
-            
-            # Create backup filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_name = f"{file_path.stem}_{timestamp}{file_path.suffix}"
-            backup_path = self.backup_dir / backup_name
-            
-            # Copy file to backup
-            shutil.copy2(file_path, backup_path)
-            
-            # Rotate old backups
-            self._rotate_backups(file_path.stem)
+            st = file_path.stat()
+        except FileNotFoundError:
+            return "0"
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}-{st.st_ino:x}"
+
+    def _data_version(self, file_path: Path) -> str:
+        """Version token of a file's current data, including saves that are not flushed yet."""
+        with self._pending_guard:
+            pending = self._pending_versions.get(file_path)
+        return pending if pending is not None else self._file_version(file_path)
+
+    def get_file_version(self, project_id: str, file_type: str) -> str:
+        """
+        Version token of a project data file, for optimistic concurrency.
+
+        Read it before loading data that will be saved back after slow work (such
+        as LLM calls) that should not hold the file lock, then pass it as
+        `expected_version` to the save.
+        """
+        return self._data_version(self._get_project_file_path(project_id, file_type))
+
+    @contextmanager
+    def _atomic_write(
+        self,
+        file_path: Path,
+        expected_version: Optional[str] = None,
+        durable: bool = False,
+        binary: bool = False
+    ):
+        """
+        Context manager for atomic file writes.
+
+        Args:
+            file_path: File to replace
+            expected_version: Only write if the file is still at this version
+            durable: fsync the file and its directory before returning
+            binary: Yield a binary file instead of a UTF-8 text file
+
+        Raises:
+            ConcurrentModificationError: If expected_version is given and the file has changed
+        """
+        with self._file_lock(file_path):
+            if expected_version is not None and self._data_version(file_path) != expected_version:
+                raise ConcurrentModificationError(f"{file_path.name} was modified concurrently")
+
+            # Create backup before writing
+            if file_path.exists():
+                self._create_backup(file_path)
             
-            logger.debug(f"Created backup: {backup_path}")
-        except Exception as e:
-            logger.warning(f"Failed to create backup for {file_path}: {e}")
+            # Unique temporary file, so concurrent writers never share one
+            fd, temp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+            temp_file = Path(temp_name)
+            try:
+                os.chmod(temp_name, FILE_MODE)
+                with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+                    yield f
+                    f.flush()
+                    if durable:
+                        os.fsync(f.fileno())
+                    self._record_io("write", file_path, os.fstat(f.fileno()).st_size)
+                # Atomic move
+                temp_file.replace(file_path)
+                if durable:
+                    self._fsync_dir(file_path.parent)
+            except Exception as e:
+                # Clean up temp file on error
+                if temp_file.exists():
+                    temp_file.unlink()
+                raise e
     
-    def _rotate_backups(self, file_stem: str) -> None:
-        """Rotate backups to keep only the most recent ones."""
+    @staticmethod
+    def _fsync_dir(directory: Path) -> None:
+        """Persist a rename in a directory (a no-op where directories cannot be opened)."""
         try:
-            # Find all backups for this file
-            backup_pattern = f"{file_stem}_*"
-            backups = list(self.backup_dir.glob(backup_pattern))
-            
-            # Sort by modification time (newest first)
-            backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-            
-            # Remove old backups
-            for backup in backups[MAX_BACKUPS:]:
-                try:
-                    backup.unlink()
-                    logger.debug(f"Removed old backup: {backup}")
-                except Exception as e:
-                    logger.warning(f"Failed to remove old backup {backup}: {e}")
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _create_backup(self, file_path: Path, force: bool = False) -> None:
+        """Snapshot the file before it is replaced (see BackupStore for the policy)."""
+        try:
+            self.backups.snapshot(file_path, force=force)
         except Exception as e:
-            logger.warning(f"Failed to rotate backups: {e}")
+            logger.warning(f"Failed to create backup for {file_path}: {e}")
+
+    @staticmethod
+    def _record_io(direction: str, file_path: Path, size: int) -> None:
+        """Count a data file read or write, labelled by file type rather than project."""
+        name = file_path.name
+        if file_path.parent.name.startswith("project-"):
+            # Files inside a project directory, such as chat partitions, count towards the directory
+            name = file_path.parent.name
+        kind = name.rsplit("-", 1)[-1] if name.startswith("project-") else name
+        kind = kind.split(".", 1)[0]
+        metrics.inc(f"samurai_file_{direction}s_total", file=kind)
+        metrics.inc(f"samurai_file_{direction}_bytes_total", size, file=kind)
 
     # Plain text helpers
     def _load_text(self, file_path: Path) -> str:
@@ -133,7 +295,9 @@ class FileService:
         try:
             if not file_path.exists():
                 return ""
-            return file_path.read_text(encoding='utf-8')
+            content = file_path.read_text(encoding='utf-8')
+            self._record_io("read", file_path, file_path.stat().st_size)
+            return content
         except Exception as e:
             logger.error(f"Error loading text from {file_path}: {e}")
             return ""
@@ -149,12 +313,18 @@ class FileService:
     
     def _load_json(self, file_path: Path) -> List[Dict[str, Any]]:
         """Load JSON data from file with error handling."""
+        with self._pending_guard:
+            pending = self._pending.get(file_path)
+        if pending is not None:
+            # Unflushed write-behind data is authoritative
+            return [dict(record) for record in pending]
         try:
             if not file_path.exists():
                 return []
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            content = file_path.read_bytes()
+            self._record_io("read", file_path, len(content))
+            data = loads(content)
             
             if not isinstance(data, list):
                 logger.warning(f"Invalid JSON structure in {file_path}, expected list")
@@ -168,20 +338,150 @@ class FileService:
             logger.error(f"Error loading {file_path}: {e}")
             return []
     
-    def _save_json(self, file_path: Path, data: List[Dict[str, Any]]) -> None:
-        """Save JSON data to file with atomic write."""
+    def _load_dict_json(self, file_path: Path) -> Dict[str, Any]:
+        """Load a JSON object from file with error handling."""
         try:
-            with self._atomic_write(file_path) as temp_file:
-                json.dump(data, temp_file, indent=2, ensure_ascii=False, default=str)
+            if not file_path.exists():
+                return {}
+            
+            content = file_path.read_bytes()
+            self._record_io("read", file_path, len(content))
+            data = loads(content)
+            
+            if not isinstance(data, dict):
+                logger.warning(f"Invalid JSON structure in {file_path}, expected object")
+                return {}
+            
+            return data
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error in {file_path}: {e}")
+            return {}
+        except Exception as e:
+            logger.error(f"Error loading {file_path}: {e}")
+            return {}
+    
+    def _save_json(self, file_path: Path, data: List[Dict[str, Any]], expected_version: Optional[str] = None) -> None:
+        """Save JSON data to file with atomic write, optionally only if it is still at expected_version."""
+        if self.durability != "immediate" and not self._closed:
+            with self._file_lock(file_path):
+                if expected_version is not None and self._data_version(file_path) != expected_version:
+                    raise ConcurrentModificationError(f"{file_path.name} was modified concurrently")
+                self._stage_write(file_path, data)
+            search_index.notify_saved(file_path, data)
+            return
+        try:
+            with self._atomic_write(file_path, expected_version, binary=True) as temp_file:
+                temp_file.write(dumps(data))
+        except ConcurrentModificationError:
+            raise
         except Exception as e:
             logger.error(f"Error saving {file_path}: {e}")
             raise
+        # A save that lands after close() supersedes anything still pending for the file
+        self._discard_pending(file_path)
+        # Keep the task/memory search index in step with the file
+        search_index.notify_saved(file_path, data)
+
+    # Write-behind
+    def _stage_write(self, file_path: Path, data: List[Dict[str, Any]]) -> None:
+        """Record data as the pending content of file_path, to be written by the next flush."""
+        with self._pending_guard:
+            self._pending[file_path] = data
+            self._pending_serial += 1
+            self._pending_versions[file_path] = f"pending-{self._pending_serial:x}"
+            self._dirty_count += 1
+            dirty = self._dirty_count
+        metrics.inc("samurai_write_behind_staged_total", file=file_path.name.rsplit("-", 1)[-1].split(".", 1)[0])
+        if self.durability == "interval":
+            if self._flusher is None or not self._flusher.is_alive():
+                self._start_flusher()
+            if dirty >= self.max_dirty:
+                self._flush_wakeup.set()
+
+    def _start_flusher(self) -> None:
+        # Not the flush lock: saves call this while holding a file lock, which flush() takes after it
+        with self._pending_guard:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name="file-service-flusher", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._flush_wakeup.wait(self.flush_interval)
+            self._flush_wakeup.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+
+    def pending_writes(self) -> int:
+        """Number of files with saves that have not been flushed to disk."""
+        with self._pending_guard:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Write every pending write-behind file to disk, with fsync.
+
+        Files that fail to write stay pending and are retried by the next flush.
+
+        Returns:
+            Number of files written
+        """
+        written = 0
+        with self._flush_lock:
+            with self._pending_guard:
+                paths = list(self._pending)
+                self._dirty_count = 0
+            for file_path in paths:
+                # Saves stage under the file lock, so the data cannot change while it is written
+                with self._file_lock(file_path):
+                    with self._pending_guard:
+                        data = self._pending.get(file_path)
+                    if data is None:
+                        continue
+                    try:
+                        with self._atomic_write(file_path, durable=True, binary=True) as temp_file:
+                            temp_file.write(dumps(data))
+                    except Exception as e:
+                        logger.error(f"Error flushing {file_path}: {e}")
+                        continue
+                    with self._pending_guard:
+                        del self._pending[file_path]
+                        del self._pending_versions[file_path]
+                    search_index.notify_saved(file_path, data)
+                written += 1
+        if written:
+            metrics.inc("samurai_write_behind_flushes_total")
+            logger.debug(f"Flushed {written} write-behind files")
+        return written
+
+    def close(self) -> None:
+        """
+        Stop the background flusher, flush everything pending and finish queued backups.
+
+        Later saves are written immediately.
+        """
+        self._closed = True
+        self._flush_wakeup.set()
+        flusher = self._flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join(timeout=max(5.0, self.flush_interval * 2))
+        self.flush()
+        self.backups.drain()
+
+    def _discard_pending(self, file_path: Path) -> None:
+        with self._pending_guard:
+            self._pending.pop(file_path, None)
+            self._pending_versions.pop(file_path, None)
 
     def _save_dict_json(self, file_path: Path, data: Dict[str, Any]) -> None:
         """Save dictionary JSON data to file with atomic write."""
         try:
-            with self._atomic_write(file_path) as temp_file:
-                json.dump(data, temp_file, indent=2, ensure_ascii=False, default=str)
+            with self._atomic_write(file_path, binary=True) as temp_file:
+                temp_file.write(dumps(data))
         except Exception as e:
             logger.error(f"Error saving {file_path}: {e}")
             raise
@@ -234,6 +534,32 @@ class FileService:
         
         return task
     
+    def _generate_task_embeddings_batch(self, tasks: List[Task]) -> List[Task]:
+        """Generate embeddings for every task missing one with a single batched model call."""
+        try:
+            pending = [task for task in tasks if not task.embedding]
+            if not pending:
+                return tasks
+            
+            embedding_texts = [
+                embedding_service.prepare_text_for_embedding(f"{task.title} {task.description}")
+                for task in pending
+            ]
+            embeddings = embedding_service.generate_embeddings_batch(embedding_texts)
+            
+            for task, embedding_text, embedding in zip(pending, embedding_texts, embeddings):
+                if embedding:
+                    task.embedding = embedding
+                    task.embedding_text = embedding_text
+                else:
+                    logger.warning(f"Failed to generate embedding for task: {task.title}")
+            logger.debug(f"Generated batch embeddings for {len(pending)} tasks")
+            
+        except Exception as e:
+            logger.error(f"Error generating batch task embeddings: {e}")
+        
+        return tasks
+    
     def _generate_memory_embedding(self, memory: Memory) -> Memory:
         """Generate embedding for a memory."""
         try:
@@ -306,45 +632,47 @@ class FileService:
         for item in data:
             if self._validate_project_data(item):
                 try:
-                    projects.append(Project(**item))
+                    projects.append(from_record(Project, item))
                 except Exception as e:
                     logger.warning(f"Invalid project data: {e}")
                     continue
         
-        logger.info(f"Loaded {len(projects)} projects")
+        logger.debug("Loaded %d projects", len(projects))
         return projects
     
     def save_project(self, project: Project) -> None:
         """Save or update a project."""
         self.ensure_data_dir()
-        projects = self.load_projects()
-        
-        # Remove existing project with same ID
-        projects = [p for p in projects if p.id != project.id]
-        projects.append(project)
-        
-        # Save with atomic write
         file_path = self._get_file_path("projects.json")
-        self._save_json(file_path, [p.dict() for p in projects])
+        with self._file_lock(file_path):
+            projects = self.load_projects()
+            
+            # Remove existing project with same ID
+            projects = [p for p in projects if p.id != project.id]
+            projects.append(project)
+            
+            # Save with atomic write
+            self._save_json(file_path, [to_record(p) for p in projects])
         logger.info(f"Saved project: {project.name}")
     
     def delete_project(self, project_id: str) -> bool:
         """Delete a project and all its associated data."""
         try:
             self.ensure_data_dir()
-            projects = self.load_projects()
-            
-            # Find and remove project
-            original_count = len(projects)
-            projects = [p for p in projects if p.id != project_id]
-            
-            if len(projects) == original_count:
-                logger.warning(f"Project not found for deletion: {project_id}")
-                return False
-            
-            # Save updated projects list
             file_path = self._get_file_path("projects.json")
-            self._save_json(file_path, [p.dict() for p in projects])
+            with self._file_lock(file_path):
+                projects = self.load_projects()
+                
+                # Find and remove project
+                original_count = len(projects)
+                projects = [p for p in projects if p.id != project_id]
+                
+                if len(projects) == original_count:
+                    logger.warning(f"Project not found for deletion: {project_id}")
+                    return False
+                
+                # Save updated projects list
+                self._save_json(file_path, [to_record(p) for p in projects])
             
             # Delete project-specific files
             self._delete_project_files(project_id)
@@ -365,15 +693,24 @@ class FileService:
     
     def _delete_project_files(self, project_id: str) -> None:
         """Delete all files associated with a project."""
-        file_types = ['memories', 'tasks', 'chat', 'sessions']
+        file_types = ['memories', 'memory_sections', 'tasks', 'chat', 'chat_manifest', 'sessions', 'detail_chunks', 'detail_state']
         for file_type in file_types:
             file_path = self._get_project_file_path(project_id, file_type)
+            self._discard_pending(file_path)
             if file_path.exists():
                 try:
                     file_path.unlink()
                     logger.debug(f"Deleted {file_path}")
                 except Exception as e:
                     logger.warning(f"Failed to delete {file_path}: {e}")
+        # Delete chat partitions
+        chat_dir = self._get_chat_dir(project_id)
+        if chat_dir.exists():
+            try:
+                shutil.rmtree(chat_dir)
+                logger.debug(f"Deleted {chat_dir}")
+            except Exception as e:
+                logger.warning(f"Failed to delete {chat_dir}: {e}")
         # Delete project detail text file
         detail_path = self._get_project_detail_path(project_id)
         if detail_path.exists():
@@ -394,7 +731,7 @@ class FileService:
         for item in data:
             if self._validate_memory_data(item):
                 try:
-                    memories.append(Memory(**item))
+                    memories.append(from_record(Memory, item))
                 except Exception as e:
                     logger.warning(f"Invalid memory data: {e}")
                     continue
@@ -407,42 +744,161 @@ class FileService:
         # Generate embedding if not present
         memory = self._generate_memory_embedding(memory)
         
-        memories = self.load_memories(project_id)
-        
-        # Remove existing memory with same ID
-        memories = [m for m in memories if m.id != memory.id]
-        memories.append(memory)
-        
         file_path = self._get_project_file_path(project_id, "memories")
-        self._save_json(file_path, [m.dict() for m in memories])
+        with self._file_lock(file_path):
+            memories = self.load_memories(project_id)
+            
+            # Remove existing memory with same ID
+            memories = [m for m in memories if m.id != memory.id]
+            memories.append(memory)
+            
+            self._save_json(file_path, [to_record(m) for m in memories])
         logger.info(f"Saved memory: {memory.id}")
     
-    def save_memories(self, project_id: str, memories: List[Memory]) -> None:
-        """Save multiple memories for a project with embedding generation."""
+    def save_memories(self, project_id: str, memories: List[Memory], expected_version: Optional[str] = None) -> None:
+        """
+        Replace all memories of a project, with embedding generation.
+
+        Args:
+            project_id: Project identifier
+            memories: The complete memory list
+            expected_version: Only save if the file is still at this version (see get_file_version)
+
+        Raises:
+            ConcurrentModificationError: If expected_version is given and no longer current
+        """
         # Generate embeddings for memories that don't have them
         for memory in memories:
             memory = self._generate_memory_embedding(memory)
         
         file_path = self._get_project_file_path(project_id, "memories")
-        self._save_json(file_path, [m.dict() for m in memories])
+        self._save_json(file_path, [to_record(m) for m in memories], expected_version)
         logger.info(f"Saved {len(memories)} memories for project {project_id}")
     
     def delete_memory(self, project_id: str, memory_id: str) -> bool:
         """Delete a specific memory."""
-        memories = self.load_memories(project_id)
-        
-        original_count = len(memories)
-        memories = [m for m in memories if m.id != memory_id]
-        
-        if len(memories) == original_count:
-            logger.warning(f"Memory not found for deletion: {memory_id}")
-            return False
-        
         file_path = self._get_project_file_path(project_id, "memories")
-        self._save_json(file_path, [m.dict() for m in memories])
+        with self._file_lock(file_path):
+            memories = self.load_memories(project_id)
+            
+            original_count = len(memories)
+            memories = [m for m in memories if m.id != memory_id]
+            
+            if len(memories) == original_count:
+                logger.warning(f"Memory not found for deletion: {memory_id}")
+                return False
+            
+            self._save_json(file_path, [to_record(m) for m in memories])
+        self.delete_memory_sections(project_id, memory_id)
         logger.info(f"Deleted memory: {memory_id}")
         return True
     
+    # Memory section operations (consolidated memories)
+    def load_memory_sections(self, project_id: str, memory_id: str) -> Optional[Dict[str, Any]]:
+        """Load the sections and metadata stored for one consolidated memory."""
+        self.ensure_data_dir()
+        store = self._load_dict_json(self._get_project_file_path(project_id, "memory_sections"))
+        return store.get(memory_id)
+
+    def save_memory_sections(
+        self,
+        project_id: str,
+        memory_id: str,
+        sections: Dict[str, Any],
+        metadata: Dict[str, Any]
+    ) -> None:
+        """Replace all sections stored for one consolidated memory."""
+        self.ensure_data_dir()
+        file_path = self._get_project_file_path(project_id, "memory_sections")
+        with self._file_lock(file_path):
+            store = self._load_dict_json(file_path)
+            store[memory_id] = {"sections": sections, "metadata": metadata}
+            self._save_dict_json(file_path, store)
+        logger.debug(f"Saved {len(sections)} sections for memory {memory_id}")
+
+    def update_memory_section(
+        self,
+        project_id: str,
+        memory_id: str,
+        section_key: str,
+        section: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Add or replace a single section of a consolidated memory."""
+        self.ensure_data_dir()
+        file_path = self._get_project_file_path(project_id, "memory_sections")
+        with self._file_lock(file_path):
+            store = self._load_dict_json(file_path)
+            entry = store.setdefault(memory_id, {"sections": {}, "metadata": {}})
+            entry["sections"][section_key] = section
+            if metadata is not None:
+                entry["metadata"] = metadata
+            self._save_dict_json(file_path, store)
+        logger.debug(f"Updated section {section_key} of memory {memory_id}")
+
+    def delete_memory_sections(self, project_id: str, memory_id: str) -> bool:
+        """Remove the stored sections of a consolidated memory."""
+        file_path = self._get_project_file_path(project_id, "memory_sections")
+        if not file_path.exists():
+            return False
+        with self._file_lock(file_path):
+            store = self._load_dict_json(file_path)
+            if store.pop(memory_id, None) is None:
+                return False
+            self._save_dict_json(file_path, store)
+        return True
+
+    def migrate_memory_section_sidecars(self) -> int:
+        """
+        Fold legacy memory-{id}-sections.json sidecar files into the per-project section store.
+
+        Returns:
+            Number of sidecar files migrated
+        """
+        sidecars = list(self.data_dir.glob("memory-*-sections.json"))
+        if not sidecars:
+            return 0
+
+        # Consolidated memory ids are "<project_id>_<category>_consolidated"
+        project_ids = sorted((p.id for p in self.load_projects()), key=len, reverse=True)
+        migrated_by_project: Dict[str, Dict[str, Any]] = {}
+        migrated_files: List[Path] = []
+
+        for sidecar in sidecars:
+            try:
+                with open(sidecar, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                memory_id = data.get("memory_id") or sidecar.name[len("memory-"):-len("-sections.json")]
+                project_id = next((pid for pid in project_ids if memory_id.startswith(f"{pid}_")), None)
+                if project_id is None:
+                    logger.warning(f"Skipping sections sidecar for unknown project: {sidecar}")
+                    continue
+                migrated_by_project.setdefault(project_id, {})[memory_id] = {
+                    "sections": data.get("sections", {}),
+                    "metadata": data.get("metadata", {})
+                }
+                migrated_files.append(sidecar)
+            except Exception as e:
+                logger.warning(f"Failed to read sections sidecar {sidecar}: {e}")
+
+        for project_id, entries in migrated_by_project.items():
+            file_path = self._get_project_file_path(project_id, "memory_sections")
+            with self._file_lock(file_path):
+                store = self._load_dict_json(file_path)
+                for memory_id, entry in entries.items():
+                    # Sections written through the store are newer than any sidecar
+                    store.setdefault(memory_id, entry)
+                self._save_dict_json(file_path, store)
+
+        for sidecar in migrated_files:
+            try:
+                sidecar.unlink()
+            except Exception as e:
+                logger.warning(f"Failed to remove migrated sidecar {sidecar}: {e}")
+
+        logger.info(f"Migrated {len(migrated_files)} memory section sidecars")
+        return len(migrated_files)
+
     # Task operations
     def load_tasks(self, project_id: str) -> List[Task]:
         """Load all tasks for a project."""
@@ -454,7 +910,7 @@ class FileService:
         for item in data:
             if self._validate_task_data(item):
                 try:
-                    tasks.append(Task(**item))
+                    tasks.append(from_record(Task, item))
                 except Exception as e:
                     logger.warning(f"Invalid task data: {e}")
                     continue
@@ -464,14 +920,23 @@ class FileService:
         logger.debug(f"Loaded {len(tasks)} tasks for project {project_id}")
         return tasks
     
-    def save_tasks(self, project_id: str, tasks: List[Task]) -> None:
-        """Save multiple tasks for a project with embedding generation."""
+    def save_tasks(self, project_id: str, tasks: List[Task], expected_version: Optional[str] = None) -> None:
+        """
+        Replace all tasks of a project, with embedding generation.
+
+        Args:
+            project_id: Project identifier
+            tasks: The complete task list
+            expected_version: Only save if the file is still at this version (see get_file_version)
+
+        Raises:
+            ConcurrentModificationError: If expected_version is given and no longer current
+        """
         # Generate embeddings for tasks that don't have them
-        for task in tasks:
-            task = self._generate_task_embedding(task)
+        tasks = self._generate_task_embeddings_batch(tasks)
         
         file_path = self._get_project_file_path(project_id, "tasks")
-        self._save_json(file_path, [t.dict() for t in tasks])
+        self._save_json(file_path, [to_record(t) for t in tasks], expected_version)
         logger.info(f"Saved {len(tasks)} tasks for project {project_id}")
     
     def save_task(self, project_id: str, task: Task) -> None:
@@ -479,25 +944,54 @@ class FileService:
         # Generate embedding if not present
         task = self._generate_task_embedding(task)
         
-        tasks = self.load_tasks(project_id)
+        file_path = self._get_project_file_path(project_id, "tasks")
+        with self._file_lock(file_path):
+            tasks = self.load_tasks(project_id)
+            
+            # Remove existing task with same ID
+            tasks = [t for t in tasks if t.id != task.id]
+            tasks.append(task)
+            
+            # Sort by order
+            tasks.sort(key=lambda x: x.order)
+            
+            self._save_json(file_path, [to_record(t) for t in tasks])
+        logger.info(f"Saved task: {task.title}")
+    
+    def add_tasks(self, project_id: str, new_tasks: List[Task]) -> None:
+        """
+        Append several new tasks to a project in a single write.
         
-        # Remove existing task with same ID
-        tasks = [t for t in tasks if t.id != task.id]
-        tasks.append(task)
+        Embeddings for all new tasks are generated in one batch and the task
+        file is rewritten once, instead of once per task as with save_task.
+        """
+        if not new_tasks:
+            return
         
-        # Sort by order
-        tasks.sort(key=lambda x: x.order)
+        new_tasks = self._generate_task_embeddings_batch(new_tasks)
         
+        new_ids = {task.id for task in new_tasks}
         file_path = self._get_project_file_path(project_id, "tasks")
-        self._save_json(file_path, [t.dict() for t in tasks])
-        logger.info(f"Saved task: {task.title}")
+        with self._file_lock(file_path):
+            tasks = [t for t in self.load_tasks(project_id) if t.id not in new_ids]
+            tasks.extend(new_tasks)
+            
+            # Sort by order
+            tasks.sort(key=lambda x: x.order)
+            
+            self._save_json(file_path, [to_record(t) for t in tasks])
+        logger.info(f"Saved {len(new_tasks)} new tasks for project {project_id}")
     
     def get_task_by_id(self, project_id: str, task_id: str) -> Optional[Task]:
-        """Get a specific task by ID."""
-        tasks = self.load_tasks(project_id)
-        for task in tasks:
-            if task.id == task_id:
-                return task
+        """Get a specific task by ID, building a model for that task only."""
+        self.ensure_data_dir()
+        data = self._load_json(self._get_project_file_path(project_id, "tasks"))
+        for item in data:
+            if item.get("id") == task_id and self._validate_task_data(item):
+                try:
+                    return from_record(Task, item)
+                except Exception as e:
+                    logger.warning(f"Invalid task data: {e}")
         return None
 
     def get_task_by_id_global(self, task_id: str) -> Optional[Task]:
@@ -511,57 +1005,167 @@ class FileService:
 
     def update_task_status(self, project_id: str, task_id: str, completed: bool) -> bool:
         """Update task completion status."""
-        tasks = self.load_tasks(project_id)
-        
-        for task in tasks:
-            if task.id == task_id:
-                task.completed = completed
-                task.status = "completed" if completed else "pending"
-                task.updated_at = datetime.utcnow()
+        with self._file_lock(self._get_project_file_path(project_id, "tasks")):
+            tasks = self.load_tasks(project_id)
+        
+            for task in tasks:
+                if task.id == task_id:
+                    task.completed = completed
+                    task.status = "completed" if completed else "pending"
+                    task.updated_at = datetime.utcnow()
                 
-                # Regenerate embedding if task content changed significantly
-                task = self._generate_task_embedding(task)
+                    # Regenerate embedding if task content changed significantly
+                    task = self._generate_task_embedding(task)
                 
-                self.save_tasks(project_id, tasks)
-                logger.info(f"Updated task status: {task_id} -> {'completed' if completed else 'pending'}")
-                return True
+                    self.save_tasks(project_id, tasks)
+                    logger.info(f"Updated task status: {task_id} -> {'completed' if completed else 'pending'}")
+                    return True
         
         logger.warning(f"Task not found for status update: {task_id}")
         return False
 
     def delete_task(self, project_id: str, task_id: str) -> bool:
         """Delete a specific task."""
-        tasks = self.load_tasks(project_id)
-        
-        # Also delete children recursively
-        to_delete = {task_id}
-        changed = True
-        while changed:
-            changed = False
-            for t in list(tasks):
-                if getattr(t, 'parent_task_id', None) in to_delete:
-                    to_delete.add(t.id)
-                    changed = True
-        
-        original_count = len(tasks)
-        tasks = [t for t in tasks if t.id not in to_delete]
-        
-        if len(tasks) == original_count:
-            logger.warning(f"Task not found for deletion: {task_id}")
-            return False
-        
         file_path = self._get_project_file_path(project_id, "tasks")
-        self._save_json(file_path, [t.dict() for t in tasks])
+        with self._file_lock(file_path):
+            tasks = self.load_tasks(project_id)
+        
+            # Also delete children recursively
+            to_delete = {task_id}
+            changed = True
+            while changed:
+                changed = False
+                for t in list(tasks):
+                    if getattr(t, 'parent_task_id', None) in to_delete and t.id not in to_delete:
+                        to_delete.add(t.id)
+                        changed = True
+        
+            original_count = len(tasks)
+            tasks = [t for t in tasks if t.id not in to_delete]
+        
+            if len(tasks) == original_count:
+                logger.warning(f"Task not found for deletion: {task_id}")
+                return False
+        
+            self._save_json(file_path, [to_record(t) for t in tasks])
         logger.info(f"Deleted task: {task_id}")
         return True
     
     # Chat operations
-    def load_chat_history(self, project_id: str) -> List[ChatMessage]:
-        """Load all chat messages for a project with backward compatibility for legacy format."""
-        self.ensure_data_dir()
-        file_path = self._get_project_file_path(project_id, "chat")
-        data = self._load_json(file_path)
-        
+    #
+    # Chat history is partitioned by session: project-{id}-chat/ holds one JSONL
+    # file per session, appended to one line per message, and
+    # project-{id}-chat_manifest.json records each session's file, message count,
+    # time range and whether it is sealed. Ended sessions are sealed read-only
+    # (gzip-compressed unless SAMURAI_CHAT_SEAL_COMPRESS=0), so live turns only
+    # ever touch the live session's file.
+    def _get_chat_dir(self, project_id: str) -> Path:
+        """Get the directory holding a project's per-session chat partitions."""
+        return self.data_dir / f"project-{project_id}-chat"
+
+    @staticmethod
+    def _chat_partition_name(session_id: str, sealed: bool = False) -> str:
+        """File name for a session's partition; unusual session ids are hashed."""
+        stem = session_id if _SAFE_SESSION_ID.match(session_id or "") else (
+            "h" + hashlib.sha1((session_id or "").encode("utf-8")).hexdigest()[:16]
+        )
+        return f"session-{stem}.jsonl" + (".gz" if sealed and CHAT_SEAL_COMPRESS else "")
+
+    def _load_chat_manifest(self, project_id: str) -> Dict[str, Any]:
+        """Load the chat manifest, migrating or rebuilding the partitions if needed."""
+        manifest_path = self._get_project_file_path(project_id, "chat_manifest")
+        legacy_path = self._get_project_file_path(project_id, "chat")
+        if not legacy_path.exists():
+            manifest = self._load_dict_json(manifest_path)
+            if manifest.get("version") == CHAT_MANIFEST_VERSION:
+                return manifest
+
+        with self._file_lock(manifest_path):
+            # Another writer may have migrated or rebuilt it while we waited
+            if legacy_path.exists():
+                return self._migrate_legacy_chat(project_id)
+            manifest = self._load_dict_json(manifest_path)
+            if manifest.get("version") == CHAT_MANIFEST_VERSION:
+                return manifest
+            return self._rebuild_chat_manifest(project_id)
+
+    def _save_chat_manifest(self, project_id: str, manifest: Dict[str, Any]) -> None:
+        """Persist the chat manifest."""
+        self._save_dict_json(self._get_project_file_path(project_id, "chat_manifest"), manifest)
+
+    @staticmethod
+    def _chat_manifest_entry(file_name: str, records: List[Dict[str, Any]], sealed: bool) -> Dict[str, Any]:
+        """Manifest entry describing one session partition."""
+        timestamps = [str(record.get("created_at")) for record in records]
+        return {
+            "file": file_name,
+            "sealed": sealed,
+            "count": len(records),
+            "first_at": min(timestamps, default=None),
+            "last_at": max(timestamps, default=None)
+        }
+
+    def _rebuild_chat_manifest(self, project_id: str) -> Dict[str, Any]:
+        """Recreate a missing or outdated manifest by scanning the partition files."""
+        manifest = {"version": CHAT_MANIFEST_VERSION, "sessions": {}}
+        chat_dir = self._get_chat_dir(project_id)
+        if not chat_dir.exists():
+            return manifest
+
+        for path in sorted(chat_dir.glob("session-*.jsonl*")):
+            records = self._read_chat_partition(path)
+            if not records:
+                continue
+            session_id = records[0].get("session_id", "")
+            sealed = path.suffix == ".gz" or not path.stat().st_mode & stat.S_IWUSR
+            manifest["sessions"][session_id] = self._chat_manifest_entry(path.name, records, sealed)
+        self._save_chat_manifest(project_id, manifest)
+        logger.info(f"Rebuilt chat manifest for project {project_id}: {len(manifest['sessions'])} sessions")
+        return manifest
+
+    def _migrate_legacy_chat(self, project_id: str) -> Dict[str, Any]:
+        """Split a legacy single-file chat history into per-session partitions."""
+        legacy_path = self._get_project_file_path(project_id, "chat")
+        messages = self._convert_legacy_chat_records(project_id, self._load_json(legacy_path))
+
+        manifest = {"version": CHAT_MANIFEST_VERSION, "sessions": {}}
+        self._write_chat_partitions(project_id, manifest, messages)
+
+        # Every session but the most recent one has ended
+        latest = self.get_latest_session(project_id)
+        for session_id in list(manifest["sessions"]):
+            if latest is None or session_id != latest.id:
+                self._seal_chat_partition(project_id, manifest, session_id)
+        self._save_chat_manifest(project_id, manifest)
+
+        # The legacy file is removed below, so it is backed up regardless of the snapshot interval
+        self._create_backup(legacy_path, force=True)
+        legacy_path.unlink()
+        logger.info(f"Migrated {len(messages)} chat messages for project {project_id} "
+                    f"into {len(manifest['sessions'])} session partitions")
+        return manifest
+
+    def migrate_chat_partitions(self) -> int:
+        """
+        Move every project still on the legacy single-file chat history to session partitions.
+
+        Returns:
+            Number of projects migrated
+        """
+        migrated = 0
+        for legacy_path in self.data_dir.glob("project-*-chat.json"):
+            project_id = legacy_path.name[len("project-"):-len("-chat.json")]
+            try:
+                self._load_chat_manifest(project_id)
+                migrated += 1
+            except Exception as e:
+                logger.warning(f"Failed to migrate chat history for project {project_id}: {e}")
+        if migrated:
+            logger.info(f"Migrated chat history of {migrated} projects to session partitions")
+        return migrated
+
+    def _convert_legacy_chat_records(self, project_id: str, data: List[Dict[str, Any]]) -> List[ChatMessage]:
+        """Convert stored chat records, including the legacy role/content format, to messages."""
         messages = []
         for item in data:
             try:
@@ -604,45 +1208,361 @@ class FileService:
                     else:
                         logger.warning(f"Invalid chat message data: {item}")
                         continue
-                
+
                 # Create ChatMessage object
-                messages.append(ChatMessage(**converted_item))
-                
+                messages.append(from_record(ChatMessage, converted_item))
+
             except Exception as e:
                 logger.warning(f"Error processing chat message: {e}, data: {item}")
                 continue
-        
+
         # Sort by creation time
         messages.sort(key=lambda x: x.created_at)
+        return messages
+
+    def _read_chat_partition(self, path: Path, tail: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Read the records of one session partition.
+
+        Args:
+            path: Partition file
+            tail: Read only the last `tail` records, seeking from the end of the file
+                  instead of reading the whole partition (live partitions only)
+
+        Returns:
+            Records in file order; a torn or corrupt line is skipped
+        """
+        try:
+            if not path.exists():
+                return []
+            if path.suffix == ".gz":
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+                size = path.stat().st_size
+            elif tail is not None:
+                lines, size = self._read_tail_lines(path, tail)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+                    size = os.fstat(f.fileno()).st_size
+            self._record_io("read", path, size)
+        except Exception as e:
+            logger.error(f"Error loading {path}: {e}")
+            return []
+
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                records.append(loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping corrupt chat record in {path}")
+        return records[-tail:] if tail is not None else records
+
+    @staticmethod
+    def _read_tail_lines(path: Path, count: int) -> Tuple[List[str], int]:
+        """Read the last `count` lines of a file block by block from its end."""
+        with open(path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            data = b""
+            # One newline more than requested guarantees the first wanted line is whole
+            while position > 0 and data.count(b"\n") <= count:
+                step = min(CHAT_TAIL_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.split(b"\n")
+        if position > 0:
+            lines = lines[1:]
+        lines = [line.decode('utf-8') for line in lines if line.strip()]
+        return lines[-count:] if count else [], len(data)
+
+    def _write_chat_partition(self, path: Path, records: List[Dict[str, Any]]) -> None:
+        """Rewrite a whole partition file atomically; .gz partitions are compressed."""
+        content = b"".join(dumps(record, pretty=False) + b"\n" for record in records)
+        if path.suffix != ".gz":
+            with self._atomic_write(path, binary=True) as temp_file:
+                temp_file.write(content)
+            return
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        temp_file = Path(temp_name)
+        try:
+            os.chmod(temp_name, FILE_MODE)
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wb') as f:
+                f.write(content)
+            self._record_io("write", path, temp_file.stat().st_size)
+            temp_file.replace(path)
+        except Exception:
+            if temp_file.exists():
+                temp_file.unlink()
+            raise
+
+    def _append_chat_records(self, path: Path, records: List[Dict[str, Any]]) -> None:
+        """Append records to a live partition in one write, without rewriting it."""
+        lines = b"".join(dumps(record, pretty=False) + b"\n" for record in records)
+        with open(path, 'ab') as f:
+            f.write(lines)
+        self._record_io("write", path, len(lines))
+
+    def _write_chat_partitions(self, project_id: str, manifest: Dict[str, Any], messages: List[ChatMessage]) -> None:
+        """Replace a project's partitions with the given messages, keeping sealed sessions sealed."""
+        # Partitions are kept in chronological order so the newest messages are at the tail
+        by_session: Dict[str, List[Dict[str, Any]]] = {}
+        for message in sorted(messages, key=lambda m: self._parse_chat_timestamp(m.created_at)):
+            by_session.setdefault(message.session_id, []).append(to_record(message))
+
+        chat_dir = self._get_chat_dir(project_id)
+        chat_dir.mkdir(parents=True, exist_ok=True)
+        previous = manifest["sessions"]
+        manifest["sessions"] = {}
+        for session_id, records in by_session.items():
+            sealed = previous.get(session_id, {}).get("sealed", False)
+            file_name = self._chat_partition_name(session_id, sealed)
+            path = chat_dir / file_name
+            if path.exists():
+                path.chmod(0o644)
+            self._write_chat_partition(path, records)
+            if sealed:
+                path.chmod(0o444)
+            manifest["sessions"][session_id] = self._chat_manifest_entry(file_name, records, sealed)
+
+        for session_id, entry in previous.items():
+            stale = chat_dir / entry["file"]
+            if session_id not in by_session or manifest["sessions"][session_id]["file"] != entry["file"]:
+                if stale.exists():
+                    stale.chmod(0o644)
+                    stale.unlink()
+
+    def _seal_chat_partition(self, project_id: str, manifest: Dict[str, Any], session_id: str) -> bool:
+        """Seal one partition in the manifest; the caller saves the manifest."""
+        entry = manifest["sessions"].get(session_id)
+        if entry is None or entry.get("sealed"):
+            return False
+
+        chat_dir = self._get_chat_dir(project_id)
+        live_path = chat_dir / entry["file"]
+        sealed_name = self._chat_partition_name(session_id, sealed=True)
+        sealed_path = chat_dir / sealed_name
+        if sealed_name != entry["file"]:
+            self._write_chat_partition(sealed_path, self._read_chat_partition(live_path))
+            live_path.unlink()
+        sealed_path.chmod(0o444)
+        entry.update(file=sealed_name, sealed=True)
+        return True
+
+    def _unseal_chat_partition(self, project_id: str, manifest: Dict[str, Any], session_id: str) -> None:
+        """Turn a sealed partition back into a live one so a late message can be appended."""
+        entry = manifest["sessions"][session_id]
+        chat_dir = self._get_chat_dir(project_id)
+        sealed_path = chat_dir / entry["file"]
+        live_name = self._chat_partition_name(session_id)
+        sealed_path.chmod(0o644)
+        if live_name != entry["file"]:
+            self._write_chat_partition(chat_dir / live_name, self._read_chat_partition(sealed_path))
+            sealed_path.unlink()
+        entry.update(file=live_name, sealed=False)
+        logger.info(f"Reopened sealed chat session {session_id} in project {project_id}")
+
+    def seal_chat_session(self, project_id: str, session_id: str) -> bool:
+        """
+        Seal an ended session's chat partition as read-only, compressing it if configured.
+
+        Returns:
+            True if the session was sealed by this call
+        """
+        with self._file_lock(self._get_project_file_path(project_id, "chat_manifest")):
+            manifest = self._load_chat_manifest(project_id)
+            if not self._seal_chat_partition(project_id, manifest, session_id):
+                return False
+            self._save_chat_manifest(project_id, manifest)
+        logger.info(f"Sealed chat session {session_id} in project {project_id}")
+        return True
+
+    def _load_chat_records(
+        self,
+        project_id: str,
+        session_id: Optional[str] = None,
+        tail: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Load raw chat records from the partitions.
+
+        Args:
+            project_id: Project identifier
+            session_id: Read only this session's partition (all sessions when None)
+            tail: With a session, read only its last `tail` records
+
+        Returns:
+            (records, total): total is the number of stored messages in scope,
+            which exceeds len(records) when only the tail was read
+        """
+        manifest = self._load_chat_manifest(project_id)
+        chat_dir = self._get_chat_dir(project_id)
+        if session_id is not None:
+            entry = manifest["sessions"].get(session_id)
+            if entry is None:
+                return [], 0
+            records = self._read_chat_partition(chat_dir / entry["file"], tail=tail)
+            return records, max(entry.get("count", 0), len(records))
+
+        records = []
+        for entry in manifest["sessions"].values():
+            records.extend(self._read_chat_partition(chat_dir / entry["file"]))
+        return records, len(records)
+
+    def load_chat_history(self, project_id: str) -> List[ChatMessage]:
+        """Load all chat messages for a project, across all sessions, in chronological order."""
+        messages, _ = self.load_chat_messages_page(project_id, limit=None)
         logger.debug(f"Loaded {len(messages)} chat messages for project {project_id}")
         return messages
-    
+
+    @staticmethod
+    def _parse_chat_timestamp(value: Any) -> datetime:
+        """Parse a stored or cursor timestamp into a naive UTC datetime for ordering."""
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            try:
+                parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+            except ValueError:
+                return datetime.min
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    def load_chat_messages_page(
+        self,
+        project_id: str,
+        session_id: Optional[str] = None,
+        limit: Optional[int] = DEFAULT_CHAT_PAGE_SIZE,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Tuple[List[ChatMessage], bool]:
+        """
+        Load one page of chat messages in chronological order.
+
+        Without a cursor the page is the newest `limit` messages; for a single
+        session only the tail of its partition is read. With a cursor the
+        partition is read in full, and only the requested window is validated
+        into ChatMessage models.
+
+        Args:
+            project_id: Project identifier
+            session_id: Restrict to one session (all sessions when None)
+            limit: Page size; None returns every matching message
+            before: Message id or ISO timestamp; return the messages just older than it
+            after: Message id or ISO timestamp; return the messages just newer than it
+
+        Returns:
+            (messages, has_more): has_more is True when further messages exist
+            beyond the page in the paging direction (older, or newer with `after`)
+
+        Raises:
+            ValueError: If a cursor is neither a known message id nor a timestamp
+        """
+        self.ensure_data_dir()
+        tail = limit if limit is not None and not before and not after else None
+        data, total = self._load_chat_records(project_id, session_id, tail=tail)
+        records = [item for item in data if self._validate_chat_message_data(item)]
+
+        # Stable sort keeps append order for equal timestamps
+        keyed = sorted(
+            ((self._parse_chat_timestamp(item.get("created_at")), index, item) for index, item in enumerate(records)),
+            key=lambda entry: (entry[0], entry[1])
+        )
+        timestamps = [entry[0] for entry in keyed]
+        positions = {entry[2].get("id"): position for position, entry in enumerate(keyed)}
+
+        def resolve(cursor: str, side: str) -> int:
+            if cursor in positions:
+                return positions[cursor] + (1 if side == "after" else 0)
+            try:
+                moment = datetime.fromisoformat(cursor.replace("Z", "+00:00"))
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor}") from None
+            moment = self._parse_chat_timestamp(moment)
+            if side == "after":
+                return bisect.bisect_right(timestamps, moment)
+            return bisect.bisect_left(timestamps, moment)
+
+        start = resolve(after, "after") if after else 0
+        end = resolve(before, "before") if before else len(keyed)
+        end = max(start, end)
+        if limit is not None and end - start > limit:
+            has_more = True
+            if after:
+                end = start + limit
+            else:
+                start = end - limit
+        else:
+            # A tail read leaves older messages unread
+            has_more = end < len(keyed) if after else start > 0 or (tail is not None and total > len(data))
+
+        messages = []
+        for _, _, item in keyed[start:end]:
+            try:
+                messages.append(from_record(ChatMessage, item))
+            except Exception as e:
+                logger.warning(f"Error processing chat message: {e}, data: {item}")
+        return messages, has_more
+
     def load_chat_messages(self, project_id: str) -> List[ChatMessage]:
         """Alias for load_chat_history for backward compatibility."""
         return self.load_chat_history(project_id)
-    
+
     def save_chat_message(self, project_id: str, message: ChatMessage) -> None:
-        """Save a single chat message with embedding generation."""
-        # Generate embedding if not present
-        message = self._generate_chat_message_embedding(message)
-        
-        messages = self.load_chat_history(project_id)
-        messages.append(message)
-        
-        file_path = self._get_project_file_path(project_id, "chat")
-        self._save_json(file_path, [m.dict() for m in messages])
-        logger.info(f"Saved chat message: {message.id}")
-    
+        """Append a single chat message to its session's partition, with embedding generation."""
+        self.save_chat_messages(project_id, [message])
+
+    def save_chat_messages(self, project_id: str, messages: List[ChatMessage]) -> None:
+        """
+        Append chat messages to their sessions' partitions, with embedding generation.
+
+        Each partition gets one append and the manifest is saved once, however
+        many messages are passed.
+        """
+        # Generate embeddings if not present
+        messages = [self._generate_chat_message_embedding(message) for message in messages]
+        by_session: Dict[str, List[Dict[str, Any]]] = {}
+        for message in messages:
+            by_session.setdefault(message.session_id, []).append(to_record(message))
+
+        # The manifest lock covers the partition appends as well
+        with self._file_lock(self._get_project_file_path(project_id, "chat_manifest")):
+            manifest = self._load_chat_manifest(project_id)
+            chat_dir = self._get_chat_dir(project_id)
+            chat_dir.mkdir(parents=True, exist_ok=True)
+
+            for session_id, records in by_session.items():
+                entry = manifest["sessions"].get(session_id)
+                if entry is not None and entry.get("sealed"):
+                    self._unseal_chat_partition(project_id, manifest, session_id)
+                if entry is None:
+                    entry = manifest["sessions"][session_id] = self._chat_manifest_entry(
+                        self._chat_partition_name(session_id), [], sealed=False
+                    )
+                self._append_chat_records(chat_dir / entry["file"], records)
+
+                timestamps = [str(record.get("created_at")) for record in records]
+                entry["count"] += len(records)
+                entry["first_at"] = min([entry["first_at"]] + timestamps if entry["first_at"] else timestamps)
+                entry["last_at"] = max([entry["last_at"]] + timestamps if entry["last_at"] else timestamps)
+            self._save_chat_manifest(project_id, manifest)
+        logger.info("Saved %d chat messages for project %s", len(messages), project_id)
+
     def save_chat_history(self, project_id: str, messages: List[ChatMessage]) -> None:
-        """Save multiple chat messages with embedding generation."""
+        """Replace a project's chat history with the given messages, with embedding generation."""
         # Generate embeddings for messages that don't have them
         for message in messages:
             message = self._generate_chat_message_embedding(message)
-        
-        file_path = self._get_project_file_path(project_id, "chat")
-        self._save_json(file_path, [m.dict() for m in messages])
+
+        with self._file_lock(self._get_project_file_path(project_id, "chat_manifest")):
+            manifest = self._load_chat_manifest(project_id)
+            self._write_chat_partitions(project_id, manifest, messages)
+            self._save_chat_manifest(project_id, manifest)
         logger.info(f"Saved {len(messages)} chat messages for project {project_id}")
-    
+
     # Session management methods
     def load_sessions(self, project_id: str) -> List["Session"]:
         """Load sessions for a project."""
@@ -655,7 +1575,7 @@ class FileService:
             try:
                 # Import Session here to avoid circular imports
                 from models import Session
-                sessions.append(Session(**item))
+                sessions.append(from_record(Session, item))
             except Exception as e:
                 logger.warning(f"Invalid session data: {e}")
                 continue
@@ -667,17 +1587,18 @@ class FileService:
     
     def save_session(self, project_id: str, session: "Session") -> None:
         """Save a single session."""
-        sessions = self.load_sessions(project_id)
-        
-        # Update existing session or add new one
-        existing_index = next((i for i, s in enumerate(sessions) if s.id == session.id), None)
-        if existing_index is not None:
-            sessions[existing_index] = session
-        else:
-            sessions.append(session)
-        
         file_path = self._get_project_file_path(project_id, "sessions")
-        self._save_json(file_path, [s.dict() for s in sessions])
+        with self._file_lock(file_path):
+            sessions = self.load_sessions(project_id)
+            
+            # Update existing session or add new one
+            existing_index = next((i for i, s in enumerate(sessions) if s.id == session.id), None)
+            if existing_index is not None:
+                sessions[existing_index] = session
+            else:
+                sessions.append(session)
+            
+            self._save_json(file_path, [to_record(s) for s in sessions])
         logger.debug(f"Saved session: {session.id}")
     
     def get_session_by_id(self, project_id: str, session_id: str) -> Optional["Session"]:
@@ -711,38 +1632,30 @@ class FileService:
     
     def update_session_activity(self, project_id: str, session_id: str) -> None:
         """Update the last activity timestamp for a session."""
-        session = self.get_session_by_id(project_id, session_id)
-        if session:
-            from datetime import datetime
-            session.last_activity = datetime.now()
-            self.save_session(project_id, session)
+        self.update_sessions_activity(project_id, [session_id])
+
+    def update_sessions_activity(self, project_id: str, session_ids: List[str]) -> None:
+        """Update the last activity timestamp of several sessions with one write."""
+        file_path = self._get_project_file_path(project_id, "sessions")
+        with self._file_lock(file_path):
+            sessions = self.load_sessions(project_id)
+            wanted = set(session_ids)
+            now = datetime.now()
+            touched = [session for session in sessions if session.id in wanted]
+            if not touched:
+                return
+            for session in touched:
+                session.last_activity = now
+            self._save_json(file_path, [to_record(session) for session in sessions])
     
     def load_chat_messages_by_session(self, project_id: str, session_id: str) -> List[ChatMessage]:
-        """Load chat messages for a specific session with improved error handling."""
-        messages = self.load_chat_history(project_id)
-        logger.info(f"Total messages loaded for project {project_id}: {len(messages)}")
-        
+        """Load all chat messages of a session in chronological order."""
         if not session_id:
             logger.warning(f"Empty session_id provided for project {project_id}")
             return []
         
-        # Debug: Check session_id field in messages
-        for i, msg in enumerate(messages[:5]):  # Check first 5 messages
-            msg_session_id = getattr(msg, 'session_id', None)
-            logger.info(f"Message {i}: session_id = {msg_session_id}")
-        
-        # Filter messages by session_id, handling both string and None values
-        session_messages = []
-        for m in messages:
-            msg_session_id = getattr(m, 'session_id', None)
-            if msg_session_id == session_id:
-                session_messages.append(m)
-        
-        logger.info(f"Messages matching session {session_id}: {len(session_messages)}")
-        
-        # Sort by created_at
-        session_messages.sort(key=lambda x: x.created_at)
-        logger.debug(f"Loaded {len(session_messages)} messages for session {session_id}")
+        session_messages, _ = self.load_chat_messages_page(project_id, session_id, limit=None)
+        logger.debug("Loaded %d messages for session %s", len(session_messages), session_id)
         return session_messages
     
     # Utility methods
@@ -750,7 +1663,7 @@ class FileService:
         """Get statistics for a project."""
         memories = self.load_memories(project_id)
         tasks = self.load_tasks(project_id)
-        messages = self.load_chat_history(project_id)
+        chat_sessions = self._load_chat_manifest(project_id)["sessions"]
         
         completed_tasks = sum(1 for task in tasks if task.completed)
         
@@ -758,7 +1671,7 @@ class FileService:
             "memories": len(memories),
             "tasks": len(tasks),
             "completed_tasks": completed_tasks,
-            "chat_messages": len(messages)
+            "chat_messages": sum(entry.get("count", 0) for entry in chat_sessions.values())
         }
     
     def cleanup_orphaned_files(self) -> int:
@@ -768,17 +1681,25 @@ class FileService:
         
         cleaned_count = 0
         for file_path in self.data_dir.glob("project-*-*.json"):
-            # Extract project ID from filename
-            parts = file_path.stem.split('-')
-            if len(parts) >= 2:
-                file_project_id = parts[1]
-                if file_project_id not in project_ids:
-                    try:
-                        file_path.unlink()
-                        cleaned_count += 1
-                        logger.info(f"Cleaned up orphaned file: {file_path}")
-                    except Exception as e:
-                        logger.warning(f"Failed to clean up {file_path}: {e}")
+            # project-<project_id>-<file_type>.json; project IDs (uuid4) contain dashes, file types do not
+            file_project_id = file_path.stem[len("project-"):].rsplit('-', 1)[0]
+            if file_project_id not in project_ids:
+                try:
+                    file_path.unlink()
+                    cleaned_count += 1
+                    logger.info(f"Cleaned up orphaned file: {file_path}")
+                except Exception as e:
+                    logger.warning(f"Failed to clean up {file_path}: {e}")
+        
+        for chat_dir in self.data_dir.glob("project-*-chat"):
+            file_project_id = chat_dir.name[len("project-"):-len("-chat")]
+            if chat_dir.is_dir() and file_project_id not in project_ids:
+                try:
+                    shutil.rmtree(chat_dir)
+                    cleaned_count += 1
+                    logger.info(f"Cleaned up orphaned chat partitions: {chat_dir}")
+                except Exception as e:
+                    logger.warning(f"Failed to clean up {chat_dir}: {e}")
         
         return cleaned_count
 
@@ -798,6 +1719,27 @@ class FileService:
         self._save_text(path, content)
         logger.info(f"Saved project detail for {project_id} ({len(content or '')} chars)")
 
+    def load_project_detail_state(self, project_id: str) -> Dict[str, Any]:
+        """Load project detail ingestion state (e.g. the last digested chat message watermark)."""
+        self.ensure_data_dir()
+        return self._load_dict_json(self._get_project_file_path(project_id, "detail_state"))
+
+    def save_project_detail_state(self, project_id: str, state: Dict[str, Any]) -> None:
+        """Persist project detail ingestion state."""
+        self.ensure_data_dir()
+        self._save_dict_json(self._get_project_file_path(project_id, "detail_state"), state)
+
+    def load_project_detail_chunk_cache(self, project_id: str) -> Dict[str, Any]:
+        """Load cached chunk summaries (content hash -> summary) used by project detail ingestion."""
+        self.ensure_data_dir()
+        return self._load_dict_json(self._get_project_file_path(project_id, "detail_chunks"))
+
+    def save_project_detail_chunk_cache(self, project_id: str, cache: Dict[str, Any]) -> None:
+        """Persist cached chunk summaries for project detail ingestion."""
+        self.ensure_data_dir()
+        self._save_dict_json(self._get_project_file_path(project_id, "detail_chunks"), cache)
+        logger.debug(f"Saved {len(cache)} cached chunk summaries for {project_id}")
+
     # User preferences (single-user) operations
     def load_user_preferences(self) -> Dict[str, Any]:
         """Load user preferences. Defaults if not present."""
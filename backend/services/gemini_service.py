@@ -4,6 +4,13 @@ import logging
 import asyncio
 from dotenv import load_dotenv
 
+try:
+    from .llm_simulator import SimulatedModel, simulator_enabled
+    from .metrics import metrics
+except ImportError:
+    from services.llm_simulator import SimulatedModel, simulator_enabled
+    from services.metrics import metrics
+
 # Load environment variables
 load_dotenv()
 
@@ -15,9 +22,14 @@ class GeminiService:
         # Configure Gemini with graceful fallback for local/dev/test
         self.api_key = os.getenv("GEMINI_API_KEY")
         self.use_mock = os.getenv("SAMURAI_USE_MOCK_LLM") == "1"
+        self.use_simulator = simulator_enabled()
         self.is_key_valid = self._validate_api_key()
 
-        if self.use_mock:
+        if self.use_simulator:
+            # Realistic latency, streaming and scripted JSON; behaves like a valid key
+            self.model = SimulatedModel()
+            logger.warning("SAMURAI_LLM_SIMULATOR=1 detected. Using the local LLM simulator for responses.")
+        elif self.use_mock:
             logger.warning("SAMURAI_USE_MOCK_LLM=1 detected. Using mock LLM model for responses.")
             
             class _DummyResponse:
@@ -25,12 +37,13 @@ class GeminiService:
                     self.text = text
 
             class _DummyModel:
-                def generate_content(self, prompt: str):
+                def generate_content(self, prompt: str, stream: bool = False):
                     # Return a fast, deterministic mock response
                     preview = (prompt or "").strip()
                     if len(preview) > 120:
                         preview = preview[:120] + "..."
-                    return _DummyResponse(text=f"[mock-ai] {preview if preview else 'OK'}")
+                    response = _DummyResponse(text=f"[mock-ai] {preview if preview else 'OK'}")
+                    return [response] if stream else response
 
             self.model = _DummyModel()
             logger.info("Gemini service initialized with mock model")
@@ -55,12 +68,12 @@ class GeminiService:
 
     def is_api_key_valid(self) -> bool:
         """Return whether the API key is valid and the service can make real API calls."""
-        return self.is_key_valid and not self.use_mock
+        return self.use_simulator or (self.is_key_valid and not self.use_mock)
 
     async def chat(self, message: str, context: str = "") -> str:
         """Simple chat with optional context"""
         # Check if API key is invalid (not mock mode)
-        if not self.is_key_valid and not self.use_mock:
+        if not self.is_key_valid and not self.use_mock and not self.use_simulator:
             return "Warning: Gemini API key not found or invalid. Please set your GEMINI_API_KEY in the .env file to enable full functionality."
         
         try:
@@ -69,9 +82,7 @@ class GeminiService:
             else:
                 full_prompt = message
                 
-            # Offload blocking SDK call to a background thread to avoid blocking the event loop
-            response = await asyncio.to_thread(self.model.generate_content, full_prompt)
-            return response.text
+            return await self._generate(full_prompt, "chat")
             
         except Exception as e:
             logger.error(f"Gemini API error: {e}")
@@ -80,25 +91,38 @@ class GeminiService:
     async def chat_with_system_prompt(self, message: str, system_prompt: str) -> str:
         """Chat with a custom system prompt"""
         # Check if API key is invalid (not mock mode)
-        if not self.is_key_valid and not self.use_mock:
+        if not self.is_key_valid and not self.use_mock and not self.use_simulator:
             return "Warning: Gemini API key not found or invalid. Please set your GEMINI_API_KEY in the .env file to enable full functionality."
         
         try:
             full_prompt = f"{system_prompt}\n\nUser: {message}"
-            # Offload blocking SDK call to a background thread to avoid blocking the event loop
-            response = await asyncio.to_thread(self.model.generate_content, full_prompt)
-            return response.text
+            return await self._generate(full_prompt, "chat_with_system_prompt")
             
         except Exception as e:
             logger.error(f"Gemini API error: {e}")
             return f"I'm having trouble processing that request. Please try again."
 
+    async def _generate(self, prompt: str, operation: str) -> str:
+        """Run one generate call off the event loop, recording LLM call metrics."""
+        metrics.inc("samurai_llm_calls_total", operation=operation)
+        metrics.inc("samurai_llm_prompt_chars_total", len(prompt), operation=operation)
+        with metrics.span("llm.generate", operation=operation, prompt_chars=len(prompt)):
+            try:
+                # Offload blocking SDK call to a background thread to avoid blocking the event loop
+                response = await asyncio.to_thread(self.model.generate_content, prompt)
+            except Exception:
+                metrics.inc("samurai_llm_errors_total", operation=operation)
+                raise
+        text = response.text
+        metrics.inc("samurai_llm_response_chars_total", len(text or ""), operation=operation)
+        return text
+
     # Intentionally keep LLM surface minimal here; orchestration lives in dedicated services.
 
     def _safe_ai_call(self, prompt: str) -> str:
         """Make AI call with error handling (synchronous)"""
         # Check if API key is invalid (not mock mode)
-        if not self.is_key_valid and not self.use_mock:
+        if not self.is_key_valid and not self.use_mock and not self.use_simulator:
             return "Warning: Gemini API key not found or invalid. Please set your GEMINI_API_KEY in the .env file to enable full functionality."
         
         try:
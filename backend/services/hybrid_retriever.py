@@ -0,0 +1,296 @@
+"""
+Hybrid Lexical + Vector Retriever
+
+Single retrieval path for tasks and memories. BM25 candidates from the
+inverted search index and cosine candidates from the stored embeddings are
+gathered in parallel, fused with reciprocal-rank fusion (RRF), optionally
+diversified with maximal marginal relevance (MMR), and cut to a fixed top-k.
+
+RRF only uses ranks, so the two retrievers' incompatible score scales never
+need calibrating against each other, and either one can be missing (no
+embedding model, empty query) without changing the code path.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .embedding_service import embedding_service
+    from .search_index import search_index, COLLECTIONS
+except ImportError:
+    import os
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services.embedding_service import embedding_service
+    from services.search_index import search_index, COLLECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Constants
+RRF_K = 60
+CANDIDATE_POOL_SIZE = 30  # candidates taken from each retriever before fusion
+DEFAULT_TOP_K = 6
+VECTOR_MIN_SIMILARITY = 0.25  # floor for vector candidates; ranking does the rest
+MMR_LAMBDA = 0.5  # relevance vs. diversity trade-off
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+@dataclass
+class RetrievedItem:
+    """A fused retrieval result."""
+    doc: Dict[str, Any]
+    score: float
+    lexical_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+    vector_similarity: Optional[float] = None
+
+    @property
+    def id(self) -> str:
+        return self.doc["id"]
+
+
+class _EmbeddingMatrix:
+    """Normalized embedding rows of one collection file, rebuilt when the file changes."""
+
+    def __init__(self, signature, docs: List[Dict[str, Any]], matrix: Optional[np.ndarray]):
+        self.signature = signature
+        self.docs = docs
+        self.matrix = matrix
+
+
+class HybridRetriever:
+    """Fuses BM25 and embedding retrieval over a project's tasks or memories."""
+
+    def __init__(self, index=None, embeddings=None):
+        self.index = index or search_index
+        self.embeddings = embeddings or embedding_service
+        self._matrices: Dict[str, _EmbeddingMatrix] = {}
+
+    # Candidate generation
+    def _lexical_candidates(
+        self,
+        file_service,
+        project_id: str,
+        collection: str,
+        query: str,
+        predicate: Optional[Predicate],
+        pool_size: Optional[int] = CANDIDATE_POOL_SIZE
+    ) -> List[Dict[str, Any]]:
+        results = self.index.search(
+            file_service, project_id, collection, query,
+            limit=pool_size, predicate=predicate
+        )
+        return [doc for doc, _ in results]
+
+    def _embedding_matrix(self, file_service, project_id: str, collection: str) -> _EmbeddingMatrix:
+        file_path: Path = file_service._get_project_file_path(project_id, collection)
+        # Tracks unflushed write-behind saves as well as the file itself
+        signature = file_service.get_file_version(project_id, collection)
+        cached = self._matrices.get(str(file_path))
+        if cached is not None and cached.signature == signature:
+            return cached
+
+        kept_fields = COLLECTIONS[collection][2]
+        docs, rows = [], []
+        for record in file_service._load_json(file_path):
+            embedding = record.get("embedding")
+            if record.get("id") and embedding:
+                docs.append({field: record.get(field) for field in kept_fields})
+                rows.append(embedding)
+
+        matrix = None
+        if rows:
+            try:
+                matrix = np.asarray(rows, dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+            except ValueError as e:
+                # Mixed embedding sizes (e.g. after a model change)
+                logger.warning(f"Unusable embeddings in {file_path}: {e}")
+                docs, matrix = [], None
+
+        cached = _EmbeddingMatrix(signature, docs, matrix)
+        self._matrices[str(file_path)] = cached
+        return cached
+
+    def _query_embedding(self, query: str) -> Optional[np.ndarray]:
+        if not query or not self.embeddings.is_model_loaded():
+            return None
+        embedding = self.embeddings.generate_embedding(self.embeddings.prepare_text_for_embedding(query))
+        return np.asarray(embedding, dtype=np.float32) if embedding else None
+
+    def _vector_candidates(
+        self,
+        file_service,
+        project_id: str,
+        collection: str,
+        query: str,
+        query_embedding: Optional[List[float]],
+        predicate: Optional[Predicate],
+        pool_size: Optional[int] = CANDIDATE_POOL_SIZE
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float], Dict[str, np.ndarray]]:
+        """Cosine candidates with their similarity and (normalized) embedding rows."""
+        vector = np.asarray(query_embedding, dtype=np.float32) if query_embedding else self._query_embedding(query)
+        if vector is None:
+            return [], {}, {}
+
+        store = self._embedding_matrix(file_service, project_id, collection)
+        if store.matrix is None or store.matrix.shape[1] != vector.shape[0]:
+            return [], {}, {}
+
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return [], {}, {}
+        similarities = store.matrix @ (vector / norm)
+
+        candidates, scores, rows = [], {}, {}
+        for i in np.argsort(-similarities, kind="stable"):
+            similarity = float(similarities[i])
+            if similarity < VECTOR_MIN_SIMILARITY or (pool_size is not None and len(candidates) >= pool_size):
+                break
+            doc = store.docs[i]
+            if predicate is not None and not predicate(doc):
+                continue
+            candidates.append(doc)
+            scores[doc["id"]] = similarity
+            rows[doc["id"]] = store.matrix[i]
+        return candidates, scores, rows
+
+    # Fusion
+    @staticmethod
+    def fuse(ranked_lists: List[List[Dict[str, Any]]], k: int = RRF_K) -> List[Tuple[Dict[str, Any], float]]:
+        """Reciprocal-rank fusion: score(d) = sum over lists of 1 / (k + rank)."""
+        scores: Dict[str, float] = {}
+        docs: Dict[str, Dict[str, Any]] = {}
+        for ranked in ranked_lists:
+            for rank, doc in enumerate(ranked, start=1):
+                scores[doc["id"]] = scores.get(doc["id"], 0.0) + 1.0 / (k + rank)
+                docs.setdefault(doc["id"], doc)
+        fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(docs[doc_id], score) for doc_id, score in fused]
+
+    @staticmethod
+    def _mmr(items: List[RetrievedItem], rows: Dict[str, np.ndarray], top_k: int) -> List[RetrievedItem]:
+        """Greedy MMR over fused results; items without an embedding only compete on relevance."""
+        if len(items) <= 1:
+            return items[:top_k]
+        best = items[0].score or 1.0
+        remaining = list(items)
+        selected: List[RetrievedItem] = []
+        while remaining and len(selected) < top_k:
+            def mmr_score(item: RetrievedItem) -> float:
+                row = rows.get(item.id)
+                redundancy = 0.0
+                if row is not None:
+                    redundancy = max(
+                        (float(row @ rows[s.id]) for s in selected if s.id in rows),
+                        default=0.0
+                    )
+                return MMR_LAMBDA * (item.score / best) - (1 - MMR_LAMBDA) * redundancy
+            choice = max(remaining, key=mmr_score)
+            selected.append(choice)
+            remaining.remove(choice)
+        return selected
+
+    def _combine(
+        self,
+        lexical: List[Dict[str, Any]],
+        vector: Tuple[List[Dict[str, Any]], Dict[str, float], Dict[str, np.ndarray]],
+        top_k: Optional[int],
+        use_mmr: bool
+    ) -> List[RetrievedItem]:
+        vector_docs, similarities, rows = vector
+        lexical_ranks = {doc["id"]: rank for rank, doc in enumerate(lexical, start=1)}
+        vector_ranks = {doc["id"]: rank for rank, doc in enumerate(vector_docs, start=1)}
+
+        items = [
+            RetrievedItem(
+                doc=doc,
+                score=score,
+                lexical_rank=lexical_ranks.get(doc["id"]),
+                vector_rank=vector_ranks.get(doc["id"]),
+                vector_similarity=similarities.get(doc["id"])
+            )
+            for doc, score in self.fuse([lexical, vector_docs])
+        ]
+        if use_mmr and rows and top_k:
+            return self._mmr(items, rows, top_k)
+        return items[:top_k]
+
+    @staticmethod
+    def _pool_size(top_k: Optional[int]) -> Optional[int]:
+        return None if top_k is None else max(CANDIDATE_POOL_SIZE, top_k)
+
+    # Public API
+    def search(
+        self,
+        file_service,
+        project_id: str,
+        collection: str,
+        query: str,
+        top_k: Optional[int] = DEFAULT_TOP_K,
+        query_embedding: Optional[List[float]] = None,
+        predicate: Optional[Predicate] = None,
+        use_mmr: bool = False
+    ) -> List[RetrievedItem]:
+        """
+        Retrieve and fuse candidates synchronously (for tools that run in worker threads).
+
+        Args:
+            file_service: FileService whose data directory holds the collection
+            project_id: Project identifier
+            collection: "tasks" or "memories"
+            query: Free-text query used for BM25 (and embedded if no query_embedding)
+            top_k: Number of results to return (None for all fused candidates)
+            query_embedding: Precomputed query embedding, e.g. of the whole conversation
+            predicate: Optional filter applied to candidates of both retrievers
+            use_mmr: Diversify the top-k with maximal marginal relevance
+
+        Returns:
+            Fused results, best first
+        """
+        pool_size = self._pool_size(top_k)
+        lexical = self._lexical_candidates(file_service, project_id, collection, query, predicate, pool_size)
+        if not query and query_embedding is None:
+            # Empty query: list everything in file order
+            return [RetrievedItem(doc=doc, score=0.0) for doc in lexical[:top_k]]
+        vector = self._vector_candidates(
+            file_service, project_id, collection, query, query_embedding, predicate, pool_size
+        )
+        return self._combine(lexical, vector, top_k, use_mmr)
+
+    async def retrieve(
+        self,
+        file_service,
+        project_id: str,
+        collection: str,
+        query: str,
+        top_k: Optional[int] = DEFAULT_TOP_K,
+        query_embedding: Optional[List[float]] = None,
+        predicate: Optional[Predicate] = None,
+        use_mmr: bool = True
+    ) -> List[RetrievedItem]:
+        """Same as search(), with the lexical and vector retrievers running concurrently."""
+        if not query and query_embedding is None:
+            return self.search(file_service, project_id, collection, query, top_k, None, predicate)
+        pool_size = self._pool_size(top_k)
+        lexical, vector = await asyncio.gather(
+            asyncio.to_thread(
+                self._lexical_candidates, file_service, project_id, collection, query, predicate, pool_size
+            ),
+            asyncio.to_thread(
+                self._vector_candidates, file_service, project_id, collection, query, query_embedding,
+                predicate, pool_size
+            )
+        )
+        return self._combine(lexical, vector, top_k, use_mmr)
+
+
+# Global instance
+hybrid_retriever = HybridRetriever()
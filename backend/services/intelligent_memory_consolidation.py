@@ -5,23 +5,42 @@ This service analyzes completed conversation sessions and consolidates insights
 into existing project memories before starting a fresh session.
 """
 
+import asyncio
 import json
 import logging
-from typing import List, Dict, Any, Optional, Set
+import os
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 
+import numpy as np
+
 from models import ChatMessage, Memory, Project, MemoryCategory, CATEGORY_CONFIG
 from services.gemini_service import GeminiService
-from services.file_service import FileService
+from services.file_service import ConcurrentModificationError, FileService
+from services.embedding_service import embedding_service
+from services.write_lanes import write_lanes
 
 # Configuration constants
 MIN_SESSION_LENGTH = 3  # messages to trigger consolidation
 MIN_SIGNIFICANCE_SCORE = 0.7  # for insight extraction
 MIN_RELEVANCE_SCORE = 0.5  # for session relevance to project
-MEMORY_MERGE_THRESHOLD = 0.5  # similarity score to merge
+MEMORY_MERGE_THRESHOLD = 0.5  # keyword similarity score to merge (no embeddings)
+# Cosine thresholds for all-MiniLM-L6-v2. These are initial estimates, not values
+# fitted on project data: they assume paraphrases and refinements of one decision
+# score roughly 0.7-0.9 and distinct facts on the same topic roughly 0.45-0.65.
+# Override them while tuning against real memories.
+EMBEDDING_MERGE_THRESHOLD = float(os.getenv("SAMURAI_EMBEDDING_MERGE_THRESHOLD", "0.72"))  # propose a merge (per-insight path)
+EMBEDDING_CANDIDATE_THRESHOLD = float(os.getenv("SAMURAI_EMBEDDING_CANDIDATE_THRESHOLD", "0.45"))  # show the memory to the batched LLM call
 NEW_MEMORY_THRESHOLD = 0.8  # significance needed for new memory
 MAX_CATEGORY_NAME_LENGTH = 30
+MAX_BATCH_CANDIDATES = 8  # existing memories shown to the LLM per category
+MAX_MEMORY_TITLE_LENGTH = 50
+MAX_MEMORY_CONTENT_LENGTH = 2000
+MAX_CONSOLIDATION_SAVE_ATTEMPTS = 3  # re-apply batched plans if memories changed meanwhile
+
+# "batched" makes one LLM call per category; "legacy" processes insights one by one
+CONSOLIDATION_MODE = os.getenv("SAMURAI_CONSOLIDATION_MODE", "batched").lower()
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +67,15 @@ class SessionAnalysis:
     total_insights_processed: int
 
 
+@dataclass
+class MemoryMatchScores:
+    """Similarity of each insight (rows) to each existing memory (columns)."""
+    scores: np.ndarray
+    merge_threshold: float
+    candidate_threshold: float
+    method: str  # embedding|keyword
+
+
 @dataclass
 class CategoryProcessingResult:
     """Results from processing insights for a specific category."""
@@ -73,9 +101,9 @@ class MemoryConsolidationResult:
 class IntelligentMemoryConsolidationService:
     """Service for intelligent memory consolidation on session end."""
 
-    def __init__(self):
-        self.gemini_service = GeminiService()
-        self.file_service = FileService()
+    def __init__(self, gemini_service: Optional[GeminiService] = None, file_service: Optional[FileService] = None):
+        self.gemini_service = gemini_service or GeminiService()
+        self.file_service = file_service or FileService()
         logger.info("IntelligentMemoryConsolidationService initialized")
 
     async def consolidate_session_memories(
@@ -326,6 +354,9 @@ Set is_new_category: true and provide new_category_suggestion if insight doesn't
                     category_insights[category] = []
                 category_insights[category].append(insight)
             
+            if CONSOLIDATION_MODE != "legacy":
+                return await self._process_categories_batched(category_insights, project_id)
+            
             # Process each category
             category_results = []
             for category, cat_insights in category_insights.items():
@@ -376,11 +407,13 @@ Set is_new_category: true and provide new_category_suggestion if insight doesn't
             memories_updated = 0
             memories_created = 0
             
+            match = self._score_memory_matches(insights, existing_memories)
+            
             # Process each insight
-            for insight in insights:
+            for index, insight in enumerate(insights):
                 # Try to find existing memory to merge with
                 matching_memory = await self._find_best_matching_memory(
-                    insight, existing_memories
+                    index, match, existing_memories
                 )
                 
                 if matching_memory and await self._should_merge_insight(insight, matching_memory):
@@ -419,6 +452,259 @@ Set is_new_category: true and provide new_category_suggestion if insight doesn't
                 is_new_category=False
             )
 
+    async def _process_categories_batched(
+        self,
+        category_insights: Dict[str, List[ConversationInsight]],
+        project_id: str
+    ) -> List[CategoryProcessingResult]:
+        """
+        Consolidate all categories with one LLM call each and a single memories write.
+        
+        Categories are planned concurrently against one in-memory copy of the
+        project's memories. Categories whose batched response cannot be parsed
+        fall back to the per-insight path once the batched changes are saved.
+        
+        The memories file is not locked during the LLM calls. The write goes
+        through the project's write lane and is conditional on the version that
+        was read; if another writer got in between, the plans are re-applied to
+        a fresh copy.
+        
+        Args:
+            category_insights: Insights grouped by category
+            project_id: Project identifier
+            
+        Returns:
+            List of CategoryProcessingResult for each category processed
+        """
+        version = self.file_service.get_file_version(project_id, "memories")
+        memories = self.file_service.load_memories(project_id)
+        
+        resolved: List[Tuple[str, bool, List[ConversationInsight]]] = []
+        for category, insights in category_insights.items():
+            category, is_new_category = self._resolve_category(category)
+            resolved.append((category, is_new_category, insights))
+        
+        plans = await asyncio.gather(*[
+            self._plan_category_batch(
+                category,
+                insights,
+                [m for m in memories if m.category.lower() == category.lower()]
+            )
+            for category, _, insights in resolved
+        ])
+        
+        for attempt in range(1, MAX_CONSOLIDATION_SAVE_ATTEMPTS + 1):
+            results: List[CategoryProcessingResult] = []
+            fallbacks: List[Tuple[str, List[ConversationInsight]]] = []
+            changed = False
+            memories_by_id = {m.id: m for m in memories}
+        
+            for (category, is_new_category, insights), plan in zip(resolved, plans):
+                if plan is None:
+                    fallbacks.append((category, insights))
+                    continue
+                updated, created = self._apply_category_plan(
+                    plan, category, insights, memories_by_id, memories, project_id
+                )
+                changed = changed or bool(updated or created)
+                logger.info(
+                    f"Category {category}: {updated} updated, "
+                    f"{created} created, {len(insights)} processed (batched)"
+                )
+                results.append(CategoryProcessingResult(
+                    category=category,
+                    memories_updated=updated,
+                    memories_created=created,
+                    insights_processed=len(insights),
+                    is_new_category=is_new_category
+                ))
+        
+            if not changed:
+                break
+            try:
+                await write_lanes.run(
+                    project_id, "memories", self.file_service.save_memories,
+                    project_id, memories, expected_version=version
+                )
+                break
+            except ConcurrentModificationError:
+                if attempt == MAX_CONSOLIDATION_SAVE_ATTEMPTS:
+                    raise
+                logger.info(f"Memories of project {project_id} changed during consolidation, re-applying plans")
+                version = self.file_service.get_file_version(project_id, "memories")
+                memories = self.file_service.load_memories(project_id)
+        
+        for category, insights in fallbacks:
+            logger.warning(f"Batched consolidation response unusable for {category}, using per-insight path")
+            results.append(await self._process_category_insights(category, insights, project_id))
+        
+        return results
+
+    def _resolve_category(self, category: str) -> Tuple[str, bool]:
+        """Validate a category name, falling back to 'general' for invalid new categories."""
+        is_new_category = not self._is_existing_category(category)
+        if is_new_category and not self._validate_new_category_name(category):
+            logger.warning(f"Invalid new category name: {category}, falling back to 'general'")
+            return "general", False
+        return category, is_new_category
+
+    def _select_batch_candidates(
+        self,
+        insights: List[ConversationInsight],
+        existing_memories: List[Memory]
+    ) -> List[Memory]:
+        """Pick the existing memories most likely to absorb any of the insights."""
+        if not existing_memories:
+            return []
+        
+        match = self._score_memory_matches(insights, existing_memories)
+        best_scores = match.scores.max(axis=0)
+        ranked = [
+            i for i in np.argsort(-best_scores, kind="stable")
+            if best_scores[i] > match.candidate_threshold
+        ]
+        return [existing_memories[i] for i in ranked[:MAX_BATCH_CANDIDATES]]
+
+    async def _plan_category_batch(
+        self,
+        category: str,
+        insights: List[ConversationInsight],
+        existing_memories: List[Memory]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ask the LLM for merge/create/skip decisions for every insight in a category.
+        
+        Args:
+            category: Category being consolidated
+            insights: Insights for this category
+            existing_memories: Memories already stored under this category
+            
+        Returns:
+            Parsed plan with "updates", "creates" and "skipped" keys, or None
+            if the response could not be used
+        """
+        try:
+            candidates = self._select_batch_candidates(insights, existing_memories)
+            
+            memories_text = "\n\n".join(
+                f"[{m.id}]\nTitle: {m.title}\nContent: {m.content}" for m in candidates
+            ) or "(none)"
+            insights_text = "\n\n".join(
+                f"[{i}] ({insight.insight_type}, significance {insight.significance_score})\n{insight.content}"
+                for i, insight in enumerate(insights)
+            )
+            
+            batch_prompt = f"""
+Consolidate these new insights into the existing project memories for the "{category}" category.
+
+EXISTING MEMORIES:
+{memories_text}
+
+NEW INSIGHTS:
+{insights_text}
+
+For every insight decide one action:
+- merge: it adds complementary details to an existing memory (use that memory's id)
+- create: it is significant, new information that no existing memory covers
+- skip: it is redundant or not worth storing
+
+Rules:
+1. Never merge an insight that contradicts a memory's technical decisions; create a new memory instead
+2. When merging, preserve ALL important existing information and integrate the insight naturally
+3. If several insights go into the same memory, return that memory once with all of them merged
+4. Related new insights may be combined into a single new memory
+5. Titles must be concise and specific (max {MAX_MEMORY_TITLE_LENGTH} characters)
+
+Return JSON:
+{{
+    "updates": [
+        {{"memory_id": "existing memory id", "insights": [0], "title": "Updated title", "content": "Merged content"}}
+    ],
+    "creates": [
+        {{"insights": [1], "title": "New title", "content": "Memory content", "type": "feature|decision|spec|note"}}
+    ],
+    "skipped": [2]
+}}
+"""
+            
+            response = await self.gemini_service.chat_with_system_prompt(
+                "Consolidate the insights into project memories",
+                batch_prompt
+            )
+            
+            plan = self._parse_analysis_response(response)
+            if not any(key in plan for key in ("updates", "creates", "skipped")):
+                return None
+            
+            plan["candidate_ids"] = [m.id for m in candidates]
+            return plan
+            
+        except Exception as e:
+            logger.error(f"Error planning batched consolidation for {category}: {e}")
+            return None
+
+    def _apply_category_plan(
+        self,
+        plan: Dict[str, Any],
+        category: str,
+        insights: List[ConversationInsight],
+        memories_by_id: Dict[str, Memory],
+        memories: List[Memory],
+        project_id: str
+    ) -> Tuple[int, int]:
+        """
+        Apply a batched plan to the in-memory memory list.
+        
+        Returns:
+            Tuple of (memories updated, memories created)
+        """
+        candidate_ids = set(plan.get("candidate_ids", []))
+        updated_ids: Set[str] = set()
+        created = 0
+        
+        def _insights_for(entry: Dict[str, Any]) -> List[ConversationInsight]:
+            indexes = entry.get("insights") or []
+            return [
+                insights[i] for i in indexes
+                if isinstance(i, int) and 0 <= i < len(insights)
+            ]
+        
+        for entry in plan.get("updates") or []:
+            memory = memories_by_id.get(entry.get("memory_id"))
+            content = (entry.get("content") or "").strip()
+            if memory is None or memory.id not in candidate_ids or not content:
+                logger.warning(f"Ignoring batched update for unknown memory: {entry.get('memory_id')}")
+                continue
+            memory.title = (entry.get("title") or memory.title).strip()[:MAX_MEMORY_TITLE_LENGTH]
+            memory.content = content[:MAX_MEMORY_CONTENT_LENGTH]
+            # Force the embedding to be regenerated for the merged text
+            memory.embedding = None
+            memory.embedding_text = None
+            updated_ids.add(memory.id)
+        
+        for entry in plan.get("creates") or []:
+            sources = _insights_for(entry)
+            content = (entry.get("content") or "").strip()
+            if not content or not any(i.significance_score >= NEW_MEMORY_THRESHOLD for i in sources):
+                logger.info("Skipping batched create without a sufficiently significant insight")
+                continue
+            memory_type = entry.get("type") or sources[0].insight_type
+            if memory_type not in ['feature', 'decision', 'spec', 'note']:
+                memory_type = 'note'
+            title = (entry.get("title") or " ".join(content.split()[:6])).strip()[:MAX_MEMORY_TITLE_LENGTH]
+            new_memory = Memory(
+                project_id=project_id,
+                title=title,
+                content=content[:MAX_MEMORY_CONTENT_LENGTH],
+                category=category,
+                type=memory_type
+            )
+            memories.append(new_memory)
+            memories_by_id[new_memory.id] = new_memory
+            created += 1
+        
+        return len(updated_ids), created
+
     # Helper methods for processing and validation
 
     def _build_session_conversation_text(self, session_messages: List[ChatMessage]) -> str:
@@ -502,28 +788,101 @@ Set is_new_category: true and provide new_category_suggestion if insight doesn't
             logger.error(f"Error extracting keywords: {e}")
             return []
 
-    def _calculate_content_similarity(self, text1: str, text2: str) -> float:
-        """Basic text similarity calculation."""
+    def _score_memory_matches(
+        self,
+        insights: List[ConversationInsight],
+        memories: List[Memory]
+    ) -> MemoryMatchScores:
+        """
+        Score every insight against every memory in one pass.
+        
+        Uses the memories' stored embeddings when the embedding model is
+        available and falls back to keyword overlap otherwise.
+        
+        Args:
+            insights: Insights to match
+            memories: Candidate memories
+            
+        Returns:
+            MemoryMatchScores with the score matrix and thresholds for its scale
+        """
+        if insights and memories and embedding_service.is_model_loaded():
+            scores = self._embedding_match_scores(insights, memories)
+            if scores is not None:
+                return MemoryMatchScores(
+                    scores=scores,
+                    merge_threshold=EMBEDDING_MERGE_THRESHOLD,
+                    candidate_threshold=EMBEDDING_CANDIDATE_THRESHOLD,
+                    method="embedding"
+                )
+        
+        return MemoryMatchScores(
+            scores=self._keyword_match_scores(insights, memories),
+            merge_threshold=MEMORY_MERGE_THRESHOLD,
+            candidate_threshold=0.0,
+            method="keyword"
+        )
+
+    def _embedding_match_scores(
+        self,
+        insights: List[ConversationInsight],
+        memories: List[Memory]
+    ) -> Optional[np.ndarray]:
+        """Cosine similarity matrix from one batched embedding call and one matmul."""
         try:
-            # Simple word overlap similarity
-            words1 = set(text1.lower().split())
-            words2 = set(text2.lower().split())
+            missing = [i for i, m in enumerate(memories) if not m.embedding]
+            texts = [embedding_service.prepare_text_for_embedding(i.content) for i in insights]
+            texts += [
+                embedding_service.prepare_text_for_embedding(f"{memories[i].title} {memories[i].content}")
+                for i in missing
+            ]
             
-            intersection = words1.intersection(words2)
-            union = words1.union(words2)
+            embeddings = embedding_service.generate_embeddings_batch(texts)
+            insight_embeddings = embeddings[:len(insights)]
+            if any(e is None for e in insight_embeddings):
+                return None
             
-            if len(union) == 0:
-                return 0.0
+            for index, embedding in zip(missing, embeddings[len(insights):]):
+                if embedding is None:
+                    return None
+                memories[index].embedding = embedding
+                memories[index].embedding_text = texts[len(insights) + missing.index(index)]
             
-            return len(intersection) / len(union)
+            return embedding_service.cosine_similarity_matrix(
+                insight_embeddings, [m.embedding for m in memories]
+            )
             
         except Exception as e:
-            logger.error(f"Error calculating similarity: {e}")
-            return 0.0
+            logger.error(f"Error scoring insights with embeddings: {e}")
+            return None
+
+    def _keyword_match_scores(
+        self,
+        insights: List[ConversationInsight],
+        memories: List[Memory]
+    ) -> np.ndarray:
+        """Word-overlap similarity plus keyword boost, computing each memory's terms once."""
+        scores = np.zeros((len(insights), len(memories)))
+        memory_terms = [
+            (set(m.content.lower().split()), set(self._extract_keywords_from_content(m.content)))
+            for m in memories
+        ]
+        
+        for row, insight in enumerate(insights):
+            insight_words = set(insight.content.lower().split())
+            insight_keywords = set(insight.related_keywords)
+            for col, (memory_words, memory_keywords) in enumerate(memory_terms):
+                union = insight_words | memory_words
+                content_similarity = len(insight_words & memory_words) / len(union) if union else 0.0
+                keyword_boost = len(insight_keywords & memory_keywords) * 0.1
+                scores[row, col] = content_similarity + keyword_boost
+        
+        return scores
 
     async def _find_best_matching_memory(
         self, 
-        insight: ConversationInsight, 
+        insight_index: int,
+        match: MemoryMatchScores,
         existing_memories: List[Memory]
     ) -> Optional[Memory]:
         """Find the best matching existing memory for an insight."""
@@ -531,30 +890,14 @@ Set is_new_category: true and provide new_category_suggestion if insight doesn't
             if not existing_memories:
                 return None
             
-            best_match = None
-            best_score = 0.0
-            
-            for memory in existing_memories:
-                # Calculate similarity based on content and keywords
-                content_similarity = self._calculate_content_similarity(
-                    insight.content, memory.content
-                )
-                
-                # Boost score if keywords match
-                memory_keywords = self._extract_keywords_from_content(memory.content)
-                keyword_overlap = len(set(insight.related_keywords).intersection(set(memory_keywords)))
-                keyword_boost = keyword_overlap * 0.1
-                
-                total_score = content_similarity + keyword_boost
-                
-                if total_score > best_score:
-                    best_score = total_score
-                    best_match = memory
+            row = match.scores[insight_index]
+            best_index = int(np.argmax(row))
+            best_score = float(row[best_index])
             
             # Only return if similarity is above threshold
-            if best_score >= MEMORY_MERGE_THRESHOLD:
-                logger.info(f"Found matching memory with similarity: {best_score}")
-                return best_match
+            if best_score >= match.merge_threshold:
+                logger.info(f"Found matching memory with {match.method} similarity: {best_score:.3f}")
+                return existing_memories[best_index]
             
             return None
             
@@ -668,9 +1011,7 @@ Return JSON:
             memory.category = merge_result.get("category", memory.category)
             
             # Save updated memory
-            memories = self.file_service.load_memories(project_id)
-            updated_memories = [m if m.id != memory.id else memory for m in memories]
-            self.file_service.save_memories(project_id, updated_memories)
+            await write_lanes.run(project_id, "memories", self.file_service.save_memory, project_id, memory)
             
             logger.info(f"Successfully merged insight into memory: {memory.title}")
             
@@ -697,9 +1038,7 @@ Return JSON:
             )
             
             # Save memory
-            memories = self.file_service.load_memories(project_id)
-            memories.append(new_memory)
-            self.file_service.save_memories(project_id, memories)
+            await write_lanes.run(project_id, "memories", self.file_service.save_memory, project_id, new_memory)
             
             logger.info(f"Created new memory: {title} (category: {insight.category})")
             
@@ -0,0 +1,274 @@
+"""
+Durable Background Job Queue
+
+Replaces fire-and-forget asyncio.create_task calls for long-running work such
+as session-end memory consolidation and project detail digests. Every job is
+persisted to its own JSON file under the data directory, so queued and
+interrupted jobs survive a restart. A scheduler runs jobs with a global
+concurrency cap, never runs two jobs of the same lane at once (lanes are
+per-project and per-resource), and retries failures with exponential backoff.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:
+    from models import BackgroundJob
+    from .file_service import DATA_DIR
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from models import BackgroundJob
+    from services.file_service import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Constants
+JOB_CONCURRENCY = int(os.getenv("SAMURAI_JOB_CONCURRENCY", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("SAMURAI_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("SAMURAI_JOB_RETRY_BASE_DELAY", "5"))
+JOB_RETRY_MAX_DELAY = 300.0
+FINISHED_JOB_RETENTION = timedelta(days=1)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class JobQueue:
+    """Persistent job queue with per-lane serialization and retries."""
+
+    def __init__(
+        self,
+        jobs_dir: str = os.path.join(DATA_DIR, "jobs"),
+        max_concurrency: int = JOB_CONCURRENCY,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_base_delay: float = JOB_RETRY_BASE_DELAY
+    ):
+        self.jobs_dir = Path(jobs_dir)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_delay = retry_base_delay
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[str, BackgroundJob] = {}
+        self._active_lanes: Dict[str, str] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._scheduler: Optional[asyncio.Task] = None
+        self._loaded = False
+
+    # Registration and submission
+    def register_handler(self, kind: str, handler: JobHandler) -> None:
+        """Register the coroutine function that executes jobs of the given kind."""
+        self._handlers[kind] = handler
+
+    def enqueue(
+        self,
+        kind: str,
+        project_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        lane: Optional[str] = None,
+        max_attempts: Optional[int] = None
+    ) -> BackgroundJob:
+        """
+        Persist a new job and wake the scheduler.
+
+        Args:
+            kind: Registered handler name
+            project_id: Project the job belongs to
+            payload: Arguments passed to the handler
+            lane: Serialization key (defaults to "<project_id>:<kind>")
+            max_attempts: Override for the number of attempts
+
+        Returns:
+            The queued job
+        """
+        self._ensure_loaded()
+        job = BackgroundJob(
+            kind=kind,
+            project_id=project_id,
+            lane=lane or f"{project_id}:{kind}",
+            payload=payload or {},
+            max_attempts=max_attempts or self.max_attempts
+        )
+        self._jobs[job.id] = job
+        self._persist(job)
+        self._notify()
+        logger.info(f"Queued job {job.id} ({kind}) for project {project_id}")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[BackgroundJob]:
+        """Get a job by ID."""
+        self._ensure_loaded()
+        return self._jobs.get(job_id)
+
+    def list_jobs(self, project_id: Optional[str] = None) -> List[BackgroundJob]:
+        """List known jobs, newest first."""
+        self._ensure_loaded()
+        jobs = [j for j in self._jobs.values() if project_id is None or j.project_id == project_id]
+        jobs.sort(key=lambda j: j.created_at, reverse=True)
+        return jobs
+
+    # Lifecycle
+    async def start(self) -> None:
+        """Recover persisted jobs and start the scheduler."""
+        if self._scheduler and not self._scheduler.done():
+            return
+        self._ensure_loaded()
+        self._wakeup = asyncio.Event()
+        self._scheduler = asyncio.create_task(self._run_scheduler())
+        logger.info(f"Job queue started ({len(self._pending_jobs())} pending jobs)")
+
+    async def stop(self) -> None:
+        """Stop the scheduler; interrupted jobs are re-queued on the next start."""
+        if self._scheduler:
+            self._scheduler.cancel()
+            try:
+                await self._scheduler
+            except asyncio.CancelledError:
+                pass
+            self._scheduler = None
+        running = list(self._running.values())
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        self._running.clear()
+        self._active_lanes.clear()
+
+    async def wait_idle(self, timeout: Optional[float] = None) -> None:
+        """Wait until no job is queued or running (used by tests and tooling)."""
+        async def _wait():
+            while self._pending_jobs() or self._running:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(_wait(), timeout)
+
+    # Scheduling
+    def _notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pending_jobs(self) -> List[BackgroundJob]:
+        return [j for j in self._jobs.values() if j.status == "queued"]
+
+    async def _run_scheduler(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = datetime.utcnow()
+            next_due: Optional[datetime] = None
+
+            for job in sorted(self._pending_jobs(), key=lambda j: j.created_at):
+                if len(self._running) >= self.max_concurrency:
+                    break
+                if job.lane in self._active_lanes:
+                    continue
+                if job.run_after > now:
+                    next_due = job.run_after if next_due is None else min(next_due, job.run_after)
+                    continue
+                self._active_lanes[job.lane] = job.id
+                self._running[job.id] = asyncio.create_task(self._run_job(job))
+
+            timeout = None
+            if next_due is not None:
+                timeout = max(0.0, (next_due - datetime.utcnow()).total_seconds())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, job: BackgroundJob) -> None:
+        handler = self._handlers.get(job.kind)
+        job.status = "running"
+        job.attempts += 1
+        job.started_at = datetime.utcnow()
+        job.updated_at = job.started_at
+        self._persist(job)
+
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job kind '{job.kind}'")
+            await handler(job.payload)
+            job.status = "succeeded"
+            job.last_error = None
+            job.finished_at = datetime.utcnow()
+            logger.info(f"Job {job.id} ({job.kind}) succeeded on attempt {job.attempts}")
+        except asyncio.CancelledError:
+            # Shutdown: leave the job to be picked up again after restart
+            job.status = "queued"
+            raise
+        except Exception as e:
+            job.last_error = str(e)
+            if job.attempts < job.max_attempts:
+                delay = min(JOB_RETRY_MAX_DELAY, self.retry_base_delay * (2 ** (job.attempts - 1)))
+                delay *= random.uniform(0.8, 1.2)
+                job.status = "queued"
+                job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+                logger.warning(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}, retrying in {delay:.1f}s: {e}")
+            else:
+                job.status = "failed"
+                job.finished_at = datetime.utcnow()
+                logger.error(f"Job {job.id} ({job.kind}) failed after {job.attempts} attempts: {e}")
+        finally:
+            job.updated_at = datetime.utcnow()
+            self._persist(job)
+            self._running.pop(job.id, None)
+            self._active_lanes.pop(job.lane, None)
+            self._notify()
+
+    # Persistence
+    def _job_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"job-{job_id}.json"
+
+    def _persist(self, job: BackgroundJob) -> None:
+        """Write a job record atomically."""
+        try:
+            self.jobs_dir.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.jobs_dir, prefix=f".job-{job.id}-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(job.dict(), f, ensure_ascii=False, default=str)
+                os.replace(temp_path, self._job_path(job.id))
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+        except Exception as e:
+            logger.error(f"Failed to persist job {job.id}: {e}")
+
+    def _ensure_loaded(self) -> None:
+        """Load persisted jobs once, re-queueing interrupted ones and pruning old finished ones."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.jobs_dir.exists():
+            return
+
+        cutoff = datetime.utcnow() - FINISHED_JOB_RETENTION
+        for path in self.jobs_dir.glob("job-*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    job = BackgroundJob(**json.load(f))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable job file {path}: {e}")
+                continue
+
+            if job.status in ("succeeded", "failed") and job.finished_at and job.finished_at < cutoff:
+                try:
+                    path.unlink()
+                except Exception as e:
+                    logger.warning(f"Failed to remove old job file {path}: {e}")
+                continue
+
+            if job.status == "running":
+                job.status = "queued"
+                self._persist(job)
+            self._jobs[job.id] = job
+
+
+# Global instance
+job_queue = JobQueue()
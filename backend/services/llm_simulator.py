@@ -0,0 +1,315 @@
+"""
+Local LLM Simulator
+
+In-process stand-in for the Gemini model, used for load tests and offline
+development. It implements the same generate_content(prompt, stream=...)
+surface as google.generativeai.GenerativeModel, so GeminiService and everything
+above it runs unchanged, but responses arrive with realistic timing:
+
+- time to first token drawn from a configurable latency distribution
+- output tokens emitted at a fixed rate, in chunks when streaming
+- injected errors and timeouts at configurable rates
+- scripted responses per prompt pattern, so intent classification, task
+  breakdown JSON and action JSON follow the same paths as with the real model
+
+Enable with SAMURAI_LLM_SIMULATOR=1. Settings (all optional):
+
+    SAMURAI_LLM_SIM_TTFT_MS          mean time to first token (default 400)
+    SAMURAI_LLM_SIM_LATENCY_DIST     fixed | uniform | normal | lognormal (default lognormal)
+    SAMURAI_LLM_SIM_LATENCY_SPREAD   relative spread of the distribution (default 0.5)
+    SAMURAI_LLM_SIM_TOKENS_PER_SEC   output rate after the first token (default 80)
+    SAMURAI_LLM_SIM_CHUNK_TOKENS     tokens per streamed chunk (default 8)
+    SAMURAI_LLM_SIM_RESPONSE_TOKENS  length of free-text responses (default 120)
+    SAMURAI_LLM_SIM_ERROR_RATE       probability of a failed call (default 0)
+    SAMURAI_LLM_SIM_TIMEOUT_RATE     probability of a call that hangs, then times out (default 0)
+    SAMURAI_LLM_SIM_TIMEOUT_S        how long a timed-out call hangs (default 30)
+    SAMURAI_LLM_SIM_SCRIPT           JSON file of extra [{"match": regex, "response": text}] rules
+    SAMURAI_LLM_SIM_SEED             random seed for reproducible runs
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Pattern, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Constants
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+CHARS_PER_TOKEN = 4
+USER_MARKER = "\n\nUser: "  # GeminiService joins system prompt and message with this
+
+
+class SimulatedLLMError(Exception):
+    """Injected model failure."""
+
+
+@dataclass
+class SimulatorConfig:
+    """Timing, failure and scripting settings of the simulator."""
+    ttft_ms: float = 400.0
+    latency_distribution: str = "lognormal"
+    latency_spread: float = 0.5
+    tokens_per_second: float = 80.0
+    chunk_tokens: int = 8
+    response_tokens: int = 120
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 30.0
+    script_path: Optional[str] = None
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "SimulatorConfig":
+        seed = os.getenv("SAMURAI_LLM_SIM_SEED")
+        distribution = os.getenv("SAMURAI_LLM_SIM_LATENCY_DIST", "lognormal").lower()
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            logger.warning(f"Unknown SAMURAI_LLM_SIM_LATENCY_DIST '{distribution}', using lognormal")
+            distribution = "lognormal"
+        return cls(
+            ttft_ms=float(os.getenv("SAMURAI_LLM_SIM_TTFT_MS", "400")),
+            latency_distribution=distribution,
+            latency_spread=float(os.getenv("SAMURAI_LLM_SIM_LATENCY_SPREAD", "0.5")),
+            tokens_per_second=float(os.getenv("SAMURAI_LLM_SIM_TOKENS_PER_SEC", "80")),
+            chunk_tokens=int(os.getenv("SAMURAI_LLM_SIM_CHUNK_TOKENS", "8")),
+            response_tokens=int(os.getenv("SAMURAI_LLM_SIM_RESPONSE_TOKENS", "120")),
+            error_rate=float(os.getenv("SAMURAI_LLM_SIM_ERROR_RATE", "0")),
+            timeout_rate=float(os.getenv("SAMURAI_LLM_SIM_TIMEOUT_RATE", "0")),
+            timeout_seconds=float(os.getenv("SAMURAI_LLM_SIM_TIMEOUT_S", "30")),
+            script_path=os.getenv("SAMURAI_LLM_SIM_SCRIPT") or None,
+            seed=int(seed) if seed else None,
+        )
+
+
+class SimulatedResponse:
+    """Minimal stand-in for a generate_content response or stream chunk."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+Responder = Callable[[str, str], str]
+
+
+@dataclass
+class ScriptRule:
+    """Response rule: a regex on the system prompt (and optionally the user message)."""
+    name: str
+    prompt_pattern: Pattern
+    response: Union[str, Responder]
+    message_pattern: Optional[Pattern] = None
+
+    def matches(self, system_prompt: str, message: str) -> bool:
+        if not self.prompt_pattern.search(system_prompt):
+            return False
+        return self.message_pattern is None or bool(self.message_pattern.search(message))
+
+    def render(self, system_prompt: str, message: str) -> str:
+        if callable(self.response):
+            return self.response(system_prompt, message)
+        return self.response
+
+
+# Built-in scripted responses
+def _topic(message: str, words: int = 6) -> str:
+    tokens = re.findall(r"[A-Za-z0-9']+", message)
+    return " ".join(tokens[:words]) or "the feature"
+
+
+def _classify_intent(_system_prompt: str, message: str) -> str:
+    text = message.lower()
+    if re.search(r"\b(mark|delete|remove|complete|update)\b.*\btasks?\b|\btasks?\b.*\b(done|complete)", text):
+        return "direct_action"
+    if re.search(r"(create|generate|make|add) (the |these |some )?tasks|break (this|it) down|give me the prompt", text):
+        return "ready_for_action"
+    if re.search(r"\b(should|must|needs? to|require|spec)\b", text):
+        return "spec_clarification"
+    if re.search(r"\b(thinking|idea|maybe|could we|what if|explore)\b", text):
+        return "feature_exploration"
+    return "pure_discussion"
+
+
+def _task_breakdown(system_prompt: str, message: str) -> str:
+    topic = _topic(message)
+    active = re.search(r"ACTIVE TASK[^\n]*\nID: ([^\n]+)", system_prompt)
+    parent = active.group(1).strip() if active else None
+    tasks = [] if parent else [{
+        "title": f"Implement {topic}",
+        "description": f"Deliver {topic} end to end.",
+        "parent_task_id": None,
+    }]
+    for step in ("Design", "Build", "Test"):
+        tasks.append({
+            "title": f"{step} {topic}",
+            "description": f"{step} work for {topic}.",
+            "parent_task_id": parent,
+        })
+    return json.dumps(tasks)
+
+
+def _action_plan(system_prompt: str, message: str) -> str:
+    text = message.lower()
+    project_id = re.search(r'"project_id": "([^"]+)"', system_prompt)
+    project_id = project_id.group(1) if project_id else ""
+    identifier = _topic(re.sub(r"\b(mark|delete|remove|task|as|complete|completed|done|the)\b", " ", text), 4)
+    if re.search(r"\b(delete|remove)\b", text):
+        action = {"tool_name": "delete_task", "parameters": {"task_identifier": identifier}}
+    elif re.search(r"\b(complete|completed|done|finish(ed)?)\b", text):
+        action = {"tool_name": "change_task_status",
+                  "parameters": {"task_identifier": identifier, "new_status": "completed"}}
+    else:
+        action = {"tool_name": "create_task",
+                  "parameters": {"title": f"Follow up: {_topic(message)}", "description": message[:500]}}
+    action["parameters"]["project_id"] = project_id
+    action.update({"requires_search_first": False, "description": f"Simulated {action['tool_name']}"})
+    return json.dumps({
+        "actions_detected": True,
+        "action_count": 1,
+        "confidence": 0.9,
+        "reasoning": "Simulated action analysis",
+        "actions": [action],
+    })
+
+
+def _session_insights(_system_prompt: str, message: str) -> str:
+    return json.dumps({
+        "insights": [{
+            "content": f"Decision discussed in session: {_topic(message, 12)}",
+            "category": "backend",
+            "is_new_category": False,
+            "new_category_suggestion": None,
+            "significance_score": 0.8,
+            "insight_type": "decision",
+            "related_keywords": _topic(message, 3).lower().split(),
+        }],
+        "session_relevance_score": 0.7,
+        "suggested_new_categories": [],
+    })
+
+
+BUILTIN_RULES: List[ScriptRule] = [
+    ScriptRule("intent", re.compile(r"Return ONLY the category name: pure_discussion"), _classify_intent),
+    ScriptRule("task_breakdown", re.compile(r"Return a pure JSON array of tasks"), _task_breakdown),
+    ScriptRule("action_plan", re.compile(r'"actions_detected"'), _action_plan),
+    ScriptRule("session_insights", re.compile(r'"session_relevance_score"'), _session_insights),
+    ScriptRule("consolidation_plan", re.compile(r'"updates".*"creates"', re.S),
+               json.dumps({"updates": [], "creates": [], "skipped": []})),
+    ScriptRule("title", re.compile(r"Return only the title"), lambda _s, m: _topic(m, 5).title()),
+]
+
+
+class SimulatedModel:
+    """Drop-in replacement for GenerativeModel with simulated latency, streaming and failures."""
+
+    def __init__(self, config: Optional[SimulatorConfig] = None, rules: Optional[List[ScriptRule]] = None):
+        self.config = config or SimulatorConfig.from_env()
+        self.rules = (rules or []) + self._load_script(self.config.script_path) + BUILTIN_RULES
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    @staticmethod
+    def _load_script(path: Optional[str]) -> List[ScriptRule]:
+        if not path:
+            return []
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+            return [
+                ScriptRule(
+                    name=entry.get("name", f"script_{i}"),
+                    prompt_pattern=re.compile(entry.get("match", ""), re.S),
+                    message_pattern=re.compile(entry["message_match"], re.S) if entry.get("message_match") else None,
+                    response=entry["response"],
+                )
+                for i, entry in enumerate(entries)
+            ]
+        except Exception as e:
+            logger.error(f"Failed to load LLM simulator script {path}: {e}")
+            return []
+
+    # Sampling
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def sample_ttft(self) -> float:
+        """Time to first token in seconds."""
+        mean = self.config.ttft_ms / 1000
+        spread = max(self.config.latency_spread, 0.0)
+        distribution = self.config.latency_distribution
+        with self._rng_lock:
+            if distribution == "fixed" or spread == 0:
+                value = mean
+            elif distribution == "uniform":
+                value = self._rng.uniform(mean * (1 - spread), mean * (1 + spread))
+            elif distribution == "normal":
+                value = self._rng.gauss(mean, mean * spread)
+            else:
+                # Lognormal with the configured mean; spread is sigma of the underlying normal
+                value = self._rng.lognormvariate(math.log(mean) - spread ** 2 / 2, spread) if mean > 0 else 0.0
+        return max(value, 0.0)
+
+    # Responses
+    def respond(self, prompt: str) -> Tuple[str, str]:
+        """(rule name, response text) for a prompt, without any delay."""
+        system_prompt, _, message = prompt.rpartition(USER_MARKER)
+        if not system_prompt:
+            system_prompt, message = prompt, ""
+        for rule in self.rules:
+            if rule.matches(system_prompt, message):
+                return rule.name, rule.render(system_prompt, message)
+        return "text", self._free_text(message or prompt)
+
+    def _free_text(self, message: str) -> str:
+        words = re.findall(r"[A-Za-z0-9']+", message)[:8]
+        filler = "here is a considered answer that walks through the approach trade-offs and next steps".split()
+        body = [filler[i % len(filler)] for i in range(max(self.config.response_tokens - len(words), 0))]
+        return " ".join(["Regarding"] + words + ["-"] + body).strip() + "."
+
+    def _chunks(self, text: str) -> List[str]:
+        size = max(self.config.chunk_tokens, 1) * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def _maybe_fail(self) -> None:
+        roll = self._random()
+        if roll < self.config.timeout_rate:
+            time.sleep(self.config.timeout_seconds)
+            raise TimeoutError(f"Simulated LLM timeout after {self.config.timeout_seconds}s")
+        if roll < self.config.timeout_rate + self.config.error_rate:
+            raise SimulatedLLMError("Simulated LLM error: 503 model overloaded")
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        """Blocking, like the SDK: returns a response, or an iterator of chunks when stream=True."""
+        self.calls += 1
+        if stream:
+            return self._stream(prompt)
+        self._maybe_fail()
+        _, text = self.respond(prompt)
+        tokens = len(text) / CHARS_PER_TOKEN
+        time.sleep(self.sample_ttft() + self._generation_time(tokens))
+        return SimulatedResponse(text)
+
+    def _stream(self, prompt: str) -> Iterator[SimulatedResponse]:
+        self._maybe_fail()
+        _, text = self.respond(prompt)
+        time.sleep(self.sample_ttft())
+        for i, chunk in enumerate(self._chunks(text)):
+            if i:
+                time.sleep(self._generation_time(len(chunk) / CHARS_PER_TOKEN))
+            yield SimulatedResponse(chunk)
+
+    def _generation_time(self, tokens: float) -> float:
+        if self.config.tokens_per_second <= 0:
+            return 0.0
+        return tokens / self.config.tokens_per_second
+
+
+def simulator_enabled() -> bool:
+    return os.getenv("SAMURAI_LLM_SIMULATOR") == "1"
@@ -0,0 +1,177 @@
+"""
+Structured, Non-Blocking Logging Setup
+
+configure_logging() replaces the per-module logging.basicConfig calls with one
+root configuration:
+
+- Records go through a QueueHandler to a QueueListener thread, so request
+  handlers never block on terminal or file writes. Messages are formatted on
+  the listener thread, which keeps %-style arguments lazy on the hot path.
+- Output is plain text or one JSON object per line (SAMURAI_LOG_FORMAT=json).
+- Messages longer than SAMURAI_LOG_MAX_CHARS are truncated.
+- SAMURAI_LOG_SAMPLE keeps only a fraction of DEBUG/INFO records per logger,
+  e.g. "services.file_service=0.1,main=0.5". WARNING and above are never sampled.
+
+Because formatting is deferred, log arguments should not be mutated after the
+call; pass values that are safe to render later (ids, counts, strings).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+
+# Constants
+LOG_LEVEL = os.getenv("SAMURAI_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("SAMURAI_LOG_FORMAT", "text")
+LOG_ASYNC = os.getenv("SAMURAI_LOG_ASYNC", "1") != "0"
+LOG_MAX_CHARS = int(os.getenv("SAMURAI_LOG_MAX_CHARS", "2000"))
+LOG_SAMPLE = os.getenv("SAMURAI_LOG_SAMPLE", "")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.Handler] = None
+
+
+def truncate(text: str, max_chars: int = LOG_MAX_CHARS) -> str:
+    """Shorten text beyond max_chars, noting how much was dropped."""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} chars truncated]"
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "logger=rate,logger=rate" into a mapping, ignoring malformed entries."""
+    rates = {}
+    for entry in spec.split(","):
+        name, _, rate = entry.strip().partition("=")
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records below WARNING for the configured loggers and their children."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "services.file_service" wins over "services"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return rate >= 1.0 or random.random() < rate
+        return True
+
+
+class TruncatingFormatter(logging.Formatter):
+    """Plain text formatter that caps the rendered message length."""
+
+    def __init__(self, fmt: str = TEXT_FORMAT, max_chars: int = LOG_MAX_CHARS):
+        super().__init__(fmt)
+        self.max_chars = max_chars
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message, self.max_chars)
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the standard fields plus any `extra=` values."""
+
+    def __init__(self, max_chars: int = LOG_MAX_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage(), self.max_chars),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the calling thread; the queue is in-process,
+        # so the record can travel as is
+        return record
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    log_format: str = LOG_FORMAT,
+    use_queue: bool = LOG_ASYNC,
+    sample_rates: Optional[Dict[str, float]] = None,
+    max_chars: int = LOG_MAX_CHARS,
+    stream=None
+) -> logging.Handler:
+    """
+    Install the root logging handler, replacing one from an earlier call.
+
+    Args:
+        level: Root log level name
+        log_format: "text" or "json"
+        use_queue: Write through a background listener thread
+        sample_rates: Per-logger keep rates for DEBUG/INFO; defaults to SAMURAI_LOG_SAMPLE
+        max_chars: Truncate messages longer than this (0 disables)
+        stream: Output stream, stderr by default
+
+    Returns:
+        The handler installed on the root logger
+    """
+    global _listener, _handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter(max_chars) if log_format == "json" else TruncatingFormatter(max_chars=max_chars))
+
+    if use_queue:
+        handler: logging.Handler = DeferredQueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+    handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE) if sample_rates is None else sample_rates))
+
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    root.addHandler(handler)
+    root.setLevel(level)
+    _handler = handler
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread, if running."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -87,8 +87,8 @@ async def detect_category_with_llm(content: str, available_categories: List[Memo
         The detected category or None if detection fails
     """
     try:
-        from .gemini_service import GeminiService
-        gemini_service = GeminiService()
+        from .container import container
+        gemini_service = container.gemini_service
         
         # Group categories by type for better prompting
         technical_cats = [cat for cat in available_categories if CATEGORY_CONFIG[cat].get('type') == 'technical']
@@ -185,8 +185,8 @@ async def generate_category_specific_title(content: str, category: MemoryCategor
         A short, category-specific title
     """
     try:
-        from .gemini_service import GeminiService
-        gemini_service = GeminiService()
+        from .container import container
+        gemini_service = container.gemini_service
         
         config = CATEGORY_CONFIG[category]
         
@@ -266,8 +266,8 @@ def migrate_existing_memories():
     Migrate existing memories from old categories to new software engineering categories.
     """
     try:
-        from .file_service import FileService
-        file_service = FileService()
+        from .container import container
+        file_service = container.file_service
         
         # Migration mapping from old to new categories
         migration_map = {
@@ -313,8 +313,8 @@ def bulk_recategorize_memories(project_id: str = None) -> int:
         Number of memories updated
     """
     try:
-        from .file_service import FileService
-        file_service = FileService()
+        from .container import container
+        file_service = container.file_service
         
         updated_count = 0
         
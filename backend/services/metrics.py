@@ -0,0 +1,306 @@
+"""
+Lightweight Metrics and Span Tracing
+
+A process-wide registry of counters, gauges and histograms, rendered in the Prometheus
+text exposition format by GET /metrics. Pipeline stages are timed with spans:
+every finished span feeds the samurai_stage_duration_seconds histogram and,
+when a trace is active in the current context, joins that request's span tree
+so it can be returned with the response.
+
+The active span lives in a contextvar, so spans opened in tasks created by the
+request and in asyncio.to_thread workers nest under the right parent. Setting
+SAMURAI_METRICS_ENABLED=0 turns recording into no-ops.
+"""
+
+import bisect
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constants
+METRICS_ENABLED = os.getenv("SAMURAI_METRICS_ENABLED", "1") != "0"
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STAGE_METRIC = "samurai_stage_duration_seconds"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Help text and histogram buckets for the metrics the services record
+METRIC_DEFINITIONS: Dict[str, Tuple[str, str, Optional[Sequence[float]]]] = {
+    STAGE_METRIC: ("histogram", "Duration of agent pipeline stages", LATENCY_BUCKETS),
+    "samurai_llm_calls_total": ("counter", "LLM generate calls", None),
+    "samurai_llm_errors_total": ("counter", "LLM generate calls that raised", None),
+    "samurai_llm_prompt_chars_total": ("counter", "Characters sent to the LLM", None),
+    "samurai_llm_response_chars_total": ("counter", "Characters received from the LLM", None),
+    "samurai_embedding_calls_total": ("counter", "Embedding model encode calls", None),
+    "samurai_embedding_texts_total": ("counter", "Texts passed to the embedding model", None),
+    "samurai_file_reads_total": ("counter", "Data files read", None),
+    "samurai_file_read_bytes_total": ("counter", "Bytes read from data files", None),
+    "samurai_file_writes_total": ("counter", "Data files written", None),
+    "samurai_file_write_bytes_total": ("counter", "Bytes written to data files", None),
+    "samurai_tool_calls_total": ("counter", "Agent tool executions", None),
+    "samurai_write_lane_ops_total": ("counter", "Mutations applied through per-project write lanes", None),
+    "samurai_write_lane_flushes_total": ("counter", "Write lane flushes; fewer than ops when writes were coalesced", None),
+    "samurai_write_lane_depth": ("gauge", "Mutations queued or running in a project's write lane", None),
+    "samurai_write_lane_wait_seconds": ("histogram", "Time a mutation waited in its write lane", None),
+    "samurai_write_behind_staged_total": ("counter", "Saves held in memory by write-behind persistence", None),
+    "samurai_write_behind_flushes_total": ("counter", "Write-behind flushes that wrote at least one file", None),
+    "samurai_backups_total": ("counter", "Data file snapshots by result (created, deduplicated, skipped)", None),
+    "samurai_request_llm_calls": ("histogram", "LLM calls per traced request", COUNT_BUCKETS),
+    "samurai_request_prompt_chars": ("histogram", "LLM prompt characters per traced request", SIZE_BUCKETS),
+    "samurai_request_file_read_bytes": ("histogram", "Data file bytes read per traced request", SIZE_BUCKETS),
+}
+
+# Per-request histograms observed from trace totals when a trace finishes
+REQUEST_TOTALS = {
+    "samurai_request_llm_calls": "samurai_llm_calls_total",
+    "samurai_request_prompt_chars": "samurai_llm_prompt_chars_total",
+    "samurai_request_file_read_bytes": "samurai_file_read_bytes_total",
+}
+
+
+class Span:
+    """A timed stage. The root span of a trace also accumulates counter totals."""
+
+    __slots__ = ("name", "attributes", "started", "duration", "children", "root", "totals")
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["Span"] = None):
+        self.name = name
+        self.attributes = attributes
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.children: List["Span"] = []
+        self.root = parent.root if parent is not None else self
+        self.totals: Dict[str, float] = {}
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the span tree for API responses."""
+        elapsed = self.duration if self.duration is not None else time.perf_counter() - self.started
+        data: Dict[str, Any] = {"name": self.name, "duration_ms": round(elapsed * 1000, 3)}
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.children:
+            data["children"] = [child.to_dict() for child in list(self.children)]
+        if self.root is self and self.totals:
+            data["totals"] = dict(self.totals)
+        return data
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("samurai_current_span", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, labels: LabelKey, value: float) -> None:
+        # Per series: one count per bucket, then +Inf count, then sum
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges, histograms and span traces."""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, _Histogram] = {}
+
+    # Recording
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Increment a counter, and the active trace's total for it."""
+        if not self.enabled:
+            return
+        key = self._label_key(labels)
+        span = _current_span.get()
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+            if span is not None:
+                span.root.totals[name] = span.root.totals.get(name, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge to its current value."""
+        if not self.enabled:
+            return
+        key = self._label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record a histogram observation."""
+        if not self.enabled:
+            return
+        key = self._label_key(labels)
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                definition = METRIC_DEFINITIONS.get(name)
+                histogram = self._histograms[name] = _Histogram(
+                    definition[2] if definition and definition[2] else LATENCY_BUCKETS
+                )
+            histogram.observe(key, value)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Time a pipeline stage.
+
+        The span nests under the active span, if any, and its duration is
+        recorded in the stage histogram labelled with the span name, so names
+        should be low-cardinality ("agent.intent", not per-project).
+        """
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        span = Span(name, attributes, parent)
+        if parent is not None:
+            parent.children.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.finish()
+            self._reset(token)
+            self.observe(STAGE_METRIC, span.duration, stage=name)
+
+    def start_trace(self, name: str, **attributes: Any) -> Tuple[Optional[Span], Optional[contextvars.Token]]:
+        """
+        Open a new root span in the current context.
+
+        Use this instead of trace() where a with-block cannot span the work,
+        such as across the yields of a streaming response. Returns the span and
+        the token to pass to finish_trace().
+        """
+        if not self.enabled:
+            return None, None
+        span = Span(name, attributes)
+        return span, _current_span.set(span)
+
+    def finish_trace(self, span: Optional[Span], token: Optional[contextvars.Token]) -> None:
+        """Close a root span from start_trace() and record its per-request histograms."""
+        if span is None:
+            return
+        span.finish()
+        self._reset(token)
+        self.observe(STAGE_METRIC, span.duration, stage=span.name)
+        for histogram, counter in REQUEST_TOTALS.items():
+            self.observe(histogram, span.totals.get(counter, 0.0), endpoint=span.name)
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Open a root span for one request; see start_trace()."""
+        span, token = self.start_trace(name, **attributes)
+        try:
+            yield span
+        finally:
+            self.finish_trace(span, token)
+
+    def current_span(self) -> Optional[Span]:
+        """Return the active span in this context, if any."""
+        return _current_span.get()
+
+    # Export
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                self._write_header(lines, name, "counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{self._format_labels(labels)} {self._format_value(value)}")
+            for name in sorted(self._gauges):
+                self._write_header(lines, name, "gauge")
+                for labels, value in sorted(self._gauges[name].items()):
+                    lines.append(f"{name}{self._format_labels(labels)} {self._format_value(value)}")
+            for name in sorted(self._histograms):
+                histogram = self._histograms[name]
+                self._write_header(lines, name, "histogram")
+                for labels, series in sorted(histogram.series.items()):
+                    cumulative = 0.0
+                    for bound, count in zip(histogram.buckets, series):
+                        cumulative += count
+                        le = self._format_labels(labels + (("le", self._format_value(bound)),))
+                        lines.append(f"{name}_bucket{le} {self._format_value(cumulative)}")
+                    cumulative += series[len(histogram.buckets)]
+                    lines.append(f"{name}_bucket{self._format_labels(labels + (('le', '+Inf'),))} "
+                                 f"{self._format_value(cumulative)}")
+                    lines.append(f"{name}_sum{self._format_labels(labels)} {self._format_value(series[-1])}")
+                    lines.append(f"{name}_count{self._format_labels(labels)} {self._format_value(cumulative)}")
+        return "\n".join(lines) + "\n"
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        """Sum a counter over all series matching the given labels."""
+        wanted = set(self._label_key(labels))
+        with self._lock:
+            return sum(value for key, value in self._counters.get(name, {}).items() if wanted <= set(key))
+
+    def gauge_value(self, name: str, **labels: Any) -> Optional[float]:
+        """Current value of the gauge series with exactly these labels, if set."""
+        with self._lock:
+            return self._gauges.get(name, {}).get(self._label_key(labels))
+
+    def reset(self) -> None:
+        """Clear all recorded values (for tests)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    # Helpers
+    @staticmethod
+    def _reset(token: Optional[contextvars.Token]) -> None:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Finished from another context (e.g. a closed streaming generator); nothing to restore
+            pass
+
+    @staticmethod
+    def _label_key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _format_labels(labels: LabelKey) -> str:
+        if not labels:
+            return ""
+        def escape(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+    @staticmethod
+    def _write_header(lines: List[str], name: str, kind: str) -> None:
+        definition = METRIC_DEFINITIONS.get(name)
+        if definition:
+            lines.append(f"# HELP {name} {definition[1]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+# Global instance
+metrics = MetricsRegistry()
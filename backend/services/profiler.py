@@ -0,0 +1,180 @@
+"""
+Opt-in Per-Request Sampling Profiler
+
+A wall-clock sampling profiler for diagnosing slow requests. While a profiled
+request runs, a background thread snapshots the stack of every thread with
+sys._current_frames() at a fixed interval: the event loop thread (the endpoint
+and the agent task it spawns) as well as asyncio.to_thread workers running
+blocking LLM, embedding and file calls. Time spent waiting shows up as samples
+in the waiting frame, so Gemini latency is distinguishable from CPU work.
+
+Profiles are saved in the folded-stack format ("frame;frame;frame count" per
+line) understood by flamegraph.pl, speedscope and inferno, next to a JSON
+metadata file used by the /profiles index.
+
+Profiling is off unless SAMURAI_PROFILING_ENABLED=1. When enabled, requests are
+profiled if they send the X-Samurai-Profile header or are picked by
+SAMURAI_PROFILE_SAMPLE_RATE. Samples cover the whole process, so requests that
+run concurrently appear in each other's profiles.
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from .file_service import DATA_DIR
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services.file_service import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Constants
+PROFILING_ENABLED = os.getenv("SAMURAI_PROFILING_ENABLED") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("SAMURAI_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("SAMURAI_PROFILE_INTERVAL_MS", "5"))
+PROFILES_DIR = os.getenv("SAMURAI_PROFILES_DIR", os.path.join(DATA_DIR, "profiles"))
+PROFILE_HEADER = "X-Samurai-Profile"
+PROFILE_ID_HEADER = "X-Samurai-Profile-Id"
+MAX_PROFILES = 100
+MAX_STACK_DEPTH = 128
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _short_path(filename: str) -> str:
+    """Trim a code path to something readable in a flame graph."""
+    if "site-packages" in filename:
+        return filename.split("site-packages" + os.sep, 1)[-1]
+    if filename.startswith(BACKEND_DIR):
+        return filename[len(BACKEND_DIR) + 1:]
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads until stopped and aggregates them as folded stacks."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = max(interval_ms, 0.5) / 1000
+        self.profile_id = ""
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[datetime] = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[Any, str] = {}
+
+    def start(self) -> None:
+        self.started_at = datetime.now()
+        self.profile_id = f"{self.started_at.strftime('%Y%m%d_%H%M%S_%f')}-{uuid.uuid4().hex[:8]}"
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._thread = threading.Thread(target=self._run, name="samurai-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = time.process_time() - self._cpu_start
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.stacks[self._fold(names.get(thread_id, str(thread_id)), frame)] += 1
+            self.samples += 1
+
+    def _fold(self, thread_name: str, frame) -> str:
+        frames: List[str] = []
+        while frame is not None and len(frames) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            frames.append(label)
+            frame = frame.f_back
+        frames.append(thread_name)
+        return ";".join(reversed(frames))
+
+    def folded(self) -> str:
+        """Return the profile in folded-stack format, heaviest stacks first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Saves profiles with their metadata and keeps only the most recent ones."""
+
+    def __init__(self, profiles_dir: str = PROFILES_DIR, max_profiles: int = MAX_PROFILES):
+        self.profiles_dir = Path(profiles_dir)
+        self.max_profiles = max_profiles
+
+    def save(self, profiler: SamplingProfiler, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Write a finished profile and return its metadata including the id."""
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
+        profile_id = profiler.profile_id
+        metadata = {
+            "id": profile_id,
+            "started_at": profiler.started_at.isoformat(),
+            "wall_ms": round(profiler.wall_seconds * 1000, 1),
+            "process_cpu_ms": round(profiler.cpu_seconds * 1000, 1),
+            "samples": profiler.samples,
+            "interval_ms": profiler.interval * 1000,
+            "format": "folded",
+            **metadata,
+        }
+        (self.profiles_dir / f"{profile_id}.folded").write_text(profiler.folded(), encoding="utf-8")
+        (self.profiles_dir / f"{profile_id}.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+        self._rotate()
+        return metadata
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Metadata of stored profiles, newest first."""
+        profiles = []
+        for path in sorted(self.profiles_dir.glob("*.json"), reverse=True):
+            try:
+                profiles.append(json.loads(path.read_text(encoding="utf-8")))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable profile metadata {path}: {e}")
+        return profiles
+
+    def get_profile_path(self, profile_id: str) -> Optional[Path]:
+        """Path of a stored folded profile, or None for unknown or malformed ids."""
+        path = self.profiles_dir / f"{profile_id}.folded"
+        if path.parent != self.profiles_dir or not path.exists():
+            return None
+        return path
+
+    def _rotate(self) -> None:
+        for path in sorted(self.profiles_dir.glob("*.json"), reverse=True)[self.max_profiles:]:
+            for stale in (path, path.with_suffix(".folded")):
+                try:
+                    stale.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def should_profile(header_value: Optional[str], sample_rate: float = PROFILE_SAMPLE_RATE) -> bool:
+    """Decide whether to profile a request from its profile header and the sampling rate."""
+    if header_value is not None:
+        return header_value.strip().lower() not in ("", "0", "false", "no")
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+# Global instance
+profile_store = ProfileStore()
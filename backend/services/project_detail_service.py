@@ -1,73 +1,321 @@
+import asyncio
+import hashlib
 import logging
-from typing import List, Optional
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from .gemini_service import GeminiService
-from .file_service import file_service
+from .file_service import FileService
+from .embedding_service import embedding_service
+from .container import container
 
 
 logger = logging.getLogger(__name__)
 
+# Chunking and map-reduce limits
+MAX_CHUNK_CHARS = 8000
+SUMMARY_CONCURRENCY = 4
+REDUCE_BUDGET_CHARS = 24000
+CHUNK_CACHE_MAX_ENTRIES = 500
+
+# Section-routed merge
+SPEC_SECTION_TITLES = [
+    "Project Overview", "Features", "Tech Stack", "Architecture", "Key APIs", "Data Models",
+    "Workflows", "Constraints", "Non-Functional Requirements", "Open Questions",
+]
+FALLBACK_SECTION_TITLE = "Open Questions"
+KEYWORD_ROUTING_MIN_SCORE = 0.05
+EMBEDDING_ROUTING_MIN_SCORE = 0.35
+SESSION_MESSAGE_LIMIT = 100
+
+_CANONICAL_TITLES = {t.lower(): t for t in SPEC_SECTION_TITLES}
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+_HEADING_RE = re.compile(r"^\s{0,3}(#{1,6}\s+\S|[A-Z][A-Za-z0-9 /&()\-]{2,60}:\s*$)")
+
+CHUNK_SYSTEM_PROMPT = (
+    """
+    You are a senior software architect creating comprehensive, reader-friendly documentation for engineers
+    and product/project managers. Digest the provided text and extract ONLY facts that are explicitly stated.
+    Do NOT infer, guess, extrapolate, or invent any details.
+
+    Principles:
+    - Be comprehensive yet concise: capture all explicit, useful facts for understanding the product goal and
+      planning implementation, but avoid fluff.
+    - Use consistent terminology exactly as written in the source; include aliases only if explicitly provided.
+    - If a detail is missing or ambiguous, write 'Not specified' or add a question to 'Open Questions' without
+      proposing an answer.
+
+    Output a concise, structured summary using these exact sections (omit sections with no info):
+    - Project Overview: primary goal/value proposition, and the 3–5 main features/value points if explicitly
+      present. Exclude implementation details. Include target users only if explicitly stated.
+    - Features: only user-visible capabilities that are clearly and explicitly described. Omit vague items.
+    - Tech Stack: as explicitly stated.
+    - Architecture: as explicitly stated.
+    - Key APIs: only explicitly named endpoints (methods/paths if present); do not invent.
+    - Data Models: only database schema elements (tables/collections, fields, types if provided, relationships).
+      Exclude DTOs/payload shapes/runtime objects unless the text explicitly marks them as schema.
+    - Workflows: only main end-to-end flows at a high level (roughly 3–8 steps); exclude micro-interactions.
+    - Constraints
+    - Non-Functional Requirements
+    - Open Questions
+    Formatting: Use bullet points, crisp language, and avoid internal jargon where possible (unless it appears
+    verbatim in the text).
+    """
+)
+
+MERGE_SYSTEM_PROMPT = (
+    """
+    You are updating an existing software project specification to be comprehensive and easy to understand
+    for engineers and product/project managers. Perform a STRICT, FACTS-ONLY, CONSERVATIVE SEMANTIC MERGE of
+    the EXISTING SPEC with the NEW INSIGHTS.
+
+    Preservation-first merge policy:
+    - Preserve existing content by default. Do not delete, weaken, rename, or downgrade existing items unless
+      the NEW INSIGHTS explicitly deprecate, replace, or correct that exact item.
+    - When NEW INSIGHTS add detail to an existing item, augment the existing item with the additional detail.
+    - If NEW INSIGHTS conflict ambiguously with existing content, keep the original and add the conflicting
+      statement under 'Open Questions' as a question to resolve; do not choose a side.
+    - Never infer, guess, or invent any details (APIs, endpoints, parameters, models, fields, services,
+      libraries, versions, or architectural components). Include ONLY items explicitly present in either the
+      existing spec or the new insights text.
+    - Comprehensiveness: do not drop explicit facts from either source. If a fact does not neatly fit a
+      section but is relevant, place it under 'Constraints' or 'Open Questions' rather than omitting it.
+
+    Section rules (optimize for understanding the goal and major capabilities):
+    - Project Overview: include only the primary goal and 3–5 main features/value propositions. Exclude
+      implementation details, APIs, workflows, tech stack, constraints, or minor specifics.
+    - Features: include only user-visible capabilities that are explicitly and clearly described. If an item
+      is vague or unclear, omit it from this section. Each item should be a short action/result statement
+      (e.g., "Users can … to …").
+    - Tech Stack and Architecture: list exactly as explicitly stated; do not infer or rename.
+    - Key APIs: include only endpoints explicitly named (methods/paths if provided). Omit examples and
+      payload minutiae unless explicitly present.
+    - Data Models: include only database schema elements (tables/collections, fields, types if provided,
+      and relationships). Exclude runtime objects, DTOs, API payload shapes, and memory categories. If types
+      are not stated, note "type: Not specified".
+    - Workflows: capture only main end-to-end flows at a high level (roughly 3–8 steps). Exclude UI micro-
+      interactions, edge cases, error/status code details, and payload/response examples.
+    - Constraints and Non-Functional Requirements: include only what is explicitly stated.
+    - Open Questions: list gaps, ambiguities, and conflicts.
+
+    Clarity and formatting for a broad audience:
+    - Use bullet points and short, direct sentences.
+    - Prefer clear phrasing without internal shorthand. Keep original domain terms but avoid unexplained jargon.
+    - If a section lacks explicit information, write 'Not specified'.
+    - Normalize duplicates; prefer stable canonical names present in the existing spec when possible.
+
+    Output a single concise 'Project Detail Specification' with these exact sections:
+    Project Overview, Features, Tech Stack, Architecture, Key APIs, Data Models, Workflows, Constraints,
+    Non-Functional Requirements, Open Questions.
+    """
+)
+
+REPLACE_SYSTEM_PROMPT = (
+    "Synthesize the provided summaries into a single concise 'Project Detail Specification' suitable as a "
+    "permanent reference for an AI coding assistant.\n\n"
+    "Hard constraints:\n"
+    "- Extract ONLY facts explicitly present in the summaries; do NOT fabricate or infer details.\n"
+    "- Do NOT create API endpoints, parameters, models, fields, or architectural elements unless they are "
+    "  explicitly stated.\n"
+    "- If a section lacks explicit information, write 'Not specified'.\n"
+    "- Move missing-but-important details to 'Open Questions' as questions.\n\n"
+    "Use these sections: Project Overview, Tech Stack, Architecture, Key APIs, Data Models, Workflows, "
+    "Constraints, Non-Functional Requirements, Features, Open Questions. Use bullet points and keep it crisp."
+)
+
+REDUCE_SYSTEM_PROMPT = (
+    "Condense the provided partial summaries of one software project into a single summary using the same "
+    "sections (Project Overview, Features, Tech Stack, Architecture, Key APIs, Data Models, Workflows, "
+    "Constraints, Non-Functional Requirements, Open Questions).\n\n"
+    "Hard constraints:\n"
+    "- Keep every explicit fact; remove only duplicates.\n"
+    "- Do NOT infer, guess, or invent details.\n"
+    "- Use bullet points and keep it crisp."
+)
+
+SECTION_MERGE_SYSTEM_PROMPT = (
+    """
+    You are updating selected sections of an existing software project specification. Perform a STRICT,
+    FACTS-ONLY, CONSERVATIVE SEMANTIC MERGE of the EXISTING SECTIONS with the NEW INSIGHTS routed to them.
+
+    - Preserve existing content by default. Do not delete, weaken, rename, or downgrade existing items unless
+      the NEW INSIGHTS explicitly deprecate, replace, or correct that exact item.
+    - When NEW INSIGHTS add detail to an existing item, augment the existing item with the additional detail.
+    - If NEW INSIGHTS conflict ambiguously with existing content, keep the original and add the conflicting
+      statement to the 'Open Questions' section if it was provided; do not choose a side.
+    - Never infer, guess, or invent any details. Include ONLY items explicitly present in either source.
+    - Use bullet points and short, direct sentences. If a section lacks explicit information, write
+      'Not specified'.
+
+    Output every section you were given, in the same order, each starting with a line '## <Section Title>'
+    using exactly the given title. Do not output any other sections or any text outside the sections.
+    """
+)
+
+
+@dataclass
+class SpecSection:
+    """One addressable section of the project detail spec."""
+    title: str
+    heading: str
+    body: str
+
+
+def _canonical_section_title(line: str) -> Optional[str]:
+    """Return the canonical section title if the line is a spec section heading."""
+    candidate = line.strip()
+    if not candidate or len(candidate) > 80:
+        return None
+    candidate = re.sub(r"^(#{1,6}|[-*])\s+", "", candidate)
+    candidate = re.sub(r"^\d+[.)]\s*", "", candidate)
+    candidate = candidate.strip().strip("*_").strip().rstrip(":").strip().strip("*_").strip()
+    return _CANONICAL_TITLES.get(candidate.lower())
+
+
+def parse_spec_sections(text: str) -> List[SpecSection]:
+    """
+    Split a spec into addressable sections keyed by the canonical section titles.
+
+    Text before the first recognised heading is returned as a section with an
+    empty title so that rendering the sections reproduces the whole document.
+    """
+    sections: List[SpecSection] = []
+    current = SpecSection(title="", heading="", body="")
+    lines: List[str] = []
+    for line in (text or "").splitlines():
+        title = _canonical_section_title(line)
+        if title:
+            current.body = "\n".join(lines).strip("\n")
+            if current.title or current.body.strip():
+                sections.append(current)
+            current = SpecSection(title=title, heading=line.rstrip(), body="")
+            lines = []
+        else:
+            lines.append(line)
+    current.body = "\n".join(lines).strip("\n")
+    if current.title or current.body.strip():
+        sections.append(current)
+    return sections
+
+
+def render_spec_sections(sections: List[SpecSection]) -> str:
+    """Render sections back into a single spec document."""
+    parts = []
+    for section in sections:
+        if section.heading:
+            parts.append(f"{section.heading}\n{section.body}".rstrip())
+        elif section.body.strip():
+            parts.append(section.body.rstrip())
+    return "\n\n".join(parts).strip()
+
+
+def _keywords(text: str) -> set:
+    return set(_WORD_RE.findall((text or "").lower()))
+
+
+def _prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def split_into_chunks(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into chunks of at most max_chars, breaking on headings and paragraphs.
+
+    Blocks (paragraphs, or a heading plus the text up to the next blank line) are
+    packed greedily; a new chunk is started before a heading when the current chunk
+    is already half full so sections are not split mid-way. Blocks that are larger
+    than max_chars on their own are split on line boundaries, then hard-split.
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    for line in text.splitlines():
+        if not line.strip():
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            continue
+        if _HEADING_RE.match(line) and current:
+            blocks.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+
+    pieces: List[str] = []
+    for block in blocks:
+        if len(block) <= max_chars:
+            pieces.append(block)
+            continue
+        buffer = ""
+        for line in block.splitlines():
+            while len(line) > max_chars:
+                if buffer:
+                    pieces.append(buffer)
+                    buffer = ""
+                pieces.append(line[:max_chars])
+                line = line[max_chars:]
+            if buffer and len(buffer) + 1 + len(line) > max_chars:
+                pieces.append(buffer)
+                buffer = line
+            else:
+                buffer = f"{buffer}\n{line}" if buffer else line
+        if buffer:
+            pieces.append(buffer)
+
+    chunks: List[str] = []
+    chunk = ""
+    for piece in pieces:
+        starts_section = bool(_HEADING_RE.match(piece))
+        too_big = chunk and len(chunk) + 2 + len(piece) > max_chars
+        section_break = chunk and starts_section and len(chunk) >= max_chars // 2
+        if too_big or section_break:
+            chunks.append(chunk)
+            chunk = piece
+        else:
+            chunk = f"{chunk}\n\n{piece}" if chunk else piece
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
 
 class ProjectDetailService:
     """
     Orchestrates LLM-based digestion of long-form project detail with semantic merging.
-    - Chunks raw input
-    - Summarizes chunks
-    - Semantically merges with existing spec (merge/replace/append)
+    - Chunks raw input on heading/paragraph boundaries
+    - Summarizes chunks in parallel (bounded), reusing cached summaries of unchanged chunks
+    - Reduces summaries hierarchically when they exceed the context budget
+    - Semantically merges with existing spec (merge/replace/append); merges only
+      send the spec sections affected by the new insights
+    - Tracks a per-project watermark so session closes only digest new messages
     - Persists final result to project_detail.txt
     """
 
-    def __init__(self, gemini_service: Optional[GeminiService] = None):
-        self.gemini = gemini_service or GeminiService()
+    def __init__(self, gemini_service: Optional[GeminiService] = None, file_service: Optional[FileService] = None):
+        self.gemini = gemini_service or container.gemini_service
+        self.file_service = file_service or container.file_service
 
     async def ingest_project_detail(self, project_id: str, raw_text: str, mode: str = "merge") -> str:
         raw_text = (raw_text or "").strip()
         if not raw_text:
             return ""
+        started = time.perf_counter()
 
         # 1) Chunk raw input for LLM limits
-        max_chunk_chars = 8000
-        chunks: List[str] = [raw_text[i:i + max_chunk_chars] for i in range(0, len(raw_text), max_chunk_chars)]
-
-        # 2) Summarize chunks individually
-        partial_summaries: List[str] = []
-        chunk_system_prompt = (
-            """
-            You are a senior software architect creating comprehensive, reader-friendly documentation for engineers
-            and product/project managers. Digest the provided text and extract ONLY facts that are explicitly stated.
-            Do NOT infer, guess, extrapolate, or invent any details.
-
-            Principles:
-            - Be comprehensive yet concise: capture all explicit, useful facts for understanding the product goal and
-              planning implementation, but avoid fluff.
-            - Use consistent terminology exactly as written in the source; include aliases only if explicitly provided.
-            - If a detail is missing or ambiguous, write 'Not specified' or add a question to 'Open Questions' without
-              proposing an answer.
-
-            Output a concise, structured summary using these exact sections (omit sections with no info):
-            - Project Overview: primary goal/value proposition, and the 3–5 main features/value points if explicitly
-              present. Exclude implementation details. Include target users only if explicitly stated.
-            - Features: only user-visible capabilities that are clearly and explicitly described. Omit vague items.
-            - Tech Stack: as explicitly stated.
-            - Architecture: as explicitly stated.
-            - Key APIs: only explicitly named endpoints (methods/paths if present); do not invent.
-            - Data Models: only database schema elements (tables/collections, fields, types if provided, relationships).
-              Exclude DTOs/payload shapes/runtime objects unless the text explicitly marks them as schema.
-            - Workflows: only main end-to-end flows at a high level (roughly 3–8 steps); exclude micro-interactions.
-            - Constraints
-            - Non-Functional Requirements
-            - Open Questions
-            Formatting: Use bullet points, crisp language, and avoid internal jargon where possible (unless it appears
-            verbatim in the text).
-            """
-        )
-        for chunk in chunks:
-            summary = await self.gemini.chat_with_system_prompt(chunk, chunk_system_prompt)
-            partial_summaries.append((summary or "").strip())
+        chunks = split_into_chunks(raw_text, MAX_CHUNK_CHARS)
 
-        # 3) Semantic merge synthesis with existing content
+        # 2) Map: summarize chunks concurrently, reusing cached summaries
+        partial_summaries = await self._summarize_chunks(project_id, chunks)
+
+        # 3) Reduce: condense summaries until they fit the merge prompt budget
+        partial_summaries = await self._reduce_summaries(partial_summaries)
+
+        # 4) Semantic merge synthesis with existing content
         synthesis_input = "\n\n".join(partial_summaries)
-        existing_detail = file_service.load_project_detail(project_id)
+        existing_detail = self.file_service.load_project_detail(project_id)
         mode_normalized = (mode or "merge").lower()
 
         # append => concatenate then perform semantic merge to dedupe and update
@@ -78,81 +326,274 @@ class ProjectDetailService:
             mode_for_prompt = mode_normalized
 
         if mode_for_prompt == "merge" and existing_detail:
-            merge_system_prompt = (
-                """
-                You are updating an existing software project specification to be comprehensive and easy to understand
-                for engineers and product/project managers. Perform a STRICT, FACTS-ONLY, CONSERVATIVE SEMANTIC MERGE of
-                the EXISTING SPEC with the NEW INSIGHTS.
-
-                Preservation-first merge policy:
-                - Preserve existing content by default. Do not delete, weaken, rename, or downgrade existing items unless
-                  the NEW INSIGHTS explicitly deprecate, replace, or correct that exact item.
-                - When NEW INSIGHTS add detail to an existing item, augment the existing item with the additional detail.
-                - If NEW INSIGHTS conflict ambiguously with existing content, keep the original and add the conflicting
-                  statement under 'Open Questions' as a question to resolve; do not choose a side.
-                - Never infer, guess, or invent any details (APIs, endpoints, parameters, models, fields, services,
-                  libraries, versions, or architectural components). Include ONLY items explicitly present in either the
-                  existing spec or the new insights text.
-                - Comprehensiveness: do not drop explicit facts from either source. If a fact does not neatly fit a
-                  section but is relevant, place it under 'Constraints' or 'Open Questions' rather than omitting it.
-
-                Section rules (optimize for understanding the goal and major capabilities):
-                - Project Overview: include only the primary goal and 3–5 main features/value propositions. Exclude
-                  implementation details, APIs, workflows, tech stack, constraints, or minor specifics.
-                - Features: include only user-visible capabilities that are explicitly and clearly described. If an item
-                  is vague or unclear, omit it from this section. Each item should be a short action/result statement
-                  (e.g., "Users can … to …").
-                - Tech Stack and Architecture: list exactly as explicitly stated; do not infer or rename.
-                - Key APIs: include only endpoints explicitly named (methods/paths if provided). Omit examples and
-                  payload minutiae unless explicitly present.
-                - Data Models: include only database schema elements (tables/collections, fields, types if provided,
-                  and relationships). Exclude runtime objects, DTOs, API payload shapes, and memory categories. If types
-                  are not stated, note "type: Not specified".
-                - Workflows: capture only main end-to-end flows at a high level (roughly 3–8 steps). Exclude UI micro-
-                  interactions, edge cases, error/status code details, and payload/response examples.
-                - Constraints and Non-Functional Requirements: include only what is explicitly stated.
-                - Open Questions: list gaps, ambiguities, and conflicts.
-
-                Clarity and formatting for a broad audience:
-                - Use bullet points and short, direct sentences.
-                - Prefer clear phrasing without internal shorthand. Keep original domain terms but avoid unexplained jargon.
-                - If a section lacks explicit information, write 'Not specified'.
-                - Normalize duplicates; prefer stable canonical names present in the existing spec when possible.
-
-                Output a single concise 'Project Detail Specification' with these exact sections:
-                Project Overview, Features, Tech Stack, Architecture, Key APIs, Data Models, Workflows, Constraints,
-                Non-Functional Requirements, Open Questions.
-                """
-            )
-            merge_input = f"EXISTING SPEC:\n{existing_detail}\n\nNEW INSIGHTS (summaries):\n{synthesis_input}"
-            final_text = await self.gemini.chat_with_system_prompt(
-                "Merge existing spec with new insights semantically", f"{merge_system_prompt}\n\n{merge_input}"
-            )
+            final_text = None
+            if mode_normalized == "merge":
+                # Only send the sections the new insights touch
+                final_text = await self._merge_affected_sections(existing_detail, synthesis_input)
+            if final_text is None:
+                merge_input = f"EXISTING SPEC:\n{existing_detail}\n\nNEW INSIGHTS (summaries):\n{synthesis_input}"
+                final_text = await self.gemini.chat_with_system_prompt(
+                    "Merge existing spec with new insights semantically", f"{MERGE_SYSTEM_PROMPT}\n\n{merge_input}"
+                )
         else:
             # replace or no existing
-            replace_system_prompt = (
-                "Synthesize the provided summaries into a single concise 'Project Detail Specification' suitable as a "
-                "permanent reference for an AI coding assistant.\n\n"
-                "Hard constraints:\n"
-                "- Extract ONLY facts explicitly present in the summaries; do NOT fabricate or infer details.\n"
-                "- Do NOT create API endpoints, parameters, models, fields, or architectural elements unless they are "
-                "  explicitly stated.\n"
-                "- If a section lacks explicit information, write 'Not specified'.\n"
-                "- Move missing-but-important details to 'Open Questions' as questions.\n\n"
-                "Use these sections: Project Overview, Tech Stack, Architecture, Key APIs, Data Models, Workflows, "
-                "Constraints, Non-Functional Requirements, Features, Open Questions. Use bullet points and keep it crisp."
-            )
             final_text = await self.gemini.chat_with_system_prompt(
-                "Create synthesized project detail", f"{replace_system_prompt}\n\n{synthesis_input}"
+                "Create synthesized project detail", f"{REPLACE_SYSTEM_PROMPT}\n\n{synthesis_input}"
             )
 
         final_text = (final_text or "").strip()
-        file_service.save_project_detail(project_id, final_text)
-        logger.info(f"Project detail ingested and saved for {project_id} ({len(final_text)} chars, mode={mode_for_prompt})")
+        if not final_text or self._is_failed_response(final_text):
+            # Keep the existing spec; the caller's job is retried
+            raise RuntimeError(f"Project detail merge failed for {project_id}; spec left unchanged")
+        self.file_service.save_project_detail(project_id, final_text)
+        logger.info(
+            f"Project detail ingested and saved for {project_id} ({len(final_text)} chars, mode={mode_for_prompt}, "
+            f"{len(chunks)} chunks, {time.perf_counter() - started:.2f}s)"
+        )
+        return final_text
+
+    async def ingest_session_messages(self, project_id: str, session_id: str, messages: List[Any]) -> str:
+        """
+        Merge the not-yet-digested messages of a session into the project detail spec.
+
+        A per-project watermark (last digested message id and timestamp) is kept so
+        repeated session closes only summarize new messages.
+
+        Args:
+            project_id: Project identifier
+            session_id: Session the messages belong to
+            messages: Session chat messages sorted by creation time
+
+        Returns:
+            The resulting spec text (unchanged if there was nothing new)
+
+        Raises:
+            RuntimeError: If the merge failed; the watermark is not advanced
+        """
+        state = self.file_service.load_project_detail_state(project_id)
+        new_messages = self._messages_after_watermark(messages, state)
+        if not new_messages:
+            logger.info(f"No new messages to digest for project {project_id}, session {session_id}")
+            return self.file_service.load_project_detail(project_id)
+
+        parts = []
+        for m in new_messages[-SESSION_MESSAGE_LIMIT:]:
+            if m.message:
+                parts.append(f"User: {m.message}")
+            if m.response:
+                parts.append(f"Agent: {m.response}")
+        raw_update_text = "\n".join(parts)
+
+        final_text = self.file_service.load_project_detail(project_id)
+        if raw_update_text:
+            # Raises when the merge fails, so the watermark only moves past messages that reached the spec
+            final_text = await self.ingest_project_detail(project_id, raw_update_text, mode="merge")
+
+        last = new_messages[-1]
+        state.update({
+            "last_message_id": last.id,
+            "last_message_at": last.created_at.isoformat(),
+            "session_id": session_id,
+        })
+        self.file_service.save_project_detail_state(project_id, state)
+        logger.info(f"Digested {len(new_messages)} new messages into project detail for {project_id}")
         return final_text
 
+    @staticmethod
+    def _messages_after_watermark(messages: List[Any], state: Dict[str, Any]) -> List[Any]:
+        """Return messages newer than the stored watermark."""
+        last_id = state.get("last_message_id")
+        if last_id:
+            for index, message in enumerate(messages):
+                if message.id == last_id:
+                    return messages[index + 1:]
+        last_at = state.get("last_message_at")
+        if last_at:
+            try:
+                watermark = datetime.fromisoformat(last_at)
+                return [m for m in messages if m.created_at > watermark]
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid project detail watermark: {last_at}")
+        return list(messages)
+
+    async def _merge_affected_sections(self, existing_detail: str, insights: str) -> Optional[str]:
+        """
+        Merge insights into only the spec sections they affect.
+
+        Returns the updated spec, or None when the spec has no recognisable sections
+        or the model output cannot be mapped back (callers fall back to a full merge).
+        """
+        sections = parse_spec_sections(existing_detail)
+        titled = [s for s in sections if s.title]
+        if len(titled) < 2:
+            return None
+
+        routed = self._route_insights(titled, insights)
+        if not routed:
+            logger.info("No spec sections affected by new insights; keeping existing spec")
+            return existing_detail
+
+        by_title = {s.title: s for s in titled}
+        for title in routed:
+            if title not in by_title:
+                # New section: keep canonical ordering relative to existing ones
+                section = SpecSection(title=title, heading=f"## {title}", body="")
+                order = SPEC_SECTION_TITLES.index(title)
+                position = len(sections)
+                for i, existing in enumerate(sections):
+                    if existing.title and SPEC_SECTION_TITLES.index(existing.title) > order:
+                        position = i
+                        break
+                sections.insert(position, section)
+                by_title[title] = section
+
+        ordered_titles = [s.title for s in sections if s.title in routed]
+        existing_part = "\n\n".join(f"## {t}\n{by_title[t].body}".rstrip() for t in ordered_titles)
+        insights_part = "\n\n".join(f"## {t}\n" + "\n".join(routed[t]) for t in ordered_titles)
+        merge_input = f"EXISTING SECTIONS:\n{existing_part}\n\nNEW INSIGHTS BY SECTION:\n{insights_part}"
+
+        response = await self.gemini.chat_with_system_prompt(
+            "Merge new insights into the given spec sections", f"{SECTION_MERGE_SYSTEM_PROMPT}\n\n{merge_input}"
+        )
+        updated = {s.title: s.body for s in parse_spec_sections(response or "") if s.title in routed}
+        if not updated:
+            logger.warning("Section merge response had no recognisable sections; falling back to full merge")
+            return None
+
+        for title, body in updated.items():
+            by_title[title].body = body.strip("\n")
+        logger.info(f"Merged insights into {len(updated)}/{len(titled)} spec sections")
+        return render_spec_sections(sections)
+
+    def _route_insights(self, sections: List[SpecSection], insights: str) -> Dict[str, List[str]]:
+        """
+        Map insight lines to the spec sections they affect.
+
+        Lines under a recognised section heading in the summaries go to that section;
+        unlabeled lines are routed by embedding similarity (when the model is loaded)
+        or keyword overlap, falling back to Open Questions.
+        """
+        routed: Dict[str, List[str]] = {}
+        unlabeled: List[str] = []
+        for block in parse_spec_sections(insights):
+            lines = [l for l in block.body.splitlines() if l.strip() and "not specified" not in l.lower()]
+            if not lines:
+                continue
+            if block.title:
+                routed.setdefault(block.title, []).extend(lines)
+            else:
+                unlabeled.extend(lines)
+
+        if unlabeled:
+            for line, title in zip(unlabeled, self._route_lines(sections, unlabeled)):
+                routed.setdefault(title, []).append(line)
+        return routed
+
+    def _route_lines(self, sections: List[SpecSection], lines: List[str]) -> List[str]:
+        """Pick the best matching section title for each line."""
+        section_texts = [f"{s.title} {s.body}" for s in sections]
+
+        if embedding_service.is_model_loaded():
+            vectors = embedding_service.generate_embeddings_batch(
+                [embedding_service.prepare_text_for_embedding(t) for t in section_texts + lines]
+            )
+            section_vectors, line_vectors = vectors[:len(sections)], vectors[len(sections):]
+            if all(section_vectors) and all(line_vectors):
+                titles = []
+                for line_vector in line_vectors:
+                    scores = [embedding_service.calculate_cosine_similarity(line_vector, v) for v in section_vectors]
+                    best = max(range(len(scores)), key=scores.__getitem__)
+                    titles.append(sections[best].title if scores[best] >= EMBEDDING_ROUTING_MIN_SCORE else FALLBACK_SECTION_TITLE)
+                return titles
+
+        section_keywords = [_keywords(t) for t in section_texts]
+        titles = []
+        for line in lines:
+            words = _keywords(line)
+            scores = [len(words & kw) / len(words | kw) if words | kw else 0.0 for kw in section_keywords]
+            best = max(range(len(scores)), key=scores.__getitem__)
+            titles.append(sections[best].title if scores[best] >= KEYWORD_ROUTING_MIN_SCORE else FALLBACK_SECTION_TITLE)
+        return titles
+
+    async def _summarize_chunks(self, project_id: str, chunks: List[str]) -> List[str]:
+        """Summarize chunks with bounded parallelism, skipping chunks whose summary is cached."""
+        cache = self.file_service.load_project_detail_chunk_cache(project_id)
+        prompt_key = _prompt_fingerprint(CHUNK_SYSTEM_PROMPT)
+        keys = [hashlib.sha256(f"{prompt_key}:{chunk}".encode("utf-8")).hexdigest() for chunk in chunks]
+
+        semaphore = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+        fresh: Dict[str, str] = {}
+
+        async def summarize(key: str, chunk: str) -> str:
+            cached = cache.get(key)
+            if cached:
+                return cached["summary"]
+            async with semaphore:
+                summary = (await self.gemini.chat_with_system_prompt(chunk, CHUNK_SYSTEM_PROMPT) or "").strip()
+            if summary and not self._is_failed_response(summary):
+                fresh[key] = summary
+            return summary
+
+        summaries = await asyncio.gather(*(summarize(key, chunk) for key, chunk in zip(keys, chunks)))
+
+        hits = len(chunks) - len(fresh)
+        if fresh or hits:
+            now = time.time()
+            for key in keys:
+                if key in cache:
+                    cache[key]["used_at"] = now
+            for key, summary in fresh.items():
+                cache[key] = {"summary": summary, "used_at": now}
+            if len(cache) > CHUNK_CACHE_MAX_ENTRIES:
+                newest = sorted(cache.items(), key=lambda item: item[1].get("used_at", 0), reverse=True)
+                cache = dict(newest[:CHUNK_CACHE_MAX_ENTRIES])
+            try:
+                self.file_service.save_project_detail_chunk_cache(project_id, cache)
+            except Exception as e:
+                logger.warning(f"Failed to save chunk summary cache for {project_id}: {e}")
+        logger.debug(f"Chunk summaries for {project_id}: {len(chunks)} chunks, {len(chunks) - len(fresh)} cached")
+        return list(summaries)
+
+    async def _reduce_summaries(self, summaries: List[str]) -> List[str]:
+        """Hierarchically condense summaries until their combined size fits REDUCE_BUDGET_CHARS."""
+        summaries = [s for s in summaries if s]
+        while len(summaries) > 1 and sum(len(s) + 2 for s in summaries) > REDUCE_BUDGET_CHARS:
+            groups: List[List[str]] = [[]]
+            size = 0
+            for summary in summaries:
+                if groups[-1] and size + len(summary) + 2 > REDUCE_BUDGET_CHARS:
+                    groups.append([])
+                    size = 0
+                groups[-1].append(summary)
+                size += len(summary) + 2
+
+            if len(groups) == len(summaries):
+                # Every summary already fills the budget on its own; pair them up to keep making progress
+                groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+
+            semaphore = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+
+            async def condense(group: List[str]) -> str:
+                if len(group) == 1:
+                    return group[0]
+                async with semaphore:
+                    condensed = await self.gemini.chat_with_system_prompt(
+                        "\n\n".join(group), REDUCE_SYSTEM_PROMPT
+                    )
+                return (condensed or "").strip()
+
+            logger.debug(f"Reducing {len(summaries)} summaries into {len(groups)} groups")
+            summaries = [s for s in await asyncio.gather(*(condense(g) for g in groups)) if s]
+        return summaries
 
-# Singleton
-project_detail_service = ProjectDetailService()
+    @staticmethod
+    def _is_failed_response(text: str) -> bool:
+        """Detect the fallback strings GeminiService returns instead of raising."""
+        return text.startswith("Warning: Gemini API key") or text.startswith("I'm having trouble processing")
 
 
+# Singleton wired to the application's shared services
+project_detail_service = ProjectDetailService(
+    gemini_service=container.gemini_service,
+    file_service=container.file_service
+)
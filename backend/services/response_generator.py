@@ -12,12 +12,14 @@ from dataclasses import dataclass
 
 try:
     from .gemini_service import GeminiService
+    from .container import container
     from models import Task, Memory, Project, ChatMessage
 except ImportError:
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from gemini_service import GeminiService
+    from services.container import container
     from models import Task, Memory, Project, ChatMessage
 
 logger = logging.getLogger(__name__)
@@ -43,8 +45,8 @@ class ResponseGenerator:
     using LLM calls instead of hardcoded responses.
     """
     
-    def __init__(self):
-        self.gemini_service = GeminiService()
+    def __init__(self, gemini_service: Optional[GeminiService] = None):
+        self.gemini_service = gemini_service or GeminiService()
         
         # Response templates and guidelines
         self.agent_personality = """
@@ -1023,4 +1025,4 @@ Remember: You're guiding them from idea to implementation with the perfect balan
 
 
 # Create singleton instance
-response_generator = ResponseGenerator() 
\ No newline at end of file
+response_generator = ResponseGenerator(gemini_service=container.gemini_service) 
\ No newline at end of file
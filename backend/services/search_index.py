@@ -0,0 +1,335 @@
+"""
+In-Memory Inverted Search Index
+
+Per-project token index for tasks and memories used by the agent's search and
+identifier-resolution tools. Documents are ranked with BM25 (title tokens are
+weighted higher than body tokens), query tokens also match vocabulary terms by
+prefix and within one edit, and exact titles resolve through a hash map.
+
+Indexes are built lazily from the JSON files on first use and kept current by
+FileService, which reports every list write through notify_saved(). A file
+signature (mtime and size) check rebuilds an index whose file was changed by
+someone else, e.g. another process.
+"""
+
+import logging
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constants
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_TERM_WEIGHT = 2  # title tokens count this many times towards term frequency
+PREFIX_MATCH_WEIGHT = 0.7
+TYPO_MATCH_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 2
+MIN_TYPO_LENGTH = 4
+MAX_TERM_EXPANSIONS = 25
+
+# Indexed collections: file type -> (title field, body field, fields kept on each document)
+COLLECTIONS = {
+    "tasks": ("title", "description", ("id", "title", "description", "status", "priority", "completed", "order")),
+    "memories": ("title", "content", ("id", "title", "content", "category", "type")),
+}
+
+SearchResult = Tuple[Dict[str, Any], float]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens of a text."""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def file_signature(file_path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = file_path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def _deletion_variants(term: str) -> Set[str]:
+    """The term itself plus every string obtained by deleting one character."""
+    return {term} | {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion, substitution or transposition."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (
+            len(diffs) == 2 and diffs[1] == diffs[0] + 1
+            and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+        )
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    for i in range(len(shorter)):
+        if shorter[i] != longer[i]:
+            return shorter[i:] == longer[i + 1:]
+    return True
+
+
+class InvertedIndex:
+    """BM25 inverted index over one collection of one project."""
+
+    def __init__(self, title_field: str, body_field: str, kept_fields: Tuple[str, ...]):
+        self.title_field = title_field
+        self.body_field = body_field
+        self.kept_fields = kept_fields
+        self.signature: Optional[Tuple[int, int]] = None
+
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self._positions: Dict[str, int] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._vocabulary: List[str] = []
+        self._deletions: Dict[str, Set[str]] = {}
+        self._titles: Dict[str, Set[str]] = {}
+
+    # Maintenance
+    def sync(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Bring the index in line with the given records, touching only changed documents."""
+        seen: Set[str] = set()
+        for position, record in enumerate(records):
+            doc_id = record.get("id")
+            if not doc_id or not record.get(self.title_field):
+                continue
+            seen.add(doc_id)
+            self._positions[doc_id] = position
+            doc = {field: record.get(field) for field in self.kept_fields}
+            if self.docs.get(doc_id) != doc:
+                self._remove(doc_id)
+                self._add(doc_id, doc)
+
+        for doc_id in [d for d in self.docs if d not in seen]:
+            self._remove(doc_id)
+            self._positions.pop(doc_id, None)
+
+    def _add(self, doc_id: str, doc: Dict[str, Any]) -> None:
+        terms = Counter(tokenize(doc.get(self.body_field) or ""))
+        for term in tokenize(doc.get(self.title_field) or ""):
+            terms[term] += TITLE_TERM_WEIGHT
+
+        self.docs[doc_id] = doc
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[doc_id]
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._add_term(term)
+            postings[doc_id] = frequency
+
+        self._titles.setdefault(self._title_key(doc), set()).add(doc_id)
+
+    def _remove(self, doc_id: str) -> None:
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        terms = self._doc_terms.pop(doc_id)
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._remove_term(term)
+
+        title_key = self._title_key(doc)
+        ids = self._titles.get(title_key)
+        if ids is not None:
+            ids.discard(doc_id)
+            if not ids:
+                del self._titles[title_key]
+
+    def _add_term(self, term: str) -> None:
+        index = bisect_left(self._vocabulary, term)
+        self._vocabulary.insert(index, term)
+        if len(term) >= MIN_TYPO_LENGTH - 1:
+            for variant in _deletion_variants(term):
+                self._deletions.setdefault(variant, set()).add(term)
+
+    def _remove_term(self, term: str) -> None:
+        index = bisect_left(self._vocabulary, term)
+        if index < len(self._vocabulary) and self._vocabulary[index] == term:
+            del self._vocabulary[index]
+        if len(term) >= MIN_TYPO_LENGTH - 1:
+            for variant in _deletion_variants(term):
+                terms = self._deletions.get(variant)
+                if terms is not None:
+                    terms.discard(term)
+                    if not terms:
+                        del self._deletions[variant]
+
+    def _title_key(self, doc: Dict[str, Any]) -> str:
+        return (doc.get(self.title_field) or "").strip().lower()
+
+    # Lookups
+    def ordered_docs(self) -> List[Dict[str, Any]]:
+        """All documents in the order they appear in the file."""
+        return sorted(self.docs.values(), key=self._order_key)
+
+    def _order_key(self, doc: Dict[str, Any]) -> Tuple[Any, int]:
+        return (doc.get("order") or 0, self._positions.get(doc["id"], 0))
+
+    def resolve(self, identifier: str) -> Optional[Dict[str, Any]]:
+        """Find a document by exact ID, then by case-insensitive exact title."""
+        if not identifier:
+            return None
+        if identifier in self.docs:
+            return self.docs[identifier]
+        ids = self._titles.get(identifier.strip().lower())
+        if not ids:
+            return None
+        return min((self.docs[i] for i in ids), key=self._order_key)
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        """Vocabulary terms matched by a query token, with their match weight."""
+        expansions: Dict[str, float] = {}
+        if token in self._postings:
+            expansions[token] = 1.0
+
+        if len(token) >= MIN_PREFIX_LENGTH:
+            index = bisect_left(self._vocabulary, token)
+            while index < len(self._vocabulary) and len(expansions) < MAX_TERM_EXPANSIONS:
+                term = self._vocabulary[index]
+                if not term.startswith(token):
+                    break
+                expansions.setdefault(term, PREFIX_MATCH_WEIGHT)
+                index += 1
+
+        if len(token) >= MIN_TYPO_LENGTH:
+            for variant in _deletion_variants(token):
+                for term in self._deletions.get(variant, ()):
+                    if term not in expansions and len(expansions) < MAX_TERM_EXPANSIONS and _within_one_edit(token, term):
+                        expansions[term] = TYPO_MATCH_WEIGHT
+
+        return expansions
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[SearchResult]:
+        """
+        Rank documents for a query with BM25.
+
+        Args:
+            query: Free-text query; an empty query returns every document in file order
+            limit: Maximum number of results
+            predicate: Optional filter applied to candidate documents
+
+        Returns:
+            List of (document, score) tuples, best first
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            docs = [d for d in self.ordered_docs() if predicate is None or predicate(d)]
+            return [(d, 0.0) for d in docs[:limit]]
+
+        doc_count = len(self.docs)
+        if doc_count == 0:
+            return []
+        average_length = self._total_length / doc_count
+
+        scores: Dict[str, float] = {}
+        for token in tokens:
+            token_scores: Dict[str, float] = {}
+            for term, weight in self._expand(token).items():
+                postings = self._postings[term]
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    length = self._doc_lengths[doc_id]
+                    norm = frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    score = weight * idf * frequency * (BM25_K1 + 1) / norm
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+            for doc_id, score in token_scores.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        results = [
+            (self.docs[doc_id], score) for doc_id, score in scores.items()
+            if predicate is None or predicate(self.docs[doc_id])
+        ]
+        results.sort(key=lambda item: (-item[1], self._order_key(item[0])))
+        return results[:limit]
+
+
+class SearchIndex:
+    """Registry of inverted indexes keyed by collection file path."""
+
+    def __init__(self):
+        self._indexes: Dict[str, InvertedIndex] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _collection_for(file_path: Path) -> Optional[str]:
+        for collection in COLLECTIONS:
+            if file_path.name.endswith(f"-{collection}.json"):
+                return collection
+        return None
+
+    def _get(self, file_service, project_id: str, collection: str) -> InvertedIndex:
+        file_path = file_service._get_project_file_path(project_id, collection)
+        key = str(file_path)
+        index = self._indexes.get(key)
+        signature = file_signature(file_path)
+        if index is None or index.signature != signature:
+            if index is None:
+                title_field, body_field, kept_fields = COLLECTIONS[collection]
+                index = self._indexes[key] = InvertedIndex(title_field, body_field, kept_fields)
+            index.sync(file_service._load_json(file_path))
+            index.signature = signature
+            logger.debug(f"Indexed {len(index.docs)} {collection} for project {project_id}")
+        return index
+
+    def notify_saved(self, file_path: Path, records: List[Dict[str, Any]]) -> None:
+        """Update an already-built index after its collection file was rewritten."""
+        if self._collection_for(file_path) is None:
+            return
+        with self._lock:
+            index = self._indexes.get(str(file_path))
+            if index is None:
+                return
+            index.sync(records)
+            index.signature = file_signature(file_path)
+
+    def search(
+        self,
+        file_service,
+        project_id: str,
+        collection: str,
+        query: str,
+        limit: Optional[int] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[SearchResult]:
+        """Rank a project's tasks or memories for a query (see InvertedIndex.search)."""
+        with self._lock:
+            return self._get(file_service, project_id, collection).search(query, limit, predicate)
+
+    def resolve(self, file_service, project_id: str, collection: str, identifier: str) -> Optional[Dict[str, Any]]:
+        """Resolve a task or memory identifier (ID or exact title) without scanning the collection."""
+        with self._lock:
+            return self._get(file_service, project_id, collection).resolve(identifier)
+
+
+# Global instance
+search_index = SearchIndex()
@@ -0,0 +1,160 @@
+"""
+JSON Serialization for Data Files
+
+One codec for everything FileService writes and reads:
+
+- dumps()/loads() use orjson when it is installed and the stdlib json module
+  otherwise. Output is compact UTF-8 bytes (SAMURAI_JSON_PRETTY=1 indents it
+  for debugging), and both encoders render datetimes and other non-JSON
+  values with str(), so files do not depend on which library wrote them.
+- to_record() dumps a model and stamps it with a fingerprint of the model's
+  schema. from_record() trusts records carrying the current fingerprint, since
+  they were produced by a validated model of the same shape: it builds them with
+  model_construct, converting only datetimes, enums and nested models, instead
+  of running full validation. Anything else (older files, hand-edited or
+  legacy records) is validated as before.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import types
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Constants
+JSON_PRETTY = os.getenv("SAMURAI_JSON_PRETTY", "0") == "1"
+SCHEMA_FIELD = "_schema"
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+Converter = Callable[[Any], Any]
+# Returned by _converter_for for annotations that cannot be built without validation
+_UNSUPPORTED = object()
+_PLAIN_TYPES = (str, int, float, bool, Any, type(None))
+
+
+def dumps(data: Any, pretty: bool = JSON_PRETTY) -> bytes:
+    """Encode data as UTF-8 JSON bytes."""
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(data, default=str, option=options)
+        except TypeError:
+            # e.g. non-string dict keys, which the stdlib encoder converts
+            pass
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode JSON from bytes or text.
+
+    Raises:
+        json.JSONDecodeError: If the input is not valid JSON (orjson's error subclasses it)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=None)
+def schema_version(model_cls: Type[BaseModel]) -> str:
+    """Fingerprint of a model's JSON schema; it changes whenever a field, type or constraint does."""
+    schema = json.dumps(model_cls.model_json_schema(), sort_keys=True, default=str)
+    return hashlib.sha1(schema.encode("utf-8")).hexdigest()[:12]
+
+
+def to_record(model: BaseModel) -> Dict[str, Any]:
+    """Dump a model for storage, stamped with its schema version."""
+    record = model.model_dump()
+    record[SCHEMA_FIELD] = schema_version(type(model))
+    return record
+
+
+def from_record(model_cls: Type[ModelT], record: Dict[str, Any]) -> ModelT:
+    """
+    Build a model from a stored record, skipping validation for records of the current schema.
+
+    Raises:
+        pydantic.ValidationError: If an untrusted record is invalid
+    """
+    if record.get(SCHEMA_FIELD) == schema_version(model_cls):
+        plan = _construct_plan(model_cls)
+        if plan is not None:
+            try:
+                return _construct(model_cls, plan, record)
+            except (TypeError, ValueError) as e:
+                logger.debug(f"Validating {model_cls.__name__} record after trusted build failed: {e}")
+    return model_cls(**record)
+
+
+def _construct(model_cls: Type[ModelT], plan: Tuple[Tuple[str, Converter], ...], record: Dict[str, Any]) -> ModelT:
+    values = dict(record)
+    values.pop(SCHEMA_FIELD, None)
+    for name, convert in plan:
+        value = values.get(name)
+        if value is not None:
+            values[name] = convert(value)
+    return model_cls.model_construct(**values)
+
+
+@lru_cache(maxsize=None)
+def _construct_plan(model_cls: Type[BaseModel]) -> Optional[Tuple[Tuple[str, Converter], ...]]:
+    """Converters for the fields of a model that JSON does not restore as-is, or None if any field needs validation."""
+    plan = []
+    for name, field in model_cls.model_fields.items():
+        converter = _converter_for(field.annotation)
+        if converter is _UNSUPPORTED:
+            logger.debug(f"{model_cls.__name__}.{name} needs validation; records are always validated")
+            return None
+        if converter is not None:
+            plan.append((name, converter))
+    return tuple(plan)
+
+
+def _converter_for(annotation: Any) -> Any:
+    """Converter for one annotation: None when the JSON value is already right, _UNSUPPORTED when unknown."""
+    origin = get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        options = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _converter_for(options[0]) if len(options) == 1 else _UNSUPPORTED
+    if origin in (list, List):
+        args = get_args(annotation)
+        item = _converter_for(args[0]) if args else None
+        if item is None or item is _UNSUPPORTED:
+            return item
+        return lambda values: [item(value) for value in values]
+    if origin in (dict, Dict):
+        args = get_args(annotation)
+        return None if not args or _converter_for(args[1]) is None else _UNSUPPORTED
+    if annotation in _PLAIN_TYPES:
+        return None
+    if annotation is datetime:
+        return _to_datetime
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return lambda value: value if isinstance(value, annotation) else annotation(value)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        plan = _construct_plan(annotation)
+        if plan is None:
+            return _UNSUPPORTED
+        return lambda value: value if isinstance(value, annotation) else _construct(annotation, plan, value)
+    return _UNSUPPORTED
+
+
+def _to_datetime(value: Any) -> datetime:
+    # Stored as str(datetime) by dumps(); datetimes themselves come from unflushed write-behind data
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
@@ -28,9 +28,9 @@ class TaskAnalysisAgent:
     3. Detail sufficiency
     """
 
-    def __init__(self):
+    def __init__(self, gemini_service: Optional[GeminiService] = None):
         """Initialize the TaskAnalysisAgent."""
-        self.gemini_service = GeminiService()
+        self.gemini_service = gemini_service or GeminiService()
         
         # Define analysis criteria for LLM prompts
         self.analysis_criteria = {
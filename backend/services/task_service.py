@@ -10,6 +10,7 @@ try:
     from models import Task, TaskWarning
     from .task_analysis_agent import TaskAnalysisAgent
     from .file_service import FileService
+    from .write_lanes import write_lanes
 except ImportError:
     import sys
     import os
@@ -17,11 +18,13 @@ except ImportError:
     from models import Task, TaskWarning
     from task_analysis_agent import TaskAnalysisAgent
     from file_service import FileService
+    from write_lanes import write_lanes
 except ImportError:
     # Try direct import
     from models import Task, TaskWarning
     from task_analysis_agent import TaskAnalysisAgent
     from file_service import FileService
+    from write_lanes import write_lanes
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +32,21 @@ class TaskService:
     """
     Service for handling task operations with integrated analysis.
     This service ensures that task analysis is performed consistently
-    across all task creation and update operations.
+    across all task creation and update operations. Writes go through the
+    project's write lane, serialized with the other mutations of its tasks.
     """
 
-    def __init__(self):
-        """Initialize the TaskService."""
-        self.file_service = FileService()
-        self.analysis_agent = TaskAnalysisAgent()
+    def __init__(self, file_service: Optional[FileService] = None,
+                 analysis_agent: Optional[TaskAnalysisAgent] = None):
+        """
+        Initialize the TaskService.
+
+        Args:
+            file_service: Shared FileService (a new one is created if omitted)
+            analysis_agent: Shared TaskAnalysisAgent (a new one is created if omitted)
+        """
+        self.file_service = file_service or FileService()
+        self.analysis_agent = analysis_agent or TaskAnalysisAgent()
 
     async def create_task(self, title: str, description: str, project_id: str,
                          priority: str = "medium", status: str = "pending",
@@ -82,10 +93,77 @@ class TaskService:
         )
         
         # Save task
-        self.file_service.save_task(project_id, task)
+        await write_lanes.run(project_id, "tasks", self.file_service.save_task, project_id, task)
         
         return task
 
+    async def create_tasks(self, project_id: str, task_specs: List[Dict[str, Any]]) -> List[Task]:
+        """
+        Create several tasks at once, validating the whole hierarchy before persisting.
+
+        Each spec accepts the same fields as create_task. A spec may point at an
+        existing task via ``parent_task_id`` or at an earlier spec in the same batch
+        via ``parent_index``. Existing tasks are loaded once, parents and depths are
+        resolved in memory, and the batch is written with a single save so either
+        every task is created or none is.
+
+        Args:
+            project_id: Project identifier
+            task_specs: List of task specifications
+
+        Returns:
+            The created Task objects, in the same order as task_specs
+
+        Raises:
+            ValueError: If a parent cannot be resolved or the depth limit is exceeded
+        """
+        existing = {t.id: t for t in self.file_service.load_tasks(project_id)}
+
+        created: List[Task] = []
+        for index, spec in enumerate(task_specs):
+            title = spec.get("title")
+            if not title:
+                raise ValueError(f"Task at position {index} is missing a title")
+
+            parent_task_id = spec.get("parent_task_id")
+            parent_index = spec.get("parent_index")
+            parent = None
+            if parent_index is not None:
+                if not isinstance(parent_index, int) or not 0 <= parent_index < index:
+                    raise ValueError(f"Invalid parent_index {parent_index} for task '{title}'")
+                parent = created[parent_index]
+                parent_task_id = parent.id
+            elif parent_task_id:
+                parent = existing.get(parent_task_id)
+                if not parent:
+                    raise ValueError("Parent task not found")
+
+            # Determine hierarchy depth with validation (max depth 4)
+            depth = 1
+            if parent:
+                if parent.depth >= 4:
+                    raise ValueError("Maximum task nesting depth of 4 exceeded")
+                depth = parent.depth + 1
+
+            now = datetime.utcnow()
+            created.append(Task(
+                title=title,
+                description=spec.get("description", ""),
+                project_id=project_id,
+                priority=spec.get("priority", "medium"),
+                status=spec.get("status", "pending"),
+                parent_task_id=parent_task_id,
+                depth=depth,
+                review_warnings=[],
+                created_at=now,
+                updated_at=now
+            ))
+
+        # Save all tasks in one write
+        await write_lanes.run(project_id, "tasks", self.file_service.add_tasks, project_id, created)
+
+        return created
+
     async def update_task(self, project_id: str, task_id: str,
                          updates: Dict[str, Any]) -> Optional[Task]:
         """
@@ -99,28 +177,31 @@ class TaskService:
         Returns:
             Updated Task object or None if not found
         """
-        # Get existing task
-        task = self.file_service.get_task_by_id(project_id, task_id)
-        if not task:
-            return None
-        
-        # Update task fields
-        for key, value in updates.items():
-            if hasattr(task, key):
-                setattr(task, key, value)
-        
-        # Re-analyze if description was updated (disabled temporarily)
-        if "description" in updates or "title" in updates:
-            # warnings = await self.analysis_agent.analyze_task(task.title, task.description)
-            task.review_warnings = []
-        
-        # Update timestamp
-        task.updated_at = datetime.utcnow()
-        
-        # Save updated task
-        self.file_service.save_task(project_id, task)
-        
-        return task
+        def apply_updates() -> Optional[Task]:
+            # Read, modify and save in one lane slot so concurrent updates do not overwrite each other
+            task = self.file_service.get_task_by_id(project_id, task_id)
+            if not task:
+                return None
+
+            # Update task fields
+            for key, value in updates.items():
+                if hasattr(task, key):
+                    setattr(task, key, value)
+
+            # Re-analyze if description was updated (disabled temporarily; the
+            # analysis call would have to run before the update enters the lane)
+            if "description" in updates or "title" in updates:
+                # warnings = await self.analysis_agent.analyze_task(task.title, task.description)
+                task.review_warnings = []
+
+            # Update timestamp
+            task.updated_at = datetime.utcnow()
+
+            # Save updated task
+            self.file_service.save_task(project_id, task)
+            return task
+
+        return await write_lanes.run(project_id, "tasks", apply_updates)
 
     async def get_task(self, project_id: str, task_id: str) -> Optional[Task]:
         """
@@ -158,7 +239,5 @@ class TaskService:
         Returns:
             True if task was deleted, False otherwise
         """
-        tasks = self.file_service.load_tasks(project_id)
-        tasks = [t for t in tasks if t.id != task_id]
-        self.file_service.save_tasks(project_id, tasks)
+        await write_lanes.run(project_id, "tasks", self.file_service.delete_task, project_id, task_id)
         return True
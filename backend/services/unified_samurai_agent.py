@@ -20,8 +20,13 @@ try:
     from .memory_categorization import detect_memory_category, generate_category_specific_title
     from .consolidated_memory import ConsolidatedMemoryService
     from .vector_context_service import vector_context_service
+    from .hybrid_retriever import hybrid_retriever
     from .agent_tools import AgentToolRegistry
-    from .response_generator import ResponseGenerator, ResponseContext
+    from .action_planner import build_action_graph, execute_action_graph
+    from .response_generator import ResponseGenerator, ResponseContext, response_generator
+    from .task_service import TaskService
+    from .container import container
+    from .metrics import metrics
     from models import Task, Memory, Project, MemoryCategory, ChatMessage
 except ImportError:
     import sys
@@ -32,12 +37,22 @@ except ImportError:
     from memory_categorization import detect_memory_category, generate_category_specific_title
     from consolidated_memory import ConsolidatedMemoryService
     from vector_context_service import vector_context_service
+    from hybrid_retriever import hybrid_retriever
     from agent_tools import AgentToolRegistry
-    from response_generator import ResponseGenerator, ResponseContext
+    from action_planner import build_action_graph, execute_action_graph
+    from response_generator import ResponseGenerator, ResponseContext, response_generator
+    from task_service import TaskService
+    from services.container import container
+    from services.metrics import metrics
     from models import Task, Memory, Project, MemoryCategory, ChatMessage
 
 logger = logging.getLogger(__name__)
 
+# Memories included in prompt context per message
+MEMORY_CONTEXT_TOP_K = 6
+# Most recent session messages the prompts and conversation embedding use
+SESSION_CONTEXT_WINDOW = 20
+
 
 @dataclass
 class IntentAnalysis:
@@ -72,12 +87,19 @@ class UnifiedSamuraiAgent:
     - Smart memory management that only updates at session boundaries or explicit requests
     """
     
-    def __init__(self):
-        self.gemini_service = GeminiService()
-        self.file_service = FileService()
-        self.tool_registry = AgentToolRegistry()
-        self.consolidated_memory_service = ConsolidatedMemoryService()
-        self.response_generator = ResponseGenerator()
+    def __init__(
+        self,
+        gemini_service: Optional[GeminiService] = None,
+        file_service: Optional[FileService] = None,
+        task_service: Optional[TaskService] = None,
+        response_generator: Optional[ResponseGenerator] = None
+    ):
+        self.gemini_service = gemini_service or GeminiService()
+        self.file_service = file_service or FileService()
+        self.task_service = task_service or TaskService()
+        self.tool_registry = AgentToolRegistry(file_service=self.file_service, task_service=self.task_service)
+        self.consolidated_memory_service = ConsolidatedMemoryService(file_service=self.file_service)
+        self.response_generator = response_generator or ResponseGenerator(gemini_service=self.gemini_service)
         
         # Memory management configuration
         self.memory_update_triggers = [
@@ -113,9 +135,25 @@ class UnifiedSamuraiAgent:
             progress_callback: Optional callback for progress updates
             task_context: Optional task context to provide focused assistance
         """
-        
+        with metrics.span("agent.process_message"):
+            return await self._process_message(
+                message, project_id, project_context, session_id, conversation_history,
+                progress_callback, task_context
+            )
+
+    async def _process_message(
+        self,
+        message: str,
+        project_id: str,
+        project_context: dict,
+        session_id: Optional[str],
+        conversation_history: Optional[List[ChatMessage]],
+        progress_callback: Optional[Callable[[str, str, str, Dict[str, Any]], None]],
+        task_context: Optional[Any]
+    ) -> dict:
+        """Run the process_message pipeline, timing each stage."""
         try:
-            logger.info(f"Processing message with unified architecture: {message[:100]}...")
+            logger.info("Processing message with unified architecture: %.100s...", message)
             
             # Step 1: Start processing
             if progress_callback:
@@ -131,10 +169,11 @@ class UnifiedSamuraiAgent:
                     "Gathering conversation history and project context", project_context
                 )
             
-            conversation_context = await self._load_comprehensive_context(
-                message, project_id, session_id, conversation_history, project_context,
-                task_context=task_context
-            )
+            with metrics.span("agent.context"):
+                conversation_context = await self._load_comprehensive_context(
+                    message, project_id, session_id, conversation_history, project_context,
+                    task_context=task_context
+                )
             
             if progress_callback:
                 await self._send_dynamic_progress_update(
@@ -149,9 +188,10 @@ class UnifiedSamuraiAgent:
                     "Understanding what you want to accomplish", project_context
                 )
             
-            intent_analysis = await self._analyze_user_intent(
-                message, conversation_context, progress_callback=progress_callback
-            )
+            with metrics.span("agent.intent"):
+                intent_analysis = await self._analyze_user_intent(
+                    message, conversation_context, progress_callback=progress_callback
+                )
             
             if progress_callback:
                 await self._send_dynamic_progress_update(
@@ -165,10 +205,15 @@ class UnifiedSamuraiAgent:
                     progress_callback, "processing", "🔄 Processing your request...", 
                     "Executing the appropriate response path", project_context
                 )
-            logger.info(f"Conversation context: {conversation_context}")
-            response_result = await self._select_and_execute_response_path(
-                message, intent_analysis, conversation_context, project_id, progress_callback
+            logger.debug(
+                "Conversation context: %d session messages, %d memories, task context %s",
+                len(conversation_context.session_messages), len(conversation_context.relevant_memories),
+                conversation_context.task_context.id if conversation_context.task_context else None
             )
+            with metrics.span("agent.response", intent=intent_analysis.intent_type):
+                response_result = await self._select_and_execute_response_path(
+                    message, intent_analysis, conversation_context, project_id, progress_callback
+                )
             
             if progress_callback:
                 await self._send_dynamic_progress_update(
@@ -184,9 +229,10 @@ class UnifiedSamuraiAgent:
                         "Processing explicit memory update request", project_context
                     )
                 
-                await self._handle_explicit_memory_update(
-                    message, response_result.get("response", ""), conversation_context, project_id
-                )
+                with metrics.span("agent.memory_update"):
+                    await self._handle_explicit_memory_update(
+                        message, response_result.get("response", ""), conversation_context, project_id
+                    )
                 
                 if progress_callback:
                     await self._send_dynamic_progress_update(
@@ -264,10 +310,10 @@ class UnifiedSamuraiAgent:
             # Get session messages
             if conversation_history is not None:
                 session_messages = conversation_history
-                logger.info(f"Using provided conversation history with {len(session_messages)} messages")
+                logger.debug("Using provided conversation history with %d messages", len(session_messages))
             else:
                 session_messages = self._get_session_messages(project_id, session_id)
-                logger.info(f"Loaded {len(session_messages)} messages from file service")
+                logger.debug("Loaded %d messages from file service", len(session_messages))
             
             # Generate vector-enhanced context
             vector_context = await self._build_vector_enhanced_context(
@@ -1196,7 +1242,7 @@ Show deep understanding of how the specification has evolved throughout the enti
             logger.info(f"Completing session {session_id} for project {project_id}")
             
             # Get all messages from the session
-            session_messages = self._get_session_messages(project_id, session_id)
+            session_messages = self.file_service.load_chat_messages_by_session(project_id, session_id)
             
             if not session_messages:
                 return {"status": "no_messages", "memories_created": 0}
@@ -1269,21 +1315,24 @@ Show deep understanding of how the specification has evolved throughout the enti
     
     # Helper methods for context and processing
     async def _build_vector_enhanced_context(self, message: str, project_id: str, session_messages: List[ChatMessage], project_context: dict, task_context: Optional[Any] = None) -> dict:
-        """Build vector-enhanced context using existing vector context service."""
+        """Build context with memories from hybrid (BM25 + conversation embedding) retrieval."""
         try:
-            # Generate conversation embedding
-            conversation_embedding = vector_context_service.get_conversation_context_embedding(
-                session_messages, message
-            )
-            
-            if not conversation_embedding:
-                return self._create_fallback_vector_context(message, project_id, session_messages, project_context, task_context)
+            # Generate conversation embedding (None when the embedding model is unavailable)
+            with metrics.span("agent.embedding"):
+                conversation_embedding = vector_context_service.get_conversation_context_embedding(
+                    session_messages, message
+                )
             
-            # Load memories and compute relevant memories only
-            all_memories = self.file_service.load_memories(project_id)
-            relevant_memories = vector_context_service.find_relevant_memories(
-                conversation_embedding, all_memories, project_id
-            )
+            # Fuse lexical matches on the message with vector matches on the whole conversation
+            with metrics.span("agent.memory_retrieval"):
+                retrieved = await hybrid_retriever.retrieve(
+                    self.file_service, project_id, "memories", message,
+                    top_k=MEMORY_CONTEXT_TOP_K, query_embedding=conversation_embedding
+                )
+                memories_by_id = {m.id: m for m in self.file_service.load_memories(project_id)}
+            relevant_memories = [
+                (memories_by_id[item.id], item.score) for item in retrieved if item.id in memories_by_id
+            ]
 
             # Keep only the active task context as task context
             relevant_tasks = []
@@ -1293,7 +1342,7 @@ Show deep understanding of how the specification has evolved throughout the enti
                     "score": 1.0,
                     "reason": "Active task context - primary focus for this conversation"
                 }]
-                logger.info(f"Prioritized task context: {task_context.title}")
+                logger.debug("Prioritized task context: %s", task_context.title)
 
             return {
                 "relevant_tasks_with_scores": relevant_tasks,
@@ -1420,12 +1469,12 @@ Show deep understanding of how the specification has evolved throughout the enti
         return "\n".join(memory_parts)
     
     def _get_session_messages(self, project_id: str, session_id: str = None) -> List[ChatMessage]:
-        """Get session messages from file service."""
+        """Get the recent session messages the agent's prompts use."""
         try:
-            if session_id:
-                return self.file_service.load_chat_messages_by_session(project_id, session_id)
-            else:
-                return self.file_service.load_chat_history(project_id)
+            messages, _ = self.file_service.load_chat_messages_page(
+                project_id, session_id or None, limit=SESSION_CONTEXT_WINDOW
+            )
+            return messages
         except Exception as e:
             logger.error(f"Error getting session messages: {e}")
             return []
@@ -1798,58 +1847,63 @@ IMPORTANT:
         return "\n".join(response_parts)
     
     async def _execute_task_creation(self, task_breakdown: List[dict], project_id: str, parent_task_id_override: Optional[str] = None) -> List[dict]:
-        """Execute task creation using tool registry."""
-        results = []
-        root_created_id: Optional[str] = None
+        """Execute task creation as a single batch through the tool registry."""
+        results: List[Optional[dict]] = [None] * len(task_breakdown)
+        task_specs: List[dict] = []
+        spec_positions: List[int] = []
+        root_spec_index: Optional[int] = None
         
         for index, task_data in enumerate(task_breakdown):
             try:
-                # Create task using tool registry
-                # Extract optional parameters
-                params = {
+                spec = {
                     "title": task_data["title"],
-                    "description": task_data["description"],
-                    "project_id": project_id
+                    "description": task_data["description"]
                 }
                 
                 # Add optional parameters if they exist
                 if "status" in task_data:
-                    params["status"] = task_data["status"]
+                    spec["status"] = task_data["status"]
                 if "priority" in task_data:
-                    params["priority"] = task_data["priority"]
-                if "due_date" in task_data:
-                    params["due_date"] = task_data["due_date"]
+                    spec["priority"] = task_data["priority"]
                 # Parent assignment logic
                 if parent_task_id_override:
                     # Force all tasks to be children of the active task
-                    params["parent_task_id"] = parent_task_id_override
-                else:
-                    # No active task; enforce root-first then attach children to created root
-                    if index == 0:
-                        # Ensure root is created without any parent assignment regardless of provided ptid
-                        pass
-                    else:
-                        # For subtasks, ignore any provided parent_task_id and attach to created root
-                        if root_created_id:
-                            params["parent_task_id"] = root_created_id
+                    spec["parent_task_id"] = parent_task_id_override
+                elif index == 0:
+                    # No active task; the root is created without any parent assignment regardless of provided ptid
+                    root_spec_index = len(task_specs)
+                elif root_spec_index is not None:
+                    # For subtasks, ignore any provided parent_task_id and attach to the root created in this batch
+                    spec["parent_index"] = root_spec_index
                 
-                result = await self.tool_registry.execute_tool(
-                    "create_task",
-                    **params
-                )
-                results.append(result)
-
-                # Capture root id if this is the first created task and we are in the root-parent flow
-                if (parent_task_id_override is None) and (index == 0):
-                    if result.get("success") and result.get("task_id"):
-                        root_created_id = result["task_id"]
+                task_specs.append(spec)
+                spec_positions.append(index)
             except Exception as e:
-                logger.error(f"Error creating task: {e}")
-                results.append({
+                logger.error(f"Error preparing task: {e}")
+                results[index] = {
                     "success": False,
                     "error": str(e),
                     "task_title": task_data.get("title", "Unknown")
-                })
+                }
+        
+        if task_specs:
+            batch_result = await self.tool_registry.execute_tool(
+                "create_tasks",
+                tasks=task_specs,
+                project_id=project_id
+            )
+            
+            if batch_result.get("success"):
+                for position, task_result in zip(spec_positions, batch_result.get("results", [])):
+                    results[position] = task_result
+            else:
+                logger.error(f"Error creating tasks: {batch_result.get('error')}")
+                for position, spec in zip(spec_positions, task_specs):
+                    results[position] = {
+                        "success": False,
+                        "error": batch_result.get("error", batch_result.get("message")),
+                        "task_title": spec["title"]
+                    }
         
         return results
     
@@ -2309,7 +2363,7 @@ Return JSON with the detected action and context-specific parameters informed by
             }
 
     async def _execute_detected_actions(self, action_analysis: dict, project_id: str, context: ConversationContext) -> dict:
-        """Execute the actions detected by LLM analysis."""
+        """Execute the actions detected by LLM analysis, running independent actions concurrently."""
         
         actions = action_analysis.get("actions", [])
         tool_results = []
@@ -2317,53 +2371,20 @@ Return JSON with the detected action and context-specific parameters informed by
         response_parts = []
         
         try:
-            for action in actions:
-                # Handle search-first requirement
-                if action.get("requires_search_first", False):
-                    search_results = await self._execute_search_before_action(action, project_id)
-                    if search_results:
-                        # Update action parameters with search results
-                        action = await self._refine_action_with_search_results(action, search_results)
-                        total_tool_calls += 1
-                    else:
-                        response_parts.append(f"❌ Could not find items for: {action.get('description', 'unknown action')}")
-                        continue
-                
-                # Execute the main action using AgentToolRegistry
-                tool_name = action.get("tool_name")
-                parameters = action.get("parameters", {})
-                
-                # Ensure project_id is in parameters
-                if "project_id" not in parameters:
-                    parameters["project_id"] = project_id
-                
-                if tool_name in self.tool_registry.get_available_tools():
-                    try:
-                        # Actually execute the tool through the registry
-                        result = await self.tool_registry.execute_tool(tool_name, **parameters)
-                        tool_results.append(result)
-                        total_tool_calls += 1
-                        
-                        if result.get("success", False):
-                            response_parts.append(result.get("message", f"✅ Completed: {action.get('description')}"))
-                        else:
-                            response_parts.append(result.get("message", f"❌ Failed: {action.get('description')}"))
-                            
-                    except Exception as tool_error:
-                        logger.error(f"Tool execution error for {tool_name}: {tool_error}")
-                        response_parts.append(f"❌ Error executing {tool_name}: {str(tool_error)}")
-                        tool_results.append({
-                            "success": False,
-                            "error": str(tool_error),
-                            "tool_name": tool_name
-                        })
-                else:
-                    response_parts.append(f"❌ Unknown tool: {tool_name}")
-                    tool_results.append({
-                        "success": False,
-                        "error": f"Unknown tool: {tool_name}",
-                        "tool_name": tool_name
-                    })
+            # Order only the actions that depend on each other; the rest run in parallel
+            planned = build_action_graph(actions)
+            outcomes = await execute_action_graph(
+                planned,
+                lambda action: self._execute_single_action(action, project_id)
+            )
+            
+            # Aggregate in the original action order
+            for outcome in outcomes:
+                total_tool_calls += outcome["tool_calls"]
+                if outcome["response_part"]:
+                    response_parts.append(outcome["response_part"])
+                if outcome["tool_result"] is not None:
+                    tool_results.append(outcome["tool_result"])
             
             # Generate comprehensive response
             if response_parts:
@@ -2389,6 +2410,60 @@ Return JSON with the detected action and context-specific parameters informed by
                 "action_type": "error"
             }
 
+    async def _execute_single_action(self, action: dict, project_id: str) -> dict:
+        """Execute one detected action (including its optional search step)."""
+        
+        outcome = {"tool_result": None, "response_part": None, "tool_calls": 0}
+        
+        # Handle search-first requirement
+        if action.get("requires_search_first", False):
+            search_results = await self._execute_search_before_action(action, project_id)
+            if search_results:
+                # Update action parameters with search results
+                action = await self._refine_action_with_search_results(action, search_results)
+                outcome["tool_calls"] += 1
+            else:
+                outcome["response_part"] = f"❌ Could not find items for: {action.get('description', 'unknown action')}"
+                return outcome
+        
+        # Execute the main action using AgentToolRegistry
+        tool_name = action.get("tool_name")
+        parameters = action.get("parameters", {})
+        
+        # Ensure project_id is in parameters
+        if "project_id" not in parameters:
+            parameters["project_id"] = project_id
+        
+        if tool_name in self.tool_registry.get_available_tools():
+            try:
+                # Actually execute the tool through the registry
+                result = await self.tool_registry.execute_tool(tool_name, **parameters)
+                outcome["tool_result"] = result
+                outcome["tool_calls"] += 1
+                
+                if result.get("success", False):
+                    outcome["response_part"] = result.get("message", f"✅ Completed: {action.get('description')}")
+                else:
+                    outcome["response_part"] = result.get("message", f"❌ Failed: {action.get('description')}")
+                    
+            except Exception as tool_error:
+                logger.error(f"Tool execution error for {tool_name}: {tool_error}")
+                outcome["response_part"] = f"❌ Error executing {tool_name}: {str(tool_error)}"
+                outcome["tool_result"] = {
+                    "success": False,
+                    "error": str(tool_error),
+                    "tool_name": tool_name
+                }
+        else:
+            outcome["response_part"] = f"❌ Unknown tool: {tool_name}"
+            outcome["tool_result"] = {
+                "success": False,
+                "error": f"Unknown tool: {tool_name}",
+                "tool_name": tool_name
+            }
+        
+        return outcome
+
     async def _execute_search_before_action(self, action: dict, project_id: str) -> list:
         """Execute search before the main action to find target items."""
         
@@ -2608,5 +2683,10 @@ Return JSON with the detected action and context-specific parameters informed by
         return "\n".join(session_parts)
 
 
-# Create singleton instance
-unified_samurai_agent = UnifiedSamuraiAgent() 
\ No newline at end of file
+# Create singleton instance wired to the application's shared services
+unified_samurai_agent = UnifiedSamuraiAgent(
+    gemini_service=container.gemini_service,
+    file_service=container.file_service,
+    task_service=container.task_service,
+    response_generator=response_generator
+) 
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+Per-Project Write Lanes
+
+Request handlers and background work mutate project files with load-modify-save
+calls. A write lane is a per-project actor: mutations submitted for a project
+are applied one at a time, in submission order, on a worker thread, so the
+event loop never blocks on file I/O and concurrent coroutines cannot interleave
+their read-modify-write cycles. Lanes of different projects run in parallel,
+and a lane exists only while it has work.
+
+Batched mutations (run_batched) waiting in a lane are coalesced: when one
+reaches the front, every queued mutation of the same kind joins it and their
+items are flushed with a single call of the batch function. The kind names
+the file a mutation writes; mutations of different kinds touch different files,
+so a coalesced batch may overtake them, but it never moves past a non-batched
+mutation of its own kind.
+
+A mutation that runs longer than SAMURAI_WRITE_LANE_TIMEOUT seconds is
+abandoned: its callers get a TimeoutError, the lane moves on to the next
+mutation, and the timeout is logged and counted. The worker thread cannot be
+stopped and finishes in the background, where its outcome is logged.
+
+Queue depth, wait time, ops, flushes and timeouts are exported per lane through
+the metrics registry.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+try:
+    from .metrics import metrics
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Constants
+WRITE_LANE_MAX_BATCH = int(os.getenv("SAMURAI_WRITE_LANE_MAX_BATCH", "64"))
+WRITE_LANE_TIMEOUT = float(os.getenv("SAMURAI_WRITE_LANE_TIMEOUT", "30"))
+
+
+@dataclass
+class _Mutation:
+    kind: str
+    fn: Callable[..., Any]
+    batched: bool
+    item: Any
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class _Lane:
+    def __init__(self, name: str, loop: asyncio.AbstractEventLoop):
+        self.name = name
+        self.loop = loop
+        self.pending: Deque[_Mutation] = deque()
+        self.running = 0
+        self.worker: Optional[asyncio.Task] = None
+
+
+class WriteLanes:
+    """Per-project serial executors for file mutations."""
+
+    def __init__(self, max_batch: int = WRITE_LANE_MAX_BATCH, timeout: float = WRITE_LANE_TIMEOUT):
+        self.max_batch = max(1, max_batch)
+        self.timeout = timeout
+        self._lanes: Dict[str, _Lane] = {}
+
+    async def run(self, lane: str, kind: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Apply fn(*args, **kwargs) in a lane, after everything queued there before it.
+
+        Args:
+            lane: Lane name, normally the project ID
+            kind: The file the mutation writes, e.g. "memories"
+            fn: Blocking function to run on a worker thread
+
+        Returns:
+            fn's return value (its exception is raised here)
+        """
+        return await self._submit(lane, kind, functools.partial(fn, *args, **kwargs), False, None)
+
+    async def run_batched(self, lane: str, kind: str, batch_fn: Callable[[List[Any]], Any], item: Any) -> Any:
+        """
+        Queue one item for batch_fn, flushed together with other queued items of the same kind.
+
+        All batched mutations of a kind must use an equivalent batch_fn; the one
+        submitted first in a batch is called with every item of the batch.
+
+        Returns:
+            batch_fn's return value for the batch the item was flushed in
+        """
+        return await self._submit(lane, kind, batch_fn, True, item)
+
+    def depth(self, lane: str) -> int:
+        """Mutations queued or running in a lane."""
+        state = self._lanes.get(lane)
+        return len(state.pending) + state.running if state else 0
+
+    def snapshot(self) -> Dict[str, int]:
+        """Depth of every active lane."""
+        return {name: self.depth(name) for name in self._lanes}
+
+    async def _submit(self, name: str, kind: str, fn: Callable[..., Any], batched: bool, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        lane = self._lanes.get(name)
+        if lane is None or lane.loop is not loop:
+            lane = self._lanes[name] = _Lane(name, loop)
+        mutation = _Mutation(kind=kind, fn=fn, batched=batched, item=item, future=loop.create_future())
+        lane.pending.append(mutation)
+        self._report_depth(lane)
+        if lane.worker is None or lane.worker.done():
+            lane.worker = loop.create_task(self._drain(lane))
+        # The mutation is applied even if the caller is cancelled while waiting
+        return await asyncio.shield(mutation.future)
+
+    async def _drain(self, lane: _Lane) -> None:
+        while lane.pending:
+            batch = self._take_batch(lane)
+            lane.running = len(batch)
+            started = time.perf_counter()
+            for mutation in batch:
+                metrics.observe("samurai_write_lane_wait_seconds", started - mutation.enqueued_at,
+                                lane=lane.name, kind=mutation.kind)
+            head = batch[0]
+            if head.batched:
+                call = functools.partial(head.fn, [mutation.item for mutation in batch])
+            else:
+                call = head.fn
+            work = asyncio.ensure_future(asyncio.to_thread(call))
+            try:
+                result = await asyncio.wait_for(asyncio.shield(work), self.timeout if self.timeout > 0 else None)
+            except asyncio.TimeoutError:
+                logger.error(
+                    f"Write lane {lane.name} {head.kind} mutation exceeded {self.timeout:g}s; "
+                    f"abandoning it so {len(lane.pending)} queued mutations can run"
+                )
+                metrics.inc("samurai_write_lane_timeouts_total", lane=lane.name, kind=head.kind)
+                work.add_done_callback(functools.partial(self._log_abandoned, lane.name, head.kind, started))
+                error = TimeoutError(f"Write lane {lane.name} {head.kind} mutation timed out after {self.timeout:g}s")
+                for mutation in batch:
+                    if not mutation.future.done():
+                        mutation.future.set_exception(error)
+            except Exception as e:
+                logger.error(f"Write lane {lane.name} {head.kind} mutation failed: {e}")
+                for mutation in batch:
+                    if not mutation.future.done():
+                        mutation.future.set_exception(e)
+            else:
+                for mutation in batch:
+                    if not mutation.future.done():
+                        mutation.future.set_result(result)
+            lane.running = 0
+            metrics.inc("samurai_write_lane_ops_total", len(batch), lane=lane.name, kind=head.kind)
+            metrics.inc("samurai_write_lane_flushes_total", lane=lane.name, kind=head.kind)
+            self._report_depth(lane)
+
+        if self._lanes.get(lane.name) is lane:
+            del self._lanes[lane.name]
+
+    @staticmethod
+    def _log_abandoned(lane: str, kind: str, started: float, work: asyncio.Future) -> None:
+        elapsed = time.perf_counter() - started
+        if work.cancelled():
+            return
+        error = work.exception()
+        if error is not None:
+            logger.error(f"Abandoned write lane {lane} {kind} mutation failed after {elapsed:.1f}s: {error}")
+        else:
+            logger.warning(f"Abandoned write lane {lane} {kind} mutation finished after {elapsed:.1f}s")
+
+    def _take_batch(self, lane: _Lane) -> List[_Mutation]:
+        """Pop the next mutation plus, if it is batched, the queued mutations it coalesces with."""
+        head = lane.pending.popleft()
+        batch = [head]
+        if not head.batched:
+            return batch
+
+        remaining: Deque[_Mutation] = deque()
+        while lane.pending and len(batch) < self.max_batch:
+            mutation = lane.pending.popleft()
+            if mutation.kind != head.kind:
+                remaining.append(mutation)
+            elif mutation.batched:
+                batch.append(mutation)
+            else:
+                # A plain mutation of the same kind is a barrier
+                remaining.append(mutation)
+                break
+        remaining.extend(lane.pending)
+        lane.pending = remaining
+        return batch
+
+    def _report_depth(self, lane: _Lane) -> None:
+        metrics.set_gauge("samurai_write_lane_depth", len(lane.pending) + lane.running, lane=lane.name)
+
+
+# Global instance
+write_lanes = WriteLanes()
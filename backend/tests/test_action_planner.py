@@ -0,0 +1,75 @@
+import os
+import sys
+import asyncio
+import unittest
+
+
+class TestActionPlanner(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def test_independent_collections_have_no_dependencies(self):
+        from services.action_planner import build_action_graph
+
+        planned = build_action_graph([
+            {"tool_name": "change_task_status", "parameters": {"task_identifier": "A", "new_status": "completed"}},
+            {"tool_name": "create_memory", "parameters": {"title": "C", "content": "note"}},
+            {"tool_name": "search_memories", "parameters": {"query": "x"}},
+            {"tool_name": "search_tasks", "parameters": {"query": "y"}},
+        ])
+
+        self.assertEqual(planned[0].depends_on, set())
+        self.assertEqual(planned[1].depends_on, set())
+        # Reading memories after a memory write must wait for it
+        self.assertEqual(planned[2].depends_on, {1})
+        self.assertEqual(planned[3].depends_on, {0})
+
+    def test_create_then_reference_and_search_first(self):
+        from services.action_planner import build_action_graph
+
+        planned = build_action_graph([
+            {"tool_name": "create_task", "parameters": {"title": "Login page", "description": ""}},
+            {"tool_name": "create_memory", "parameters": {"title": "Auth", "content": "JWT"}},
+            {"tool_name": "change_task_status", "parameters": {"task_identifier": "login page", "new_status": "completed"}},
+            {"tool_name": "update_memory", "parameters": {"memory_identifier": "db"},
+             "requires_search_first": True, "search_tool": "search_tasks"},
+        ])
+
+        self.assertEqual(planned[2].depends_on, {0})
+        # The search step reads tasks, so it waits for both task writes as well as the memory write
+        self.assertEqual(planned[3].depends_on, {0, 1, 2})
+
+    async def test_independent_actions_run_concurrently_in_order(self):
+        from services.action_planner import build_action_graph, execute_action_graph
+
+        actions = [
+            {"tool_name": "delete_task", "parameters": {"task_identifier": "B"}},
+            {"tool_name": "create_memory", "parameters": {"title": "C", "content": "note"}},
+            {"tool_name": "change_task_status", "parameters": {"task_identifier": "A", "new_status": "completed"}},
+        ]
+        running = 0
+        peak = 0
+        finished = []
+
+        async def runner(action):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            finished.append(action["tool_name"])
+            return action["tool_name"]
+
+        results = await execute_action_graph(build_action_graph(actions), runner)
+
+        self.assertEqual(results, ["delete_task", "create_memory", "change_task_status"])
+        self.assertEqual(peak, 2)
+        # Task writes stay serialized in their original order
+        self.assertLess(finished.index("delete_task"), finished.index("change_task_status"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+
+class TestListResponseProjection(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+        from fastapi.testclient import TestClient
+        from services.file_service import FileService
+        from models import Memory, Project
+        import main as main_module
+
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        self.file_service_patch = mock.patch.object(main_module, 'file_service', self.fs)
+        self.file_service_patch.start()
+        self.client = TestClient(main_module.app)
+
+        self.fs.save_project(Project(id="p1", name="Shop", description="Store", tech_stack="FastAPI"))
+        self.fs.save_memories("p1", [
+            Memory(id=f"m{i}", project_id="p1", title=f"Decision {i}", content="Use postgres " * 20,
+                   type="decision", embedding=[0.125] * 384, embedding_text="decision text",
+                   created_at=datetime(2024, 1, 1))
+            for i in range(5)
+        ])
+
+    def tearDown(self):
+        self.file_service_patch.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_embeddings_are_excluded_unless_requested(self):
+        default = self.client.get("/projects/p1/memories").json()
+        self.assertEqual(len(default), 5)
+        self.assertNotIn("embedding", default[0])
+        self.assertNotIn("embedding_text", default[0])
+        self.assertEqual(default[0]["title"], "Decision 0")
+        self.assertEqual(default[0]["created_at"], "2024-01-01T00:00:00")
+
+        full = self.client.get("/projects/p1/memories", params={"include_embeddings": "true"}).json()
+        self.assertEqual(len(full[0]["embedding"]), 384)
+
+    def test_fields_projection(self):
+        response = self.client.get("/projects/p1/memories", params={"fields": "id,title"})
+        self.assertEqual(response.json()[0], {"id": "m0", "title": "Decision 0"})
+
+        response = self.client.get("/projects/p1/memories", params={"fields": "id,bogus"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bogus", response.json()["detail"])
+
+    def test_large_lists_are_compressed(self):
+        response = self.client.get("/projects/p1/memories", params={"include_embeddings": "true"},
+                                   headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["vary"])
+        self.assertEqual(len(response.json()), 5)
+
+        plain = self.client.get("/projects/p1/memories", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", plain.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
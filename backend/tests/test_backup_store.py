@@ -0,0 +1,155 @@
+import os
+import sys
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+
+class TestBackupStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        self.backup_dir = Path(self.temp_dir) / "backups"
+        self.backup_dir.mkdir()
+        self.data_file = Path(self.temp_dir) / "project-p1-tasks.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def store(self, **kwargs):
+        from services.backup_store import BackupStore
+
+        kwargs.setdefault("interval", 0)
+        return BackupStore(self.backup_dir, **kwargs)
+
+    def replace_data(self, content):
+        """Save the way FileService does: write a new file and rename it over the old one."""
+        temp = self.data_file.with_suffix(".tmp")
+        temp.write_text(content)
+        temp.replace(self.data_file)
+
+    def read_backup(self, entry):
+        path = self.backup_dir / entry["name"]
+        if path.suffix == ".gz":
+            with gzip.open(path, 'rt') as f:
+                return f.read()
+        return path.read_text()
+
+    def test_snapshot_survives_the_replace_and_is_indexed(self):
+        store = self.store()
+        self.replace_data("v1")
+        snapshot = store.snapshot(self.data_file)
+        self.assertEqual(snapshot.stat().st_ino, self.data_file.stat().st_ino)
+        self.replace_data("v2")
+        store.drain()
+
+        [entry] = store.list_backups("project-p1-tasks")
+        self.assertEqual(self.read_backup(entry), "v1")
+        with open(self.backup_dir / "index.json") as f:
+            self.assertEqual(json.load(f)["files"]["project-p1-tasks"][0]["name"], entry["name"])
+
+    def test_interval_dedup_and_rotation(self):
+        store = self.store(interval=3600, max_backups=2)
+        self.replace_data("v1")
+        self.assertIsNotNone(store.snapshot(self.data_file))
+        self.assertIsNone(store.snapshot(self.data_file))
+
+        store.interval = 0
+        # Unchanged content is not kept twice
+        self.assertIsNotNone(store.snapshot(self.data_file))
+        store.drain()
+        self.assertEqual(len(store.list_backups("project-p1-tasks")), 1)
+
+        for version in ("v2", "v3", "v4"):
+            self.replace_data(version)
+            store.snapshot(self.data_file)
+        store.drain()
+        entries = store.list_backups("project-p1-tasks")
+        self.assertEqual([self.read_backup(e) for e in entries], ["v3", "v4"])
+        self.assertEqual(sorted(os.listdir(self.backup_dir)), sorted([e["name"] for e in entries] + ["index.json"]))
+
+    def test_gzip_mode_archives_snapshots(self):
+        store = self.store(mode="gzip")
+        self.replace_data("x" * 10000)
+        store.snapshot(self.data_file)
+        store.drain()
+        [entry] = store.list_backups("project-p1-tasks")
+        self.assertTrue(entry["name"].endswith(".json.gz"))
+        self.assertEqual(entry["size"], 10000)
+        self.assertEqual(self.read_backup(entry), "x" * 10000)
+
+    def test_backups_from_earlier_versions_are_adopted(self):
+        for second in range(3):
+            (self.backup_dir / f"project-p1-memory_sections_20240101_12000{second}.json").write_text("{}")
+        store = self.store(max_backups=2)
+        self.assertEqual(len(store.list_backups("project-p1-memory_sections")), 3)
+
+        self.data_file = Path(self.temp_dir) / "project-p1-memory_sections.json"
+        self.replace_data('{"m1": {}}')
+        store.snapshot(self.data_file)
+        store.drain()
+        names = [e["name"] for e in store.list_backups("project-p1-memory_sections")]
+        self.assertEqual(len(names), 2)
+        self.assertNotIn("project-p1-memory_sections_20240101_120000.json", os.listdir(self.backup_dir))
+
+    def test_processes_sharing_a_directory_merge_the_index(self):
+        # Two stores stand in for two worker processes: each keeps its own in-memory index
+        first, second = self.store(max_backups=2), self.store(interval=3600, max_backups=2)
+        self.assertEqual(second.list_backups("project-p1-tasks"), [])
+
+        other_file = Path(self.temp_dir) / "project-p1-memories.json"
+        other_file.write_text("m1")
+        self.replace_data("v1")
+        first.snapshot(self.data_file)
+        first.drain()
+        second.snapshot(other_file)
+        second.drain()
+
+        with open(self.backup_dir / "index.json") as f:
+            files = json.load(f)["files"]
+        self.assertEqual(len(files["project-p1-tasks"]), 1)
+        self.assertEqual(len(files["project-p1-memories"]), 1)
+        # The other process's snapshot counts towards the interval
+        self.replace_data("v2")
+        self.assertIsNone(second.snapshot(self.data_file))
+
+        # Rotation done by one store is not undone by the other
+        for version in ("v3", "v4"):
+            self.replace_data(version)
+            first.snapshot(self.data_file)
+        first.drain()
+        second.interval = 0
+        self.replace_data("v5")
+        second.snapshot(self.data_file)
+        second.drain()
+        entries = first.list_backups("project-p1-tasks")
+        self.assertEqual([self.read_backup(e) for e in entries], ["v4", "v5"])
+        self.assertEqual(entries, second.list_backups("project-p1-tasks"))
+        self.assertEqual(sorted(os.listdir(self.backup_dir)),
+                         sorted([e["name"] for e in entries] + [first.list_backups("project-p1-memories")[0]["name"],
+                                                                "index.json"]))
+
+    def test_file_service_backs_up_previous_version(self):
+        from services.file_service import FileService
+        from models import Memory
+
+        fs = FileService(data_dir=self.temp_dir, backup_dir=str(self.backup_dir))
+        fs.backups.interval = 0
+        for memory_id in ("a", "b"):
+            fs.save_memory("p1", Memory(id=memory_id, project_id="p1", title=memory_id, content="c",
+                                        type="note", embedding=[0.1]))
+        fs.close()
+        [entry] = fs.backups.list_backups("project-p1-memories")
+        self.assertEqual([m["id"] for m in json.loads(self.read_backup(entry))], ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
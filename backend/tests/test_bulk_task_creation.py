@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import shutil
+import unittest
+from unittest import mock
+
+
+class TestBulkTaskCreation(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Add backend directory to sys.path for imports like `from services...`
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+        from services.file_service import FileService
+
+        tdir = self.temp_dir
+
+        class TempFileService(FileService):
+            def __init__(self):
+                super().__init__(data_dir=tdir, backup_dir=os.path.join(tdir, 'backups'))
+
+        self.TempFileService = TempFileService
+        self.taskservice_fs_patch = mock.patch('services.task_service.FileService', TempFileService)
+        self.taskservice_fs_patch.start()
+        self.project_id = 'test-project-bulk'
+
+    def tearDown(self):
+        self.taskservice_fs_patch.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    async def test_create_tasks_resolves_batch_parents_with_single_write(self):
+        from services.task_service import TaskService
+
+        service = TaskService()
+        with mock.patch.object(service.file_service, '_save_json', wraps=service.file_service._save_json) as save_json, \
+                mock.patch('services.file_service.embedding_service.generate_embeddings_batch',
+                           side_effect=lambda texts: [None] * len(texts)) as embed_batch:
+            tasks = await service.create_tasks(self.project_id, [
+                {"title": "Root", "description": "Root task"},
+                {"title": "Child", "description": "Child task", "parent_index": 0},
+                {"title": "Grandchild", "description": "Grandchild task", "parent_index": 1},
+            ])
+
+        self.assertEqual(save_json.call_count, 1)
+        self.assertEqual(embed_batch.call_count, 1)
+        self.assertEqual([t.depth for t in tasks], [1, 2, 3])
+        self.assertEqual(tasks[1].parent_task_id, tasks[0].id)
+        self.assertEqual(tasks[2].parent_task_id, tasks[1].id)
+
+        stored = {t.id: t for t in self.TempFileService().load_tasks(self.project_id)}
+        self.assertEqual(set(stored), {t.id for t in tasks})
+
+    async def test_create_tasks_is_all_or_nothing(self):
+        from services.task_service import TaskService
+
+        service = TaskService()
+        with self.assertRaises(ValueError):
+            await service.create_tasks(self.project_id, [
+                {"title": "Valid", "description": "ok"},
+                {"title": "Orphan", "description": "bad parent", "parent_task_id": "missing"},
+            ])
+
+        self.assertEqual(self.TempFileService().load_tasks(self.project_id), [])
+
+    async def test_create_tasks_enforces_depth_limit(self):
+        from services.task_service import TaskService
+
+        service = TaskService()
+        specs = [{"title": "Level 1", "description": ""}]
+        for level in range(2, 6):
+            specs.append({"title": f"Level {level}", "description": "", "parent_index": level - 2})
+
+        with self.assertRaises(ValueError) as ctx:
+            await service.create_tasks(self.project_id, specs)
+        self.assertIn("Maximum task nesting depth", str(ctx.exception))
+
+    async def test_create_tasks_tool_reports_per_task_results(self):
+        from services.agent_tools import AgentToolRegistry
+        from services.task_service import TaskService
+
+        # Without a task service the tools would use the container's, which writes to data/
+        registry = AgentToolRegistry(task_service=TaskService())
+        result = await registry.execute_tool(
+            "create_tasks",
+            tasks=[
+                {"title": "Root", "description": "Root task"},
+                {"title": "Child", "description": "Child task", "parent_index": 0},
+            ],
+            project_id=self.project_id,
+        )
+
+        self.assertTrue(result["success"])
+        self.assertEqual(len(result["results"]), 2)
+        self.assertTrue(all(r["success"] for r in result["results"]))
+        self.assertEqual(result["task_ids"], [r["task_id"] for r in result["results"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+
+class TestChatPagination(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+        from services.file_service import FileService
+        from models import ChatMessage, Project
+
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        self.fs.save_project(Project(id="p1", name="Shop", description="Store", tech_stack="FastAPI"))
+        self.session = self.fs.create_session("p1", "Main")
+
+        start = datetime(2024, 1, 1, 12, 0, 0)
+        messages = []
+        for i in range(10):
+            messages.append(ChatMessage(id=f"s{i}", project_id="p1", session_id=self.session.id,
+                                        message=f"question {i}", response=f"answer {i}",
+                                        created_at=start + timedelta(minutes=i)))
+            # Interleave another session's messages
+            messages.append(ChatMessage(id=f"o{i}", project_id="p1", session_id="other",
+                                        message="elsewhere", response="elsewhere",
+                                        created_at=start + timedelta(minutes=i, seconds=30)))
+        # Stored out of order; pages are always chronological
+        self.fs.save_chat_history("p1", list(reversed(messages)))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def ids(self, messages):
+        return [m.id for m in messages]
+
+    def test_default_page_is_the_session_tail(self):
+        messages, has_more = self.fs.load_chat_messages_page("p1", self.session.id, limit=3)
+        self.assertEqual(self.ids(messages), ["s7", "s8", "s9"])
+        self.assertTrue(has_more)
+
+        messages, has_more = self.fs.load_chat_messages_page("p1", self.session.id, limit=None)
+        self.assertEqual(len(messages), 10)
+        self.assertFalse(has_more)
+        self.assertEqual(self.ids(self.fs.load_chat_messages_by_session("p1", self.session.id)),
+                         [f"s{i}" for i in range(10)])
+
+    def test_before_and_after_cursors(self):
+        messages, has_more = self.fs.load_chat_messages_page("p1", self.session.id, limit=3, before="s7")
+        self.assertEqual(self.ids(messages), ["s4", "s5", "s6"])
+        self.assertTrue(has_more)
+
+        messages, has_more = self.fs.load_chat_messages_page("p1", self.session.id, limit=3, before="s2")
+        self.assertEqual(self.ids(messages), ["s0", "s1"])
+        self.assertFalse(has_more)
+
+        messages, has_more = self.fs.load_chat_messages_page("p1", self.session.id, limit=3, after="s1")
+        self.assertEqual(self.ids(messages), ["s2", "s3", "s4"])
+        self.assertTrue(has_more)
+
+        messages, has_more = self.fs.load_chat_messages_page("p1", self.session.id, limit=5, after="s7")
+        self.assertEqual(self.ids(messages), ["s8", "s9"])
+        self.assertFalse(has_more)
+
+        # Timestamp cursors, with or without a UTC suffix
+        messages, _ = self.fs.load_chat_messages_page("p1", self.session.id, limit=2,
+                                                      before="2024-01-01T12:05:00")
+        self.assertEqual(self.ids(messages), ["s3", "s4"])
+        messages, _ = self.fs.load_chat_messages_page("p1", self.session.id, limit=2,
+                                                      after="2024-01-01T12:05:00Z")
+        self.assertEqual(self.ids(messages), ["s6", "s7"])
+
+        with self.assertRaises(ValueError):
+            self.fs.load_chat_messages_page("p1", self.session.id, before="no-such-message")
+
+    def test_endpoints_return_pages_with_cursor_headers(self):
+        from fastapi.testclient import TestClient
+        import main as main_module
+
+        with mock.patch.object(main_module, 'file_service', self.fs):
+            client = TestClient(main_module.app)
+            url = f"/projects/p1/session-messages/{self.session.id}"
+
+            response = client.get(url, params={"limit": 4})
+            self.assertEqual([m["id"] for m in response.json()], ["s6", "s7", "s8", "s9"])
+            self.assertEqual(response.headers["x-has-more"], "true")
+            self.assertEqual(response.headers["x-before-cursor"], "s6")
+            self.assertEqual(response.headers["x-after-cursor"], "s9")
+
+            older = client.get(url, params={"limit": 4, "before": response.headers["x-before-cursor"]})
+            self.assertEqual([m["id"] for m in older.json()], ["s2", "s3", "s4", "s5"])
+
+            # Without limit or cursor the full history is returned, as before paging
+            everything = client.get(url)
+            self.assertEqual(len(everything.json()), 10)
+            self.assertEqual(everything.headers["x-has-more"], "false")
+            self.assertEqual([m["id"] for m in client.get(url, params={"before": "s2"}).json()], ["s0", "s1"])
+
+            history = client.get("/projects/p1/chat-messages", params={"limit": 2})
+            self.assertEqual([m["id"] for m in history.json()], ["s9", "o9"])
+
+            self.assertEqual(client.get(url, params={"before": "bogus"}).status_code, 400)
+            self.assertEqual(client.get(url, params={"limit": 0}).status_code, 422)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import sys
+import json
+import stat
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+
+class TestChatPartitions(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+        from services.file_service import FileService
+        from models import Project
+
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        self.fs.save_project(Project(id="p1", name="Shop", description="Store", tech_stack="FastAPI"))
+        self.chat_dir = self.fs._get_chat_dir("p1")
+        self.start = datetime(2024, 1, 1, 12, 0, 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def message(self, message_id, session_id, minute):
+        from models import ChatMessage
+
+        return ChatMessage(id=message_id, project_id="p1", session_id=session_id,
+                           message=f"question {message_id}", response=f"answer {message_id}",
+                           created_at=self.start + timedelta(minutes=minute))
+
+    def manifest(self):
+        return self.fs._load_dict_json(self.fs._get_project_file_path("p1", "chat_manifest"))
+
+    def test_legacy_chat_file_is_split_and_old_sessions_sealed(self):
+        from models import Session
+
+        self.fs.save_session("p1", Session(id="old", project_id="p1", name="Old",
+                                           last_activity=self.start))
+        self.fs.save_session("p1", Session(id="live", project_id="p1", name="Live",
+                                           last_activity=self.start + timedelta(days=1)))
+        legacy = [
+            {"role": "user", "content": "hi", "session_id": "old", "timestamp": "2024-01-01T10:00:00"},
+            {"role": "assistant", "content": "hello", "session_id": "old", "timestamp": "2024-01-01T10:00:01"},
+            self.message("m1", "live", 1).dict(),
+        ]
+        with open(self.fs._get_project_file_path("p1", "chat"), 'w', encoding='utf-8') as f:
+            json.dump(legacy, f, default=str)
+
+        self.assertEqual(self.fs.migrate_chat_partitions(), 1)
+        self.assertFalse(self.fs._get_project_file_path("p1", "chat").exists())
+
+        sessions = self.manifest()["sessions"]
+        self.assertTrue(sessions["old"]["sealed"])
+        self.assertTrue(sessions["old"]["file"].endswith(".jsonl.gz"))
+        self.assertEqual(stat.S_IMODE((self.chat_dir / sessions["old"]["file"]).stat().st_mode), 0o444)
+        self.assertFalse(sessions["live"]["sealed"])
+
+        [old] = self.fs.load_chat_messages_by_session("p1", "old")
+        self.assertEqual((old.message, old.response), ("hi", "hello"))
+        self.assertEqual([m.id for m in self.fs.load_chat_history("p1")], [old.id, "m1"])
+        self.assertEqual(self.fs.get_project_stats("p1")["chat_messages"], 2)
+
+    def test_live_session_reads_and_appends_touch_only_its_partition(self):
+        self.fs.save_chat_history("p1", [self.message(f"a{i}", "ended", i) for i in range(3)])
+        self.assertTrue(self.fs.seal_chat_session("p1", "ended"))
+        self.assertFalse(self.fs.seal_chat_session("p1", "ended"))
+
+        for i in range(5):
+            self.fs.save_chat_message("p1", self.message(f"b{i}", "live", 10 + i))
+        live_path = self.chat_dir / self.manifest()["sessions"]["live"]["file"]
+        self.assertEqual(len(live_path.read_text().splitlines()), 5)
+
+        read = []
+        original = self.fs._read_chat_partition
+        with mock.patch.object(self.fs, "_read_chat_partition",
+                               side_effect=lambda path, tail=None: read.append(path.name) or original(path, tail)):
+            messages, has_more = self.fs.load_chat_messages_page("p1", "live", limit=2)
+        self.assertEqual([m.id for m in messages], ["b3", "b4"])
+        self.assertTrue(has_more)
+        self.assertEqual(read, [live_path.name])
+
+        # A late message reopens a sealed session
+        self.fs.save_chat_message("p1", self.message("a3", "ended", 4))
+        entry = self.manifest()["sessions"]["ended"]
+        self.assertFalse(entry["sealed"])
+        self.assertEqual(entry["count"], 4)
+        self.assertEqual([m.id for m in self.fs.load_chat_messages_by_session("p1", "ended")],
+                         ["a0", "a1", "a2", "a3"])
+
+    def test_tail_read_skips_older_lines(self):
+        self.fs.save_chat_history("p1", [self.message(f"m{i}", "s1", i) for i in range(50)])
+        path = self.chat_dir / self.manifest()["sessions"]["s1"]["file"]
+        lines = path.read_text().splitlines()
+        # Older lines are never parsed, so damaging them does not affect the tail page
+        path.write_text("\n".join(["{not json"] * 10 + lines[10:]) + "\n")
+
+        with mock.patch("services.file_service.CHAT_TAIL_BLOCK_SIZE", 256):
+            messages, has_more = self.fs.load_chat_messages_page("p1", "s1", limit=3)
+        self.assertEqual([m.id for m in messages], ["m47", "m48", "m49"])
+        self.assertTrue(has_more)
+
+    def test_manifest_is_rebuilt_from_partitions(self):
+        self.fs.save_chat_history("p1", [self.message("m0", "s1", 0), self.message("m1", "s2", 1)])
+        self.fs.seal_chat_session("p1", "s1")
+        self.fs._get_project_file_path("p1", "chat_manifest").unlink()
+
+        self.assertEqual([m.id for m in self.fs.load_chat_history("p1")], ["m0", "m1"])
+        sessions = self.manifest()["sessions"]
+        self.assertTrue(sessions["s1"]["sealed"])
+        self.assertEqual(sessions["s2"]["count"], 1)
+
+        self.fs.delete_project("p1")
+        self.assertFalse(self.chat_dir.exists())
+
+    def test_orphan_cleanup_keeps_projects_with_uuid_ids(self):
+        import uuid
+        from models import Project
+
+        live_id, gone_id = str(uuid.uuid4()), str(uuid.uuid4())
+        self.fs.save_project(Project(id=live_id, name="Live", description="d", tech_stack="x"))
+        for project_id in (live_id, gone_id):
+            session = self.fs.create_session(project_id)
+            message = self.message("m1", session.id, 0).copy(update={"project_id": project_id})
+            self.fs.save_chat_message(project_id, message)
+
+        self.assertEqual(self.fs.cleanup_orphaned_files(), 3)
+        self.assertEqual(len(self.fs.load_chat_history(live_id)), 1)
+        self.assertEqual(len(self.fs.load_sessions(live_id)), 1)
+        self.assertTrue(self.fs._get_chat_dir(live_id).exists())
+        self.assertFalse(self.fs._get_chat_dir(gone_id).exists())
+        self.assertEqual(self.fs.load_sessions(gone_id), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
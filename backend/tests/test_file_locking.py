@@ -0,0 +1,123 @@
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+import unittest
+import multiprocessing
+from datetime import datetime, timedelta
+from unittest import mock
+
+WRITER_PROCESSES = 6
+WRITES_PER_PROCESS = 15
+
+
+def write_concurrently(data_dir, worker, barrier):
+    """Writer process: add tasks, memories and chat messages to one shared project."""
+    from services.file_service import FileService
+    from models import ChatMessage, Memory, Task
+
+    fs = FileService(data_dir=data_dir, backup_dir=os.path.join(data_dir, 'backups'))
+    barrier.wait()
+    for i in range(WRITES_PER_PROCESS):
+        fs.save_task("p1", Task(id=f"t-{worker}-{i}", project_id="p1", title=f"Task {worker}.{i}",
+                                description="stress", embedding=[0.1]))
+        fs.save_memory("p1", Memory(id=f"m-{worker}-{i}", project_id="p1", title=f"Memory {worker}.{i}",
+                                    content="stress", type="note", embedding=[0.1]))
+        fs.save_chat_message("p1", ChatMessage(id=f"c-{worker}-{i}", project_id="p1", session_id="s1",
+                                               message="q", response="a", embedding=[0.1],
+                                               created_at=datetime(2024, 1, 1) + timedelta(seconds=i)))
+
+
+class TestFileLocking(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+        from services.file_service import FileService
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork and fcntl")
+    def test_concurrent_writer_processes_lose_no_updates(self):
+        context = multiprocessing.get_context("fork")
+        barrier = context.Barrier(WRITER_PROCESSES)
+        writers = [context.Process(target=write_concurrently, args=(self.temp_dir, worker, barrier))
+                   for worker in range(WRITER_PROCESSES)]
+        for process in writers:
+            process.start()
+        for process in writers:
+            process.join(timeout=120)
+        self.assertEqual([p.exitcode for p in writers], [0] * WRITER_PROCESSES)
+
+        expected = WRITER_PROCESSES * WRITES_PER_PROCESS
+        self.assertEqual(len({t.id for t in self.fs.load_tasks("p1")}), expected)
+        self.assertEqual(len({m.id for m in self.fs.load_memories("p1")}), expected)
+        self.assertEqual(len(self.fs.load_chat_messages_by_session("p1", "s1")), expected)
+        self.assertEqual(self.fs.get_project_stats("p1")["chat_messages"], expected)
+        leftovers = [name for name in os.listdir(self.temp_dir) if name.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_save_with_stale_version_is_rejected(self):
+        from services.file_service import ConcurrentModificationError
+        from models import Memory
+
+        def memory(memory_id):
+            return Memory(id=memory_id, project_id="p1", title=memory_id, content="c", type="note", embedding=[0.1])
+
+        version = self.fs.get_file_version("p1", "memories")
+        self.fs.save_memories("p1", [memory("a")], expected_version=version)
+
+        stale = self.fs.get_file_version("p1", "memories")
+        self.fs.save_memory("p1", memory("b"))
+        with self.assertRaises(ConcurrentModificationError):
+            self.fs.save_memories("p1", [memory("a"), memory("c")], expected_version=stale)
+        self.assertEqual({m.id for m in self.fs.load_memories("p1")}, {"a", "b"})
+
+    def test_batched_consolidation_reapplies_plans_after_concurrent_write(self):
+        from services.intelligent_memory_consolidation import (
+            ConversationInsight, IntelligentMemoryConsolidationService
+        )
+        from models import Memory
+
+        existing = Memory(id="api", project_id="p1", title="API framework", content="FastAPI",
+                          category="backend", type="decision", embedding=[0.1])
+        self.fs.save_memories("p1", [existing])
+
+        fs = self.fs
+
+        class ConcurrentGemini:
+            async def chat_with_system_prompt(self, message, system_prompt):
+                # Another request saves a memory while the plan is being generated
+                fs.save_memory("p1", Memory(id="tool", project_id="p1", title="Added by a tool",
+                                            content="x", category="general", type="note", embedding=[0.1]))
+                await asyncio.sleep(0)
+                return ('{"updates": [], "creates": [{"insights": [0], "title": "Caching",'
+                        ' "content": "Redis caching in front of the API", "type": "decision"}], "skipped": []}')
+
+        service = IntelligentMemoryConsolidationService()
+        service.file_service = self.fs
+        service.gemini_service = ConcurrentGemini()
+        insight = ConversationInsight(content="Added Redis caching", category="backend", is_new_category=False,
+                                      new_category_suggestion=None, significance_score=0.9,
+                                      insight_type="decision", related_keywords=[])
+
+        with mock.patch.object(self.fs, 'save_memories', wraps=self.fs.save_memories) as save_spy:
+            asyncio.run(service._process_categories_batched({"backend": [insight]}, "p1"))
+
+        self.assertEqual(save_spy.call_count, 2)
+        stored = {m.id: m for m in self.fs.load_memories("p1")}
+        self.assertIn("tool", stored)
+        self.assertIn("api", stored)
+        self.assertEqual([m.title for m in stored.values() if m.category == "backend" and m.id != "api"], ["Caching"])
+
+
+if __name__ == '__main__':
+    unittest.main()
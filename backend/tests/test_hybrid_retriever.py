@@ -0,0 +1,110 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+
+class KeywordEmbeddings:
+    """Embeds text as a bag of known concepts so related words share a direction."""
+
+    CONCEPTS = {
+        "auth": 0, "login": 0, "jwt": 0, "session": 0,
+        "database": 1, "postgres": 1, "schema": 1,
+        "deploy": 2, "docker": 2,
+    }
+
+    def is_model_loaded(self):
+        return True
+
+    def prepare_text_for_embedding(self, text, max_length=512):
+        return text
+
+    def generate_embedding(self, text):
+        vector = [0.0, 0.0, 0.0, 0.1]
+        for word in text.lower().split():
+            concept = self.CONCEPTS.get(word.strip(".,"))
+            if concept is not None:
+                vector[concept] += 1.0
+        return vector
+
+
+class TestHybridRetriever(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        from services.file_service import FileService
+        from services.hybrid_retriever import HybridRetriever
+        from models import Memory
+
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        embeddings = KeywordEmbeddings()
+        self.retriever = HybridRetriever(embeddings=embeddings)
+
+        specs = [
+            ("m1", "Login flow", "Users login with JWT", "security"),
+            ("m2", "Session handling", "Tokens live in the postgres database schema", "security"),
+            ("m3", "Database", "Postgres schema for users", "database"),
+            ("m4", "Deploy", "Docker images on push", "devops"),
+            ("m5", "Login flow copy", "Users login with JWT", "security"),
+        ]
+        self.fs.save_memories("p1", [
+            Memory(id=mid, project_id="p1", title=title, content=content, category=category, type="note",
+                   embedding=embeddings.generate_embedding(f"{title} {content}"))
+            for mid, title, content, category in specs
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_reciprocal_rank_fusion(self):
+        from services.hybrid_retriever import HybridRetriever
+
+        a, b, c = {"id": "a"}, {"id": "b"}, {"id": "c"}
+        fused = HybridRetriever.fuse([[a, b], [b, c]], k=60)
+        self.assertEqual([doc["id"] for doc, _ in fused], ["b", "a", "c"])
+        self.assertAlmostEqual(fused[0][1], 1 / 62 + 1 / 61)
+
+    def test_vector_candidates_complement_lexical_matches(self):
+        items = self.retriever.search(self.fs, "p1", "memories", "auth", top_k=None)
+        ids = [item.id for item in items]
+
+        # "auth" matches no memory text; only the embedding links it to login/session memories
+        self.assertEqual(set(ids), {"m1", "m2", "m5"})
+        self.assertTrue(all(item.lexical_rank is None for item in items))
+
+        items = self.retriever.search(self.fs, "p1", "memories", "session", top_k=None)
+        self.assertEqual(items[0].id, "m2")
+        self.assertIsNotNone(items[0].lexical_rank)
+        self.assertIsNotNone(items[0].vector_rank)
+
+    async def test_retrieve_applies_predicate_and_mmr(self):
+        items = await self.retriever.retrieve(
+            self.fs, "p1", "memories", "login jwt", top_k=2,
+            predicate=lambda doc: doc["category"] == "security"
+        )
+        ids = [item.id for item in items]
+        self.assertEqual(len(ids), 2)
+        # The exact duplicate of the top hit is pushed out in favour of a different memory
+        self.assertFalse({"m1", "m5"} <= set(ids))
+        self.assertIn("m2", ids)
+
+    async def test_lexical_only_without_embedding_model(self):
+        from services.hybrid_retriever import HybridRetriever
+
+        class NoModel(KeywordEmbeddings):
+            def is_model_loaded(self):
+                return False
+
+        retriever = HybridRetriever(embeddings=NoModel())
+        items = await retriever.retrieve(self.fs, "p1", "memories", "docker", top_k=3)
+        self.assertEqual([item.id for item in items], ["m4"])
+
+
+if __name__ == '__main__':
+    unittest.main()
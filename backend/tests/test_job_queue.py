@@ -0,0 +1,152 @@
+import os
+import sys
+import asyncio
+import shutil
+import tempfile
+import unittest
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_jobs_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _queue(self, **kwargs):
+        from services.job_queue import JobQueue
+        kwargs.setdefault("retry_base_delay", 0.01)
+        return JobQueue(jobs_dir=self.temp_dir, **kwargs)
+
+    async def test_retries_with_backoff_until_success(self):
+        queue = self._queue(max_attempts=3)
+        calls = []
+
+        async def flaky(payload):
+            calls.append(payload["n"])
+            if len(calls) < 3:
+                raise RuntimeError("transient")
+
+        queue.register_handler("flaky", flaky)
+        await queue.start()
+        try:
+            job = queue.enqueue("flaky", "p1", payload={"n": 1})
+            await queue.wait_idle(timeout=5)
+        finally:
+            await queue.stop()
+
+        self.assertEqual(calls, [1, 1, 1])
+        self.assertEqual(queue.get_job(job.id).status, "succeeded")
+        self.assertEqual(queue.get_job(job.id).attempts, 3)
+
+    async def test_marks_failed_after_max_attempts(self):
+        queue = self._queue(max_attempts=2)
+
+        async def broken(payload):
+            raise RuntimeError("always")
+
+        queue.register_handler("broken", broken)
+        await queue.start()
+        try:
+            job = queue.enqueue("broken", "p1")
+            await queue.wait_idle(timeout=5)
+        finally:
+            await queue.stop()
+
+        stored = queue.get_job(job.id)
+        self.assertEqual(stored.status, "failed")
+        self.assertEqual(stored.last_error, "always")
+
+    async def test_session_consolidation_error_result_is_retried(self):
+        from unittest import mock
+        import main
+        from services.intelligent_memory_consolidation import MemoryConsolidationResult
+
+        def result(status):
+            return MemoryConsolidationResult(status=status, total_insights_processed=0, total_insights_skipped=0,
+                                             categories_affected=[], new_categories_created=[],
+                                             total_memories_affected=0, session_relevance=0.0)
+
+        consolidate = mock.AsyncMock(side_effect=[result("error"), result("completed")])
+        queue = self._queue(max_attempts=3)
+        queue.register_handler(main.SESSION_CONSOLIDATION_JOB, main._run_session_consolidation_job)
+        with mock.patch.object(main, "_build_project_context", return_value={"name": "Shop"}), \
+                mock.patch.object(main.memory_consolidation_service, "consolidate_session_memories", consolidate):
+            await queue.start()
+            try:
+                job = queue.enqueue(main.SESSION_CONSOLIDATION_JOB, "p1",
+                                    payload={"project_id": "p1", "session_id": "s1"})
+                await queue.wait_idle(timeout=5)
+            finally:
+                await queue.stop()
+
+        self.assertEqual(consolidate.await_count, 2)
+        stored = queue.get_job(job.id)
+        self.assertEqual((stored.status, stored.attempts), ("succeeded", 2))
+
+    async def test_same_lane_serialized_other_lanes_concurrent(self):
+        queue = self._queue(max_concurrency=4)
+        active = {}
+        peak = {}
+
+        async def work(payload):
+            lane = payload["lane"]
+            active[lane] = active.get(lane, 0) + 1
+            peak[lane] = max(peak.get(lane, 0), active[lane])
+            peak["total"] = max(peak.get("total", 0), sum(active.values()))
+            await asyncio.sleep(0.05)
+            active[lane] -= 1
+
+        queue.register_handler("work", work)
+        await queue.start()
+        try:
+            for lane in ("p1:memories", "p1:memories", "p1:project_detail", "p2:memories"):
+                queue.enqueue("work", lane.split(":")[0], payload={"lane": lane}, lane=lane)
+            await queue.wait_idle(timeout=5)
+        finally:
+            await queue.stop()
+
+        self.assertEqual(peak["p1:memories"], 1)
+        self.assertGreaterEqual(peak["total"], 3)
+
+    async def test_interrupted_jobs_are_recovered_after_restart(self):
+        queue = self._queue()
+        started = asyncio.Event()
+
+        async def slow(payload):
+            started.set()
+            await asyncio.sleep(10)
+
+        queue.register_handler("slow", slow)
+        await queue.start()
+        job = queue.enqueue("slow", "p1")
+        await asyncio.wait_for(started.wait(), 5)
+        await queue.stop()
+
+        # A fresh queue over the same directory picks the job up again
+        restarted = self._queue()
+        done = []
+
+        async def fast(payload):
+            done.append(True)
+
+        restarted.register_handler("slow", fast)
+        self.assertEqual(restarted.get_job(job.id).status, "queued")
+        await restarted.start()
+        try:
+            await restarted.wait_idle(timeout=5)
+        finally:
+            await restarted.stop()
+
+        self.assertEqual(done, [True])
+        self.assertEqual(restarted.get_job(job.id).status, "succeeded")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+FAST_SIMULATOR_ENV = {
+    "SAMURAI_LLM_SIMULATOR": "1",
+    "SAMURAI_LLM_SIM_TTFT_MS": "0",
+    "SAMURAI_LLM_SIM_TOKENS_PER_SEC": "0",
+    "SAMURAI_LLM_SIM_SEED": "3",
+}
+
+
+class TestLLMSimulator(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def _service(self, **env):
+        from services.gemini_service import GeminiService
+        with mock.patch.dict(os.environ, {**FAST_SIMULATOR_ENV, **env}):
+            return GeminiService()
+
+    async def test_scripted_json_and_intent_responses(self):
+        service = self._service()
+        self.assertTrue(service.is_api_key_valid())
+
+        intent = await service.chat_with_system_prompt(
+            "Please create tasks for the checkout page",
+            "... Return ONLY the category name: pure_discussion, feature_exploration, ..."
+        )
+        self.assertEqual(intent, "ready_for_action")
+
+        breakdown = json.loads(await service.chat_with_system_prompt(
+            "checkout page", "## OUTPUT FORMAT\nReturn a pure JSON array of tasks."
+        ))
+        self.assertIsNone(breakdown[0]["parent_task_id"])
+        self.assertGreater(len(breakdown), 1)
+
+    async def test_streaming_emits_chunks_with_time_to_first_token(self):
+        service = self._service(SAMURAI_LLM_SIM_TTFT_MS="50", SAMURAI_LLM_SIM_LATENCY_DIST="fixed",
+                                SAMURAI_LLM_SIM_CHUNK_TOKENS="4")
+        started = time.perf_counter()
+        chunks, first_chunk_at = [], None
+        for chunk in service.model.generate_content("You are helpful.\n\nUser: Tell me about caching", stream=True):
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter() - started
+            chunks.append(chunk.text)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertGreaterEqual(first_chunk_at, 0.045)
+        full = await service.chat_with_system_prompt("Tell me about caching", "You are helpful.")
+        self.assertEqual("".join(chunks), full)
+
+    async def test_error_injection(self):
+        service = self._service(SAMURAI_LLM_SIM_ERROR_RATE="1")
+        response = await service.chat_with_system_prompt("hi", "You are helpful.")
+        self.assertIn("trouble processing", response)
+
+        from services.llm_simulator import SimulatedLLMError
+        with self.assertRaises(SimulatedLLMError):
+            list(service.model.generate_content("hi", stream=True))
+
+    def test_latency_distribution_mean(self):
+        from services.llm_simulator import SimulatedModel, SimulatorConfig
+
+        model = SimulatedModel(SimulatorConfig(ttft_ms=200, latency_distribution="lognormal",
+                                               latency_spread=0.5, seed=1))
+        samples = [model.sample_ttft() for _ in range(4000)]
+        self.assertAlmostEqual(sum(samples) / len(samples), 0.2, delta=0.02)
+        self.assertGreater(max(samples), 0.4)
+
+
+class TestAgentWithSimulator(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    async def test_task_creation_path_runs_offline(self):
+        from services.file_service import FileService
+        from services.gemini_service import GeminiService
+        from services.task_service import TaskService
+        from services.unified_samurai_agent import UnifiedSamuraiAgent
+
+        fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        with mock.patch.dict(os.environ, FAST_SIMULATOR_ENV):
+            gemini = GeminiService()
+        agent = UnifiedSamuraiAgent(gemini_service=gemini, file_service=fs,
+                                    task_service=TaskService(file_service=fs))
+
+        result = await agent.process_message(
+            "Please create tasks for the checkout page", "sim-project",
+            {"name": "Shop", "description": "Store", "tech_stack": "FastAPI"}, session_id="s1"
+        )
+
+        self.assertEqual(result["intent_analysis"]["intent_type"], "ready_for_action")
+        titles = [t.title for t in fs.load_tasks("sim-project")]
+        self.assertIn("Implement Please create tasks for the checkout", titles)
+        self.assertGreater(gemini.model.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
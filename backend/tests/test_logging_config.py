@@ -0,0 +1,78 @@
+import io
+import os
+import sys
+import json
+import logging
+import unittest
+
+
+class TestLoggingConfig(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.saved_level = logging.getLogger().level
+
+    def tearDown(self):
+        from services import logging_config
+
+        logging_config.shutdown_logging()
+        if logging_config._handler is not None:
+            logging.getLogger().removeHandler(logging_config._handler)
+            logging_config._handler = None
+        logging.getLogger().setLevel(self.saved_level)
+
+    def test_queued_json_output_with_truncation_and_extra_fields(self):
+        from services.logging_config import configure_logging, shutdown_logging
+
+        stream = io.StringIO()
+        configure_logging(level="INFO", log_format="json", use_queue=True, sample_rates={},
+                          max_chars=20, stream=stream)
+
+        class Payload:
+            def __init__(self):
+                self.renders = 0
+
+            def __str__(self):
+                self.renders += 1
+                return "x" * 100
+
+        logger = logging.getLogger("services.test_logging")
+        hidden = Payload()
+        logger.debug("hidden %s", hidden)
+        logger.info("payload %s", Payload(), extra={"project_id": "p1"})
+        shutdown_logging()
+
+        [line] = stream.getvalue().splitlines()
+        entry = json.loads(line)
+        self.assertEqual(entry["logger"], "services.test_logging")
+        self.assertEqual(entry["project_id"], "p1")
+        self.assertTrue(entry["message"].startswith("payload xxxxxxxxxxxx..."))
+        self.assertIn("[88 chars truncated]", entry["message"])
+        # Records below the level are never rendered
+        self.assertEqual(hidden.renders, 0)
+
+    def test_sampling_applies_per_logger_below_warning(self):
+        from services.logging_config import configure_logging, parse_sample_rates
+
+        self.assertEqual(parse_sample_rates("services.file_service=0.1, main=2, bad"),
+                         {"services.file_service": 0.1, "main": 1.0})
+
+        stream = io.StringIO()
+        configure_logging(level="INFO", use_queue=False, sample_rates={"services.file_service": 0.0},
+                          stream=stream)
+        logging.getLogger("services.file_service").info("dropped")
+        logging.getLogger("services.file_service").warning("kept warning")
+        logging.getLogger("services.file_service_extra").info("other logger kept")
+
+        output = stream.getvalue()
+        self.assertNotIn("dropped", output)
+        self.assertIn("kept warning", output)
+        self.assertIn("other logger kept", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
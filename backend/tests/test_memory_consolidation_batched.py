@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+class ScriptedGemini:
+    """Returns a canned JSON plan per category and tracks concurrency."""
+
+    def __init__(self, plans, delay=0.02):
+        self.plans = plans
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def chat_with_system_prompt(self, message, system_prompt):
+        self.calls.append((message, system_prompt))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        for category, plan in self.plans.items():
+            if f'"{category}" category' in system_prompt:
+                return plan if isinstance(plan, str) else json.dumps(plan)
+        return "{}"
+
+
+class TestBatchedMemoryConsolidation(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        from services.file_service import FileService
+        from services.intelligent_memory_consolidation import IntelligentMemoryConsolidationService
+        from models import Memory
+
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        self.service = IntelligentMemoryConsolidationService()
+        self.service.file_service = self.fs
+
+        self.backend_memory = Memory(
+            project_id="p1", title="API framework", content="Backend uses FastAPI with async endpoints",
+            category="backend", type="decision"
+        )
+        self.fs.save_memories("p1", [self.backend_memory])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _insight(self, content, category, significance=0.9):
+        from services.intelligent_memory_consolidation import ConversationInsight
+        return ConversationInsight(
+            content=content, category=category, is_new_category=False, new_category_suggestion=None,
+            significance_score=significance, insight_type="decision", related_keywords=[]
+        )
+
+    async def test_one_call_per_category_and_single_write(self):
+        gemini = ScriptedGemini({
+            "backend": {
+                "updates": [{"memory_id": self.backend_memory.id, "insights": [0, 1],
+                             "title": "API framework", "content": "FastAPI with async endpoints and Redis caching"}],
+                "creates": [], "skipped": []
+            },
+            "frontend": {
+                "updates": [],
+                "creates": [{"insights": [0], "title": "UI library", "content": "React with Tailwind", "type": "decision"},
+                            {"insights": [1], "title": "Minor", "content": "Low value note", "type": "note"}],
+                "skipped": []
+            },
+        })
+        self.service.gemini_service = gemini
+        insights = [
+            self._insight("Added Redis caching to the FastAPI backend", "backend"),
+            self._insight("Backend endpoints stay async", "backend"),
+            self._insight("Frontend uses React with Tailwind", "frontend"),
+            self._insight("Some minor frontend remark", "frontend", significance=0.7),
+        ]
+
+        with mock.patch.object(self.fs, 'save_memories', wraps=self.fs.save_memories) as save_spy:
+            results = await self.service._process_multi_category_insights(insights, "p1")
+
+        self.assertEqual(len(gemini.calls), 2)
+        self.assertEqual(gemini.peak, 2)
+        self.assertEqual(save_spy.call_count, 1)
+
+        by_category = {r.category: r for r in results}
+        self.assertEqual(by_category["backend"].memories_updated, 1)
+        self.assertEqual(by_category["frontend"].memories_created, 1)
+
+        stored = {m.title: m for m in self.fs.load_memories("p1")}
+        self.assertIn("Redis caching", stored["API framework"].content)
+        self.assertEqual(stored["UI library"].category, "frontend")
+        # Creates backed only by low-significance insights are dropped
+        self.assertNotIn("Minor", stored)
+
+    async def test_unparseable_category_falls_back_to_per_insight_path(self):
+        gemini = ScriptedGemini({"backend": "not json at all"})
+        self.service.gemini_service = gemini
+        insights = [self._insight("Use PostgreSQL", "backend")]
+
+        with mock.patch.object(self.service, '_process_category_insights') as legacy:
+            from services.intelligent_memory_consolidation import CategoryProcessingResult
+            legacy.return_value = CategoryProcessingResult(
+                category="backend", memories_updated=0, memories_created=1, insights_processed=1
+            )
+            results = await self.service._process_multi_category_insights(insights, "p1")
+
+        legacy.assert_awaited_once()
+        self.assertEqual(results[0].memories_created, 1)
+
+    async def test_legacy_mode_is_still_available(self):
+        import services.intelligent_memory_consolidation as imc
+
+        with mock.patch.object(imc, 'CONSOLIDATION_MODE', 'legacy'), \
+             mock.patch.object(self.service, '_process_category_insights') as legacy:
+            legacy.return_value = imc.CategoryProcessingResult(
+                category="backend", memories_updated=0, memories_created=0, insights_processed=1
+            )
+            await self.service._process_multi_category_insights([self._insight("x", "backend")], "p1")
+
+        legacy.assert_awaited_once()
+
+
+class FakeEmbeddings:
+    """Maps known phrases to fixed vectors and counts batch calls."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.batch_calls = 0
+
+    def is_model_loaded(self):
+        return True
+
+    def prepare_text_for_embedding(self, text, max_length=512):
+        return text
+
+    def generate_embeddings_batch(self, texts):
+        self.batch_calls += 1
+        return [next((v for k, v in self.vectors.items() if k in t), [0.6, -0.6, 0.5]) for t in texts]
+
+    def cosine_similarity_matrix(self, queries, candidates):
+        from services.embedding_service import embedding_service
+        return embedding_service.cosine_similarity_matrix(queries, candidates)
+
+
+class TestEmbeddingMemoryMatching(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def _memory(self, title, embedding=None):
+        from models import Memory
+        return Memory(project_id="p1", title=title, content=title, category="backend",
+                      type="note", embedding=embedding)
+
+    def test_cosine_similarity_matrix(self):
+        from services.embedding_service import embedding_service
+
+        matrix = embedding_service.cosine_similarity_matrix(
+            [[1.0, 0.0], [0.0, 2.0]], [[2.0, 0.0], [1.0, 1.0], [0.0, 0.0]]
+        )
+        self.assertEqual(matrix.shape, (2, 3))
+        self.assertAlmostEqual(float(matrix[0, 0]), 1.0, places=5)
+        self.assertAlmostEqual(float(matrix[1, 1]), 0.7071, places=3)
+        self.assertEqual(float(matrix[0, 2]), 0.0)
+
+    def test_matches_use_stored_embeddings_in_one_batch(self):
+        import services.intelligent_memory_consolidation as imc
+        from services.intelligent_memory_consolidation import ConversationInsight
+
+        fake = FakeEmbeddings({"cache": [1.0, 0.1, 0.0], "Styling": [0.0, 1.0, 0.0]})
+        memories = [
+            self._memory("Database", embedding=[0.0, 0.0, 1.0]),
+            self._memory("Caching layer", embedding=[1.0, 0.0, 0.0]),
+            self._memory("Styling"),  # no stored embedding yet
+        ]
+        insights = [
+            ConversationInsight(content=c, category="backend", is_new_category=False,
+                                new_category_suggestion=None, significance_score=0.9,
+                                insight_type="decision", related_keywords=[])
+            for c in ("Use a Redis cache", "Unrelated remark")
+        ]
+
+        service = imc.IntelligentMemoryConsolidationService()
+        with mock.patch.object(imc, 'embedding_service', fake):
+            match = service._score_memory_matches(insights, memories)
+            best = asyncio.run(service._find_best_matching_memory(0, match, memories))
+            none = asyncio.run(service._find_best_matching_memory(1, match, memories))
+
+        self.assertEqual(match.method, "embedding")
+        self.assertEqual(fake.batch_calls, 1)
+        self.assertEqual(match.scores.shape, (2, 3))
+        self.assertEqual(best.title, "Caching layer")
+        # Nearest memory for the unrelated insight stays below the merge threshold
+        self.assertIsNone(none)
+        self.assertEqual(memories[2].embedding, [0.0, 1.0, 0.0])
+
+    def test_keyword_fallback_without_model(self):
+        import services.intelligent_memory_consolidation as imc
+        from services.intelligent_memory_consolidation import ConversationInsight
+
+        class NoModel:
+            def is_model_loaded(self):
+                return False
+
+        service = imc.IntelligentMemoryConsolidationService()
+        memories = [self._memory("Backend uses FastAPI")]
+        insight = ConversationInsight(content="Backend uses FastAPI", category="backend",
+                                      is_new_category=False, new_category_suggestion=None,
+                                      significance_score=0.9, insight_type="decision", related_keywords=[])
+        with mock.patch.object(imc, 'embedding_service', NoModel()):
+            match = service._score_memory_matches([insight], memories)
+
+        self.assertEqual(match.method, "keyword")
+        self.assertEqual(match.merge_threshold, imc.MEMORY_MERGE_THRESHOLD)
+        self.assertAlmostEqual(float(match.scores[0, 0]), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
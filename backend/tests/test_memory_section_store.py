@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+
+class TestMemorySectionStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        from services.file_service import FileService
+        from services.consolidated_memory import ConsolidatedMemoryService
+        from models import Project
+
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        self.project = Project(name="Demo", description="d", tech_stack="FastAPI")
+        self.fs.save_project(self.project)
+        self.service = ConsolidatedMemoryService()
+        self.service.file_service = self.fs
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_sections_are_stored_per_project_without_sidecars(self):
+        pid = self.project.id
+        self.service.add_information_to_consolidated_memory("backend", pid, "Use FastAPI routers", "Routing")
+        self.service.add_information_to_consolidated_memory("backend", pid, "Postgres for storage", "Storage")
+
+        self.assertEqual(list(self.fs.data_dir.glob("memory-*-sections.json")), [])
+        stored = self.fs.load_memory_sections(pid, f"{pid}_backend_consolidated")
+        self.assertEqual({s["title"] for s in stored["sections"].values()}, {"Routing", "Storage"})
+
+        reloaded = self.service.get_or_create_consolidated_memory("backend", pid)
+        self.assertEqual(len(reloaded.sections), 2)
+
+    def test_deleting_memory_removes_its_sections(self):
+        pid = self.project.id
+        self.service.add_information_to_consolidated_memory("backend", pid, "Use FastAPI routers", "Routing")
+        memory_id = f"{pid}_backend_consolidated"
+
+        self.assertTrue(self.fs.delete_memory(pid, memory_id))
+        self.assertIsNone(self.fs.load_memory_sections(pid, memory_id))
+
+    def test_legacy_sidecars_are_migrated(self):
+        pid = self.project.id
+        memory_id = f"{pid}_frontend_consolidated"
+        sidecar = self.fs.data_dir / f"memory-{memory_id}-sections.json"
+        with open(sidecar, 'w') as f:
+            json.dump({
+                "memory_id": memory_id,
+                "sections": {"section_1": {"title": "Styling", "content": "Tailwind",
+                                           "created_at": "2024-01-01 00:00", "updated_at": "2024-01-01 00:00"}},
+                "metadata": {"version": 2}
+            }, f)
+
+        self.assertEqual(self.fs.migrate_memory_section_sidecars(), 1)
+        self.assertFalse(sidecar.exists())
+        stored = self.fs.load_memory_sections(pid, memory_id)
+        self.assertEqual(stored["sections"]["section_1"]["content"], "Tailwind")
+        self.assertEqual(stored["metadata"]["version"], 2)
+        # Nothing left to migrate on the next start
+        self.assertEqual(self.fs.migrate_memory_section_sidecars(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
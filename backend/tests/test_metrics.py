@@ -0,0 +1,105 @@
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestMetricsRegistry(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    async def test_spans_nest_across_tasks_and_threads(self):
+        from services.metrics import MetricsRegistry
+
+        registry = MetricsRegistry(enabled=True)
+
+        def blocking_read():
+            with registry.span("file.read"):
+                registry.inc("samurai_file_read_bytes_total", 100, file="memories")
+
+        async def stage():
+            with registry.span("agent.context"):
+                await asyncio.to_thread(blocking_read)
+                registry.inc("samurai_llm_calls_total", operation="chat")
+
+        with registry.trace("chat_stream") as root:
+            await asyncio.create_task(stage())
+            registry.inc("samurai_llm_calls_total", operation="chat")
+
+        tree = root.to_dict()
+        self.assertEqual(tree["children"][0]["name"], "agent.context")
+        self.assertEqual(tree["children"][0]["children"][0]["name"], "file.read")
+        self.assertEqual(tree["totals"]["samurai_llm_calls_total"], 2)
+        self.assertIsNone(registry.current_span())
+
+        text = registry.render_prometheus()
+        self.assertIn('samurai_llm_calls_total{operation="chat"} 2', text)
+        self.assertIn('samurai_stage_duration_seconds_count{stage="agent.context"} 1', text)
+        self.assertIn('samurai_request_llm_calls_bucket{endpoint="chat_stream",le="2"} 1', text)
+        self.assertIn('samurai_request_llm_calls_bucket{endpoint="chat_stream",le="1"} 0', text)
+
+    def test_disabled_registry_records_nothing(self):
+        from services.metrics import MetricsRegistry
+
+        registry = MetricsRegistry(enabled=False)
+        with registry.trace("chat") as root, registry.span("agent.intent") as span:
+            registry.inc("samurai_llm_calls_total")
+        self.assertIsNone(root)
+        self.assertIsNone(span)
+        self.assertEqual(registry.render_prometheus(), "\n")
+
+
+class TestAgentInstrumentation(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    async def test_process_message_span_tree_and_counters(self):
+        from services.file_service import FileService
+        from services.gemini_service import GeminiService
+        from services.task_service import TaskService
+        from services.unified_samurai_agent import UnifiedSamuraiAgent
+        from services.metrics import metrics
+
+        fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        with mock.patch.dict(os.environ, {"SAMURAI_LLM_SIMULATOR": "1", "SAMURAI_LLM_SIM_TTFT_MS": "0",
+                                          "SAMURAI_LLM_SIM_TOKENS_PER_SEC": "0"}):
+            gemini = GeminiService()
+        agent = UnifiedSamuraiAgent(gemini_service=gemini, file_service=fs,
+                                    task_service=TaskService(file_service=fs))
+
+        with metrics.trace("chat") as root:
+            await agent.process_message(
+                "Please create tasks for the checkout page", "metrics-project",
+                {"name": "Shop", "description": "Store", "tech_stack": "FastAPI"}, session_id="s1"
+            )
+
+        tree = root.to_dict()
+        process = tree["children"][0]
+        self.assertEqual(process["name"], "agent.process_message")
+        stages = [child["name"] for child in process["children"]]
+        self.assertEqual(stages[:3], ["agent.context", "agent.intent", "agent.response"])
+        self.assertEqual(process["children"][2]["attributes"], {"intent": "ready_for_action"})
+
+        self.assertEqual(tree["totals"]["samurai_llm_calls_total"], gemini.model.calls)
+        self.assertGreater(tree["totals"]["samurai_llm_prompt_chars_total"], 0)
+        self.assertGreater(tree["totals"]["samurai_file_write_bytes_total"], 0)
+        self.assertIn("samurai_tool_calls_total", metrics.render_prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
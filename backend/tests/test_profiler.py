@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import shutil
+import asyncio
+import threading
+import tempfile
+import unittest
+from unittest import mock
+
+
+def busy_work(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+class TestRequestProfiler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_sampler_records_worker_thread_stacks_and_store_rotates(self):
+        from services.profiler import ProfileStore, SamplingProfiler
+
+        store = ProfileStore(profiles_dir=self.temp_dir, max_profiles=2)
+        saved = []
+        for _ in range(3):
+            profiler = SamplingProfiler(interval_ms=1)
+            profiler.start()
+            thread = threading.Thread(target=busy_work, args=(0.05,), name="worker")
+            thread.start()
+            thread.join()
+            profiler.stop()
+            saved.append(store.save(profiler, {"path": "/test"}))
+
+        self.assertGreater(saved[-1]["samples"], 5)
+        folded = store.get_profile_path(saved[-1]["id"]).read_text()
+        line = next(l for l in folded.splitlines() if "busy_work" in l)
+        stack, count = line.rsplit(" ", 1)
+        self.assertTrue(stack.startswith("worker;"))
+        self.assertGreater(int(count), 0)
+
+        self.assertEqual([p["id"] for p in store.list_profiles()], [saved[2]["id"], saved[1]["id"]])
+        self.assertIsNone(store.get_profile_path(saved[0]["id"]))
+        self.assertIsNone(store.get_profile_path("../" + saved[2]["id"]))
+
+    def test_should_profile(self):
+        from services.profiler import should_profile
+
+        self.assertTrue(should_profile("1", sample_rate=0))
+        self.assertFalse(should_profile("0", sample_rate=1))
+        self.assertFalse(should_profile(None, sample_rate=0))
+        self.assertTrue(should_profile(None, sample_rate=1))
+
+    def test_middleware_profiles_streaming_body_until_it_ends(self):
+        from fastapi import FastAPI
+        from fastapi.responses import StreamingResponse
+        from fastapi.testclient import TestClient
+        from services.profiler import PROFILE_HEADER, PROFILE_ID_HEADER, ProfileStore
+        import main as main_module
+
+        app = FastAPI()
+
+        @app.get("/stream")
+        async def stream():
+            async def events():
+                yield "data: start\n\n"
+                await asyncio.to_thread(busy_work, 0.05)
+                yield "data: complete\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        app.middleware("http")(main_module.profile_requests)
+        store = ProfileStore(profiles_dir=self.temp_dir)
+        with mock.patch.object(main_module, "profile_store", store), TestClient(app) as client:
+            plain = client.get("/stream")
+            profiled = client.get("/stream", headers={PROFILE_HEADER: "1"})
+
+        self.assertNotIn(PROFILE_ID_HEADER, plain.headers)
+        self.assertIn("data: complete", profiled.text)
+        [metadata] = store.list_profiles()
+        self.assertEqual(metadata["id"], profiled.headers[PROFILE_ID_HEADER])
+        self.assertEqual(metadata["path"], "/stream")
+        self.assertGreaterEqual(metadata["wall_ms"], 50)
+        self.assertIn("busy_work", store.get_profile_path(metadata["id"]).read_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
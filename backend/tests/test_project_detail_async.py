@@ -5,6 +5,7 @@ import shutil
 import unittest
 from unittest import mock
 import asyncio
+import json
 
 
 class TestAsyncProjectDetailDigest(unittest.IsolatedAsyncioTestCase):
@@ -69,12 +70,13 @@ class TestAsyncProjectDetailDigest(unittest.IsolatedAsyncioTestCase):
         with mock.patch.object(self.main.project_detail_service, 'ingest_project_detail') as mock_ingest:
             mock_ingest.side_effect = Exception("Test error")
             
-            # Test that the function doesn't raise the exception (it should be logged)
-            await self.main._perform_async_project_detail_digest(
-                project_id="test-project-123",
-                raw_text="Test raw text content",
-                mode="merge"
-            )
+            # The error is logged and re-raised so the job queue can retry
+            with self.assertRaises(Exception):
+                await self.main._perform_async_project_detail_digest(
+                    project_id="test-project-123",
+                    raw_text="Test raw text content",
+                    mode="merge"
+                )
             
             # Verify the service was called
             mock_ingest.assert_called_once()
@@ -145,8 +147,9 @@ class TestIngestProjectDetailEndpoint(unittest.IsolatedAsyncioTestCase):
 
     async def test_ingest_project_detail_endpoint_success(self):
         """Test successful project detail ingest endpoint call."""
-        # Patch asyncio.create_task to ensure background scheduling happens
-        with mock.patch('asyncio.create_task') as mock_create_task:
+        # Patch the job queue to ensure the digest is queued as a background job
+        with mock.patch.object(self.main, 'job_queue') as mock_queue:
+            mock_queue.enqueue.return_value = mock.Mock(id="job-123")
             # Create a fake request
             class FakeRequest:
                 def __init__(self, raw_text, mode="merge"):
@@ -160,10 +163,14 @@ class TestIngestProjectDetailEndpoint(unittest.IsolatedAsyncioTestCase):
             
             # Verify response
             self.assertEqual(response.status_code, 202)
-            self.assertEqual(response.body.decode(), '{"message":"Project detail digest initiated asynchronously."}')
+            self.assertEqual(
+                json.loads(response.body.decode()),
+                {"message": "Project detail digest initiated asynchronously.", "job_id": "job-123"}
+            )
             
-            # Verify asyncio.create_task was called
-            self.assertTrue(mock_create_task.called, "Background task was not scheduled")
+            # Verify the digest job was queued
+            self.assertTrue(mock_queue.enqueue.called, "Background job was not queued")
+            self.assertEqual(mock_queue.enqueue.call_args.args[0], self.main.PROJECT_DETAIL_DIGEST_JOB)
     
     async def test_ingest_project_detail_endpoint_project_not_found(self):
         """Test project detail ingest endpoint with non-existent project."""
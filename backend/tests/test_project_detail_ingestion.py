@@ -0,0 +1,208 @@
+import os
+import sys
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+class FakeGemini:
+    """Records prompts and returns short deterministic summaries after a small delay."""
+
+    def __init__(self, delay=0.02, summary_chars=200):
+        self.delay = delay
+        self.summary_chars = summary_chars
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def chat_with_system_prompt(self, message, system_prompt):
+        self.calls.append((message, system_prompt))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return f"summary {len(self.calls)}: " + ("x" * self.summary_chars)
+
+
+class TestProjectDetailIngestion(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        from services.file_service import FileService
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _document(self, sections=12, paragraph_chars=900):
+        parts = []
+        for i in range(sections):
+            parts.append(f"# Section {i}")
+            for j in range(3):
+                parts.append(f"Paragraph {i}.{j} " + ("word " * (paragraph_chars // 5)))
+        return "\n\n".join(parts)
+
+    def test_chunks_break_on_boundaries_within_limit(self):
+        from services.project_detail_service import split_into_chunks
+
+        text = self._document()
+        chunks = split_into_chunks(text, max_chars=4000)
+
+        self.assertTrue(all(len(c) <= 4000 for c in chunks))
+        # No paragraph is cut in half
+        for chunk in chunks:
+            for block in chunk.split("\n\n"):
+                self.assertTrue(block.startswith("# Section") or block.startswith("Paragraph"))
+        self.assertEqual("".join(c.replace("\n", "") for c in chunks).count("Paragraph"), 36)
+
+    def test_oversized_paragraph_is_hard_split(self):
+        from services.project_detail_service import split_into_chunks
+
+        chunks = split_into_chunks("a" * 10000, max_chars=4000)
+        self.assertEqual([len(c) for c in chunks], [4000, 4000, 2000])
+
+    async def test_summaries_run_in_parallel_and_are_cached(self):
+        from services.project_detail_service import ProjectDetailService, SUMMARY_CONCURRENCY
+
+        gemini = FakeGemini()
+        service = ProjectDetailService(gemini_service=gemini, file_service=self.fs)
+        text = self._document(sections=20)
+
+        await service.ingest_project_detail("p1", text, mode="replace")
+        first_calls = len(gemini.calls)
+        self.assertGreater(first_calls, 2)
+        self.assertLessEqual(gemini.peak, SUMMARY_CONCURRENCY)
+        self.assertGreater(gemini.peak, 1)
+
+        # Re-ingesting unchanged text only pays for the final synthesis call
+        gemini.calls.clear()
+        await service.ingest_project_detail("p1", text, mode="replace")
+        self.assertEqual(len(gemini.calls), 1)
+
+    async def test_large_summaries_are_reduced_hierarchically(self):
+        import services.project_detail_service as pds
+
+        gemini = FakeGemini(summary_chars=3000)
+        service = pds.ProjectDetailService(gemini_service=gemini, file_service=self.fs)
+
+        with mock.patch.object(pds, 'REDUCE_BUDGET_CHARS', 7000):
+            await service.ingest_project_detail("p1", self._document(sections=20), mode="replace")
+
+        reduce_calls = [c for c in gemini.calls if c[1] == pds.REDUCE_SYSTEM_PROMPT]
+        self.assertGreater(len(reduce_calls), 0)
+        final_input = gemini.calls[-1][1]
+        self.assertLess(len(final_input) - len(pds.REPLACE_SYSTEM_PROMPT), 7000 + 100)
+
+
+class SectionAwareGemini(FakeGemini):
+    """Returns structured summaries for chunks and echoes updated sections for section merges."""
+
+    async def chat_with_system_prompt(self, message, system_prompt):
+        import services.project_detail_service as pds
+        self.calls.append((message, system_prompt))
+        if system_prompt == pds.CHUNK_SYSTEM_PROMPT:
+            return "## Tech Stack\n- Redis cache added\n\n## Data Models\n- Not specified"
+        if system_prompt.startswith(pds.SECTION_MERGE_SYSTEM_PROMPT):
+            return "## Tech Stack\n- FastAPI\n- Redis cache added"
+        return "full merge"
+
+
+class TestIncrementalProjectDetailMerge(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        from services.file_service import FileService
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        self.spec = (
+            "Project Detail Specification\n\n"
+            "## Project Overview\n- Task manager\n\n"
+            "## Tech Stack\n- FastAPI\n\n"
+            "## Workflows\n- " + ("Long workflow description. " * 200)
+        )
+        self.fs.save_project_detail("p1", self.spec)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _messages(self, count, start=0):
+        from models import ChatMessage
+        from datetime import datetime, timedelta
+        base = datetime(2024, 1, 1)
+        return [
+            ChatMessage(project_id="p1", session_id="s1", message=f"msg {i}", response="ok",
+                        created_at=base + timedelta(minutes=i))
+            for i in range(start, start + count)
+        ]
+
+    async def test_merge_sends_only_affected_sections(self):
+        from services.project_detail_service import ProjectDetailService, SECTION_MERGE_SYSTEM_PROMPT
+
+        gemini = SectionAwareGemini()
+        service = ProjectDetailService(gemini_service=gemini, file_service=self.fs)
+        result = await service.ingest_project_detail("p1", "We added Redis.", mode="merge")
+
+        merge_prompt = gemini.calls[-1][1]
+        self.assertTrue(merge_prompt.startswith(SECTION_MERGE_SYSTEM_PROMPT))
+        self.assertIn("## Tech Stack", merge_prompt)
+        self.assertNotIn("Long workflow description", merge_prompt)
+        self.assertIn("- Redis cache added", result)
+        # Untouched sections are preserved verbatim
+        self.assertIn("## Workflows\n- Long workflow description.", result)
+        self.assertTrue(result.startswith("Project Detail Specification"))
+
+    async def test_session_digest_respects_watermark(self):
+        from services.project_detail_service import ProjectDetailService, CHUNK_SYSTEM_PROMPT
+
+        gemini = SectionAwareGemini()
+        service = ProjectDetailService(gemini_service=gemini, file_service=self.fs)
+        messages = self._messages(3)
+
+        await service.ingest_session_messages("p1", "s1", messages)
+        first_chunk_input = [c[0] for c in gemini.calls if c[1] == CHUNK_SYSTEM_PROMPT]
+        self.assertIn("msg 0", first_chunk_input[0])
+        self.assertEqual(self.fs.load_project_detail_state("p1")["last_message_id"], messages[-1].id)
+
+        # Closing again with no new messages makes no LLM calls
+        gemini.calls.clear()
+        await service.ingest_session_messages("p1", "s1", messages)
+        self.assertEqual(gemini.calls, [])
+
+        # Only messages after the watermark are summarized
+        await service.ingest_session_messages("p1", "s1", messages + self._messages(2, start=3))
+        chunk_inputs = [c[0] for c in gemini.calls if c[1] == CHUNK_SYSTEM_PROMPT]
+        self.assertEqual(len(chunk_inputs), 1)
+        self.assertNotIn("msg 2", chunk_inputs[0])
+        self.assertIn("msg 3", chunk_inputs[0])
+
+
+    async def test_failed_merge_keeps_spec_and_watermark(self):
+        from services.project_detail_service import ProjectDetailService
+
+        class FailingGemini(SectionAwareGemini):
+            async def chat_with_system_prompt(self, message, system_prompt):
+                await super().chat_with_system_prompt(message, system_prompt)
+                return "I'm having trouble processing your request right now."
+
+        self.fs.save_project_detail("p1", "## Overview\nExisting spec")
+        service = ProjectDetailService(gemini_service=FailingGemini(), file_service=self.fs)
+        with self.assertRaises(RuntimeError):
+            await service.ingest_session_messages("p1", "s1", self._messages(3))
+
+        self.assertEqual(self.fs.load_project_detail("p1"), "## Overview\nExisting spec")
+        self.assertNotIn("last_message_id", self.fs.load_project_detail_state("p1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
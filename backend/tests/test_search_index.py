@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestInvertedIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def _index(self, records):
+        from services.search_index import InvertedIndex, COLLECTIONS
+        index = InvertedIndex(*COLLECTIONS["tasks"])
+        index.sync(records)
+        return index
+
+    def _records(self):
+        return [
+            {"id": "1", "title": "Login page", "description": "Build the authentication form", "order": 0},
+            {"id": "2", "title": "Database schema", "description": "Design tables for login audit", "order": 1},
+            {"id": "3", "title": "Deploy", "description": "Ship to production", "order": 2},
+        ]
+
+    def test_bm25_ranks_title_matches_first(self):
+        index = self._index(self._records())
+        ids = [doc["id"] for doc, _ in index.search("login")]
+        self.assertEqual(ids, ["1", "2"])
+
+    def test_prefix_and_typo_matching(self):
+        index = self._index(self._records())
+        self.assertEqual([d["id"] for d, _ in index.search("authent")], ["1"])
+        self.assertEqual([d["id"] for d, _ in index.search("databse")], ["2"])
+        self.assertEqual([d["id"] for d, _ in index.search("prodcution")], ["3"])
+        self.assertEqual(index.search("zzzz"), [])
+
+    def test_resolve_by_id_and_exact_title(self):
+        index = self._index(self._records())
+        self.assertEqual(index.resolve("3")["title"], "Deploy")
+        self.assertEqual(index.resolve("LOGIN PAGE")["id"], "1")
+        self.assertIsNone(index.resolve("Login"))
+
+    def test_incremental_sync_updates_and_removes(self):
+        records = self._records()
+        index = self._index(records)
+
+        records[2] = dict(records[2], title="Release", description="Tag a release")
+        index.sync(records[1:])
+
+        self.assertIsNone(index.resolve("Login page"))
+        self.assertIsNone(index.resolve("Deploy"))
+        self.assertEqual(index.resolve("release")["id"], "3")
+        self.assertEqual([d["id"] for d, _ in index.search("login")], ["2"])
+        self.assertNotIn("production", index._postings)
+
+
+class TestSearchTools(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        from services.file_service import FileService
+
+        tdir = self.temp_dir
+
+        class TempFileService(FileService):
+            def __init__(self):
+                super().__init__(data_dir=tdir, backup_dir=os.path.join(tdir, 'backups'))
+
+        from services.container import ServiceContainer
+
+        self.TempFileService = TempFileService
+        fs = TempFileService()
+        # Tools used outside a registry fall back to the container's FileService
+        self.fs_patch = mock.patch.object(ServiceContainer, 'file_service', new_callable=mock.PropertyMock,
+                                          return_value=fs)
+        self.fs_patch.start()
+        self.project_id = "search-project"
+
+        from models import Task, Memory
+        fs.save_tasks(self.project_id, [
+            Task(project_id=self.project_id, title="Login page", description="Authentication form", order=0),
+            Task(project_id=self.project_id, title="Payments", description="Stripe checkout", order=1),
+        ])
+        fs.save_memories(self.project_id, [
+            Memory(project_id=self.project_id, title="Auth decision", content="Use JWT tokens",
+                   category="security", type="decision"),
+        ])
+
+    def tearDown(self):
+        self.fs_patch.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_search_tools_rank_and_filter(self):
+        from services.agent_tools import SearchTasksTool, SearchMemoriesTool
+
+        result = SearchTasksTool().execute(query="checkot", project_id=self.project_id)
+        self.assertEqual([t["title"] for t in result["tasks"]], ["Payments"])
+
+        result = SearchTasksTool().execute(query="", project_id=self.project_id, status_filter="pending")
+        self.assertEqual(result["count"], 2)
+
+        result = SearchMemoriesTool().execute(query="jwt", project_id=self.project_id, category_filter="security")
+        self.assertEqual(result["memories"][0]["title"], "Auth decision")
+
+    def test_index_follows_saves_and_external_writes(self):
+        from services.agent_tools import SearchTasksTool, DeleteTaskTool, ChangeTaskStatusTool
+
+        self.assertEqual(SearchTasksTool().execute(query="login", project_id=self.project_id)["count"], 1)
+
+        deleted = DeleteTaskTool().execute(task_identifier="login page", project_id=self.project_id)
+        self.assertTrue(deleted["success"])
+        self.assertEqual(SearchTasksTool().execute(query="login", project_id=self.project_id)["count"], 0)
+
+        # A write that bypasses FileService is picked up through the file signature
+        path = self.TempFileService()._get_project_file_path(self.project_id, "tasks")
+        with open(path) as f:
+            records = json.load(f)
+        records[0]["title"] = "Refunds and payments"
+        with open(path, "w") as f:
+            json.dump(records, f)
+
+        changed = ChangeTaskStatusTool().execute(
+            task_identifier="Refunds and payments", new_status="completed", project_id=self.project_id
+        )
+        self.assertTrue(changed["success"])
+
+    def test_delete_task_tool_removes_subtasks(self):
+        import threading
+        from models import Task
+        from services.agent_tools import DeleteTaskTool
+
+        fs = self.TempFileService()
+        parent = fs.get_task_by_id(self.project_id, fs.load_tasks(self.project_id)[0].id)
+        child = Task(project_id=self.project_id, title="Login form", description="", parent_task_id=parent.id, depth=2)
+        grandchild = Task(project_id=self.project_id, title="Form tests", description="",
+                          parent_task_id=child.id, depth=3)
+        fs.add_tasks(self.project_id, [child, grandchild])
+
+        result = {}
+        worker = threading.Thread(daemon=True, target=lambda: result.update(
+            DeleteTaskTool().execute(task_identifier=parent.title, project_id=self.project_id)))
+        worker.start()
+        worker.join(10)
+        self.assertFalse(worker.is_alive(), "deleting a task with subtasks did not finish")
+        self.assertTrue(result["success"])
+        self.assertEqual([t.title for t in fs.load_tasks(self.project_id)], ["Payments"])
+
+    def test_tools_load_only_the_resolved_task(self):
+        import asyncio
+        from services.agent_tools import ChangeTaskStatusTool, DeleteTaskTool, UpdateTaskTool
+
+        failing_service = mock.Mock()
+        failing_service.get_task = mock.AsyncMock(side_effect=RuntimeError("unavailable"))
+        from services.file_service import FileService
+
+        with mock.patch.object(self.TempFileService, "load_tasks", autospec=True,
+                               side_effect=FileService.load_tasks) as load_tasks:
+            changed = ChangeTaskStatusTool().execute(
+                task_identifier="Payments", new_status="blocked", project_id=self.project_id
+            )
+            # UpdateTaskTool's FileService fallback
+            updated = asyncio.run(UpdateTaskTool().bind_services(task_service=failing_service).execute(
+                task_identifier="payments", project_id=self.project_id, priority="high"
+            ))
+            deleted = DeleteTaskTool().execute(task_identifier="Login page", project_id=self.project_id)
+        self.assertTrue(changed["success"] and updated["success"] and deleted["success"])
+        # Only the saves themselves read the whole collection
+        self.assertEqual(load_tasks.call_count, 3)
+
+        [task] = self.TempFileService().load_tasks(self.project_id)
+        self.assertEqual((task.title, task.status, task.priority), ("Payments", "blocked", "high"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestServiceContainer(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        from services.container import ServiceContainer
+        from services.file_service import FileService
+
+        self.fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+        self.container = ServiceContainer()
+        self.container.override("file_service", self.fs)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_services_are_built_once_and_share_dependencies(self):
+        task_service = self.container.task_service
+
+        self.assertIs(self.container.task_service, task_service)
+        self.assertIs(task_service.file_service, self.fs)
+        self.assertIs(task_service.analysis_agent.gemini_service, self.container.gemini_service)
+        self.assertIs(self.container.memory_consolidation_service.file_service, self.fs)
+
+    async def test_tools_use_injected_services_instead_of_constructing(self):
+        from services.agent_tools import AgentToolRegistry
+
+        registry = AgentToolRegistry(file_service=self.fs, task_service=self.container.task_service)
+        with mock.patch('services.task_service.TaskService.__init__', side_effect=AssertionError("constructed")), \
+                mock.patch('services.agent_tools.FileService', side_effect=AssertionError("constructed")):
+            created = await registry.execute_tool(
+                "create_task", title="Wire container", description="", project_id="p1"
+            )
+            found = await registry.execute_tool("search_tasks", query="container", project_id="p1")
+
+        self.assertTrue(created["success"])
+        self.assertEqual(found["count"], 1)
+        self.assertEqual(self.fs.load_tasks("p1")[0].title, "Wire container")
+
+    async def test_lifecycle_hooks_run_in_order_and_stop_in_reverse(self):
+        calls = []
+
+        async def start_queue():
+            calls.append("start queue")
+
+        def broken_start():
+            raise RuntimeError("boom")
+
+        self.container.add_lifecycle_hook("migration", start=lambda: calls.append("migrate"))
+        self.container.add_lifecycle_hook("queue", start=start_queue, stop=lambda: calls.append("stop queue"))
+        self.container.add_lifecycle_hook("broken", start=broken_start, stop=lambda: calls.append("stop broken"))
+        self.container.add_lifecycle_hook("cache", stop=lambda: calls.append("stop cache"))
+
+        await self.container.start()
+        await self.container.stop()
+
+        # A hook that failed to start is never stopped
+        self.assertEqual(calls, ["migrate", "start queue", "stop cache", "stop queue"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -53,9 +53,11 @@ class TestEndSessionImmediateResponse(unittest.IsolatedAsyncioTestCase):
         self.file_service_patch.stop()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
-    async def test_end_session_returns_immediately_and_schedules_task(self):
-        # Patch asyncio.create_task to ensure background scheduling happens
-        with mock.patch('asyncio.create_task') as mock_create_task:
+    async def test_end_session_returns_immediately_and_queues_jobs(self):
+        # Patch the job queue to ensure background jobs are queued instead of run inline
+        with mock.patch.object(self.main, 'job_queue') as mock_queue:
+            mock_queue.enqueue.side_effect = lambda kind, *args, **kwargs: mock.Mock(id=f"job-{kind}")
+
             # Minimal fake Request with json() method
             class FakeRequest:
                 def __init__(self, payload):
@@ -68,8 +70,12 @@ class TestEndSessionImmediateResponse(unittest.IsolatedAsyncioTestCase):
 
             self.assertEqual(body.get('status'), 'processing_started')
             self.assertIsInstance(body.get('new_session_id'), str)
-            # Ensure background task scheduled
-            self.assertTrue(mock_create_task.called, "Background task was not scheduled")
+            # Consolidation and project detail merge are queued as separate jobs on separate lanes
+            kinds = [c.args[0] for c in mock_queue.enqueue.call_args_list]
+            self.assertEqual(kinds, [self.main.SESSION_CONSOLIDATION_JOB, self.main.SESSION_PROJECT_DETAIL_JOB])
+            lanes = {c.kwargs['lane'] for c in mock_queue.enqueue.call_args_list}
+            self.assertEqual(len(lanes), 2)
+            self.assertEqual(len(body.get('job_ids')), 2)
 
 
 class TestBackgroundTaskBehavior(unittest.IsolatedAsyncioTestCase):
@@ -143,21 +149,27 @@ class TestBackgroundTaskBehavior(unittest.IsolatedAsyncioTestCase):
 
             async def fake_ingest(**kwargs):
                 return "ok"
-            mock_pds.ingest_project_detail.side_effect = lambda **kwargs: fake_ingest(**kwargs)
+            mock_pds.ingest_session_messages.side_effect = lambda **kwargs: fake_ingest(**kwargs)
 
-            await self.main._perform_session_end_background_tasks(self.project_id, self.session_id)
+            payload = {"project_id": self.project_id, "session_id": self.session_id}
+            await self.main._run_session_consolidation_job(payload)
+            await self.main._run_session_project_detail_merge_job(payload)
 
             self.assertTrue(mock_mc.consolidate_session_memories.called)
-            self.assertTrue(mock_pds.ingest_project_detail.called)
+            self.assertTrue(mock_pds.ingest_session_messages.called)
+            self.assertEqual(len(mock_pds.ingest_session_messages.call_args.kwargs['messages']), 2)
 
-    async def test_background_logs_on_error(self):
+    async def test_background_logs_and_reraises_on_error(self):
         with mock.patch.object(self.main, 'memory_consolidation_service') as mock_mc:
             async def raise_err(**kwargs):
                 raise RuntimeError('boom')
             mock_mc.consolidate_session_memories.side_effect = lambda **kwargs: raise_err(**kwargs)
 
+            payload = {"project_id": self.project_id, "session_id": self.session_id}
             with self.assertLogs(self.main.logger.name, level='ERROR') as cm:
-                await self.main._perform_session_end_background_tasks(self.project_id, self.session_id)
+                # Errors propagate so the job queue can retry the job
+                with self.assertRaises(RuntimeError):
+                    await self.main._run_session_consolidation_job(payload)
                 # Ensure at least one error line is logged
                 self.assertTrue(any('Error in background session end task' in r for r in cm.output))
 
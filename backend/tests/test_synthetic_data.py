@@ -0,0 +1,55 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+
+class TestSyntheticDataGenerator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        for path in (backend_dir, os.path.join(backend_dir, "benchmarks")):
+            if path not in sys.path:
+                sys.path.insert(0, path)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_dataset_is_readable_by_file_service(self):
+        from synthetic_data import DatasetSpec, generate_dataset
+        from services.file_service import FileService
+
+        spec = DatasetSpec(projects=2, memories=15, sessions=3, messages_per_session=4,
+                           root_tasks=2, task_depth=3, task_fanout=2, seed=1)
+        manifest = generate_dataset(self.temp_dir, spec)
+        fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'))
+
+        self.assertEqual([p.id for p in fs.load_projects()], manifest["project_ids"])
+        pid = manifest["project_ids"][0]
+        self.assertEqual(len(fs.load_memories(pid)), 15)
+        self.assertEqual(len(fs.load_sessions(pid)), 3)
+        session = fs.get_latest_session(pid)
+        self.assertEqual(len(fs.load_chat_messages_by_session(pid, session.id)), 4)
+
+        # 2 roots, each with 2 children and 4 grandchildren
+        tasks = fs.load_tasks(pid)
+        self.assertEqual(len(tasks), 14)
+        self.assertEqual(max(t.depth for t in tasks), 3)
+        by_id = {t.id: t for t in tasks}
+        self.assertTrue(all(by_id[t.parent_task_id].depth == t.depth - 1 for t in tasks if t.parent_task_id))
+
+    def test_generation_is_reproducible(self):
+        from synthetic_data import DatasetSpec, SyntheticDataGenerator
+
+        first = SyntheticDataGenerator(DatasetSpec(seed=7)).memories("p")
+        second = SyntheticDataGenerator(DatasetSpec(seed=7)).memories("p")
+        self.assertEqual([m.content for m in first], [m.content for m in second])
+        self.assertEqual(first[0].embedding, second[0].embedding)
+
+
+if __name__ == '__main__':
+    unittest.main()
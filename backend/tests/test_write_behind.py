@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import unittest
+
+
+class TestWriteBehind(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        self.services = []
+
+    def tearDown(self):
+        for fs in self.services:
+            fs.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def file_service(self, durability, **kwargs):
+        from services.file_service import FileService
+
+        fs = FileService(data_dir=self.temp_dir, backup_dir=os.path.join(self.temp_dir, 'backups'),
+                         durability=durability, **kwargs)
+        self.services.append(fs)
+        return fs
+
+    def memory(self, memory_id):
+        from models import Memory
+
+        return Memory(id=memory_id, project_id="p1", title=memory_id, content="c", type="note", embedding=[0.1])
+
+    def on_disk(self, file_type):
+        path = os.path.join(self.temp_dir, f"project-p1-{file_type}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return [record["id"] for record in json.load(f)]
+
+    def test_reads_see_unflushed_saves_and_flush_writes_them(self):
+        fs = self.file_service("on_shutdown")
+        for memory_id in ("a", "b", "c"):
+            fs.save_memory("p1", self.memory(memory_id))
+        fs.delete_memory("p1", "b")
+
+        self.assertIsNone(self.on_disk("memories"))
+        self.assertEqual([m.id for m in fs.load_memories("p1")], ["a", "c"])
+        self.assertEqual(fs.pending_writes(), 1)
+
+        self.assertEqual(fs.flush(), 1)
+        self.assertEqual(self.on_disk("memories"), ["a", "c"])
+        self.assertEqual(fs.pending_writes(), 0)
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir, 'backups')), [])
+
+    def test_versions_track_unflushed_saves(self):
+        from services.file_service import ConcurrentModificationError
+
+        fs = self.file_service("on_shutdown")
+        stale = fs.get_file_version("p1", "memories")
+        fs.save_memory("p1", self.memory("a"))
+        current = fs.get_file_version("p1", "memories")
+        self.assertNotEqual(stale, current)
+
+        with self.assertRaises(ConcurrentModificationError):
+            fs.save_memories("p1", [self.memory("x")], expected_version=stale)
+        fs.save_memories("p1", [self.memory("a"), self.memory("b")], expected_version=current)
+        self.assertEqual([m.id for m in fs.load_memories("p1")], ["a", "b"])
+
+    def test_interval_mode_flushes_once_enough_saves_are_dirty(self):
+        fs = self.file_service("interval", flush_interval=60, max_dirty=3)
+        fs.save_memory("p1", self.memory("a"))
+        fs.save_memory("p1", self.memory("b"))
+        time.sleep(0.1)
+        self.assertIsNone(self.on_disk("memories"))
+
+        fs.save_memory("p1", self.memory("c"))
+        deadline = time.time() + 5
+        while self.on_disk("memories") is None and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.on_disk("memories"), ["a", "b", "c"])
+
+    def test_close_flushes_and_later_saves_are_immediate(self):
+        fs = self.file_service("on_shutdown")
+        fs.save_memory("p1", self.memory("a"))
+        fs.close()
+        self.assertEqual(self.on_disk("memories"), ["a"])
+
+        fs.save_memory("p1", self.memory("b"))
+        self.assertEqual(self.on_disk("memories"), ["a", "b"])
+
+    def test_deleted_project_leaves_nothing_to_flush(self):
+        from models import Project
+
+        fs = self.file_service("on_shutdown")
+        fs.save_project(Project(id="p1", name="Shop", description="Store", tech_stack="FastAPI"))
+        fs.save_memory("p1", self.memory("a"))
+        self.assertTrue(fs.delete_project("p1"))
+        fs.flush()
+        self.assertIsNone(self.on_disk("memories"))
+        self.assertEqual(fs.load_memories("p1"), [])
+
+    def test_unknown_durability_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.file_service("sometimes")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import os
+import sys
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+
+class TestWriteLanes(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+
+    def setUp(self):
+        from services.metrics import MetricsRegistry
+        import services.write_lanes as write_lanes_module
+
+        self.registry = MetricsRegistry(enabled=True)
+        self.metrics_patch = mock.patch.object(write_lanes_module, "metrics", self.registry)
+        self.metrics_patch.start()
+        self.lanes = write_lanes_module.WriteLanes()
+
+    def tearDown(self):
+        self.metrics_patch.stop()
+
+    async def test_queued_batched_writes_are_coalesced_in_order(self):
+        release = threading.Event()
+        flushes = []
+
+        def flush(items):
+            if not flushes:
+                release.wait(5)
+            flushes.append(list(items))
+            return len(items)
+
+        first = asyncio.create_task(self.lanes.run_batched("p1", "chat", flush, 0))
+        await asyncio.sleep(0.05)
+        rest = [asyncio.create_task(self.lanes.run_batched("p1", "chat", flush, i)) for i in range(1, 6)]
+        await asyncio.sleep(0)
+        self.assertEqual(self.lanes.depth("p1"), 6)
+        self.assertEqual(self.registry.gauge_value("samurai_write_lane_depth", lane="p1"), 6)
+
+        release.set()
+        results = await asyncio.gather(first, *rest)
+        self.assertEqual(flushes, [[0], [1, 2, 3, 4, 5]])
+        self.assertEqual(results, [1, 5, 5, 5, 5, 5])
+        self.assertEqual(self.registry.counter_value("samurai_write_lane_ops_total", lane="p1"), 6)
+        self.assertEqual(self.registry.counter_value("samurai_write_lane_flushes_total", lane="p1"), 2)
+        self.assertEqual(self.lanes.depth("p1"), 0)
+        self.assertIn("samurai_write_lane_wait_seconds_count", self.registry.render_prometheus())
+
+    async def test_plain_write_of_same_kind_is_a_barrier(self):
+        release = threading.Event()
+        order = []
+
+        def blocker():
+            release.wait(5)
+            order.append("blocker")
+
+        def flush(items):
+            order.append(list(items))
+
+        tasks = [asyncio.create_task(self.lanes.run("p1", "sessions", blocker))]
+        await asyncio.sleep(0.05)
+        tasks += [
+            asyncio.create_task(self.lanes.run_batched("p1", "chat", flush, 1)),
+            asyncio.create_task(self.lanes.run("p1", "chat", order.append, "plain")),
+            asyncio.create_task(self.lanes.run_batched("p1", "chat", flush, 2)),
+            asyncio.create_task(self.lanes.run_batched("p1", "chat", flush, 3)),
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["blocker", [1], "plain", [2, 3]])
+
+    async def test_lanes_of_different_projects_run_in_parallel(self):
+        running = []
+        peak = []
+
+        def work():
+            running.append(1)
+            peak.append(len(running))
+            time.sleep(0.1)
+            running.pop()
+
+        await asyncio.gather(*(self.lanes.run(f"p{i}", "tasks", work) for i in range(3)))
+        self.assertEqual(max(peak), 3)
+
+        peak.clear()
+        await asyncio.gather(*(self.lanes.run("p1", "tasks", work) for _ in range(3)))
+        self.assertEqual(max(peak), 1)
+
+    async def test_errors_reach_every_caller_in_the_batch(self):
+        def fail(items):
+            raise ValueError("disk full")
+
+        results = await asyncio.gather(
+            self.lanes.run_batched("p1", "chat", fail, 1),
+            self.lanes.run_batched("p1", "chat", fail, 2),
+            return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(await self.lanes.run("p1", "chat", lambda: "still running"), "still running")
+
+    async def test_stuck_mutation_times_out_without_blocking_the_lane(self):
+        import services.write_lanes as write_lanes_module
+
+        lanes = write_lanes_module.WriteLanes(timeout=0.2)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        flushes = []
+
+        stuck = asyncio.create_task(lanes.run("p1", "tasks", release.wait, 30))
+        await asyncio.sleep(0.05)
+        later = [asyncio.create_task(lanes.run_batched("p1", "chat", flushes.append, i)) for i in range(3)]
+        failing = asyncio.create_task(lanes.run("p1", "memories", lambda: 1 / 0))
+        after_failure = asyncio.create_task(lanes.run("p1", "memories", lambda: "written"))
+
+        with self.assertRaises(TimeoutError):
+            await stuck
+        await asyncio.wait_for(asyncio.gather(*later), 5)
+        self.assertEqual(flushes, [[0, 1, 2]])
+        with self.assertRaises(ZeroDivisionError):
+            await failing
+        self.assertEqual(await after_failure, "written")
+        self.assertEqual(self.registry.counter_value("samurai_write_lane_timeouts_total", lane="p1", kind="tasks"), 1)
+        self.assertEqual(lanes.depth("p1"), 0)
+
+    async def test_concurrent_chat_turns_lose_no_messages(self):
+        from services.file_service import FileService
+        from models import ChatMessage, Project
+
+        temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        fs = FileService(data_dir=temp_dir, backup_dir=os.path.join(temp_dir, 'backups'))
+        fs.save_project(Project(id="p1", name="Shop", description="Store", tech_stack="FastAPI"))
+        session = fs.create_session("p1")
+
+        def turn(i):
+            message = ChatMessage(id=f"m{i}", project_id="p1", session_id=session.id,
+                                  message="q", response="a", embedding=[0.1])
+            return asyncio.gather(
+                self.lanes.run_batched("p1", "chat", lambda items: fs.save_chat_messages("p1", items), message),
+                self.lanes.run_batched("p1", "sessions",
+                                       lambda ids: fs.update_sessions_activity("p1", ids), session.id)
+            )
+
+        await asyncio.gather(*(turn(i) for i in range(40)))
+        self.assertEqual(len(fs.load_chat_messages_by_session("p1", session.id)), 40)
+        self.assertEqual(fs.get_project_stats("p1")["chat_messages"], 40)
+        self.assertLess(self.registry.counter_value("samurai_write_lane_flushes_total", kind="chat"), 40)
+        self.assertGreater(fs.get_session_by_id("p1", session.id).last_activity, session.last_activity)
+
+    async def test_task_service_and_tool_writes_use_the_lane(self):
+        from services.file_service import FileService
+        from services.task_service import TaskService
+        from services.agent_tools import AgentToolRegistry
+
+        temp_dir = tempfile.mkdtemp(prefix="samurai_agent_test_data_")
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        fs = FileService(data_dir=temp_dir, backup_dir=os.path.join(temp_dir, 'backups'))
+        task_service = TaskService(file_service=fs, analysis_agent=mock.Mock())
+        registry = AgentToolRegistry(file_service=fs, task_service=task_service)
+
+        task = await task_service.create_task("Checkout", "Stripe", "p1")
+        await asyncio.gather(
+            task_service.update_task("p1", task.id, {"title": "Checkout page"}),
+            task_service.update_task("p1", task.id, {"priority": "high"}),
+            registry.execute_tool("change_task_status", task_identifier=task.id,
+                                  new_status="in_progress", project_id="p1"),
+            registry.execute_tool("create_memory", title="Payments", content="Use Stripe", project_id="p1"),
+        )
+
+        stored = fs.get_task_by_id("p1", task.id)
+        self.assertEqual((stored.title, stored.priority, stored.status), ("Checkout page", "high", "in_progress"))
+        self.assertEqual(self.registry.counter_value("samurai_write_lane_ops_total", lane="p1", kind="tasks"), 4)
+        self.assertEqual(self.registry.counter_value("samurai_write_lane_ops_total", lane="p1", kind="memories"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()